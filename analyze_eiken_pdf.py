@@ -1,9 +1,59 @@
-import pdfplumber
+"""
+Eiken PDF analyzer.
+
+    python analyze_eiken_pdf.py booklet.pdf   # print the structure of one PDF
+    python analyze_eiken_pdf.py --store       # analysis store for eiken_past_papers/
+
+--store analyzes every past paper (listening scripts リスニング原稿 and
+secondary-exam samples) into page structure, sections (第N部 / Part N /
+【Questions】), question boundaries (No. N), speaker turns (★ / ☆ marks,
+labelled from the script's legend) and per-section statistics, and
+publishes the result for the Worker:
+
+    data/pdf_analysis/papers/<paper_id>.json  one analysis document per paper
+    data/pdf_analysis/manifest.json           analyzer version, source sha256, counts
+    data/pdf_analysis/pdf_analysis.sql        full reload of the 0031 eiken_pdf_* tables
+    data/pdf_analysis/pdf_analysis.ndjson     the same reload as a JSON batch payload
+    data/pdf_analysis/kv_bulk.json            wrangler kv bulk put payload
+
+A paper is re-analyzed only when its PDF or ANALYZER_VERSION changed.
+"""
+
+import argparse
+import hashlib
 import json
+import re
 import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+from batch_payloads import BatchPayloadWriter
+from eiken_corpus import BASE_DIR, PAST_PAPERS_DIR, find_past_papers, tokenize
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+# 解析ロジックを変えたら上げる（キャッシュ・KV キーが切り替わる）
+ANALYZER_VERSION = 1
+STORE_DIR = BASE_DIR / "data" / "pdf_analysis"
+KV_PREFIX = f"pdf_analysis:v{ANALYZER_VERSION}"
+UPSERT_BATCH_SIZE = 100
+
+# フッター（検定名・ページ番号・著作権表示）
+_FOOTER_RE = re.compile(r"検定一次試験|公益財団法人|無断転載|^©")
+_SECTION_RE = re.compile(r"(?:では、|続いて、)第\s*([0-9０-９])\s*部|directions for Part (\d)|【Questions】")
+_LEGEND_RE = re.compile(r"([★☆]+)=([^\s）)]+)")
+_QUESTION_RE = re.compile(r"^([★☆]*)No\.\s*(\d+)(?:\s+(.*))?$")
+_INLINE_QUESTION_RE = re.compile(r"Question No\.\s*(\d+)")
+_TOPIC_RE = re.compile(r"^(\d+)\.\s+(.*)$")
+_PASSAGE_RE = re.compile(r"^([★☆]*)\(([A-Z])\)\s*(.*)$")
+_TURN_RE = re.compile(r"^([★☆]+)\s*(.*)$")
+_ANSWER_RE = re.compile(r"^―+\s*(.*)$")
+_CHOICE_RE = re.compile(r"^[1-4]\s")
 
 def analyze_pdf(pdf_path):
     """Analyze Eiken test booklet PDF structure"""
+    import pdfplumber
     
     result = {
         "file": pdf_path,
@@ -60,12 +110,406 @@ def analyze_pdf(pdf_path):
     
     return result
 
-if __name__ == "__main__":
-    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "test.pdf"
-    result = analyze_pdf(pdf_path)
+def extract_pages(pdf_path: Path) -> List[str]:
+    """Text of every page (pdfplumber)."""
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _is_english(line: str) -> bool:
+    return sum(ch.isascii() for ch in line) >= 0.8 * len(line)
+
+
+def _section_label(number: int, kind: str) -> str:
+    if number == 0:
+        return "intro"
+    return "questions" if kind == "secondary_sample" else f"part{number}"
+
+
+def _turn_kind(speaker: Optional[str], text: str) -> str:
+    if speaker is None:
+        return "answer"
+    if text.startswith("Question:"):
+        return "question"
+    if text in ("Questions", "Question"):
+        return "cue"
+    if _CHOICE_RE.match(text):
+        return "choice"
+    return "speech"
+
+
+def analyze_pages(pages: List[str], kind: str = "listening_script") -> dict:
+    """
+    Structure of one past paper from its page texts.
+
+    Lines are read in order: section markers switch the section, "No. N"
+    opens question N, "(A)" opens a shared passage, a line starting with
+    speaker marks opens a turn and unmarked English lines continue the
+    open turn. Unmarked Japanese lines are instructions and close it.
+    """
+    speakers: Dict[str, str] = {}
+    questions: Dict[int, dict] = {}
+    page_rows, turns = [], []
+    section, passage, question, turn = 0, None, None, None
+    sections = {0: {'page_start': 1}}
+
+    for page_number, text in enumerate(pages, start=1):
+        lines = [l.strip() for l in text.splitlines()]
+        lines = [l for l in lines if l and not _FOOTER_RE.search(l)]
+        page_questions = []
+        for line in lines:
+            for mark, label in _LEGEND_RE.findall(line):
+                speakers.setdefault(mark, label)
+
+            marker = _SECTION_RE.search(line)
+            if marker:
+                number = marker.group(1) or marker.group(2)
+                section = int(number) if number else section + 1
+                sections.setdefault(section, {'page_start': page_number})
+                passage, question, turn = None, None, None
+                continue
+
+            match = _QUESTION_RE.match(line)
+            if kind == "secondary_sample" and not match:
+                topic = _TOPIC_RE.match(line)
+                match = topic and (topic, None, topic.group(1), topic.group(2))
+            elif match and (match.group(1) or kind == "secondary_sample"):
+                # リスニング原稿の問題番号には必ず話者記号が付く（"Bus No. 42 or\nNo. 43" の折り返しを除外）
+                match = (match, *match.groups())
+            else:
+                match = None
+            if match and (not match[3] or _is_english(match[3])):
+                _, mark, number, rest = match
+                question = _open_question(questions, int(number), section, passage, page_number)
+                page_questions.append(question['question_number'])
+                turn = None
+                if rest:
+                    turn = _open_turn(turns, mark or None, speakers, rest, section, question, passage, page_number)
+                    turn['kind'] = 'question'
+                continue
+
+            match = _PASSAGE_RE.match(line)
+            if match:
+                mark, letter, title = match.groups()
+                passage, question = f"({letter})", None
+                # Part 3 (準1級・1級): "(G) You have 10 seconds to read ... Question No. 25."
+                inline = _INLINE_QUESTION_RE.search(title)
+                if inline:
+                    question = _open_question(questions, int(inline.group(1)), section, passage, page_number)
+                    page_questions.append(question['question_number'])
+                turn = _open_turn(turns, mark or None, speakers, title, section, question, passage, page_number)
+                turn['kind'] = 'cue'
+                continue
+
+            match = _TURN_RE.match(line) or _ANSWER_RE.match(line)
+            if match:
+                mark, rest = (match.group(1), match.group(2)) if match.re is _TURN_RE else (None, match.group(1))
+                if not rest and mark:
+                    continue
+                turn = _open_turn(turns, mark, speakers, rest, section, question, passage, page_number)
+                continue
+
+            if turn is not None and _is_english(line):
+                turn['text'] = f"{turn['text']} {line}"
+                if question is not None:
+                    question['page_end'] = page_number
+            else:
+                turn = None
+
+        page_rows.append({
+            'page_number': page_number,
+            'line_count': len(lines),
+            'char_count': sum(len(l) for l in lines),
+            'english_words': len(tokenize("\n".join(l for l in lines if _is_english(l)))),
+            'first_question': page_questions[0] if page_questions else None,
+            'last_question': page_questions[-1] if page_questions else None,
+        })
+        for number, info in sections.items():
+            if number <= section:
+                info.setdefault('page_end', page_number)
+        sections[section]['page_end'] = page_number
+
+    for i, t in enumerate(turns):
+        t['turn_index'] = i
+        t['english_words'] = len(tokenize(t['text']))
+    for q in questions.values():
+        q_turns = [t for t in turns if t['question_number'] == q['question_number']]
+        q['turn_count'] = len(q_turns)
+        q['english_words'] = sum(t['english_words'] for t in q_turns)
+        asked = next((t['text'] for t in q_turns if t['kind'] == 'question'), None)
+        q['question_text'] = asked[len("Question:"):].strip() if asked and asked.startswith("Question:") else asked
+
+    return {
+        'total_pages': len(pages),
+        'speakers': speakers,
+        'pages': page_rows,
+        'sections': section_stats(sections, list(questions.values()), turns, kind),
+        'questions': list(questions.values()),
+        'turns': turns,
+    }
+
+
+def _open_question(questions: Dict[int, dict], number: int, section: int, passage: Optional[str],
+                   page_number: int) -> dict:
+    """Question number's record; a number already seen keeps its first boundary."""
+    if number not in questions:
+        questions[number] = {'question_number': number, 'section_number': section, 'passage': passage,
+                             'page_start': page_number, 'page_end': page_number, 'question_text': None}
+    return questions[number]
+
+
+def _open_turn(turns: List[dict], mark: Optional[str], speakers: Dict[str, str], text: str, section: int,
+               question: Optional[dict], passage: Optional[str], page_number: int) -> dict:
+    turn = {
+        'section_number': section,
+        'question_number': question['question_number'] if question else None,
+        'passage': passage,
+        'page_number': page_number,
+        'speaker': mark,
+        'speaker_label': speakers.get(mark) if mark else None,
+        'kind': _turn_kind(mark, text),
+        'text': text,
+    }
+    turns.append(turn)
+    if question is not None:
+        question['page_end'] = page_number
+    return turn
+
+
+def section_stats(sections: Dict[int, dict], questions: List[dict], turns: List[dict], kind: str) -> List[dict]:
+    """Per-section question / turn / word counts."""
+    rows = []
+    for number in sorted(sections):
+        s_questions = [q['question_number'] for q in questions if q['section_number'] == number]
+        s_turns = [t for t in turns if t['section_number'] == number]
+        words = sum(t['english_words'] for t in s_turns)
+        rows.append({
+            'section_number': number,
+            'label': _section_label(number, kind),
+            'page_start': sections[number]['page_start'],
+            'page_end': sections[number].get('page_end', sections[number]['page_start']),
+            'question_count': len(s_questions),
+            'first_question': min(s_questions) if s_questions else None,
+            'last_question': max(s_questions) if s_questions else None,
+            'turn_count': len(s_turns),
+            'english_words': words,
+            'avg_words_per_question': round(words / len(s_questions), 1) if s_questions else None,
+            'speakers': dict(Counter(t['speaker'] for t in s_turns if t['speaker']).most_common()),
+        })
+    return rows
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def analyze_paper(paper: dict, sha256: str) -> dict:
+    """Analysis document of one find_past_papers() entry."""
+    analysis = analyze_pages(extract_pages(paper['path']), paper['kind'])
+    return {
+        'paper_id': paper['paper_id'],
+        'grade': paper['grade'],
+        'session': paper['session'] or None,
+        'kind': paper['kind'],
+        'source_file': str(paper['path'].relative_to(PAST_PAPERS_DIR)),
+        'source_sha256': sha256,
+        'analyzer_version': ANALYZER_VERSION,
+        **analysis,
+    }
+
+
+def build_store(papers: List[dict], store_dir: Path = STORE_DIR, force: bool = False):
+    """
+    Analyze papers into store_dir, reusing documents whose source sha256 and
+    analyzer version are unchanged.
+
+    Returns:
+        (documents, analyzed_count)
+    """
+    papers_dir = store_dir / "papers"
+    papers_dir.mkdir(parents=True, exist_ok=True)
+    documents, analyzed = [], 0
+    for paper in papers:
+        sha256 = file_sha256(paper['path'])
+        cached = papers_dir / f"{paper['paper_id']}.json"
+        document = None
+        if cached.exists() and not force:
+            with open(cached, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            if document.get('source_sha256') != sha256 or document.get('analyzer_version') != ANALYZER_VERSION:
+                document = None
+        if document is None:
+            document = analyze_paper(paper, sha256)
+            analyzed += 1
+            with open(cached, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False, indent=2)
+        documents.append(document)
+
+    manifest = {
+        'analyzer_version': ANALYZER_VERSION,
+        'papers': {d['paper_id']: {
+            'source_file': d['source_file'],
+            'source_sha256': d['source_sha256'],
+            'total_pages': d['total_pages'],
+            'sections': len(d['sections']),
+            'questions': len(d['questions']),
+            'turns': len(d['turns']),
+        } for d in documents},
+    }
+    with open(store_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return documents, analyzed
+
+
+def _sql_value(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _insert_batches(lines: List[str], table: str, columns: List[str], rows: List[tuple],
+                    batch_size: int = UPSERT_BATCH_SIZE):
+    for i in range(0, len(rows), batch_size):
+        lines.append(f"INSERT INTO {table} ({', '.join(columns)}) VALUES")
+        lines.append(",\n".join("  (" + ", ".join(_sql_value(v) for v in row) + ")"
+                                 for row in rows[i:i + batch_size]) + ";")
+        lines.append("")
+
+
+STORE_TABLES = ('eiken_pdf_papers', 'eiken_pdf_pages', 'eiken_pdf_sections', 'eiken_pdf_questions',
+                'eiken_pdf_speaker_turns')
+
+
+def store_rows(documents: List[dict]) -> List[Tuple[str, List[str], List[tuple]]]:
+    """(table, columns, rows) for every eiken_pdf_* table, parents first."""
+    return [
+        ("eiken_pdf_papers",
+         ['paper_id', 'grade', 'session', 'kind', 'source_file', 'source_sha256', 'analyzer_version',
+          'total_pages', 'section_count', 'question_count', 'turn_count', 'speakers_json'],
+         [(d['paper_id'], d['grade'], d['session'], d['kind'], d['source_file'], d['source_sha256'],
+           d['analyzer_version'], d['total_pages'], len(d['sections']), len(d['questions']),
+           len(d['turns']), json.dumps(d['speakers'], ensure_ascii=False)) for d in documents]),
+        ("eiken_pdf_pages",
+         ['paper_id', 'page_number', 'line_count', 'char_count', 'english_words',
+          'first_question', 'last_question'],
+         [(d['paper_id'], p['page_number'], p['line_count'], p['char_count'], p['english_words'],
+           p['first_question'], p['last_question']) for d in documents for p in d['pages']]),
+        ("eiken_pdf_sections",
+         ['paper_id', 'section_number', 'label', 'page_start', 'page_end', 'question_count',
+          'first_question', 'last_question', 'turn_count', 'english_words', 'avg_words_per_question',
+          'speakers_json'],
+         [(d['paper_id'], s['section_number'], s['label'], s['page_start'], s['page_end'],
+           s['question_count'], s['first_question'], s['last_question'], s['turn_count'],
+           s['english_words'], s['avg_words_per_question'], json.dumps(s['speakers'], ensure_ascii=False))
+          for d in documents for s in d['sections']]),
+        ("eiken_pdf_questions",
+         ['paper_id', 'question_number', 'section_number', 'passage', 'page_start', 'page_end',
+          'turn_count', 'english_words', 'question_text'],
+         [(d['paper_id'], q['question_number'], q['section_number'], q['passage'], q['page_start'],
+           q['page_end'], q['turn_count'], q['english_words'], q['question_text'])
+          for d in documents for q in d['questions']]),
+        ("eiken_pdf_speaker_turns",
+         ['paper_id', 'turn_index', 'section_number', 'question_number', 'passage', 'page_number',
+          'speaker', 'speaker_label', 'kind', 'text'],
+         [(d['paper_id'], t['turn_index'], t['section_number'], t['question_number'], t['passage'],
+           t['page_number'], t['speaker'], t['speaker_label'], t['kind'], t['text'])
+          for d in documents for t in d['turns']]),
+    ]
+
+
+def generate_store_sql(documents: List[dict]) -> str:
+    """Full reload of the eiken_pdf_* tables."""
+    lines = [
+        "-- Past-paper PDF analysis built by analyze_eiken_pdf.py --store",
+        f"-- Analyzer version: {ANALYZER_VERSION}, papers: {len(documents)}",
+        "",
+    ]
+    lines += [f"DELETE FROM {table};" for table in reversed(STORE_TABLES)]
+    lines.append("")
+    for table, columns, rows in store_rows(documents):
+        _insert_batches(lines, table, columns, rows)
+    return "\n".join(lines)
+
+
+def write_store_payload(documents: List[dict], path: Path):
+    """The same full reload as a JSON batch payload (batch_payloads.py)."""
+    with BatchPayloadWriter(path, source="analyze_eiken_pdf.py --store") as payload:
+        for table in reversed(STORE_TABLES):
+            payload.execute(f"DELETE FROM {table}")
+        for table, columns, rows in store_rows(documents):
+            payload.insert(table, columns, rows)
+
+
+def generate_kv_bulk(documents: List[dict]) -> List[dict]:
+    """wrangler kv bulk put entries: one document per paper plus an index of all papers."""
+    index = [{key: d[key] for key in ('paper_id', 'grade', 'session', 'kind', 'total_pages')}
+             | {'questions': len(d['questions']), 'sections': [s['label'] for s in d['sections']]}
+             for d in documents]
+    entries = [{'key': f"{KV_PREFIX}:index", 'value': json.dumps(index, ensure_ascii=False)}]
+    entries += [{'key': f"{KV_PREFIX}:{d['paper_id']}", 'value': json.dumps(d, ensure_ascii=False)}
+                for d in documents]
+    return entries
+
+
+def store_main(args) -> int:
+    print("=" * 70)
+    print("Past-Paper PDF Analysis Store")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("analyze_eiken_pdf_store", args.profile, args.report_dir) as run:
+        with run.stage("find_papers") as stage:
+            papers = find_past_papers()
+            stage.rows = len(papers)
+
+        with run.stage("analyze_papers", rows=len(papers)):
+            documents, analyzed = build_store(papers, args.output_dir, args.force)
+
+        with run.stage("publish") as stage:
+            with open(args.output_dir / "pdf_analysis.sql", 'w', encoding='utf-8') as f:
+                f.write(generate_store_sql(documents))
+            write_store_payload(documents, args.output_dir / "pdf_analysis.ndjson")
+            kv_entries = generate_kv_bulk(documents)
+            with open(args.output_dir / "kv_bulk.json", 'w', encoding='utf-8') as f:
+                json.dump(kv_entries, f, ensure_ascii=False)
+            stage.rows = sum(len(d['turns']) for d in documents)
+
+    print(f"📄 {len(documents)} papers ({analyzed} analyzed, {len(documents) - analyzed} unchanged)")
+    for d in documents:
+        parts = ", ".join(f"{s['label']} {s['question_count']}q" for s in d['sections'] if s['section_number'])
+        print(f"   {d['paper_id']:<32} {d['total_pages']:>2}p  {len(d['questions']):>2} questions  "
+              f"{len(d['turns']):>3} turns  {parts}")
+    print(f"\n💾 Store: {args.output_dir} (analyzer v{ANALYZER_VERSION})")
+    print(f"🚀 KV: npx wrangler kv bulk put --binding=KV {args.output_dir / 'kv_bulk.json'}")
+    print()
+    return 0
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Analyze Eiken test booklet PDF structure"))
+    parser.add_argument('pdf_path', nargs='?', default="test.pdf")
+    parser.add_argument('--store', action='store_true', help="build the analysis store for eiken_past_papers/")
+    parser.add_argument('--output-dir', type=Path, default=STORE_DIR)
+    parser.add_argument('--force', action='store_true', help="re-analyze papers even if unchanged")
+    args = parser.parse_args()
+    
+    if args.store:
+        return store_main(args)
+    
+    with PipelineRun("analyze_eiken_pdf", args.profile, args.report_dir) as run:
+        with run.stage("analyze_pdf") as stage:
+            result = analyze_pdf(args.pdf_path)
+            stage.rows = result["total_pages"]
     
     print("\n" + "="*80)
     print("SUMMARY")
     print("="*80)
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
+if __name__ == "__main__":
+    sys.exit(main())
+
@@ -1,49 +1,41 @@
--- Emergency topics for Grade 4 and Pre-2
--- Generated to reach minimum 10 topics per grade
--- Total: 10 new topics (5 per grade)
+-- Topic catalog built from eiken_questions.json and past-paper text
+-- Total rows: 7 (0 corpus, 7 fill)
 
+-- Batch 1: rows 1 to 7
 INSERT INTO eiken_topic_areas
   (grade, topic_code, topic_label_ja, topic_label_en, abstractness_level,
    context_type, scenario_description, sub_topics, argument_axes,
    weight, official_frequency, is_active)
 VALUES
-  ('4', 'pets', 'ペット', 'Pets',
-   2, 'personal', 'Topics about pets, animals at home, taking care of pets, favorite animals, visits to pet shops or zoos',
-   '["my_pet", "cat", "dog", "animal_care", "zoo_visit"]', '["like_dislike", "favorite", "description"]',
-   1.1, 1.3, 1),
-  ('4', 'weather', '天気', 'Weather',
-   1, 'daily', 'Weather descriptions, seasons, favorite weather, activities in different weather conditions',
-   '["sunny", "rainy", "seasons", "weather_activities"]', '["description", "preference", "activities"]',
+  ('5', 'festivals', 'お祭り・イベント', 'Festivals and Events',
+   1, 'daily', 'School festivals, local festivals, events, celebrations, special occasions',
+   '["school_festival", "summer_festival", "christmas", "new_year", "birthday"]', '["experience", "enjoyment", "activities"]',
    1.0, 1.2, 1),
-  ('4', 'sports', 'スポーツ', 'Sports',
-   2, 'personal', 'Sports activities, favorite sports, playing sports, watching sports, sports at school',
-   '["soccer", "baseball", "swimming", "sports_day", "team_sports"]', '["like_dislike", "participation", "watching"]',
-   1.2, 1.4, 1),
-  ('4', 'shopping', '買い物', 'Shopping',
-   2, 'daily', 'Shopping experiences, going to stores, buying things, what to buy, shopping with family',
-   '["supermarket", "shopping_mall", "buying_clothes", "pocket_money"]', '["experience", "preferences", "routines"]',
+  ('5', 'pets', 'ペット', 'Pets',
+   1, 'personal', 'Topics about pets, animals at home, taking care of pets, favorite animals, visits to pet shops or zoos',
+   '["my_pet", "cat", "dog", "animal_care", "zoo_visit"]', '["like_dislike", "favorite", "description"]',
    1.0, 1.1, 1),
-  ('4', 'festivals', 'お祭り・イベント', 'Festivals and Events',
+  ('5', 'sports', 'スポーツ', 'Sports',
+   1, 'personal', 'Sports activities, favorite sports, playing sports, watching sports, sports at school',
+   '["soccer", "baseball", "swimming", "sports_day", "team_sports"]', '["like_dislike", "participation", "watching"]',
+   1.0, 1.2, 1),
+  ('3', 'festivals', 'お祭り・イベント', 'Festivals and Events',
    2, 'daily', 'School festivals, local festivals, events, celebrations, special occasions',
    '["school_festival", "summer_festival", "christmas", "new_year", "birthday"]', '["experience", "enjoyment", "activities"]',
-   1.1, 1.2, 1),
-  ('pre2', 'hobbies', '趣味', 'Hobbies',
-   3, 'personal', 'Personal hobbies, interests, leisure activities, developing skills, hobby benefits',
-   '["reading", "music", "sports", "collecting", "creative_activities"]', '["benefits", "time_management", "skill_development"]',
-   1.2, 1.4, 1),
-  ('pre2', 'part_time_jobs', 'アルバイト', 'Part-time Jobs',
-   4, 'general', 'Student part-time work, job experiences, balancing work and study, earning money',
-   '["work_experience", "responsibility", "time_balance", "earning_money"]', '["pros_cons", "learning", "responsibility"]',
-   1.1, 1.3, 1),
-  ('pre2', 'technology', 'テクノロジー', 'Technology',
-   4, 'general', 'Technology in daily life, smartphones, computers, internet, social media basics',
-   '["smartphones", "internet", "social_media", "online_learning", "apps"]', '["benefits_problems", "usage", "impact"]',
-   1.3, 1.5, 1),
-  ('pre2', 'food', '食生活', 'Food and Diet',
-   3, 'daily', 'Food preferences, healthy eating, cooking, restaurants, food culture',
-   '["healthy_eating", "cooking", "restaurants", "food_culture", "diet"]', '["health", "preferences", "culture"]',
    1.0, 1.2, 1),
-  ('pre2', 'transportation', '交通', 'Transportation',
-   3, 'daily', 'Transportation methods, commuting, public transportation, travel, traffic',
-   '["trains", "buses", "bicycles", "commuting", "traffic_issues"]', '["convenience", "environment", "safety"]',
-   1.0, 1.1, 1);
\ No newline at end of file
+  ('2', 'ai_science', 'AI・科学', 'AI and Science',
+   5, 'social', 'AI and Science topics as tested in real exam questions (grammar_fill, opinion_essay, opinion_speech, summary)',
+   '["worry", "accurately", "job", "data", "industry", "replace"]', '["causes_effects", "opinion", "description"]',
+   1.0, 1.1, 1),
+  ('2', 'festivals', 'お祭り・イベント', 'Festivals and Events',
+   5, 'daily', 'School festivals, local festivals, events, celebrations, special occasions',
+   '["school_festival", "summer_festival", "christmas", "new_year", "birthday"]', '["experience", "enjoyment", "activities"]',
+   1.0, 1.0, 1),
+  ('2', 'part_time_jobs', 'アルバイト', 'Part-time Jobs',
+   5, 'general', 'Student part-time work, job experiences, balancing work and study, earning money',
+   '["work_experience", "responsibility", "time_balance", "earning_money"]', '["pros_cons", "learning", "responsibility"]',
+   1.0, 1.2, 1)
+ON CONFLICT(grade, topic_code) DO UPDATE SET
+  sub_topics = excluded.sub_topics,
+  official_frequency = excluded.official_frequency,
+  updated_at = CURRENT_TIMESTAMP;
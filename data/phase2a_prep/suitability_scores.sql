@@ -13,7 +13,7 @@ VALUES
   ('greeting', '5', 'conversation', 1.0, 'Based on 2 actual exam question(s) in grade 5'),
   ('hobbies', '5', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade 5'),
   ('school', '5', 'grammar_fill', 1.0, 'Based on 2 actual exam question(s) in grade 5'),
-  ('self-introduction', '5', 'conversation', 0.9, 'Based on 1 actual exam question(s) in grade 5'),
+  ('self_introduction', '5', 'conversation', 0.9, 'Based on 1 actual exam question(s) in grade 5'),
   ('daily_life', '4', 'conversation', 1.2, 'Based on 3 actual exam question(s) in grade 4'),
   ('daily_life', '4', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade 4'),
   ('family', '4', 'conversation', 0.9, 'Based on 1 actual exam question(s) in grade 4'),
@@ -113,10 +113,10 @@ VALUES
   ('technology', '2', 'picture_description', 1.0, 'Based on 2 actual exam question(s) in grade 2'),
   ('technology', '2', 'q_and_a', 1.0, 'Based on 2 actual exam question(s) in grade 2'),
   ('technology', '2', 'reading_aloud', 0.9, 'Based on 1 actual exam question(s) in grade 2'),
-  ('ai_/_science', 'pre1', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
-  ('ai_/_science', 'pre1', 'opinion_essay', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
-  ('ai_/_science', 'pre1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
-  ('ai_/_science', 'pre1', 'summary', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
+  ('ai_science', 'pre1', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
+  ('ai_science', 'pre1', 'opinion_essay', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
+  ('ai_science', 'pre1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
+  ('ai_science', 'pre1', 'summary', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
   ('climate_change', 'pre1', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
   ('climate_change', 'pre1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
   ('climate_change', 'pre1', 'q_and_a', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
@@ -144,10 +144,10 @@ VALUES
   ('technology', 'pre1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
   ('technology', 'pre1', 'q_and_a', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
   ('technology', 'pre1', 'summary', 0.9, 'Based on 1 actual exam question(s) in grade pre1'),
-  ('ai_/_science', '1', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
-  ('ai_/_science', '1', 'long_reading', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
-  ('ai_/_science', '1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
-  ('ai_/_science', '1', 'writing_essay', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
+  ('ai_science', '1', 'grammar_fill', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
+  ('ai_science', '1', 'long_reading', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
+  ('ai_science', '1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
+  ('ai_science', '1', 'writing_essay', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
   ('climate_change', '1', 'opinion_speech', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
   ('climate_change', '1', 'q_and_a', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
   ('economics', '1', 'long_reading', 0.9, 'Based on 1 actual exam question(s) in grade 1'),
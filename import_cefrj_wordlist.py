@@ -3,11 +3,18 @@
 CEFR-J Wordlist Ver1.6.xlsx を解析して vocabulary_master テーブル用のSQL INSERT文を生成
 """
 
-import pandas as pd
+import argparse
 import json
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+from corpus_frequencies import FREQUENCIES_CSV, load_frequencies, lookup_frequency
+from lexicon_records import (LexiconTable, dedupe, expand_variants, is_missing, normalize_cefr_level, normalize_pos,
+                             normalize_word, write_conflict_report)
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
 # CEFR レベルを数値スコアに変換
 CEFR_SCORES = {
     'A1': 1,
@@ -38,25 +45,18 @@ CEFR_TO_EIKEN = {
     6: 'grade_1',      # C2 → 英検1級
 }
 
-def normalize_cefr_level(level_str):
-    """CEFR レベル文字列を正規化"""
-    if not level_str or pd.isna(level_str):
-        return None
-    
-    level_str = str(level_str).strip().upper()
-    
-    # Pre-A1, A1.1 などを A1 に正規化
-    if level_str.startswith('PRE-'):
-        return 'A1'
-    if '.' in level_str:
-        return level_str.split('.')[0]
-    
-    return level_str if level_str in ['A1', 'A2', 'B1', 'B2', 'C1', 'C2'] else None
+# Zipf スコアの閾値（corpus_frequencies.py の lemma_frequencies.csv）
+ZIPF_COMMON = 5.0
+ZIPF_RARE = 3.0
+
+BASE_DIR = Path(__file__).parent
+# 重複解消の結果（生成物なので run_reports に置く）
+CONFLICT_REPORT = BASE_DIR / "data" / "run_reports" / "cefrj_import_conflicts.json"
 
-def calculate_difficulty_score(cefr_level, frequency=None):
+def calculate_difficulty_score(cefr_level, zipf_score=None):
     """
     難易度スコアを計算 (0-100)
-    CEFR レベルと頻度に基づく
+    CEFR レベルと頻度（Zipf スコア）に基づく
     """
     if not cefr_level:
         return 50  # デフォルト
@@ -68,21 +68,19 @@ def calculate_difficulty_score(cefr_level, frequency=None):
     base_score = 15 + (cefr_score * 15)
     
     # 頻度で微調整（もし利用可能なら）
-    if frequency and not pd.isna(frequency):
-        try:
-            freq_value = float(frequency)
-            # 高頻度 = 低難易度
-            if freq_value > 1000:
-                base_score -= 5
-            elif freq_value < 100:
-                base_score += 5
-        except:
-            pass
+    if zipf_score is not None and not is_missing(zipf_score):
+        # 高頻度 = 低難易度
+        if zipf_score >= ZIPF_COMMON:
+            base_score -= 5
+        elif zipf_score < ZIPF_RARE:
+            base_score += 5
     
     return min(100, max(0, base_score))
 
 def parse_wordlist(excel_path):
     """Excel ファイルを解析して語彙データを抽出"""
+    import pandas as pd
+
     print(f"📖 Reading Excel file: {excel_path}")
     
     # Excelファイルを読み込み
@@ -98,9 +96,9 @@ def parse_wordlist(excel_path):
     print("\n📝 First 5 rows:")
     print(df.head())
     
-    vocabulary_data = []
+    vocabulary_data = LexiconTable()
     
-    for idx, row in df.iterrows():
+    for _, row in df.iterrows():
         # 単語とレベルの列を探す（列名は実際のファイルに合わせて調整）
         word = None
         cefr_level = None
@@ -116,45 +114,29 @@ def parse_wordlist(excel_path):
             elif 'pos' in col_lower or 'part' in col_lower:
                 pos = row[col]
         
-        if not word or pd.isna(word):
+        word = normalize_word(word)
+        if not word:
             continue
         
-        word = str(word).strip().lower()
-        
         # CEFR レベルを正規化
         normalized_cefr = normalize_cefr_level(cefr_level)
         if not normalized_cefr:
             continue
         
-        cefr_score = CEFR_SCORES.get(normalized_cefr, 3)
-        difficulty = calculate_difficulty_score(normalized_cefr)
-        eiken_grade = CEFR_TO_EIKEN.get(cefr_score, 'pre_2')
-        
-        # 品詞を正規化
-        if pos and not pd.isna(pos):
-            pos_str = str(pos).strip().lower()
-        else:
-            pos_str = 'unknown'
-        
-        vocab_entry = {
-            'word': word,
-            'part_of_speech': pos_str,
-            'cefr_level': normalized_cefr,
-            'cefr_score': cefr_score,
-            'difficulty_score': difficulty,
-            'eiken_grade': eiken_grade,
-            'frequency_rank': idx + 1,  # 行番号を頻度ランクとして使用
-        }
-        
-        vocabulary_data.append(vocab_entry)
+        # 'a.m./A.M./am/AM' のような表記ゆれは 1 表記 1 行に展開
+        for variant in expand_variants(word):
+            vocabulary_data.add(
+                variant,
+                pos=normalize_pos(pos),
+                cefr_level=normalized_cefr,
+                eiken_grade=CEFR_TO_EIKEN.get(CEFR_SCORES.get(normalized_cefr, 3), 'pre_2'),
+                sources=('CEFR-J',),
+            )
     
     print(f"\n✅ Parsed {len(vocabulary_data)} vocabulary entries")
     
     # レベル別の統計
-    level_counts = {}
-    for entry in vocabulary_data:
-        level = entry['cefr_level']
-        level_counts[level] = level_counts.get(level, 0) + 1
+    level_counts = vocabulary_data.level_counts()
     
     print("\n📊 Vocabulary distribution by CEFR level:")
     for level in sorted(level_counts.keys()):
@@ -162,8 +144,16 @@ def parse_wordlist(excel_path):
     
     return vocabulary_data
 
-def generate_sql_inserts(vocabulary_data, output_file):
-    """SQL INSERT 文を生成"""
+def generate_sql_inserts(vocabulary_data, output_file, frequencies=None):
+    """
+    SQL INSERT 文を生成（vocabulary_data は dedupe(by_pos=False) 済みで word が一意）
+
+    vocabulary_master.word は UNIQUE。0017 / 0018 のデモ行と重なる語は
+    INSERT OR IGNORE で既存の行を残す
+
+    frequencies: load_frequencies() の結果。frequency_rank と難易度の頻度補正に
+    使う（無い語は entry.rank、それも無ければ NULL）
+    """
     print(f"\n📝 Generating SQL INSERT statements...")
     
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -172,8 +162,9 @@ def generate_sql_inserts(vocabulary_data, output_file):
         
         # バッチ挿入（500単語ずつ）
         batch_size = 500
+        # 難易度は CEFR レベルと Zipf スコアだけで決まるので組ごとに 1 回計算
+        difficulty_cache = {}
         for i in range(0, len(vocabulary_data), batch_size):
-            batch = vocabulary_data[i:i+batch_size]
             
             f.write(f"-- Batch {i//batch_size + 1}: Words {i+1} to {min(i+batch_size, len(vocabulary_data))}\n")
             f.write("INSERT OR IGNORE INTO vocabulary_master (\n")
@@ -183,14 +174,18 @@ def generate_sql_inserts(vocabulary_data, output_file):
             f.write(") VALUES\n")
             
             values = []
-            for entry in batch:
-                word = entry['word'].replace("'", "''")
-                pos = entry['part_of_speech'].replace("'", "''")
-                cefr_level = entry['cefr_level']
-                cefr_score = entry['cefr_score']
-                freq_rank = entry['frequency_rank']
-                difficulty = entry['difficulty_score']
-                eiken_grade = entry['eiken_grade']
+            for entry in vocabulary_data.rows(i, i + batch_size):
+                word = entry.word.replace("'", "''")
+                pos = entry.pos.replace("'", "''")
+                cefr_level = entry.cefr_level
+                cefr_score = CEFR_SCORES.get(cefr_level, 3)
+                zipf_score, freq_rank = lookup_frequency(frequencies, entry.word)
+                if freq_rank is None:
+                    freq_rank = entry.rank or 'NULL'
+                difficulty = difficulty_cache.get((cefr_level, zipf_score))
+                if difficulty is None:
+                    difficulty = difficulty_cache[cefr_level, zipf_score] = calculate_difficulty_score(cefr_level, zipf_score)
+                eiken_grade = entry.eiken_grade
                 
                 # 難易度40以上はアノテーション対象
                 should_annotate = 1 if difficulty >= 40 else 0
@@ -209,22 +204,46 @@ def generate_sql_inserts(vocabulary_data, output_file):
     print(f"📊 Total INSERT statements: {len(vocabulary_data)} words")
 
 def main():
-    excel_file = Path("/home/user/webapp/CEFR-J_Wordlist_Ver1.6.xlsx")
-    output_file = Path("/home/user/webapp/migrations/0019_import_cefrj_wordlist.sql")
+    parser = add_profile_arguments(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument('--conflict-report', type=Path, default=CONFLICT_REPORT)
+    args = parser.parse_args()
+
+    excel_file = BASE_DIR / "CEFR-J_Wordlist_Ver1.6.xlsx"
+    output_file = BASE_DIR / "migrations" / "0019_import_cefrj_wordlist.sql"
+    conflict_report = args.conflict_report
     
     if not excel_file.exists():
         print(f"❌ Error: File not found: {excel_file}")
         return
     
-    # Excel ファイルを解析
-    vocabulary_data = parse_wordlist(excel_file)
-    
-    if not vocabulary_data:
-        print("❌ No vocabulary data extracted!")
-        return
-    
-    # SQL INSERT 文を生成
-    generate_sql_inserts(vocabulary_data, output_file)
+    with PipelineRun("import_cefrj_wordlist", args.profile, args.report_dir) as run:
+        # Excel ファイルを解析
+        with run.stage("parse_wordlist") as stage:
+            vocabulary_data = parse_wordlist(excel_file)
+            stage.rows = len(vocabulary_data)
+        
+        if not vocabulary_data:
+            print("❌ No vocabulary data extracted!")
+            return
+        
+        # vocabulary_master のキー (word) で重複をメモリ上で解消（最も低いレベルの行を採用）
+        with run.stage("dedupe", rows=len(vocabulary_data)):
+            parsed_rows = len(vocabulary_data)
+            vocabulary_data, conflicts = dedupe(vocabulary_data, by_pos=False)
+            write_conflict_report(conflicts, conflict_report, parsed_rows, len(vocabulary_data))
+        
+        level_conflicts = sum(1 for c in conflicts if c['kind'] == 'level')
+        print(f"\n🔀 Deduplicated {parsed_rows} → {len(vocabulary_data)} rows "
+              f"({level_conflicts} level conflicts, {len(conflicts) - level_conflicts} duplicates)")
+        print(f"📋 Conflict report: {conflict_report}")
+        
+        frequencies = load_frequencies()
+        if frequencies is None:
+            print(f"⚠️  {FREQUENCIES_CSV} not found; run scripts/corpus_frequencies.py for frequency ranks")
+        
+        # SQL INSERT 文を生成
+        with run.stage("generate_sql_inserts", rows=len(vocabulary_data)):
+            generate_sql_inserts(vocabulary_data, output_file, frequencies)
     
     print("\n🎉 Import script completed successfully!")
     print(f"📂 SQL file: {output_file}")
@@ -0,0 +1,40 @@
+-- Migration: 0029_create_eiken_text_profiles.sql
+-- Description: Offline CVLA text profiles for the question corpus and past papers
+-- Created: 2026-10-19
+--
+-- Purpose: Store AvrDiff / BperA / ARI profiles computed in batch by
+--          scripts/build_text_profiles.py so grade calibration can read them
+--          instead of calling the runtime text profiler per passage.
+
+CREATE TABLE IF NOT EXISTS eiken_text_profiles (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+  -- Source text
+  source_type TEXT NOT NULL CHECK(source_type IN ('question', 'past_paper')),
+  source_id TEXT NOT NULL,                -- e.g. "question/pre2/mixed/3" or "pre2_2024-3_listening_script"
+  field TEXT NOT NULL,                    -- passage, question_text_en, text
+  grade TEXT NOT NULL,
+  question_type TEXT,
+  topic TEXT,
+
+  -- Counts
+  word_count INTEGER NOT NULL,
+  unique_lemmas INTEGER NOT NULL,
+  known_lemmas INTEGER NOT NULL,          -- unique lemmas found in the lexicon
+
+  -- CVLA metrics (same definitions as src/eiken/services/text-profiler.ts)
+  avr_diff REAL NOT NULL,
+  b_per_a REAL NOT NULL,
+  ari REAL NOT NULL,
+  numeric_score REAL NOT NULL,
+  cefrj_level TEXT NOT NULL,
+  is_valid INTEGER NOT NULL DEFAULT 1,    -- 0 or 1: within 3 CEFR-J steps of the grade target
+
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+  UNIQUE(source_id, field)
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_profiles_grade ON eiken_text_profiles(grade, cefrj_level);
+CREATE INDEX IF NOT EXISTS idx_text_profiles_source ON eiken_text_profiles(source_type, grade);
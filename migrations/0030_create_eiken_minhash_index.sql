@@ -0,0 +1,35 @@
+-- Migration: 0030_create_eiken_minhash_index.sql
+-- Description: MinHash / LSH near-duplicate index for copyright checks
+-- Created: 2026-10-19
+--
+-- Purpose: Built offline by scripts/build_minhash_index.py. A generated
+--          question is hashed the same way at runtime; only documents that
+--          share an LSH band bucket with it need an n-gram comparison.
+
+-- ============================================================================
+-- 1. Indexed documents (questions and past-paper passage windows)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_minhash_documents (
+  doc_id INTEGER PRIMARY KEY,              -- dense id, also used in eiken_minhash_buckets
+  source_type TEXT NOT NULL CHECK(source_type IN ('question', 'past_paper')),
+  source_id TEXT NOT NULL UNIQUE,          -- "question/3/mixed/4" or "3_2025-1_listening_script#120"
+  grade TEXT NOT NULL,
+  word_count INTEGER NOT NULL,
+  shingle_count INTEGER NOT NULL,
+  signature BLOB NOT NULL,                 -- num_perm little-endian uint32 MinHash values
+  index_version TEXT NOT NULL,             -- "<num_perm>x<bands>b<shingle_size>w"
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_minhash_documents_grade ON eiken_minhash_documents(grade);
+
+-- ============================================================================
+-- 2. LSH band buckets
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_minhash_buckets (
+  band INTEGER NOT NULL,
+  bucket INTEGER NOT NULL,                 -- uint32 hash of the band's rows
+  doc_id INTEGER NOT NULL,
+  PRIMARY KEY (band, bucket, doc_id),
+  FOREIGN KEY (doc_id) REFERENCES eiken_minhash_documents(doc_id) ON DELETE CASCADE
+) WITHOUT ROWID;
@@ -0,0 +1,102 @@
+-- Migration: 0031_create_eiken_pdf_analysis.sql
+-- Description: Precomputed structure of the past-paper PDFs
+-- Created: 2026-10-19
+--
+-- Purpose: Built offline by analyze_eiken_pdf.py --store for every PDF in
+--          eiken_past_papers/ (listening scripts and secondary-exam samples):
+--          page structure, sections, question boundaries and speaker turns.
+--          The Worker reads these rows (or the same documents from KV)
+--          instead of analyzing PDF text on request.
+
+-- ============================================================================
+-- 1. Analyzed papers
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_pdf_papers (
+  paper_id TEXT PRIMARY KEY,               -- "3_2025-1_listening_script"
+  grade TEXT NOT NULL,
+  session TEXT,                            -- "2025-1" (NULL for samples)
+  kind TEXT NOT NULL,                      -- listening_script, secondary_sample, ...
+  source_file TEXT NOT NULL,               -- path under eiken_past_papers/
+  source_sha256 TEXT NOT NULL,
+  analyzer_version INTEGER NOT NULL,
+  total_pages INTEGER NOT NULL,
+  section_count INTEGER NOT NULL,
+  question_count INTEGER NOT NULL,
+  turn_count INTEGER NOT NULL,
+  speakers_json TEXT NOT NULL DEFAULT '{}', -- {"★": "男性A", "☆": "女性A", ...}
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_pdf_papers_grade ON eiken_pdf_papers(grade, kind);
+
+-- ============================================================================
+-- 2. Pages
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_pdf_pages (
+  paper_id TEXT NOT NULL,
+  page_number INTEGER NOT NULL,
+  line_count INTEGER NOT NULL,             -- without the copyright footer
+  char_count INTEGER NOT NULL,
+  english_words INTEGER NOT NULL,
+  first_question INTEGER,                  -- first / last question starting on the page
+  last_question INTEGER,
+  PRIMARY KEY (paper_id, page_number),
+  FOREIGN KEY (paper_id) REFERENCES eiken_pdf_papers(paper_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- ============================================================================
+-- 3. Sections (第N部 / Part N / 【Questions】) with statistics
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_pdf_sections (
+  paper_id TEXT NOT NULL,
+  section_number INTEGER NOT NULL,         -- 0 = instructions before the first section
+  label TEXT NOT NULL,                     -- intro, part1, part2, ..., questions
+  page_start INTEGER NOT NULL,
+  page_end INTEGER NOT NULL,
+  question_count INTEGER NOT NULL,
+  first_question INTEGER,
+  last_question INTEGER,
+  turn_count INTEGER NOT NULL,
+  english_words INTEGER NOT NULL,
+  avg_words_per_question REAL,
+  speakers_json TEXT NOT NULL DEFAULT '{}', -- turns per speaker mark
+  PRIMARY KEY (paper_id, section_number),
+  FOREIGN KEY (paper_id) REFERENCES eiken_pdf_papers(paper_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- ============================================================================
+-- 4. Question boundaries
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_pdf_questions (
+  paper_id TEXT NOT NULL,
+  question_number INTEGER NOT NULL,
+  section_number INTEGER NOT NULL,
+  passage TEXT,                            -- "(A)" label for multi-question passages
+  page_start INTEGER NOT NULL,
+  page_end INTEGER NOT NULL,
+  turn_count INTEGER NOT NULL,
+  english_words INTEGER NOT NULL,
+  question_text TEXT,                      -- "Question: ..." line or the stem after "No. N"
+  PRIMARY KEY (paper_id, question_number),
+  FOREIGN KEY (paper_id) REFERENCES eiken_pdf_papers(paper_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- ============================================================================
+-- 5. Speaker turns
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS eiken_pdf_speaker_turns (
+  paper_id TEXT NOT NULL,
+  turn_index INTEGER NOT NULL,
+  section_number INTEGER NOT NULL,
+  question_number INTEGER,                 -- NULL for examples and shared passages
+  passage TEXT,
+  page_number INTEGER NOT NULL,
+  speaker TEXT,                            -- mark as printed (★, ☆, ★★, ☆☆); NULL for answers
+  speaker_label TEXT,                      -- from the script legend, e.g. 男性A
+  kind TEXT NOT NULL CHECK(kind IN ('speech', 'choice', 'question', 'cue', 'answer')),
+  text TEXT NOT NULL,
+  PRIMARY KEY (paper_id, turn_index),
+  FOREIGN KEY (paper_id) REFERENCES eiken_pdf_papers(paper_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_pdf_turns_question ON eiken_pdf_speaker_turns(paper_id, question_number);
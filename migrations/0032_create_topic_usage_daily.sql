@@ -0,0 +1,29 @@
+-- Migration: 0032_create_topic_usage_daily.sql
+-- Description: Daily rollups of eiken_topic_usage_history
+-- Created: 2026-10-19
+--
+-- Purpose: scripts/compact_topic_history.py rolls usage rows older than the
+--          retention window into one row per student, grade, topic, question
+--          type and day, then deletes them from eiken_topic_usage_history.
+--          The most recent rows of every (student, grade, question_type) are
+--          kept so the selector's LRU window is unaffected.
+--          eiken_topic_statistics has no student or day columns and is
+--          already incremented on every selection, so it only gains rows for
+--          topics it has never seen (usage recorded by the question generator).
+
+CREATE TABLE IF NOT EXISTS eiken_topic_usage_daily (
+  student_id TEXT NOT NULL,
+  grade TEXT NOT NULL,
+  topic_code TEXT NOT NULL,
+  question_type TEXT NOT NULL,
+  usage_date TEXT NOT NULL,                -- YYYY-MM-DD of used_at
+  use_count INTEGER NOT NULL,
+  first_used_at TEXT NOT NULL,
+  last_used_at TEXT NOT NULL,
+  compacted_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (student_id, grade, topic_code, question_type, usage_date),
+  CHECK (use_count > 0)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_usage_daily_topic
+  ON eiken_topic_usage_daily(grade, topic_code, usage_date);
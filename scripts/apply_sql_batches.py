@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Resumable, concurrent runner for the split SQL import files.
+
+The vocabulary imports are shipped as numbered chunks
+(data/vocabulary/cefrj_part_NN.sql, data/vocab_final_batches/BATCH_N_OF_8.sql)
+that used to be applied one after another by import-to-remote-d1.sh, with
+a fixed sleep in between and no memory of what already went through.
+This runner:
+
+  - builds a chunk manifest (file, sha256, statement count, dependencies);
+    a chunk that contains DDL, DELETE/UPDATE or an overwriting insert
+    (REPLACE, INSERT OR REPLACE, ON CONFLICT ... DO UPDATE) is a barrier
+    that runs after every earlier chunk and before every later one, while
+    plain INSERT chunks between barriers are independent and run
+    concurrently (-j)
+  - retries transient failures (locked database, D1 rate limits, network
+    errors) with exponential backoff and jitter
+  - appends every outcome to a JSONL checkpoint journal, so a rerun skips
+    the chunks that were already applied with the same sha256
+
+The target is pluggable: a local SQLite file (offline runs and tests) or
+the wrangler CLI against D1 (--local / --remote):
+
+    python scripts/apply_sql_batches.py cefrj-parts --sqlite /tmp/lexicon.sqlite -j 4
+    python scripts/apply_sql_batches.py vocab-final --wrangler --remote -j 2
+    python scripts/apply_sql_batches.py cefrj-parts --sqlite /tmp/lexicon.sqlite --fail-first 1 --limit 5
+    python scripts/apply_sql_batches.py cefrj-parts --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from eiken_corpus import BASE_DIR
+from pipeline_metrics import PipelineRun, add_profile_arguments
+from schema_replay import is_transaction_control, split_statements
+
+JOURNAL_DIR = BASE_DIR / "data" / "apply_journal"
+
+CHUNK_SETS = {
+    'cefrj-parts': ["data/vocabulary/cefrj_part_*.sql"],
+    'vocab-final': ["data/vocab_final_batches/BATCH_*_OF_8.sql"],
+}
+
+D1_DATABASE = "kobeya-logs-db"
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+DEFAULT_JOBS = 4
+SQLITE_BUSY_TIMEOUT = 30.0
+
+# 先頭キーワードが INSERT 以外の文を含むチャンクは順序を固定する
+_INDEPENDENT_KEYWORDS = {'INSERT'}
+_FIRST_KEYWORD_RE = re.compile(r"\A\s*(?:WITH\b.*?\)\s*)?([A-Za-z]+)", re.DOTALL)
+# 既存の行を上書きする INSERT は後勝ちになるので、これも順序を固定する
+_OVERWRITE_RE = re.compile(r"\bINSERT\s+OR\s+REPLACE\b|\bON\s+CONFLICT\b[^;]*?\bDO\s+UPDATE\b",
+                           re.IGNORECASE | re.DOTALL)
+
+# wrangler / D1 の出力のうち再試行で直る可能性があるもの
+_TRANSIENT_RE = re.compile(r"timed? ?out|ECONNRESET|ETIMEDOUT|EAI_AGAIN|fetch failed|network|"
+                           r"\b429\b|\b50[234]\b|rate limit|too many requests|overloaded|"
+                           r"database is locked|SQLITE_BUSY", re.IGNORECASE)
+
+
+class ApplyError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _natural_key(path: Path):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path.name)]
+
+
+def chunk_files(chunk_set: str) -> List[Path]:
+    files = []
+    for pattern in CHUNK_SETS[chunk_set]:
+        files += sorted(BASE_DIR.glob(pattern), key=_natural_key)
+    return files
+
+
+def chunk_statements(path: Path) -> List[str]:
+    """Executable statements of a chunk (comments and BEGIN/COMMIT dropped)."""
+    return [stmt for _, stmt in split_statements(path.read_text(encoding='utf-8'))
+            if not is_transaction_control(stmt)]
+
+
+def _is_barrier(statements: List[str]) -> bool:
+    for stmt in statements:
+        match = _FIRST_KEYWORD_RE.match(stmt)
+        if not match or match.group(1).upper() not in _INDEPENDENT_KEYWORDS or _OVERWRITE_RE.search(stmt):
+            return True
+    return False
+
+
+def build_manifest(paths: List[Path]) -> dict:
+    """
+    Chunk manifest in application order.
+
+    Each chunk lists the ids it must wait for ('after'): a barrier waits
+    for every earlier chunk, any other chunk only for the last barrier
+    before it.
+    """
+    chunks = []
+    last_barrier: Optional[str] = None
+    since_barrier: List[str] = []
+    for path in paths:
+        data = path.read_bytes()
+        statements = chunk_statements(path)
+        barrier = _is_barrier(statements)
+        chunk_id = path.stem
+        if barrier:
+            after = ([last_barrier] if last_barrier else []) + since_barrier
+        else:
+            after = [last_barrier] if last_barrier else []
+        chunks.append({
+            'id': chunk_id,
+            'file': str(path.relative_to(BASE_DIR)) if path.is_relative_to(BASE_DIR) else str(path),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'bytes': len(data),
+            'statements': len(statements),
+            'barrier': barrier,
+            'after': after,
+        })
+        if barrier:
+            last_barrier, since_barrier = chunk_id, []
+        else:
+            since_barrier.append(chunk_id)
+    return {'version': 1, 'chunks': chunks}
+
+
+def load_manifest(path: Path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def chunk_path(chunk: dict) -> Path:
+    path = Path(chunk['file'])
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def waves(manifest: dict) -> List[List[str]]:
+    """Chunk ids grouped by dependency depth (what can run side by side)."""
+    depth: Dict[str, int] = {}
+    for chunk in manifest['chunks']:
+        depth[chunk['id']] = 1 + max((depth[d] for d in chunk['after']), default=-1)
+    grouped: Dict[int, List[str]] = {}
+    for chunk_id, d in depth.items():
+        grouped.setdefault(d, []).append(chunk_id)
+    return [grouped[d] for d in sorted(grouped)]
+
+
+class SQLiteTarget:
+    """Local SQLite database; each chunk is applied in one transaction."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.label = f"sqlite-{path.stem}"
+
+    def apply(self, chunk: dict):
+        statements = chunk_statements(chunk_path(chunk))
+        conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for stmt in statements:
+                conn.execute(stmt)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise ApplyError(str(e), retryable=bool(_TRANSIENT_RE.search(str(e))))
+        finally:
+            conn.close()
+
+
+class WranglerTarget:
+    """D1 through `npx wrangler d1 execute --file` (local or remote)."""
+
+    def __init__(self, database: str = D1_DATABASE, remote: bool = False, timeout: float = 300.0):
+        self.database = database
+        self.remote = remote
+        self.timeout = timeout
+        self.label = f"d1-{database}-{'remote' if remote else 'local'}"
+
+    def apply(self, chunk: dict):
+        command = ["npx", "wrangler", "d1", "execute", self.database,
+                   "--remote" if self.remote else "--local", f"--file={chunk_path(chunk)}", "--yes"]
+        try:
+            result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise ApplyError(f"wrangler timed out after {self.timeout:.0f}s")
+        except FileNotFoundError:
+            raise ApplyError("npx not found (install Node.js / wrangler)", retryable=False)
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).strip()
+            message = output.splitlines()[-1] if output else f"wrangler exited with {result.returncode}"
+            raise ApplyError(message, retryable=bool(_TRANSIENT_RE.search(output)))
+
+
+class FlakyTarget:
+    """Stand-in failures: the first fail_first attempts per chunk raise a retryable error."""
+
+    def __init__(self, target, fail_first: int):
+        self.target = target
+        self.fail_first = fail_first
+        self.label = target.label
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, chunk: dict):
+        with self._lock:
+            attempts = self._attempts.get(chunk['id'], 0)
+            self._attempts[chunk['id']] = attempts + 1
+        if attempts < self.fail_first:
+            raise ApplyError("injected failure: 503 service unavailable")
+        self.target.apply(chunk)
+
+
+class Journal:
+    """Append-only JSONL checkpoint log; one line per finished chunk attempt series."""
+
+    def __init__(self, path: Path, reset: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if reset and path.exists():
+            path.unlink()
+
+    def applied(self) -> Dict[str, str]:
+        """chunk id → sha256 of the last successful apply."""
+        done = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 書き込み途中で中断された最終行
+                if entry.get('status') == 'applied':
+                    done[entry['chunk']] = entry['sha256']
+        return done
+
+    def record(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def apply_chunk(target, chunk: dict, retries: int = MAX_RETRIES, backoff: float = BACKOFF_SECONDS) -> dict:
+    """Apply one chunk with retries; returns a journal entry."""
+    result = {'chunk': chunk['id'], 'sha256': chunk['sha256'], 'attempts': 0}
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        result['attempts'] = attempt + 1
+        try:
+            target.apply(chunk)
+            result.update(status='applied')
+            result.pop('error', None)
+            break
+        except ApplyError as e:
+            result.update(status='failed', error=str(e))
+            if not e.retryable or attempt == retries:
+                break
+            time.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    result['at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    return result
+
+
+def run_chunks(manifest: dict, target, journal: Journal, jobs: int = DEFAULT_JOBS,
+               retries: int = MAX_RETRIES, backoff: float = BACKOFF_SECONDS,
+               limit: Optional[int] = None, on_result=None) -> List[dict]:
+    """
+    Apply every pending chunk, at most jobs at a time, respecting 'after'.
+
+    Chunks already in the journal with the same sha256 count as done. A
+    permanent failure stops scheduling new chunks (running ones finish);
+    chunks that were never started are reported as 'pending'.
+    """
+    chunks = {c['id']: c for c in manifest['chunks']}
+    applied = journal.applied()
+    done = {cid for cid, c in chunks.items() if applied.get(cid) == c['sha256']}
+    results = [{'chunk': cid, 'status': 'skipped'} for cid in chunks if cid in done]
+    waiting = [cid for cid in chunks if cid not in done]
+    started = 0
+    failed = False
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while True:
+            if not failed:
+                for cid in list(waiting):
+                    if len(running) >= jobs or (limit is not None and started >= limit):
+                        break
+                    if all(dep in done for dep in chunks[cid]['after']):
+                        waiting.remove(cid)
+                        running[executor.submit(apply_chunk, target, chunks[cid], retries, backoff)] = cid
+                        started += 1
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                running.pop(future)
+                result = future.result()
+                journal.record(result)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+                if result['status'] == 'applied':
+                    done.add(result['chunk'])
+                else:
+                    failed = True
+
+    results += [{'chunk': cid, 'status': 'pending'} for cid in waiting]
+    order = {cid: i for i, cid in enumerate(chunks)}
+    return sorted(results, key=lambda r: order[r['chunk']])
+
+
+def _print_result(result: dict):
+    if result['status'] == 'applied':
+        retried = f", {result['attempts']} attempts" if result['attempts'] > 1 else ""
+        print(f"  ✅ {result['chunk']} ({result['seconds']:.2f}s{retried})")
+    else:
+        print(f"  ❌ {result['chunk']} after {result['attempts']} attempt(s): {result['error']}")
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Apply split SQL chunk files concurrently and resumably"))
+    parser.add_argument('chunk_set', nargs='?', choices=sorted(CHUNK_SETS), help="known chunk set")
+    parser.add_argument('--manifest', type=Path, help="apply the chunks of this manifest instead")
+    parser.add_argument('--write-manifest', type=Path, metavar='PATH', help="write the manifest and exit")
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument('--sqlite', type=Path, metavar='DB', help="apply to a local SQLite database")
+    target_group.add_argument('--wrangler', action='store_true', help="apply with wrangler d1 execute")
+    parser.add_argument('--database', default=D1_DATABASE, help="D1 database name (--wrangler)")
+    parser.add_argument('--remote', action='store_true', help="wrangler --remote instead of --local")
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS)
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES)
+    parser.add_argument('--backoff', type=float, default=BACKOFF_SECONDS, help="base seconds of the retry backoff")
+    parser.add_argument('--journal', type=Path, help=f"checkpoint journal (default: {JOURNAL_DIR.relative_to(BASE_DIR)}/<set>-<target>.jsonl)")
+    parser.add_argument('--reset', action='store_true', help="ignore and truncate the journal")
+    parser.add_argument('--limit', type=int, help="start at most N chunks (resume later)")
+    parser.add_argument('--fail-first', type=int, default=0, help="stand-in: fail the first N attempts per chunk")
+    parser.add_argument('--dry-run', action='store_true', help="print the schedule without applying")
+    args = parser.parse_args()
+
+    if args.manifest:
+        manifest = load_manifest(args.manifest)
+        set_name = args.manifest.stem
+    elif args.chunk_set:
+        manifest = build_manifest(chunk_files(args.chunk_set))
+        set_name = args.chunk_set
+    else:
+        parser.error("give a chunk set or --manifest")
+
+    if args.write_manifest:
+        args.write_manifest.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.write_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"💾 Manifest written to: {args.write_manifest} ({len(manifest['chunks'])} chunks)")
+        return 0
+
+    print("=" * 70)
+    print("SQL Chunk Runner")
+    print("=" * 70)
+    print()
+
+    schedule = waves(manifest)
+    total_statements = sum(c['statements'] for c in manifest['chunks'])
+    print(f"📁 {len(manifest['chunks'])} chunks, {total_statements:,} statements, {len(schedule)} wave(s)")
+    if args.dry_run:
+        for i, wave in enumerate(schedule, 1):
+            print(f"  wave {i}: {', '.join(wave)}")
+        return 0
+
+    if args.sqlite:
+        target = SQLiteTarget(args.sqlite)
+    elif args.wrangler:
+        target = WranglerTarget(args.database, args.remote)
+    else:
+        parser.error("choose a target: --sqlite DB or --wrangler")
+    if args.fail_first:
+        target = FlakyTarget(target, args.fail_first)
+
+    journal = Journal(args.journal or JOURNAL_DIR / f"{set_name}-{target.label}.jsonl", reset=args.reset)
+    print(f"🎯 Target: {target.label}, {args.jobs} job(s), journal {journal.path}")
+    print()
+
+    with PipelineRun("apply_sql_batches", args.profile, args.report_dir) as run:
+        with run.stage("apply_chunks") as stage:
+            results = run_chunks(manifest, target, journal, args.jobs, args.retries, args.backoff,
+                                 args.limit, on_result=_print_result)
+            stage.rows = sum(c['statements'] for c in manifest['chunks']
+                             if any(r['chunk'] == c['id'] and r['status'] == 'applied' for r in results))
+
+    counts = {status: sum(1 for r in results if r['status'] == status)
+              for status in ('applied', 'skipped', 'failed', 'pending')}
+    retried = sum(r['attempts'] - 1 for r in results if 'attempts' in r)
+
+    print()
+    print(f"📊 applied {counts['applied']}, skipped (journal) {counts['skipped']}, "
+          f"failed {counts['failed']}, pending {counts['pending']}, retries {retried}")
+    if counts['failed']:
+        print("❌ Stopped after a permanent failure; fix it and rerun to resume")
+        return 1
+    if counts['pending']:
+        print("⏸  Stopped early; rerun to resume from the journal")
+        return 0
+    print("✅ All chunks applied")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
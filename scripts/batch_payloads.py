@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+JSON batch payloads: parameter tuples plus statement templates.
+
+The generators render their rows into SQL text, which D1 then has to parse
+back, and every string goes through hand-written '' escaping. A batch
+payload carries the same load as data instead:
+
+    {"format": "kobeya-batch/1", "source": "...", "statements": [
+        {"sql": "DELETE FROM t", "params": 0},
+        {"sql": "INSERT INTO t (a, b) VALUES (?, ?)", "params": 2}]}
+    {"s": 0, "rows": [[]]}
+    {"s": 1, "rows": [["x", 1], ["y", 2], ...]}
+    ...
+
+i.e. NDJSON with one header line and one line per batch of parameter
+tuples for statement s, in execution order. Each line is a SQLite
+executemany() (the whole payload in one transaction), or a D1 batch()
+call in src/eiken/utils/batch-payload.ts loadBatchPayload, where a
+parameterless line (DELETE, ...) goes into the same batch() as the line
+after it, so a table is never left cleared without its first rows.
+Values are plain JSON (bools become 0/1, NaN null).
+
+    with BatchPayloadWriter(path, source="import-cefrj-to-db.py") as payload:
+        payload.execute("DELETE FROM eiken_vocabulary_lexicon")
+        payload.insert("eiken_vocabulary_lexicon", ['word_lemma', 'pos'], rows)
+
+    python scripts/batch_payloads.py data/pdf_analysis/pdf_analysis.ndjson --sqlite /tmp/eiken.sqlite
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+FORMAT = "kobeya-batch/1"
+# D1 の 1 文あたりのバインド上限（100）とは別に、batch() 1 回に渡す文の数
+DEFAULT_BATCH_SIZE = 100
+
+
+def insert_sql(table: str, columns: Sequence[str], conflict: Sequence[str] = (),
+               update: Optional[Sequence[str]] = None, extra_set: Sequence[str] = ()) -> str:
+    """
+    Parameterized INSERT; with conflict keys it becomes an upsert that
+    updates the update columns (default: every non-key column) plus any
+    extra_set assignments such as "updated_at = CURRENT_TIMESTAMP".
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    if conflict:
+        update = [c for c in columns if c not in conflict] if update is None else update
+        assignments = [f"{c} = excluded.{c}" for c in update] + list(extra_set)
+        sql += f" ON CONFLICT({', '.join(conflict)}) DO UPDATE SET " + ", ".join(assignments)
+    return sql
+
+
+def _json_value(value):
+    if hasattr(value, 'item'):
+        value = value.item()  # NumPy scalar
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class BatchPayloadWriter:
+    """Collects statements and their parameter tuples and writes them as an NDJSON payload on close."""
+
+    def __init__(self, path: Path, source: str = "", batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = Path(path)
+        self.source = source
+        self.batch_size = batch_size
+        self.statements: List[dict] = []
+        self._ids: Dict[str, int] = {}
+        self._lines: List[Tuple[int, List[list]]] = []
+        self.rows = 0
+
+    def __enter__(self) -> "BatchPayloadWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def statement(self, sql: str) -> int:
+        """Register a statement template (same text → same id)."""
+        statement_id = self._ids.get(sql)
+        if statement_id is None:
+            statement_id = self._ids[sql] = len(self.statements)
+            self.statements.append({'sql': sql, 'params': sql.count('?')})
+        return statement_id
+
+    def execute(self, sql: str):
+        """A statement without parameters (DELETE, ...)."""
+        self._lines.append((self.statement(sql), [[]]))
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]):
+        statement_id = self.statement(sql)
+        expected = self.statements[statement_id]['params']
+        batch = []
+        for row in rows:
+            if len(row) != expected:
+                raise ValueError(f"{len(row)} values for {expected} parameters: {sql[:60]}")
+            batch.append([_json_value(v) for v in row])
+            if len(batch) == self.batch_size:
+                self._lines.append((statement_id, batch))
+                batch = []
+        if batch:
+            self._lines.append((statement_id, batch))
+
+    def insert(self, table: str, columns: Sequence[str], rows: Iterable[Sequence],
+               conflict: Sequence[str] = (), update: Optional[Sequence[str]] = None,
+               extra_set: Sequence[str] = ()):
+        self.executemany(insert_sql(table, columns, conflict, update, extra_set), rows)
+
+    def close(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            header = {'format': FORMAT, 'source': self.source, 'statements': self.statements}
+            f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')) + "\n")
+            for statement_id, rows in self._lines:
+                f.write(json.dumps({'s': statement_id, 'rows': rows}, ensure_ascii=False,
+                                   separators=(',', ':')) + "\n")
+                self.rows += len(rows)
+
+
+def read_payload(path: Path) -> Tuple[dict, Iterator[dict]]:
+    """(header, iterator over batch lines)."""
+    f = open(path, 'r', encoding='utf-8')
+    header = json.loads(f.readline())
+    if header.get('format') != FORMAT:
+        f.close()
+        raise ValueError(f"{path}: not a {FORMAT} payload")
+
+    def batches() -> Iterator[dict]:
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header, batches()
+
+
+def load_payload(conn: sqlite3.Connection, path: Path) -> dict:
+    """
+    Execute a payload with executemany, all of it in one transaction.
+
+    Returns:
+        {'statements': n templates, 'batches': n lines, 'rows': n tuples}
+    """
+    header, batches = read_payload(path)
+    statements = [s['sql'] for s in header['statements']]
+    counts = {'statements': len(statements), 'batches': 0, 'rows': 0}
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    conn.execute("BEGIN")
+    try:
+        for batch in batches:
+            conn.executemany(statements[batch['s']], batch['rows'])
+            counts['batches'] += 1
+            counts['rows'] += len(batch['rows'])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.isolation_level = isolation_level
+    return counts
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Load JSON batch payloads into SQLite"))
+    parser.add_argument('payloads', nargs='+', type=Path)
+    parser.add_argument('--sqlite', type=Path, required=True, metavar='DB')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Batch Payload Loader")
+    print("=" * 70)
+    print()
+
+    conn = sqlite3.connect(args.sqlite)
+    conn.execute("PRAGMA foreign_keys = ON")
+    failed = 0
+    with PipelineRun("batch_payloads", args.profile, args.report_dir) as run:
+        for path in args.payloads:
+            with run.stage(f"load:{path.name}") as stage:
+                start = time.perf_counter()
+                try:
+                    counts = load_payload(conn, path)
+                except (sqlite3.Error, ValueError) as e:
+                    print(f"  ❌ {path}: {e}")
+                    failed += 1
+                    continue
+                stage.rows = counts['rows']
+                print(f"  ✅ {path}: {counts['rows']:,} rows in {counts['batches']:,} batches, "
+                      f"{counts['statements']} statement(s), {time.perf_counter() - start:.2f}s")
+    conn.close()
+    print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
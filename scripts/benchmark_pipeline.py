@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Python data build pipeline.
+
+Times the key entry points on the bundled inputs (1×) and on scaled-up
+synthetic inputs (10×, 100×), compares each median against the stored
+baseline and exits non-zero when a benchmark regresses beyond the
+threshold. Run with --update-baseline to record new baselines; baselines
+are machine-specific, so none is committed, and a run without one (or
+with benchmarks missing from it) fails instead of passing unchecked.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from eiken_corpus import BASE_DIR, QUESTIONS_FILE, load_questions
+
+sys.path.insert(0, str(BASE_DIR))
+
+BASELINE_FILE = BASE_DIR / "data" / "benchmarks" / "baselines.json"
+RESULTS_FILE = BASE_DIR / "data" / "benchmarks" / "latest.json"
+WORDLIST_XLSX = BASE_DIR / "CEFR-J_Wordlist_Ver1.6.xlsx"
+BOOKLET_PDF = BASE_DIR / "grade_4_2025_2_question_booklet.pdf"
+
+ALL_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS: Dict[str, dict] = {}
+
+
+def benchmark(name: str, scales=ALL_SCALES):
+    """
+    Register a benchmark. The decorated setup(scale, workdir) builds the
+    inputs (not timed) and returns the zero-argument callable to time.
+    """
+    def register(setup: Callable):
+        BENCHMARKS[name] = {'setup': setup, 'scales': tuple(scales), 'doc': setup.__doc__}
+        return setup
+    return register
+
+
+def synthetic_vocabulary(scale: int):
+    """LexiconTable shaped like import_cefrj_wordlist.parse_wordlist output."""
+    from lexicon_records import LexiconTable
+
+    levels = [('A1', 'grade_5'), ('A2', 'grade_4'), ('B1', 'pre_2'), ('B2', 'grade_2')]
+    table = LexiconTable()
+    for i in range(7800 * scale):
+        level, grade = levels[i % len(levels)]
+        table.add(f"word{i}'s", pos='noun' if i % 3 else 'verb', cefr_level=level, eiken_grade=grade, rank=i + 1)
+    return table
+
+
+def synthetic_upload(scale: int) -> str:
+    """
+    Rebuild the raw multi-object upload that parse_eiken_questions expects:
+    pretty-printed grade objects back to back, with U+2028 separators and
+    the quoted-number typo the parser repairs.
+    """
+    chunks = []
+    for _ in range(scale):
+        for grade_obj in load_questions(QUESTIONS_FILE):
+            text = json.dumps(grade_obj, ensure_ascii=False, indent=2)
+            text = text.replace('"question_number": 1,', '"question_number": 1",', 1)
+            text = text.replace('. ', '.\u2028', 3)
+            chunks.append(text)
+    return "\n".join(chunks)
+
+
+@benchmark('parse_wordlist', scales=(1, 10))
+def bench_parse_wordlist(scale: int, workdir: Path):
+    """import_cefrj_wordlist.parse_wordlist on CEFR-J_Wordlist_Ver1.6.xlsx"""
+    import pandas as pd
+    from import_cefrj_wordlist import parse_wordlist
+
+    path = WORDLIST_XLSX
+    if scale > 1:
+        df = pd.read_excel(WORDLIST_XLSX, sheet_name='ALL')
+        path = workdir / f"wordlist_{scale}x.xlsx"
+        pd.concat([df] * scale, ignore_index=True).to_excel(path, sheet_name='ALL', index=False)
+    return lambda: parse_wordlist(path)
+
+
+@benchmark('extract_grade_sections')
+def bench_extract_grade_sections(scale: int, workdir: Path):
+    """parse_eiken_questions.extract_grade_sections on a synthetic upload"""
+    from parse_eiken_questions import extract_grade_sections
+
+    path = workdir / f"upload_{scale}x.txt"
+    path.write_text(synthetic_upload(scale), encoding='utf-8')
+    return lambda: extract_grade_sections(str(path))
+
+
+@benchmark('calculate_suitability_scores')
+def bench_calculate_suitability_scores(scale: int, workdir: Path):
+    """generate_suitability_scores.calculate_suitability_scores on the corpus facet index"""
+    from build_facet_index import FacetIndex
+    from generate_suitability_scores import calculate_suitability_scores
+
+    index = FacetIndex.build(load_questions(QUESTIONS_FILE) * scale)
+    return lambda: calculate_suitability_scores(index)
+
+
+@benchmark('generate_sql_inserts')
+def bench_generate_sql_inserts(scale: int, workdir: Path):
+    """import_cefrj_wordlist.generate_sql_inserts on synthetic vocabulary rows"""
+    from import_cefrj_wordlist import generate_sql_inserts
+
+    vocabulary_data = synthetic_vocabulary(scale)
+    output = workdir / f"vocabulary_{scale}x.sql"
+    return lambda: generate_sql_inserts(vocabulary_data, output)
+
+
+@benchmark('profile_texts')
+def bench_profile_texts(scale: int, workdir: Path):
+    """build_text_profiles.build_profiles on the question corpus (lexicon loaded once)"""
+    from build_text_profiles import build_profiles, collect_documents
+    from eiken_lexicon import load_lexicon
+
+    lexicon = load_lexicon()
+    documents = collect_documents(load_questions(QUESTIONS_FILE), []) * scale
+    return lambda: build_profiles(documents, lexicon)
+
+
+@benchmark('calculate_difficulty_components')
+def bench_calculate_difficulty_components(scale: int, workdir: Path):
+    """difficulty_scoring.calculate_difficulty_components over vocabulary_master rows"""
+    from difficulty_scoring import calculate_difficulty_components
+    from score_vocabulary_master import load_vocabulary_master
+
+    rows = load_vocabulary_master() * scale
+    return lambda: calculate_difficulty_components(rows)
+
+
+@benchmark('facet_index_query')
+def bench_facet_index_query(scale: int, workdir: Path):
+    """1,000 build_facet_index.FacetIndex.query calls (grade × type × CEFR) on the corpus"""
+    from build_facet_index import FacetIndex
+
+    index = FacetIndex.build(load_questions(QUESTIONS_FILE) * scale)
+    grades = index.values('grade')
+    types = index.values('question_type')
+    queries = [{'grade': grades[i % len(grades)], 'question_type': types[i % len(types)], 'cefr_level': 'B1'}
+               for i in range(1000)]
+    return lambda: [index.query(**q) for q in queries]
+
+
+@benchmark('flashcard_sm2_simulation', scales=(1, 10))
+def bench_flashcard_sm2_simulation(scale: int, workdir: Path):
+    """simulate_flashcard_reviews.simulate: 100 students × 500 cards × 60 days per scale unit"""
+    from simulate_flashcard_reviews import simulate
+
+    return lambda: simulate(100 * scale, 500, 60)
+
+
+@benchmark('count_lemmas', scales=(1, 10))
+def bench_count_lemmas(scale: int, workdir: Path):
+    """corpus_frequencies.count_lemmas (map-reduce, one shard per CPU) over the past-paper text"""
+    import os
+
+    from corpus_frequencies import count_lemmas
+    from eiken_corpus import load_past_paper_texts
+
+    texts = [paper['text'] for paper in load_past_paper_texts()] * scale
+    return lambda: count_lemmas(texts, os.cpu_count() or 1)
+
+
+@benchmark('coverage_matrix', scales=(1, 10))
+def bench_coverage_matrix(scale: int, workdir: Path):
+    """build_coverage_matrix: sparse count matrix + level coverage product over questions and past papers"""
+    from build_coverage_matrix import build_matrix, coverage_by_level, level_indicators
+    from build_text_profiles import collect_documents
+    from eiken_corpus import load_past_paper_texts, load_questions
+    from eiken_lexicon import load_lexicon
+
+    lexicon = load_lexicon()
+    texts = [d['text'] for d in collect_documents(load_questions(), load_past_paper_texts())] * scale
+
+    def run():
+        matrix, _ = build_matrix(texts, lexicon)
+        return coverage_by_level(matrix, level_indicators(lexicon, matrix.shape[1]))
+    return run
+
+
+@benchmark('mwe_scan', scales=(1, 10))
+def bench_mwe_scan(scale: int, workdir: Path):
+    """build_mwe_automaton: compile the multiword automaton and scan questions and past papers in one pass each"""
+    from build_mwe_automaton import (MultiwordMatcher, compile_automaton, lemmatize_phrase, multiword_patterns,
+                                     write_automaton)
+    from build_text_profiles import collect_documents
+    from eiken_corpus import load_past_paper_texts, load_questions
+    from eiken_lexicon import LEXICON_CSV, load_lexicon
+
+    lexicon = load_lexicon()
+    documents = collect_documents(load_questions(), load_past_paper_texts())
+    lemma_docs = [lemmatize_phrase(d['text'], lexicon) for d in documents] * scale
+    patterns = multiword_patterns(LEXICON_CSV, lexicon)
+    path = workdir / "mwe_automaton.json"
+
+    def run():
+        write_automaton(path, compile_automaton(list(patterns)), patterns)
+        matcher = MultiwordMatcher.load(path)
+        return [matcher.scan(lemmas) for lemmas in lemma_docs]
+    return run
+
+
+@benchmark('analyze_pdf', scales=(1,))
+def bench_analyze_pdf(scale: int, workdir: Path):
+    """analyze_eiken_pdf.analyze_pdf on the Grade 4 question booklet"""
+    from analyze_eiken_pdf import analyze_pdf
+
+    return lambda: analyze_pdf(str(BOOKLET_PDF))
+
+
+def time_callable(fn: Callable, repeat: int) -> List[float]:
+    """Run fn repeat times with its console output suppressed."""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(names: List[str], scales: List[int], repeat: int) -> Dict[str, dict]:
+    """Run the selected benchmarks; keys are '<name>@<scale>x'."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        workdir = Path(tmp)
+        for name in names:
+            bench = BENCHMARKS[name]
+            for scale in scales:
+                if scale not in bench['scales']:
+                    continue
+                key = f"{name}@{scale}x"
+                try:
+                    fn = bench['setup'](scale, workdir)
+                except (ImportError, FileNotFoundError) as e:
+                    results[key] = {'status': 'skipped', 'reason': str(e)}
+                    print(f"  ⏭️  {key:<38} skipped ({e})")
+                    continue
+
+                timings = time_callable(fn, repeat)
+                results[key] = {
+                    'status': 'ok',
+                    'median_seconds': round(statistics.median(timings), 6),
+                    'min_seconds': round(min(timings), 6),
+                    'runs': len(timings),
+                }
+                print(f"  ⏱️  {key:<38} median {results[key]['median_seconds']:9.4f}s  "
+                      f"min {results[key]['min_seconds']:9.4f}s")
+    return results
+
+
+def compare_to_baseline(results: Dict[str, dict], baseline: Dict[str, dict],
+                        threshold: float) -> List[str]:
+    """Return the keys whose median exceeds baseline × (1 + threshold)."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if result['status'] != 'ok' or not base:
+            continue
+        ratio = result['median_seconds'] / base['median_seconds'] if base['median_seconds'] else 1.0
+        result['baseline_seconds'] = base['median_seconds']
+        result['ratio'] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data build pipeline")
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS),
+                        help="run only the named benchmark (repeatable)")
+    parser.add_argument('--scales', default=",".join(str(s) for s in ALL_SCALES),
+                        help="comma-separated input scales (default: 1,10,100)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown vs. baseline before failing (0.25 = 25%%)")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store this run's results as the new baseline")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    scales = [int(s) for s in args.scales.split(",") if s]
+
+    print("=" * 70)
+    print("Data Pipeline Benchmarks")
+    print("=" * 70)
+    results = run_benchmarks(names, scales, args.repeat)
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        merged = {**baseline, **{k: v for k, v in results.items() if v['status'] == 'ok'}}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**report, 'results': merged}, f, indent=2)
+        print(f"\n💾 Baseline updated: {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\n❌ No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 1
+
+    print("\n📊 Comparison with baseline:")
+    for key, result in results.items():
+        if 'ratio' in result:
+            mark = "❌" if key in regressions else "✅"
+            print(f"  {mark} {key:<38} {result['ratio']:.2f}× baseline")
+
+    missing = [key for key, result in results.items() if result['status'] == 'ok' and key not in baseline]
+    if missing:
+        print(f"\n❌ No baseline for {', '.join(missing)}; run with --update-baseline to record them")
+        return 1
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
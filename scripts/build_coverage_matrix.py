@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Sparse passage × lemma matrix and per-grade lexicon coverage.
+
+Every passage / question_text_en in eiken_questions.json and every
+extracted past paper (the documents of build_text_profiles.py) is
+tokenized and lemmatized once into a SciPy CSR matrix X of lemma counts,
+one row per document and one column per lemma id: the CEFR-J lexicon ids
+of eiken_lexicon.Lexicon first, then the out-of-lexicon words.
+
+The lexicon side is a 0/1 matrix L with one column per CEFR level,
+L[lemma, level] = 1 when the lemma's (lowest) level is at or below it, so
+
+    coverage = (X @ L) / X.sum(axis=1)
+
+is, for every document at once, the share of its tokens inside the A1,
+A1-A2, ... word lists. Each Eiken grade reads the column of its target
+level (TARGET_CEFRJ of build_text_profiles.py), and the same product on
+the binarized matrix gives type coverage. The out-of-lexicon words of a
+document are the non-zero columns of its row beyond the lexicon.
+--verify recomputes every value with per-token lookups (lookup_coverage)
+and compares.
+
+    data/coverage_matrix/passage_lemma_counts.npz   scipy.sparse CSR counts
+    data/coverage_matrix/columns.json               lemma of every column, document of every row
+    data/coverage_matrix/coverage.json              per-document coverage by grade and OOV words
+    data/coverage_matrix/summary.json               mean coverage, document grade × word-list grade
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from build_text_profiles import TARGET_CEFRJ, collect_documents
+from eiken_corpus import BASE_DIR, GRADE_ORDER, QUESTIONS_FILE, load_past_paper_texts, load_questions, tokenize
+from eiken_lexicon import CEFR_NUMERIC, LEXICON_CSV, Lexicon, load_lexicon
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+OUTPUT_DIR = BASE_DIR / "data" / "coverage_matrix"
+
+CEFR_LEVELS = sorted(CEFR_NUMERIC, key=CEFR_NUMERIC.get)
+# 級 → 語彙リストの上限 CEFR レベル（'A1.3' → 'A1'）
+GRADE_LEVELS = {grade: TARGET_CEFRJ[grade][:2] for grade in GRADE_ORDER}
+# coverage.json に載せる OOV 語の上限（頻度順）
+MAX_OOV_WORDS = 50
+
+
+def build_matrix(texts: List[str], lexicon: Lexicon) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    Count matrix (documents × lemma ids) and the out-of-lexicon words,
+    whose column is len(lexicon) + their index.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    oov: Dict[str, int] = {}
+    encoded = [lexicon.encode(tokenize(text), oov) for text in texts]
+    lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(texts))
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    cols = np.concatenate(encoded) if texts else np.zeros(0, dtype=np.int32)
+    shape = (len(texts), len(lexicon) + len(oov))
+    # COO → CSR で重複 (row, col) が合算される
+    matrix = sparse.coo_matrix((np.ones(len(cols), dtype=np.int32), (rows, cols)), shape=shape).tocsr()
+    oov_words = sorted(oov, key=oov.get)
+    return matrix, oov_words
+
+
+def level_indicators(lexicon: Lexicon, n_columns: int) -> sparse.csr_matrix:
+    """0/1 matrix (lemma ids × CEFR levels): lemma level ≤ column level; OOV rows stay empty."""
+    import numpy as np
+    from scipy import sparse
+
+    thresholds = np.array([CEFR_NUMERIC[level] for level in CEFR_LEVELS])
+    dense = lexicon.levels[:, None] <= thresholds[None, :]
+    rows, cols = np.nonzero(dense)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                             shape=(n_columns, len(CEFR_LEVELS)))
+
+
+def coverage_by_level(matrix: sparse.csr_matrix, indicators: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+    """
+    Token and type coverage of every document at every CEFR level.
+
+    Returns:
+        {'tokens', 'types': per-document totals,
+         'token_coverage', 'type_coverage': documents × levels}
+    """
+    import numpy as np
+
+    present = (matrix > 0).astype(np.int32)
+    tokens = np.asarray(matrix.sum(axis=1)).ravel()
+    types = np.asarray(present.sum(axis=1)).ravel()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        token_coverage = (matrix @ indicators).toarray() / tokens[:, None]
+        type_coverage = (present @ indicators).toarray() / types[:, None]
+    # トークンのない文書は 0 ではなく NaN のまま（平均から除外）
+    return {'tokens': tokens, 'types': types, 'token_coverage': token_coverage, 'type_coverage': type_coverage}
+
+
+def oov_words_by_document(matrix: sparse.csr_matrix, n_lexicon: int, oov_words: List[str],
+                          limit: int = MAX_OOV_WORDS) -> List[List[Tuple[str, int]]]:
+    """(word, count) of each document's out-of-lexicon columns, most frequent first."""
+    result = []
+    for i in range(matrix.shape[0]):
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        cols, counts = matrix.indices[start:end], matrix.data[start:end]
+        mask = cols >= n_lexicon
+        words = [(oov_words[c - n_lexicon], int(n)) for c, n in zip(cols[mask], counts[mask])]
+        words.sort(key=lambda item: (-item[1], item[0]))
+        result.append(words[:limit])
+    return result
+
+
+def lookup_coverage(text: str, lexicon: Lexicon, level: str) -> float:
+    """Per-token reference for one document and level (what the matrix product replaces)."""
+    ids = lexicon.encode(tokenize(text))
+    if not len(ids):
+        return float('nan')
+    limit = CEFR_NUMERIC[level]
+    known = sum(1 for i in ids if i >= 0 and lexicon.levels[i] <= limit)
+    return known / len(ids)
+
+
+def _round(value: float):
+    return None if math.isnan(value) else round(float(value), 4)
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Sparse passage × lemma coverage matrix"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--lexicon', type=Path, default=LEXICON_CSV)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--no-past-papers', action='store_true',
+                        help="skip past-paper text (no pdfplumber needed)")
+    parser.add_argument('--verify', action='store_true',
+                        help="also recompute every coverage value with per-token lookups and compare")
+    args = parser.parse_args()
+
+    import numpy as np
+    from scipy import sparse
+
+    print("=" * 70)
+    print("Passage × Lexicon Coverage Matrix")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_coverage_matrix", args.profile, args.report_dir) as run:
+        with run.stage("load_lexicon") as stage:
+            lexicon = load_lexicon(args.lexicon)
+            stage.rows = len(lexicon)
+
+        with run.stage("load_corpus") as stage:
+            past_papers = [] if args.no_past_papers else load_past_paper_texts()
+            documents = collect_documents(load_questions(args.questions), past_papers)
+            stage.rows = len(documents)
+
+        with run.stage("build_matrix", rows=len(documents)):
+            matrix, oov_words = build_matrix([d['text'] for d in documents], lexicon)
+            indicators = level_indicators(lexicon, matrix.shape[1])
+
+        with run.stage("coverage", rows=len(documents)):
+            coverage = coverage_by_level(matrix, indicators)
+            oov_by_document = oov_words_by_document(matrix, len(lexicon), oov_words)
+
+        level_index = {level: i for i, level in enumerate(CEFR_LEVELS)}
+        grade_columns = [level_index[GRADE_LEVELS[grade]] for grade in GRADE_ORDER]
+
+        with run.stage("write_outputs", rows=matrix.nnz):
+            args.output_dir.mkdir(parents=True, exist_ok=True)
+            sparse.save_npz(args.output_dir / "passage_lemma_counts.npz", matrix)
+            rows_meta = [{k: v for k, v in d.items() if k != 'text'} for d in documents]
+            with open(args.output_dir / "columns.json", 'w', encoding='utf-8') as f:
+                json.dump({'n_lexicon': len(lexicon), 'columns': lexicon.lemmas + oov_words, 'rows': rows_meta},
+                          f, ensure_ascii=False)
+
+            records = []
+            for i, meta in enumerate(rows_meta):
+                own = GRADE_LEVELS.get(meta['grade'])
+                records.append({
+                    **meta,
+                    'tokens': int(coverage['tokens'][i]),
+                    'types': int(coverage['types'][i]),
+                    'token_coverage': {grade: _round(coverage['token_coverage'][i, c])
+                                       for grade, c in zip(GRADE_ORDER, grade_columns)},
+                    'type_coverage': {grade: _round(coverage['type_coverage'][i, c])
+                                      for grade, c in zip(GRADE_ORDER, grade_columns)},
+                    'own_grade_coverage': _round(coverage['token_coverage'][i, level_index[own]]) if own else None,
+                    'oov_words': oov_by_document[i],
+                })
+            with open(args.output_dir / "coverage.json", 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+
+    # 文書の級 × 語彙リストの級: トークン被覆率の平均
+    document_grades = [g for g in GRADE_ORDER if any(d['grade'] == g for d in documents)]
+    grade_of = np.array([d['grade'] for d in documents])
+    grade_matrix = {
+        doc_grade: {list_grade: _round(np.nanmean(coverage['token_coverage'][grade_of == doc_grade, c]))
+                    for list_grade, c in zip(GRADE_ORDER, grade_columns)}
+        for doc_grade in document_grades
+    }
+    oov_totals = Counter()
+    for words in oov_by_document:
+        oov_totals.update(dict(words))
+    summary = {
+        'documents': len(documents),
+        'columns': matrix.shape[1],
+        'lexicon_columns': len(lexicon),
+        'oov_columns': len(oov_words),
+        'nonzeros': int(matrix.nnz),
+        'density': round(matrix.nnz / max(1, matrix.shape[0] * matrix.shape[1]), 6),
+        'grade_levels': GRADE_LEVELS,
+        'mean_token_coverage': grade_matrix,
+        'top_oov_words': oov_totals.most_common(30),
+    }
+    with open(args.output_dir / "summary.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"📊 {matrix.shape[0]:,} documents × {matrix.shape[1]:,} lemma columns "
+          f"({len(lexicon):,} lexicon + {len(oov_words):,} out-of-lexicon), {matrix.nnz:,} non-zeros")
+    print()
+    print("Mean token coverage (rows: document grade, columns: word list of grade)")
+    print("   " + " " * 6 + "".join(f"{g:>7}" for g in GRADE_ORDER))
+    for doc_grade in document_grades:
+        cells = "".join(f"{grade_matrix[doc_grade][g]:>7.1%}" if grade_matrix[doc_grade][g] is not None
+                        else f"{'-':>7}" for g in GRADE_ORDER)
+        print(f"   {doc_grade:<6}{cells}")
+    print()
+    print(f"💾 Matrix: {args.output_dir / 'passage_lemma_counts.npz'}")
+    print(f"💾 Coverage: {args.output_dir / 'coverage.json'}")
+
+    if args.verify:
+        # 行列積の被覆率を単語ごとの参照計算と照合
+        mismatches = 0
+        for i, doc in enumerate(documents):
+            for level, c in level_index.items():
+                expected = lookup_coverage(doc['text'], lexicon, level)
+                actual = coverage['token_coverage'][i, c]
+                if not (np.isnan(expected) and np.isnan(actual)) and not np.isclose(expected, actual):
+                    mismatches += 1
+        if mismatches:
+            print(f"❌ {mismatches} coverage values differ from per-token lookups")
+            return 1
+        print("✓ Matrix coverage matches per-token lookups")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Local embedding precompute and top-k index for topics and passages.
+
+Embeds every eiken_topic_areas topic (seed catalog + generate_emergency_topics
+rows: labels, scenario_description, sub_topics) and every corpus passage
+with the deterministic local model in local_embeddings, and stores:
+
+    data/embeddings/embeddings.npy          float32 n × d, L2-normalized (np.load(..., mmap_mode='r'))
+    data/embeddings/embeddings_meta.json    one entry per row (kind, key, grade, text_hash)
+    data/embeddings/local_embedder.npz      fitted model, to embed new queries in the same space
+
+Nothing is written to eiken_embedding_cache: embedding-cache.ts only reads
+text-embedding-3-small vectors, and these live in a different space, so
+they can be neither served from it nor compared with its rows.
+
+    python scripts/build_embedding_index.py
+    python scripts/build_embedding_index.py --query "protecting forests" --kind topic -k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from build_topic_catalog import load_existing_catalog
+from eiken_corpus import BASE_DIR, QUESTIONS_FILE, iter_question_ids, load_questions
+from local_embeddings import LocalEmbedder, top_k
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+if TYPE_CHECKING:
+    import numpy as np
+
+OUTPUT_DIR = BASE_DIR / "data" / "embeddings"
+MATRIX_FILE = "embeddings.npy"
+META_FILE = "embeddings_meta.json"
+MODEL_FILE = "local_embedder.npz"
+
+MODEL_NAME = "local-hashing-svd-v1"
+N_COMPONENTS = 128
+
+
+def text_hash(text: str) -> str:
+    """hashEmbeddingText() normalization, to spot rows whose text changed between builds."""
+    normalized = re.sub(r"\s+", " ", text.lower().strip())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def topic_text(topic: dict) -> str:
+    parts = [topic.get('topic_label_en') or '', topic['topic_code'].replace('_', ' '),
+             topic.get('scenario_description') or '', " ".join(topic.get('sub_topics') or [])]
+    return ". ".join(p for p in parts if p)
+
+
+def collect_items(questions_data: List[dict], topics: List[dict]) -> List[dict]:
+    """Rows of the matrix: every topic, then every distinct corpus passage."""
+    items = []
+    seen_topics = set()
+    for topic in topics:
+        key = f"{topic['grade']}:{topic['topic_code']}"
+        if key in seen_topics:
+            continue
+        seen_topics.add(key)
+        items.append({'kind': 'topic', 'key': key, 'grade': topic['grade'], 'text': topic_text(topic)})
+
+    seen_passages = set()
+    for source_id, grade, q in iter_question_ids(questions_data):
+        passage = (q.get('passage') or '').strip()
+        if passage and passage not in seen_passages:
+            seen_passages.add(passage)
+            items.append({'kind': 'passage', 'key': source_id, 'grade': grade, 'text': passage})
+
+    for item in items:
+        item['text_hash'] = text_hash(item['text'])
+    return items
+
+
+class EmbeddingIndex:
+    """Memory-mapped embedding matrix plus metadata, with a batch top-k API."""
+
+    def __init__(self, matrix: np.ndarray, items: List[dict], embedder: LocalEmbedder):
+        self.matrix = matrix
+        self.items = items
+        self.embedder = embedder
+
+    @classmethod
+    def load(cls, directory: Path = OUTPUT_DIR) -> "EmbeddingIndex":
+        import numpy as np
+
+        matrix = np.load(directory / MATRIX_FILE, mmap_mode='r')
+        with open(directory / META_FILE, 'r', encoding='utf-8') as f:
+            items = json.load(f)['items']
+        return cls(matrix, items, LocalEmbedder.load(directory / MODEL_FILE))
+
+    def top_k(self, texts: List[str], k: int = 5, kind: Optional[str] = None,
+              grade: Optional[str] = None) -> List[List[dict]]:
+        """Top-k rows for each query text, optionally restricted to a kind and/or grade."""
+        import numpy as np
+
+        allowed = np.array([(kind is None or it['kind'] == kind) and (grade is None or it['grade'] == grade)
+                            for it in self.items])
+        queries = self.embedder.embed(texts)
+        indices, scores = top_k(queries, self.matrix, k, exclude=np.broadcast_to(~allowed, (len(texts), len(allowed))))
+        return [
+            [{**{f: self.items[i][f] for f in ('kind', 'key', 'grade')}, 'score': round(float(s), 4)}
+             for i, s in zip(row, row_scores) if i >= 0]
+            for row, row_scores in zip(indices, scores)
+        ]
+
+
+def build_index(questions_data: List[dict], topics: List[dict], output_dir: Path,
+                n_components: int = N_COMPONENTS) -> EmbeddingIndex:
+    """Fit the local model, write the memmap matrix, metadata and model."""
+    import numpy as np
+
+    items = collect_items(questions_data, topics)
+    texts = [item['text'] for item in items]
+    embedder = LocalEmbedder(n_components=n_components).fit(texts)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    vectors = embedder.embed(texts)
+    matrix = np.lib.format.open_memmap(output_dir / MATRIX_FILE, mode='w+', dtype=np.float32, shape=vectors.shape)
+    matrix[:] = vectors
+    matrix.flush()
+
+    embedder.save(output_dir / MODEL_FILE)
+    with open(output_dir / META_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'model': MODEL_NAME, 'dimension': embedder.dimension,
+                   'items': [{k: v for k, v in item.items() if k != 'text'} for item in items]},
+                  f, ensure_ascii=False, indent=2)
+
+    return EmbeddingIndex(matrix, items, embedder)
+
+
+def load_topics() -> List[dict]:
+    """Seed catalog plus the gap-filling topics of generate_emergency_topics."""
+    from generate_emergency_topics import generate_emergency_topics
+
+    return load_existing_catalog() + generate_emergency_topics()
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Local embedding precompute and top-k index"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--query', action='append', help="query the existing index instead of building it")
+    parser.add_argument('--kind', choices=('topic', 'passage'))
+    parser.add_argument('--grade')
+    parser.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.query:
+        index = EmbeddingIndex.load(args.output_dir)
+        for query, results in zip(args.query, index.top_k(args.query, args.k, args.kind, args.grade)):
+            print(f"\n🔎 {query}")
+            for r in results:
+                print(f"   {r['score']:.3f}  {r['kind']:<8} {r['key']}")
+        return
+
+    print("=" * 70)
+    print("Local Embedding Index")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_embedding_index", args.profile, args.report_dir) as run:
+        with run.stage("load_inputs") as stage:
+            questions_data = load_questions(args.questions)
+            topics = load_topics()
+            stage.rows = len(topics)
+
+        with run.stage("build_index") as stage:
+            index = build_index(questions_data, topics, args.output_dir)
+            stage.rows = len(index.items)
+
+    n_topics = sum(it['kind'] == 'topic' for it in index.items)
+    print(f"\n💾 Index written to: {args.output_dir}")
+    print(f"   {len(index.items)} rows ({n_topics} topics, {len(index.items) - n_topics} passages), "
+          f"d={index.matrix.shape[1]}, {index.matrix.nbytes / 1024:.1f} KB float32")
+    print()
+
+
+if __name__ == "__main__":
+    main()
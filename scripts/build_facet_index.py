@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Bitmap facet index over the question corpus.
+
+Every question in eiken_questions.json gets a dense integer id (its
+position in iter_question_ids order) and every facet value a bitmap of
+the ids that carry it. Filters are answered by OR-ing the bitmaps of the
+requested values within a facet and AND-ing across facets, so a query
+touches a handful of machine words instead of the whole corpus.
+
+Facets:
+    grade, question_type, difficulty
+    topic            topic_code_for(topic)
+    cefr_level       constraints.cefr_level; ranges like 'B1-B2' set both levels
+    target_grammar   constraints.target_grammar items, lowercased, final plural 's' dropped
+
+Bitmaps are Python ints in memory (AND / OR / popcount are native) and
+zlib-compressed little-endian bitsets on disk, next to the first spelling
+of every topic code ('ai_science' → 'AI / science') for display:
+
+    data/facet_index/facet_index.json
+
+    python scripts/build_facet_index.py
+    python scripts/build_facet_index.py --query grade=pre2 question_type=grammar_fill \\
+        target_grammar="passive voice" cefr_level=B1
+"""
+
+import argparse
+import base64
+import json
+import re
+import sys
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from eiken_corpus import BASE_DIR, QUESTIONS_FILE, iter_question_ids, load_questions, topic_code_for
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+OUTPUT_DIR = BASE_DIR / "data" / "facet_index"
+INDEX_FILE = "facet_index.json"
+
+FACETS = ('grade', 'question_type', 'topic', 'difficulty', 'cefr_level', 'target_grammar')
+
+_CEFR_RANGE_RE = re.compile(r"\b([ABC][12])\b")
+_CEFR_ORDER = ['A1', 'A2', 'B1', 'B2', 'C1', 'C2']
+
+FilterValue = Union[str, Iterable[str]]
+
+
+def normalize_grammar(value: str) -> str:
+    """'Relative  Pronouns' → 'relative pronoun' (so singular and plural labels share a bitmap)."""
+    value = " ".join(value.lower().split())
+    last = value.rsplit(' ', 1)[-1]
+    if len(last) > 3 and last.isalpha() and last.endswith('s') and not last.endswith('ss'):
+        value = value[:-1]
+    return value
+
+
+def cefr_levels(value: str) -> List[str]:
+    """'B1' → ['B1']; 'B1-B2' → ['B1', 'B2']; 'A2-B2' → ['A2', 'B1', 'B2']."""
+    found = _CEFR_RANGE_RE.findall(value.upper())
+    if len(found) == 2 and '-' in value:
+        lo, hi = sorted(_CEFR_ORDER.index(level) for level in found)
+        return _CEFR_ORDER[lo:hi + 1]
+    return found
+
+
+def facet_values(grade: str, q: dict) -> Dict[str, List[str]]:
+    """Normalized facet values of one question (a question can carry several values per facet)."""
+    constraints = q.get('constraints') or {}
+    grammar = constraints.get('target_grammar') or []
+    if isinstance(grammar, str):
+        grammar = [grammar]
+    return {
+        'grade': [grade],
+        'question_type': [q['question_type']] if q.get('question_type') else [],
+        'topic': [topic_code_for(q['topic'])] if q.get('topic') else [],
+        'difficulty': [q['difficulty']] if q.get('difficulty') else [],
+        'cefr_level': cefr_levels(constraints['cefr_level']) if constraints.get('cefr_level') else [],
+        'target_grammar': sorted({normalize_grammar(g) for g in grammar if g and g.strip()}),
+    }
+
+
+def normalize_query(facet: str, value: str) -> List[str]:
+    if facet == 'target_grammar':
+        return [normalize_grammar(value)]
+    if facet == 'topic':
+        return [topic_code_for(value)]
+    if facet == 'cefr_level':
+        return cefr_levels(value)
+    return [value]
+
+
+def iter_bits(bitmap: int) -> Iterator[int]:
+    """Set bit positions in ascending order."""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def encode_bitmap(bitmap: int, size: int) -> str:
+    return base64.b64encode(zlib.compress(bitmap.to_bytes((size + 7) // 8, 'little'), 9)).decode('ascii')
+
+
+def decode_bitmap(data: str) -> int:
+    return int.from_bytes(zlib.decompress(base64.b64decode(data)), 'little')
+
+
+class FacetIndex:
+    """Dense question ids plus one bitmap per (facet, value)."""
+
+    def __init__(self, source_ids: List[str], bitmaps: Dict[str, Dict[str, int]],
+                 topic_labels: Optional[Dict[str, str]] = None):
+        self.source_ids = source_ids
+        self.bitmaps = bitmaps
+        self.topic_labels = topic_labels or {}
+        self.all = (1 << len(source_ids)) - 1
+
+    @classmethod
+    def build(cls, questions_data: List[dict]) -> "FacetIndex":
+        source_ids = []
+        bitmaps = {facet: defaultdict(int) for facet in FACETS}
+        topic_labels = {}
+        for qid, (source_id, grade, q) in enumerate(iter_question_ids(questions_data)):
+            source_ids.append(source_id)
+            for facet, values in facet_values(grade, q).items():
+                for value in values:
+                    bitmaps[facet][value] |= 1 << qid
+            if q.get('topic'):
+                topic_labels.setdefault(topic_code_for(q['topic']), q['topic'])
+        return cls(source_ids, {facet: dict(values) for facet, values in bitmaps.items()}, topic_labels)
+
+    def bitmap(self, **filters: FilterValue) -> int:
+        """
+        Bitmap of the questions matching every facet filter.
+
+        A filter value may be a single value or a list of values (OR within
+        the facet); unknown values match nothing.
+        """
+        result = self.all
+        for facet, wanted in filters.items():
+            if facet not in self.bitmaps:
+                raise KeyError(f"unknown facet: {facet} (facets: {', '.join(FACETS)})")
+            values = [wanted] if isinstance(wanted, str) else list(wanted)
+            union = 0
+            for value in values:
+                for key in normalize_query(facet, value):
+                    union |= self.bitmaps[facet].get(key, 0)
+            result &= union
+            if not result:
+                break
+        return result
+
+    def ids(self, **filters: FilterValue) -> List[int]:
+        return list(iter_bits(self.bitmap(**filters)))
+
+    def query(self, **filters: FilterValue) -> List[str]:
+        """source_ids of the matching questions, in corpus order."""
+        return [self.source_ids[i] for i in iter_bits(self.bitmap(**filters))]
+
+    def count(self, **filters: FilterValue) -> int:
+        return self.bitmap(**filters).bit_count()
+
+    def facet_counts(self, facet: str, **filters: FilterValue) -> Dict[str, int]:
+        """Count per value of facet among the questions matching filters (drill-down)."""
+        base = self.bitmap(**filters)
+        counts = {value: (bits & base).bit_count() for value, bits in self.bitmaps[facet].items()}
+        return {value: n for value, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])) if n}
+
+    def values(self, facet: str) -> List[str]:
+        return sorted(self.bitmaps[facet])
+
+    def topic_label(self, code: str) -> str:
+        """Topic label as first written in the corpus (the code itself if unknown)."""
+        return self.topic_labels.get(code, code)
+
+    def to_dict(self) -> dict:
+        size = len(self.source_ids)
+        return {
+            'version': 1,
+            'size': size,
+            'source_ids': self.source_ids,
+            'topic_labels': dict(sorted(self.topic_labels.items())),
+            'facets': {facet: {value: encode_bitmap(bits, size) for value, bits in sorted(values.items())}
+                       for facet, values in self.bitmaps.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FacetIndex":
+        return cls(data['source_ids'], {facet: {value: decode_bitmap(bits) for value, bits in values.items()}
+                                        for facet, values in data['facets'].items()},
+                   data.get('topic_labels'))
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: Path = OUTPUT_DIR / INDEX_FILE) -> "FacetIndex":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def verify_against_scan(index: FacetIndex, questions_data: List[dict], filters: Dict[str, str]) -> bool:
+    """The bitmap answer equals a linear scan over the corpus with the same normalization."""
+    expected = []
+    for source_id, grade, q in iter_question_ids(questions_data):
+        values = facet_values(grade, q)
+        if all(set(normalize_query(facet, value)) & set(values[facet]) for facet, value in filters.items()):
+            expected.append(source_id)
+    return index.query(**filters) == expected
+
+
+def parse_filters(terms: List[str]) -> Dict[str, List[str]]:
+    """['grade=pre2', 'cefr_level=B1,B2'] → {'grade': ['pre2'], 'cefr_level': ['B1', 'B2']}"""
+    filters = {}
+    for term in terms:
+        facet, _, value = term.partition('=')
+        if not value:
+            raise ValueError(f"filter must be facet=value[,value...]: {term}")
+        filters[facet] = [v.strip() for v in value.split(',')]
+    return filters
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Bitmap facet index over the question corpus"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--output', type=Path, default=OUTPUT_DIR / INDEX_FILE)
+    parser.add_argument('--query', nargs='+', metavar='FACET=VALUE', help="query the existing index")
+    args = parser.parse_args()
+
+    if args.query:
+        index = FacetIndex.load(args.output)
+        filters = parse_filters(args.query)
+        start = time.perf_counter()
+        results = index.query(**filters)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"🔎 {len(results)} question(s) in {elapsed_us:.1f} µs")
+        for source_id in results:
+            print(f"   {source_id}")
+        return 0
+
+    print("=" * 70)
+    print("Bitmap Facet Index")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_facet_index", args.profile, args.report_dir) as run:
+        with run.stage("load_corpus") as stage:
+            questions_data = load_questions(args.questions)
+            stage.rows = sum(len(g.get('questions', [])) for g in questions_data)
+
+        with run.stage("build_index", rows=stage.rows):
+            index = FacetIndex.build(questions_data)
+
+        with run.stage("write_index"):
+            index.save(args.output)
+
+    # 全ファセットの単一値クエリを線形スキャンと照合
+    mismatches = [(facet, value) for facet in FACETS for value in index.values(facet)
+                  if not verify_against_scan(index, questions_data, {facet: value})]
+
+    print(f"💾 Index written to: {args.output} ({args.output.stat().st_size / 1024:.1f} KB)")
+    print(f"   {len(index.source_ids)} questions")
+    for facet in FACETS:
+        print(f"  - {facet}: {len(index.bitmaps[facet])} values")
+    if mismatches:
+        print(f"❌ {len(mismatches)} facet value(s) disagree with a linear scan: {mismatches[:5]}")
+        return 1
+    print("✓ Every facet value matches a linear scan")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Offline few-shot retrieval index over the real question corpus.
+
+Embeds every question in eiken_questions.json with the local hashed
+n-gram TF-IDF + SVD model and precomputes, for every
+(grade, question_type, topic) key, the top-k most similar real examples of
+that grade and question type. Topics come from the corpus and from the
+eiken_topic_areas seed catalog, so keys exist even for topics the corpus
+has no question for yet. Prompt assembly (few-shot-builder.ts) then looks
+up "<grade>|<question_type>|<topic_code>" instead of ranking at runtime.
+
+    data/few_shot/few_shot_bundle.json
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from build_topic_catalog import load_existing_catalog
+from eiken_corpus import (
+    BASE_DIR,
+    QUESTIONS_FILE,
+    grade_sort_key,
+    iter_question_ids,
+    load_questions,
+    question_text,
+    topic_code_for,
+)
+from local_embeddings import LocalEmbedder, normalize_rows, top_k
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+OUTPUT_DIR = BASE_DIR / "data" / "few_shot"
+DEFAULT_K = 3
+N_COMPONENTS = 64
+ANY_TOPIC = "*"
+
+# バンドルに含める問題フィールド
+EXAMPLE_FIELDS = ('question_type', 'topic', 'question_text_en', 'question_text_ja', 'passage',
+                  'choices', 'correct_answer', 'sample_answer', 'constraints')
+
+
+def example_text(q: dict) -> str:
+    return " ".join([question_text(q)] + [str(c) for c in q.get('choices') or []] + [q.get('topic') or ''])
+
+
+def topic_texts(questions: List[dict], catalog: List[dict]) -> Dict[str, str]:
+    """topic_code → description text (labels, scenario and sub-topics)."""
+    texts = defaultdict(list)
+    for q in questions:
+        if q.get('topic'):
+            texts[topic_code_for(q['topic'])].append(q['topic'])
+    for topic in catalog:
+        texts[topic['topic_code']] += [topic.get('topic_label_en') or '', topic['topic_code'].replace('_', ' '),
+                                       topic.get('scenario_description') or '', " ".join(topic['sub_topics'])]
+    return {code: " ".join(dict.fromkeys(t for t in parts if t)) for code, parts in texts.items()}
+
+
+def build_bundle(questions_data: List[dict], catalog: List[dict], k: int = DEFAULT_K,
+                 n_components: int = N_COMPONENTS) -> dict:
+    """Embed the corpus and rank examples for every (grade, question_type, topic) key."""
+    examples = []
+    for source_id, grade, q in iter_question_ids(questions_data):
+        examples.append({'source_id': source_id, 'grade': grade,
+                         'topic_code': topic_code_for(q.get('topic') or ''),
+                         **{f: q.get(f) for f in EXAMPLE_FIELDS if q.get(f) not in (None, '', [], {})}})
+
+    questions = [q for _, _, q in iter_question_ids(questions_data)]
+    embedder = LocalEmbedder(n_components=n_components).fit([example_text(q) for q in questions])
+    vectors = embedder.embed([example_text(q) for q in questions])
+
+    # トピックのクエリベクトル = 説明文 + そのトピックの実例の重心
+    descriptions = topic_texts(questions, catalog)
+    topic_codes = sorted(descriptions)
+    topic_vectors = embedder.embed([descriptions[c] for c in topic_codes])
+    for i, code in enumerate(topic_codes):
+        members = [j for j, e in enumerate(examples) if e['topic_code'] == code]
+        if members:
+            topic_vectors[i] += vectors[members].mean(axis=0)
+    topic_vectors = normalize_rows(topic_vectors)
+    topic_index = {code: i for i, code in enumerate(topic_codes)}
+
+    catalog_topics = defaultdict(set)
+    for topic in catalog:
+        catalog_topics[topic['grade']].add(topic['topic_code'])
+
+    groups = defaultdict(list)
+    for j, e in enumerate(examples):
+        groups[(e['grade'], e['question_type'])].append(j)
+
+    lookup = {}
+    for (grade, question_type), members in sorted(groups.items(), key=lambda g: (grade_sort_key(g[0][0]), g[0][1])):
+        member_vectors = vectors[members]
+        grade_topics = sorted({examples[j]['topic_code'] for j in members} | catalog_topics[grade])
+
+        queries = topic_vectors[[topic_index[c] for c in grade_topics]]
+        indices, scores = top_k(queries, member_vectors, k)
+        for code, row, row_scores in zip(grade_topics, indices, scores):
+            lookup[f"{grade}|{question_type}|{code}"] = [
+                [members[i], round(float(s), 4)] for i, s in zip(row, row_scores) if i >= 0
+            ]
+
+        # トピック指定なし: 問題タイプの重心に近い代表例
+        centroid = normalize_rows(member_vectors.mean(axis=0, keepdims=True))
+        indices, scores = top_k(centroid, member_vectors, k)
+        lookup[f"{grade}|{question_type}|{ANY_TOPIC}"] = [
+            [members[i], round(float(s), 4)] for i, s in zip(indices[0], scores[0]) if i >= 0
+        ]
+
+    return {
+        'version': 1,
+        'k': k,
+        'key_format': "<grade>|<question_type>|<topic_code or *>",
+        'model': {'type': 'hashed-ngram-tfidf-svd', 'dimension': embedder.dimension,
+                  'n_features': embedder.n_features},
+        'examples': examples,
+        'lookup': lookup,
+    }
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Build the offline few-shot lookup bundle"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('-k', type=int, default=DEFAULT_K, help="examples per key")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Few-shot Retrieval Index")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_few_shot_index", args.profile, args.report_dir) as run:
+        with run.stage("load_corpus") as stage:
+            questions_data = load_questions(args.questions)
+            catalog = load_existing_catalog()
+            stage.rows = sum(len(g.get('questions', [])) for g in questions_data)
+
+        with run.stage("build_bundle", rows=stage.rows):
+            bundle = build_bundle(questions_data, catalog, args.k)
+
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        output = args.output_dir / "few_shot_bundle.json"
+        with run.stage("write_bundle", rows=len(bundle['lookup'])):
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(bundle, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"💾 Bundle written to: {output} ({output.stat().st_size / 1024:.1f} KB)")
+    print(f"   {len(bundle['examples'])} examples, {len(bundle['lookup'])} keys, k={bundle['k']}")
+    for grade in sorted({e['grade'] for e in bundle['examples']}, key=grade_sort_key):
+        keys = [key for key in bundle['lookup'] if key.startswith(f"{grade}|")]
+        print(f"  - Grade {grade}: {len(keys)} keys")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+MinHash / LSH near-duplicate index for the copyright checks.
+
+copyright-validator.ts compares a generated question against every
+existing text with n-gram Jaccard, so its cost grows with the archive.
+This script computes MinHash signatures of word-trigram shingles for every
+question in eiken_questions.json and every past-paper passage window, bands
+them into LSH buckets and emits:
+
+    data/copyright_index/minhash_index.json      parameters, seeds, documents
+    data/copyright_index/minhash_signatures.bin  uint32 LE, documents × num_perm
+    data/copyright_index/minhash_index.sql       eiken_minhash_* rows (migration 0030)
+    data/copyright_index/near_duplicates.json    offline all-pairs report
+
+At runtime a new question is hashed the same way (FNV-1a per shingle, then
+murmur3 fmix32 with each seed) and only documents sharing a band bucket
+need an exact comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from eiken_corpus import (
+    BASE_DIR,
+    QUESTIONS_FILE,
+    grade_sort_key,
+    iter_question_ids,
+    load_past_paper_texts,
+    load_questions,
+    question_text,
+    tokenize,
+)
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+if TYPE_CHECKING:
+    import numpy as np
+
+OUTPUT_DIR = BASE_DIR / "data" / "copyright_index"
+
+NUM_PERM = 128
+BANDS = 64                 # 64 bands × 2 rows: 50% candidate probability at J ≈ 0.125,
+ROWS_PER_BAND = NUM_PERM // BANDS   # matching the runtime trigram thresholds (0.10-0.15)
+SHINGLE_SIZE = 3
+PASSAGE_WORDS = 80         # past papers are indexed as overlapping word windows
+PASSAGE_STRIDE = 40
+DEFAULT_REPORT_THRESHOLD = 0.5
+UPSERT_BATCH_SIZE = 500
+
+_FNV_OFFSET = 0x811C9DC5
+_FNV_PRIME = 0x01000193
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]+")
+
+
+def fmix32(h: np.ndarray) -> np.ndarray:
+    """murmur3 finalizer on uint32 arrays (Math.imul-compatible wraparound)."""
+    import numpy as np
+
+    h = h ^ (h >> np.uint32(16))
+    h = h * np.uint32(0x85EBCA6B)
+    h = h ^ (h >> np.uint32(13))
+    h = h * np.uint32(0xC2B2AE35)
+    return h ^ (h >> np.uint32(16))
+
+
+def fnv1a32(text: str) -> int:
+    h = _FNV_OFFSET
+    for byte in text.encode('utf-8'):
+        h = ((h ^ byte) * _FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+@lru_cache(maxsize=None)
+def perm_seeds() -> np.ndarray:
+    """Seed of each of the NUM_PERM MinHash permutations."""
+    import numpy as np
+
+    return fmix32(np.arange(1, NUM_PERM + 1, dtype=np.uint32) * np.uint32(0x9E3779B1))
+
+
+@lru_cache(maxsize=None)
+def band_seeds() -> np.ndarray:
+    """Initial bucket hash of each LSH band."""
+    import numpy as np
+
+    return fmix32(np.arange(1, BANDS + 1, dtype=np.uint32) * np.uint32(0x85EBCA77))
+
+
+def shingles(tokens: List[str], size: int = SHINGLE_SIZE) -> Set[str]:
+    """Word n-gram shingles; texts shorter than size become a single shingle."""
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def collect_documents(questions_data: List[dict], past_papers: List[dict]) -> List[dict]:
+    """
+    Questions are indexed as passage + stem + sample answer + choices (the
+    runtime compares question text plus choices); past papers as windows of
+    PASSAGE_WORDS tokens every PASSAGE_STRIDE tokens.
+    """
+    documents = []
+    for source_id, grade, q in iter_question_ids(questions_data):
+        text = " ".join([question_text(q)] + [str(c) for c in q.get('choices') or []])
+        documents.append({'source_type': 'question', 'source_id': source_id,
+                          'group': source_id, 'grade': grade, 'tokens': tokenize(text)})
+
+    for paper in past_papers:
+        tokens = tokenize(_NON_ASCII_RE.sub(' ', paper['text']))
+        last_start = max(len(tokens) - PASSAGE_WORDS, 0)
+        starts = list(range(0, last_start + 1, PASSAGE_STRIDE))
+        if starts[-1] != last_start:
+            starts.append(last_start)
+        for start in starts:
+            window = tokens[start:start + PASSAGE_WORDS]
+            if window:
+                documents.append({'source_type': 'past_paper',
+                                  'source_id': f"{paper['paper_id']}#{start}",
+                                  'group': paper['paper_id'], 'grade': paper['grade'],
+                                  'tokens': window})
+
+    for doc in documents:
+        doc['shingles'] = shingles(doc['tokens'])
+    return [doc for doc in documents if doc['shingles']]
+
+
+def compute_signatures(shingle_sets: List[Set[str]], chunk: int = 16) -> np.ndarray:
+    """
+    MinHash signatures (documents × NUM_PERM, uint32). All shingle hashes are
+    concatenated once and each block of permutations is reduced per document
+    with np.minimum.reduceat.
+    """
+    import numpy as np
+
+    hash_cache: Dict[str, int] = {}
+    hashes, lengths = [], []
+    for shingle_set in shingle_sets:
+        for s in shingle_set:
+            if s not in hash_cache:
+                hash_cache[s] = fnv1a32(s)
+            hashes.append(hash_cache[s])
+        lengths.append(len(shingle_set))
+
+    values = np.asarray(hashes, dtype=np.uint32)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    signatures = np.empty((len(shingle_sets), NUM_PERM), dtype=np.uint32)
+    for start in range(0, NUM_PERM, chunk):
+        seeds = perm_seeds()[start:start + chunk, None]
+        permuted = fmix32(values[None, :] ^ seeds)
+        signatures[:, start:start + chunk] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def band_buckets(signatures: np.ndarray) -> np.ndarray:
+    """LSH bucket per (document, band): fmix32 chain over the band's rows."""
+    import numpy as np
+
+    banded = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND)
+    buckets = np.broadcast_to(band_seeds(), (len(signatures), BANDS)).copy()
+    for row in range(ROWS_PER_BAND):
+        buckets = fmix32(buckets ^ banded[:, :, row])
+    return buckets
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class MinHashIndex:
+    """Signatures and band buckets of a document set, with query helpers."""
+
+    def __init__(self, documents: List[dict]):
+        self.documents = documents
+        self.signatures = compute_signatures([d['shingles'] for d in documents])
+        self.buckets = band_buckets(self.signatures)
+        self._bucket_map: Optional[Dict[tuple, List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def bucket_map(self) -> Dict[tuple, List[int]]:
+        """(band, bucket) → doc ids, the lookup the runtime does in SQL."""
+        if self._bucket_map is None:
+            self._bucket_map = {}
+            for doc_id, row in enumerate(self.buckets):
+                for band, bucket in enumerate(row):
+                    self._bucket_map.setdefault((band, int(bucket)), []).append(doc_id)
+        return self._bucket_map
+
+    def query(self, text: str, threshold: float = 0.0, grade: Optional[str] = None) -> List[dict]:
+        """
+        Candidates for a new text: documents sharing at least one band bucket,
+        with estimated and exact shingle Jaccard, most similar first.
+        """
+        query_shingles = shingles(tokenize(text))
+        if not query_shingles:
+            return []
+        signature = compute_signatures([query_shingles])
+        query_buckets = band_buckets(signature)[0]
+
+        bucket_map = self.bucket_map()
+        candidates = set()
+        for band, bucket in enumerate(query_buckets):
+            candidates.update(bucket_map.get((band, int(bucket)), ()))
+
+        results = []
+        for doc_id in candidates:
+            doc = self.documents[doc_id]
+            if grade is not None and doc['grade'] != grade:
+                continue
+            similarity = jaccard(query_shingles, doc['shingles'])
+            if similarity >= threshold:
+                results.append({
+                    'source_id': doc['source_id'],
+                    'grade': doc['grade'],
+                    'estimated_jaccard': round(float((self.signatures[doc_id] == signature[0]).mean()), 4),
+                    'jaccard': round(similarity, 4),
+                })
+        return sorted(results, key=lambda r: -r['jaccard'])
+
+    def candidate_pairs(self) -> np.ndarray:
+        """
+        All (i, j) pairs, i < j, that share a band bucket - found by sorting
+        the (band, bucket) keys rather than comparing every pair.
+        """
+        import numpy as np
+
+        n_docs = len(self.documents)
+        keys = (np.arange(BANDS, dtype=np.uint64)[None, :] << np.uint64(32)) | self.buckets.astype(np.uint64)
+        keys = keys.ravel()
+        doc_ids = np.repeat(np.arange(n_docs, dtype=np.int64), BANDS)
+        order = np.argsort(keys, kind='stable')
+        keys, doc_ids = keys[order], doc_ids[order]
+
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(keys)]))
+
+        pairs = set()
+        for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            members = doc_ids[start:end]
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    i, j = sorted((int(members[a]), int(members[b])))
+                    pairs.add((i, j))
+        return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+    def near_duplicates(self, threshold: float = DEFAULT_REPORT_THRESHOLD) -> List[dict]:
+        """
+        Offline all-pairs report: LSH candidate pairs verified with the exact
+        shingle Jaccard. Overlapping windows of the same paper are skipped.
+        """
+        pairs = self.candidate_pairs()
+        if not len(pairs):
+            return []
+        estimated = (self.signatures[pairs[:, 0]] == self.signatures[pairs[:, 1]]).mean(axis=1)
+
+        report = []
+        for (i, j), est in zip(pairs, estimated):
+            a, b = self.documents[i], self.documents[j]
+            if a['group'] == b['group']:
+                continue
+            similarity = jaccard(a['shingles'], b['shingles'])
+            if similarity >= threshold:
+                report.append({
+                    'a': a['source_id'], 'b': b['source_id'],
+                    'grade_a': a['grade'], 'grade_b': b['grade'],
+                    'estimated_jaccard': round(float(est), 4),
+                    'jaccard': round(similarity, 4),
+                })
+        return sorted(report, key=lambda r: (-r['jaccard'], r['a'], r['b']))
+
+
+def index_version() -> str:
+    return f"{NUM_PERM}x{BANDS}b{SHINGLE_SIZE}w"
+
+
+def index_metadata(index: MinHashIndex) -> dict:
+    return {
+        'version': index_version(),
+        'num_perm': NUM_PERM,
+        'bands': BANDS,
+        'rows_per_band': ROWS_PER_BAND,
+        'shingle_size': SHINGLE_SIZE,
+        'tokenizer': r"[a-z]+(?:['’][a-z]+)? on lowercased text, ’ → '",
+        'shingle_hash': 'fnv1a32(utf-8 shingle)',
+        'permutation': 'fmix32(shingle_hash ^ perm_seed)',
+        'bucket_hash': 'h = band_seed; for each row value v: h = fmix32(h ^ v)',
+        'perm_seeds': perm_seeds().tolist(),
+        'band_seeds': band_seeds().tolist(),
+        'signatures_file': 'minhash_signatures.bin',
+        'documents': [
+            {'doc_id': i, 'source_type': d['source_type'], 'source_id': d['source_id'],
+             'grade': d['grade'], 'word_count': len(d['tokens']), 'shingle_count': len(d['shingles'])}
+            for i, d in enumerate(index.documents)
+        ],
+    }
+
+
+def _sql_text(value) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def generate_index_sql(index: MinHashIndex, batch_size: int = UPSERT_BATCH_SIZE) -> str:
+    """Full reload of eiken_minhash_documents / eiken_minhash_buckets."""
+    version = index_version()
+    lines = [
+        "-- MinHash / LSH index built by scripts/build_minhash_index.py",
+        f"-- Version: {version}, documents: {len(index)}, buckets: {len(index) * BANDS}",
+        "",
+        "DELETE FROM eiken_minhash_buckets;",
+        "DELETE FROM eiken_minhash_documents;",
+        "",
+    ]
+
+    signature_bytes = index.signatures.astype('<u4')
+    for i in range(0, len(index), batch_size):
+        lines.append("INSERT INTO eiken_minhash_documents")
+        lines.append("  (doc_id, source_type, source_id, grade, word_count, shingle_count, signature, index_version)")
+        lines.append("VALUES")
+        lines.append(",\n".join(
+            f"  ({doc_id}, {_sql_text(d['source_type'])}, {_sql_text(d['source_id'])}, {_sql_text(d['grade'])}, "
+            f"{len(d['tokens'])}, {len(d['shingles'])}, X'{signature_bytes[doc_id].tobytes().hex()}', "
+            f"{_sql_text(version)})"
+            for doc_id, d in enumerate(index.documents[i:i + batch_size], start=i)
+        ) + ";")
+        lines.append("")
+
+    rows = [(band, int(bucket), doc_id)
+            for doc_id, doc_buckets in enumerate(index.buckets)
+            for band, bucket in enumerate(doc_buckets)]
+    for i in range(0, len(rows), batch_size):
+        lines.append("INSERT INTO eiken_minhash_buckets (band, bucket, doc_id) VALUES")
+        lines.append(",\n".join(f"  ({band}, {bucket}, {doc_id})" for band, bucket, doc_id in rows[i:i + batch_size]) + ";")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Build the MinHash/LSH copyright index"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REPORT_THRESHOLD,
+                        help="exact Jaccard at or above which a pair is reported")
+    parser.add_argument('--no-past-papers', action='store_true',
+                        help="skip past-paper text (no pdfplumber needed)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MinHash / LSH Copyright Index")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_minhash_index", args.profile, args.report_dir) as run:
+        with run.stage("load_corpus") as stage:
+            questions_data = load_questions(args.questions)
+            past_papers = [] if args.no_past_papers else load_past_paper_texts()
+            documents = collect_documents(questions_data, past_papers)
+            stage.rows = len(documents)
+        print(f"Indexed documents: {len(documents)} "
+              f"({sum(d['source_type'] == 'question' for d in documents)} questions, "
+              f"{sum(d['source_type'] == 'past_paper' for d in documents)} past-paper windows)")
+
+        with run.stage("compute_signatures", rows=len(documents)):
+            index = MinHashIndex(documents)
+
+        with run.stage("near_duplicates") as stage:
+            report = index.near_duplicates(args.threshold)
+            stage.rows = len(report)
+
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        with run.stage("write_outputs", rows=len(index)):
+            with open(args.output_dir / "minhash_index.json", 'w', encoding='utf-8') as f:
+                json.dump(index_metadata(index), f, ensure_ascii=False, indent=2)
+            (args.output_dir / "minhash_signatures.bin").write_bytes(index.signatures.astype('<u4').tobytes())
+            with open(args.output_dir / "minhash_index.sql", 'w', encoding='utf-8') as f:
+                f.write(generate_index_sql(index))
+            with open(args.output_dir / "near_duplicates.json", 'w', encoding='utf-8') as f:
+                json.dump({'threshold': args.threshold, 'pairs': report}, f, ensure_ascii=False, indent=2)
+
+    print(f"\n💾 Index written to: {args.output_dir}")
+    print(f"   signatures: {index.signatures.nbytes / 1024:.1f} KB, "
+          f"buckets: {len(index) * BANDS:,} rows ({BANDS} bands × {ROWS_PER_BAND} rows)")
+
+    print(f"\nNear-duplicate pairs (Jaccard ≥ {args.threshold}): {len(report)}")
+    for grade in sorted({r['grade_a'] for r in report}, key=grade_sort_key):
+        print(f"  - Grade {grade}: {sum(r['grade_a'] == grade for r in report)} pairs")
+    for r in report[:10]:
+        print(f"    {r['jaccard']:.2f}  {r['a']}  ↔  {r['b']}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Aho–Corasick automaton over the multiword entries of the CEFR-J lexicon.
+
+Phrasal verbs and fixed phrases ('look after', 'according to', 'chest of
+drawers', 'a.m.') are invisible to the single-token lookups of
+text-profiler.ts and build_coverage_matrix.py. Every lexicon headword is
+expanded into its spelling variants (lexicon_records.expand_variants),
+tokenized with eiken_corpus.tokenize and lemmatized with
+eiken_lexicon.Lexicon.lemmatize; those with two or more tokens become the
+patterns of one automaton whose alphabet is their lemmas. Text goes
+through the same tokenize + lemmatize, so 'took care of' matches 'take
+care of', and one left-to-right pass over a passage reports every
+multiword expression in it, overlapping ones included.
+
+The automaton is stored as flat int32 arrays:
+
+    edge_start[s] .. edge_start[s + 1]   outgoing edges of state s (CSR)
+    edge_symbol / edge_target            symbol ids (sorted per state) and next states
+    fail[s]                              longest proper suffix state
+    output[s]                            pattern ending at s, or -1
+    dict_link[s]                         next state on the fail chain with an output, or -1
+
+and written with the symbol and pattern tables as one JSON file whose
+arrays are base64 little-endian int32, so a Worker can read them into
+Int32Arrays without a parser for anything else:
+
+    data/mwe_automaton/mwe_automaton.json   format "kobeya-aho/1"
+    data/mwe_automaton/summary.json         pattern / state counts, matches per grade
+
+MultiwordMatcher is the reference matcher over that file; --verify checks
+it against a brute-force n-gram lookup (naive_matches) on the whole corpus.
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from build_text_profiles import collect_documents
+from eiken_corpus import BASE_DIR, GRADE_ORDER, QUESTIONS_FILE, load_past_paper_texts, load_questions, tokenize
+from eiken_lexicon import LEXICON_CSV, Lexicon, load_lexicon
+from lexicon_records import dedupe, expand_variants, read_csv
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+OUTPUT_DIR = BASE_DIR / "data" / "mwe_automaton"
+AUTOMATON_FILE = OUTPUT_DIR / "mwe_automaton.json"
+
+FORMAT = "kobeya-aho/1"
+ARRAYS = ('edge_start', 'edge_symbol', 'edge_target', 'fail', 'output', 'dict_link')
+NO_STATE = -1
+
+Match = Tuple[int, int, int]  # (開始トークン, 終了トークン（含まない）, パターン id)
+
+
+def lemmatize_phrase(text: str, lexicon: Lexicon) -> Tuple[str, ...]:
+    """Token lemmas of a headword or passage, as the automaton sees them."""
+    return tuple(lexicon.lemmatize(token) for token in tokenize(text))
+
+
+def multiword_patterns(csv_path: Path, lexicon: Lexicon) -> Dict[Tuple[str, ...], List[dict]]:
+    """
+    Lemma sequence → lexicon entries for every variant of two or more tokens.
+    Entries are (word, pos) deduped with the lowest CEFR level, and a
+    sequence shared by several headwords ('e-mail', 'E-mail') keeps them all.
+    """
+    table, _ = dedupe(read_csv(csv_path, lower=False))
+    patterns: Dict[Tuple[str, ...], List[dict]] = defaultdict(list)
+    for entry in table:
+        for variant in expand_variants(entry.word):
+            lemmas = lemmatize_phrase(variant, lexicon)
+            if len(lemmas) < 2:
+                continue
+            record = {'word': variant, 'pos': entry.pos, 'cefr_level': entry.cefr_level}
+            if record not in patterns[lemmas]:
+                patterns[lemmas].append(record)
+    return dict(sorted(patterns.items()))
+
+
+def compile_automaton(patterns: Sequence[Tuple[str, ...]]) -> dict:
+    """
+    Trie + failure links of the patterns (pattern id = index in patterns).
+
+    Returns:
+        {'symbols': sorted lemma alphabet, 'lengths': tokens per pattern,
+         'edge_start', 'edge_symbol', 'edge_target', 'fail', 'output', 'dict_link': np.int32 arrays}
+    """
+    import numpy as np
+
+    symbols = sorted({lemma for pattern in patterns for lemma in pattern})
+    symbol_ids = {lemma: i for i, lemma in enumerate(symbols)}
+
+    goto: List[Dict[int, int]] = [{}]
+    output = [NO_STATE]
+    for pattern_id, pattern in enumerate(patterns):
+        state = 0
+        for lemma in pattern:
+            symbol = symbol_ids[lemma]
+            target = goto[state].get(symbol)
+            if target is None:
+                target = goto[state][symbol] = len(goto)
+                goto.append({})
+                output.append(NO_STATE)
+            state = target
+        output[state] = pattern_id
+
+    # 幅優先で fail / dict_link を埋める（浅い状態のリンクが先に確定する）
+    fail = [0] * len(goto)
+    dict_link = [NO_STATE] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for symbol, target in goto[state].items():
+            queue.append(target)
+            f = fail[state]
+            while f and symbol not in goto[f]:
+                f = fail[f]
+            link = goto[f].get(symbol, 0) if state else 0
+            fail[target] = link
+            dict_link[target] = link if output[link] != NO_STATE else dict_link[link]
+
+    edge_start = [0]
+    edge_symbol: List[int] = []
+    edge_target: List[int] = []
+    for edges in goto:
+        for symbol in sorted(edges):
+            edge_symbol.append(symbol)
+            edge_target.append(edges[symbol])
+        edge_start.append(len(edge_symbol))
+
+    arrays = {'edge_start': edge_start, 'edge_symbol': edge_symbol, 'edge_target': edge_target,
+              'fail': fail, 'output': output, 'dict_link': dict_link}
+    return {
+        'symbols': symbols,
+        'lengths': [len(pattern) for pattern in patterns],
+        **{name: np.asarray(values, dtype=np.int32) for name, values in arrays.items()},
+    }
+
+
+def write_automaton(path: Path, automaton: dict, patterns: Dict[Tuple[str, ...], List[dict]]):
+    """JSON artifact: tables as lists, the int32 arrays as base64 ('<i4')."""
+    artifact = {
+        'format': FORMAT,
+        'states': len(automaton['fail']),
+        'symbols': automaton['symbols'],
+        'patterns': [{'lemmas': list(lemmas), 'entries': entries} for lemmas, entries in patterns.items()],
+        'arrays': {name: base64.b64encode(automaton[name].astype('<i4').tobytes()).decode('ascii')
+                   for name in ARRAYS},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(',', ':'))
+
+
+class MultiwordMatcher:
+    """
+    Reference matcher over a kobeya-aho/1 artifact: plain Python lists and
+    bisect, the same steps a TypeScript port would take over Int32Arrays.
+
+        matcher = MultiwordMatcher.load(AUTOMATON_FILE)
+        for start, end, pattern_id in matcher.scan(lemmas):
+            matcher.patterns[pattern_id]['entries']
+    """
+
+    def __init__(self, artifact: dict):
+        import numpy as np
+
+        if artifact.get('format') != FORMAT:
+            raise ValueError(f"not a {FORMAT} automaton")
+        self.symbol_ids = {lemma: i for i, lemma in enumerate(artifact['symbols'])}
+        self.patterns: List[dict] = artifact['patterns']
+        self.lengths = [len(p['lemmas']) for p in self.patterns]
+        for name in ARRAYS:
+            values = np.frombuffer(base64.b64decode(artifact['arrays'][name]), dtype='<i4')
+            setattr(self, name, values.tolist())
+
+    @classmethod
+    def load(cls, path: Path = AUTOMATON_FILE) -> "MultiwordMatcher":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _step(self, state: int, symbol: int) -> int:
+        while True:
+            lo, hi = self.edge_start[state], self.edge_start[state + 1]
+            i = bisect_left(self.edge_symbol, symbol, lo, hi)
+            if i < hi and self.edge_symbol[i] == symbol:
+                return self.edge_target[i]
+            if state == 0:
+                return 0
+            state = self.fail[state]
+
+    def scan(self, lemmas: Iterable[str]) -> List[Match]:
+        """Every pattern occurrence, ordered by end position, longest first at each end."""
+        matches: List[Match] = []
+        state = 0
+        for position, lemma in enumerate(lemmas):
+            symbol = self.symbol_ids.get(lemma)
+            if symbol is None:
+                # どのパターンにも現れない語: 根に戻る
+                state = 0
+                continue
+            state = self._step(state, symbol)
+            hit = state if self.output[state] != NO_STATE else self.dict_link[state]
+            while hit != NO_STATE:
+                pattern_id = self.output[hit]
+                matches.append((position + 1 - self.lengths[pattern_id], position + 1, pattern_id))
+                hit = self.dict_link[hit]
+        return matches
+
+
+def naive_matches(lemmas: Sequence[str], pattern_ids: Dict[Tuple[str, ...], int]) -> List[Match]:
+    """Brute-force reference: look up every n-gram of every pattern length."""
+    lengths = sorted({len(p) for p in pattern_ids})
+    found = []
+    for start in range(len(lemmas)):
+        for length in lengths:
+            if start + length > len(lemmas):
+                break
+            pattern_id = pattern_ids.get(tuple(lemmas[start:start + length]))
+            if pattern_id is not None:
+                found.append((start, start + length, pattern_id))
+    return found
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Aho–Corasick multiword-expression automaton"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--lexicon', type=Path, default=LEXICON_CSV)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--no-past-papers', action='store_true',
+                        help="skip past-paper text (no pdfplumber needed)")
+    parser.add_argument('--verify', action='store_true',
+                        help="also match every document by brute-force n-gram lookup and compare")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Multiword Expression Automaton (Aho–Corasick)")
+    print("=" * 70)
+    print()
+
+    automaton_path = args.output_dir / AUTOMATON_FILE.name
+    with PipelineRun("build_mwe_automaton", args.profile, args.report_dir) as run:
+        with run.stage("load_lexicon") as stage:
+            lexicon = load_lexicon(args.lexicon)
+            patterns = multiword_patterns(args.lexicon, lexicon)
+            stage.rows = len(patterns)
+
+        with run.stage("compile", rows=len(patterns)):
+            automaton = compile_automaton(list(patterns))
+
+        with run.stage("write_automaton", rows=len(automaton['fail'])):
+            write_automaton(automaton_path, automaton, patterns)
+            matcher = MultiwordMatcher.load(automaton_path)
+
+        with run.stage("load_corpus") as stage:
+            past_papers = [] if args.no_past_papers else load_past_paper_texts()
+            documents = collect_documents(load_questions(args.questions), past_papers)
+            lemma_docs = [lemmatize_phrase(d['text'], lexicon) for d in documents]
+            stage.rows = sum(len(lemmas) for lemmas in lemma_docs)
+
+        with run.stage("scan", rows=len(documents)):
+            start = time.perf_counter()
+            matches = [matcher.scan(lemmas) for lemmas in lemma_docs]
+            scan_seconds = time.perf_counter() - start
+
+    tokens = sum(len(lemmas) for lemmas in lemma_docs)
+    by_grade: Dict[str, Counter] = defaultdict(Counter)
+    for doc, found in zip(documents, matches):
+        by_grade[doc['grade']].update(pattern_id for _, _, pattern_id in found)
+    totals = Counter()
+    for counts in by_grade.values():
+        totals.update(counts)
+
+    def label(pattern_id: int) -> str:
+        return matcher.patterns[pattern_id]['entries'][0]['word']
+
+    size = automaton_path.stat().st_size
+    summary = {
+        'patterns': len(patterns),
+        'entries': sum(len(entries) for entries in patterns.values()),
+        'symbols': len(automaton['symbols']),
+        'states': len(automaton['fail']),
+        'edges': len(automaton['edge_symbol']),
+        'artifact_bytes': size,
+        'documents': len(documents),
+        'tokens': tokens,
+        'matches': sum(len(found) for found in matches),
+        'scan_seconds': round(scan_seconds, 4),
+        'matches_by_grade': {grade: sum(by_grade[grade].values()) for grade in GRADE_ORDER if grade in by_grade},
+        'top_expressions': [(label(pattern_id), n) for pattern_id, n in totals.most_common(30)],
+        'top_expressions_by_grade': {grade: [(label(pattern_id), n) for pattern_id, n in by_grade[grade].most_common(10)]
+                                     for grade in GRADE_ORDER if grade in by_grade},
+    }
+    with open(args.output_dir / "summary.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"📊 {summary['entries']:,} multiword entries → {summary['patterns']:,} patterns, "
+          f"{summary['symbols']:,} symbols, {summary['states']:,} states, {summary['edges']:,} edges")
+    print(f"📊 Scanned {len(documents):,} documents ({tokens:,} tokens) in {scan_seconds:.2f}s: "
+          f"{summary['matches']:,} matches")
+    for grade, n in summary['matches_by_grade'].items():
+        top = ", ".join(f"{word} ({count})" for word, count in summary['top_expressions_by_grade'][grade][:5])
+        print(f"   {grade:<6}{n:>7,}  {top}")
+    print()
+    print(f"💾 Automaton: {automaton_path} ({size / 1024:.1f} KB)")
+    print(f"💾 Summary: {args.output_dir / 'summary.json'}")
+
+    if args.verify:
+        # 1 パスの走査結果を全 n-gram の総当たりと照合
+        pattern_ids = {lemmas: i for i, lemmas in enumerate(patterns)}
+        mismatches = sum(1 for lemmas, found in zip(lemma_docs, matches)
+                         if sorted(found) != sorted(naive_matches(lemmas, pattern_ids)))
+        if mismatches:
+            print(f"❌ {mismatches} documents differ from brute-force n-gram matching")
+            return 1
+        print("✓ Automaton matches brute-force n-gram matching")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
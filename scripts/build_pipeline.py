@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Incremental orchestrator for the Python data pipeline.
+
+Every stage declares the script it runs plus its input and output files.
+Stage order follows from those declarations (a stage depends on whoever
+produces its inputs). Inputs are hashed, and a stage only reruns when its
+fingerprint changed or an output is missing; independent branches run in
+parallel.
+
+    python scripts/build_pipeline.py              # refresh everything that changed
+    python scripts/build_pipeline.py suitability  # one target plus its upstream
+    python scripts/build_pipeline.py --dry-run    # show what would run
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+STATE_FILE = BASE_DIR / "data" / ".pipeline_state.json"
+QUESTIONS_UPLOAD = os.environ.get("EIKEN_QUESTIONS_UPLOAD", "/home/user/uploaded_files/eikendate.txt")
+D1_DATABASE = "kobeya-logs-db"
+PY = sys.executable
+
+# Paths are relative to the repository root; globs are allowed in inputs.
+# Each stage's own script is added to its inputs automatically.
+STAGES = [
+    {
+        'name': 'convert-cefrj',
+        'command': [PY, 'scripts/convert-cefrj-wordlist.py'],
+        'inputs': ['data/vocabulary/cefrj_wordlist_v16.xlsx',
+                   'scripts/lexicon_records.py'],
+        'outputs': ['data/vocabulary/cefrj_wordlist_parsed.csv'],
+    },
+    {
+        'name': 'corpus-frequencies',
+        'command': [PY, 'scripts/corpus_frequencies.py'],
+        'inputs': ['eiken_past_papers/**/*.pdf',
+                   'data/vocabulary-sources/ngsl-full-raw.csv',
+                   'data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/irregular-*.json',
+                   'scripts/eiken_corpus.py',
+                   'scripts/eiken_lexicon.py'],
+        'outputs': ['data/lexicon_frequencies/lemma_frequencies.csv',
+                    'data/lexicon_frequencies/summary.json'],
+    },
+    {
+        'name': 'import-cefrj',
+        'command': [PY, 'scripts/import-cefrj-to-db.py'],
+        'inputs': ['data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/lexicon_frequencies/lemma_frequencies.csv',
+                   'scripts/batch_payloads.py',
+                   'scripts/corpus_frequencies.py',
+                   'scripts/lexicon_records.py'],
+        'outputs': ['migrations/0019_import_cefrj_wordlist.sql',
+                    'data/vocabulary/cefrj_wordlist_lexicon.ndjson',
+                    'data/vocabulary/cefrj_wordlist_conflicts.json'],
+    },
+    {
+        'name': 'apply-cefrj',
+        'command': ['npx', 'wrangler', 'd1', 'execute', D1_DATABASE, '--local',
+                    '--file=migrations/0019_import_cefrj_wordlist.sql'],
+        'inputs': ['migrations/0019_import_cefrj_wordlist.sql'],
+        'outputs': [],
+        'apply': True,
+    },
+    {
+        'name': 'parse-questions',
+        'command': [PY, 'scripts/parse_eiken_questions.py', '--input', QUESTIONS_UPLOAD],
+        'inputs': [QUESTIONS_UPLOAD],
+        'outputs': ['data/eiken_questions.json'],
+    },
+    {
+        'name': 'facet-index',
+        'command': [PY, 'scripts/build_facet_index.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'scripts/eiken_corpus.py'],
+        'outputs': ['data/facet_index/facet_index.json'],
+    },
+    {
+        'name': 'suitability',
+        'command': [PY, 'scripts/generate_suitability_scores.py'],
+        'inputs': ['data/facet_index/facet_index.json',
+                   'scripts/build_facet_index.py'],
+        'outputs': ['data/phase2a_prep/suitability_scores.json',
+                    'data/phase2a_prep/suitability_scores.sql',
+                    'data/phase2a_prep/suitability_report.txt'],
+    },
+    {
+        'name': 'mock-data',
+        'command': [PY, 'scripts/generate_mock_data.py'],
+        'inputs': ['data/facet_index/facet_index.json',
+                   'scripts/build_facet_index.py'],
+        'outputs': ['data/phase2a_prep/mock_data.json',
+                    'data/phase2a_prep/mock_data.sql'],
+    },
+    {
+        'name': 'topic-catalog',
+        'command': [PY, 'scripts/build_topic_catalog.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'migrations/0010_create_topic_system.sql',
+                   'eiken_past_papers/**/*.pdf',
+                   'data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/irregular-*.json',
+                   'scripts/eiken_corpus.py',
+                   'scripts/eiken_lexicon.py'],
+        'outputs': ['data/phase2a_prep/topic_catalog.json',
+                    'data/phase2a_prep/topic_catalog.sql'],
+    },
+    {
+        'name': 'emergency-topics',
+        'command': [PY, 'scripts/generate_emergency_topics.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'migrations/0010_create_topic_system.sql',
+                   'eiken_past_papers/**/*.pdf',
+                   'data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/irregular-*.json',
+                   'scripts/eiken_corpus.py',
+                   'scripts/eiken_lexicon.py',
+                   'scripts/build_topic_catalog.py'],
+        'outputs': ['data/phase2a_prep/emergency_topics.json',
+                    'data/phase2a_prep/emergency_topics.sql'],
+    },
+    {
+        'name': 'text-profiles',
+        'command': [PY, 'scripts/build_text_profiles.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/irregular-*.json',
+                   'eiken_past_papers/**/*.pdf',
+                   'scripts/batch_payloads.py',
+                   'scripts/eiken_corpus.py',
+                   'scripts/eiken_lexicon.py'],
+        'outputs': ['data/phase2a_prep/text_profiles.json',
+                    'data/phase2a_prep/eiken_questions_profiled.json',
+                    'data/phase2a_prep/text_profiles.sql',
+                    'data/phase2a_prep/text_profiles.ndjson'],
+    },
+    {
+        'name': 'coverage-matrix',
+        'command': [PY, 'scripts/build_coverage_matrix.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/irregular-*.json',
+                   'eiken_past_papers/**/*.pdf',
+                   'scripts/build_text_profiles.py',
+                   'scripts/eiken_corpus.py',
+                   'scripts/eiken_lexicon.py'],
+        'outputs': ['data/coverage_matrix/passage_lemma_counts.npz',
+                    'data/coverage_matrix/columns.json',
+                    'data/coverage_matrix/coverage.json',
+                    'data/coverage_matrix/summary.json'],
+    },
+    {
+        'name': 'mwe-automaton',
+        'command': [PY, 'scripts/build_mwe_automaton.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'data/vocabulary/cefrj_wordlist_parsed.csv',
+                   'data/irregular-*.json',
+                   'eiken_past_papers/**/*.pdf',
+                   'scripts/build_text_profiles.py',
+                   'scripts/eiken_corpus.py',
+                   'scripts/eiken_lexicon.py',
+                   'scripts/lexicon_records.py'],
+        'outputs': ['data/mwe_automaton/mwe_automaton.json',
+                    'data/mwe_automaton/summary.json'],
+    },
+    {
+        'name': 'minhash-index',
+        'command': [PY, 'scripts/build_minhash_index.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'eiken_past_papers/**/*.pdf',
+                   'scripts/eiken_corpus.py'],
+        'outputs': ['data/copyright_index/minhash_index.json',
+                    'data/copyright_index/minhash_signatures.bin',
+                    'data/copyright_index/minhash_index.sql',
+                    'data/copyright_index/near_duplicates.json'],
+    },
+    {
+        'name': 'difficulty-scores',
+        'command': [PY, 'scripts/score_vocabulary_master.py'],
+        'inputs': ['migrations/0025_create_vocabulary_master.sql',
+                   'migrations/0026_populate_vocabulary_master.sql',
+                   'scripts/difficulty_scoring.py'],
+        'outputs': ['data/vocabulary/vocabulary_master_difficulty.sql'],
+    },
+    {
+        'name': 'few-shot-index',
+        'command': [PY, 'scripts/build_few_shot_index.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'migrations/0010_create_topic_system.sql',
+                   'scripts/eiken_corpus.py',
+                   'scripts/local_embeddings.py'],
+        'outputs': ['data/few_shot/few_shot_bundle.json'],
+    },
+    {
+        'name': 'embedding-index',
+        'command': [PY, 'scripts/build_embedding_index.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'migrations/0010_create_topic_system.sql',
+                   'eiken_past_papers/**/*.pdf',
+                   'scripts/eiken_corpus.py',
+                   'scripts/build_topic_catalog.py',
+                   'scripts/generate_emergency_topics.py',
+                   'scripts/local_embeddings.py'],
+        'outputs': ['data/embeddings/embeddings.npy',
+                    'data/embeddings/embeddings_meta.json',
+                    'data/embeddings/local_embedder.npz'],
+    },
+    {
+        'name': 'pdf-analysis',
+        'command': [PY, 'analyze_eiken_pdf.py', '--store'],
+        'inputs': ['eiken_past_papers/**/*.pdf',
+                   'scripts/batch_payloads.py',
+                   'scripts/eiken_corpus.py'],
+        'outputs': ['data/pdf_analysis/manifest.json',
+                    'data/pdf_analysis/pdf_analysis.sql',
+                    'data/pdf_analysis/pdf_analysis.ndjson',
+                    'data/pdf_analysis/kv_bulk.json'],
+    },
+    {
+        'name': 'vocab-warmup',
+        'command': [PY, 'scripts/build_vocab_warmup.py'],
+        'inputs': ['data/eiken_questions.json',
+                   'data/schema/template.sqlite',
+                   'data/lexicon_frequencies/lemma_frequencies.csv',
+                   'eiken_past_papers/**/*.pdf',
+                   'scripts/build_schema_template.py',
+                   'scripts/corpus_frequencies.py',
+                   'scripts/eiken_corpus.py'],
+        'outputs': ['data/vocab_warmup/kv_bulk.json',
+                    'data/vocab_warmup/seed.json',
+                    'data/vocab_warmup/summary.json'],
+    },
+    {
+        'name': 'schema-template',
+        'command': [PY, 'scripts/build_schema_template.py'],
+        'inputs': ['migrations/[0-9]*.sql',
+                   'scripts/schema_replay.py'],
+        'outputs': ['data/schema/squashed_schema.sql',
+                    'data/schema/template.sqlite',
+                    'data/schema/template_manifest.json'],
+    },
+]
+
+
+def is_glob(pattern: str) -> bool:
+    return any(ch in pattern for ch in '*?[')
+
+
+def resolve(pattern: str) -> List[Path]:
+    """Expand an input pattern (repo-relative glob or plain path) to existing files."""
+    if is_glob(pattern):
+        return sorted(p for p in BASE_DIR.glob(pattern) if p.is_file())
+    path = BASE_DIR / pattern
+    return [path] if path.is_file() else []
+
+
+def file_hash(path: Path, _cache: Dict[tuple, str] = {}) -> str:
+    """sha256 of a file, memoised on (path, size, mtime) for this process."""
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _cache:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _cache[key] = digest.hexdigest()
+    return _cache[key]
+
+
+def stage_inputs(stage: dict) -> List[str]:
+    """Declared inputs plus every Python script in the stage's command."""
+    inputs = list(stage['inputs'])
+    for arg in stage['command']:
+        if arg.endswith('.py') and arg not in inputs:
+            inputs.append(arg)
+    return inputs
+
+
+def fingerprint(stage: dict) -> Optional[str]:
+    """Hash of the command and every input file; None if an input is missing."""
+    digest = hashlib.sha256(json.dumps(stage['command'][1:]).encode())
+    for pattern in stage_inputs(stage):
+        files = resolve(pattern)
+        if not files:
+            return None
+        for path in files:
+            digest.update(str(path.relative_to(BASE_DIR) if path.is_relative_to(BASE_DIR) else path).encode())
+            digest.update(file_hash(path).encode())
+    return digest.hexdigest()
+
+
+def build_graph(stages: List[dict]) -> Dict[str, set]:
+    """
+    stage name → names of the stages producing its inputs. Glob inputs
+    ('migrations/[0-9]*.sql') depend on every stage with a matching output.
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage['outputs']:
+            producers[output] = stage['name']
+    graph = {}
+    for stage in stages:
+        upstream = set()
+        for pattern in stage_inputs(stage):
+            if is_glob(pattern):
+                upstream.update(name for output, name in producers.items() if fnmatch.fnmatchcase(output, pattern))
+            elif pattern in producers:
+                upstream.add(producers[pattern])
+        upstream.discard(stage['name'])
+        graph[stage['name']] = upstream
+    return graph
+
+
+def select_stages(stages: List[dict], targets: List[str], include_apply: bool) -> List[dict]:
+    """Targets plus everything upstream of them (all stages when no targets)."""
+    by_name = {s['name']: s for s in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise SystemExit(f"❌ Unknown stage(s): {', '.join(unknown)} (available: {', '.join(by_name)})")
+
+    if not targets:
+        return [s for s in stages if include_apply or not s.get('apply')]
+
+    graph = build_graph(stages)
+    wanted, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(graph[name])
+    return [s for s in stages if s['name'] in wanted]
+
+
+def load_state(path: Path = STATE_FILE) -> dict:
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state: dict, path: Path = STATE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def plan_stage(stage: dict, state: dict, force: bool) -> tuple:
+    """Decide (action, fingerprint): 'run', 'up-to-date' or 'unavailable'."""
+    fp = fingerprint(stage)
+    outputs_present = all((BASE_DIR / o).exists() for o in stage['outputs'])
+
+    if fp is None:
+        # Source inputs are not on this machine: keep the committed outputs
+        return ('unavailable' if outputs_present and stage['outputs'] else 'missing-inputs'), None
+    if force or not outputs_present or state.get(stage['name'], {}).get('fingerprint') != fp:
+        return 'run', fp
+    return 'up-to-date', fp
+
+
+def run_stage(stage: dict) -> dict:
+    """Run one stage's command from the repository root."""
+    start = time.perf_counter()
+    completed = subprocess.run(stage['command'], cwd=BASE_DIR, capture_output=True, text=True)
+    return {
+        'returncode': completed.returncode,
+        'seconds': time.perf_counter() - start,
+        'stdout': completed.stdout,
+        'stderr': completed.stderr,
+    }
+
+
+def run_pipeline(stages: List[dict], jobs: int, force: bool = False, dry_run: bool = False,
+                 verbose: bool = False) -> Dict[str, dict]:
+    """Run the selected stages in dependency order, independent ones in parallel."""
+    state = load_state()
+    graph = build_graph(stages)
+    names = {s['name'] for s in stages}
+    deps = {name: graph[name] & names for name in names}
+    by_name = {s['name']: s for s in stages}
+
+    results = {}
+    running = {}
+    fingerprints = {}
+
+    def ready():
+        return [n for n in names
+                if n not in results and n not in running.values()
+                and deps[n] <= set(results)]
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(results) < len(names):
+            for name in sorted(ready()):
+                stage = by_name[name]
+                blocked = [d for d in deps[name] if results[d]['status'] in ('failed', 'blocked', 'missing-inputs')]
+                if blocked:
+                    results[name] = {'status': 'blocked', 'seconds': 0.0}
+                    print(f"  ⛔ {name:<20} blocked by {', '.join(blocked)}")
+                    continue
+
+                action, fp = plan_stage(stage, state, force)
+                if dry_run and any(results[d]['status'] == 'would-run' for d in deps[name]):
+                    action = 'run'
+                if action != 'run' or dry_run:
+                    status = 'would-run' if action == 'run' else action
+                    results[name] = {'status': status, 'seconds': 0.0}
+                    icon = {'up-to-date': '✓', 'unavailable': '•', 'would-run': '▶'}.get(status, '❌')
+                    print(f"  {icon} {name:<20} {status}")
+                    continue
+
+                print(f"  ▶ {name:<20} running...")
+                fingerprints[name] = fp
+                running[pool.submit(run_stage, stage)] = name
+
+            if not running:
+                if len(results) < len(names) and not ready():
+                    raise SystemExit("❌ Dependency cycle between stages: "
+                                     + ", ".join(sorted(names - set(results))))
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                outcome = future.result()
+                if outcome['returncode'] == 0:
+                    state[name] = {
+                        'fingerprint': fingerprints[name],
+                        'finished_at': datetime.now().isoformat(),
+                        'seconds': round(outcome['seconds'], 3),
+                    }
+                    save_state(state)
+                    results[name] = {'status': 'ran', 'seconds': outcome['seconds']}
+                    print(f"  ✅ {name:<20} done in {outcome['seconds']:.2f}s")
+                    if verbose:
+                        print(outcome['stdout'])
+                else:
+                    results[name] = {'status': 'failed', 'seconds': outcome['seconds']}
+                    print(f"  ❌ {name:<20} failed (exit {outcome['returncode']})")
+                    print((outcome['stderr'] or outcome['stdout'])[-2000:])
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental data pipeline orchestrator")
+    parser.add_argument('targets', nargs='*', help="stages to build (default: all)")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--force', action='store_true', help="rerun stages even if up to date")
+    parser.add_argument('--dry-run', action='store_true', help="only report what would run")
+    parser.add_argument('--apply', action='store_true', help="include wrangler apply stages")
+    parser.add_argument('--list', action='store_true', help="list stages and dependencies")
+    parser.add_argument('--verbose', '-v', action='store_true', help="print stage output")
+    args = parser.parse_args()
+
+    if args.list:
+        graph = build_graph(STAGES)
+        for stage in STAGES:
+            after = ", ".join(sorted(graph[stage['name']])) or "-"
+            print(f"{stage['name']:<20} after: {after}")
+        return 0
+
+    stages = select_stages(STAGES, args.targets, args.apply)
+
+    print("=" * 70)
+    print("Data Pipeline Build")
+    print("=" * 70)
+    start = time.perf_counter()
+    results = run_pipeline(stages, args.jobs, args.force, args.dry_run, args.verbose)
+    elapsed = time.perf_counter() - start
+
+    ran = [n for n, r in results.items() if r['status'] == 'ran']
+    pending = [n for n, r in results.items() if r['status'] == 'would-run']
+    failed = [n for n, r in results.items() if r['status'] in ('failed', 'blocked', 'missing-inputs')]
+    print("\n" + "=" * 70)
+    print(f"Ran {len(ran)} of {len(results)} stage(s) in {elapsed:.2f}s")
+    if failed:
+        print(f"❌ Failed: {', '.join(sorted(failed))}")
+        return 1
+    if pending:
+        print(f"▶ {len(pending)} stage(s) would run: {', '.join(sorted(pending))}")
+        return 0
+    print("✓ Pipeline up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
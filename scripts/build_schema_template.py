@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Squashed schema baseline and prebuilt SQLite template database.
+
+Replays every numbered migration once (schema_replay) and writes:
+
+    data/schema/squashed_schema.sql     CREATE TABLE / INDEX / TRIGGER / VIEW statements only
+    data/schema/template.sqlite         schema + reference data (VACUUM INTO)
+    data/schema/template_manifest.json  migration fingerprint, row counts, replay warnings
+
+Test and dev databases copy the template (create_database) or clone it
+into memory (open_template) instead of replaying the 48 migrations.
+
+Where the history defines a table twice, the template follows the
+definition the app queries:
+  - vocabulary_master: 0025 replaces the 0017 table (and the demo rows of
+    0016/0018 that went with it), so 0026 loads as written.
+  - eiken_vocabulary_lexicon: the 0009 (word_lemma, pos) table is kept;
+    the NGSL rows of 0024, written for the 0023 layout, are replayed into a
+    scratch database and merged in like 0020 does for vocabulary_master.
+
+    python scripts/build_schema_template.py
+    python scripts/build_schema_template.py --check   # exit 1 if migrations changed since the build
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from eiken_corpus import BASE_DIR
+from pipeline_metrics import PipelineRun, add_profile_arguments
+from schema_replay import MIGRATIONS_DIR, migration_files, replay_migrations
+
+OUTPUT_DIR = BASE_DIR / "data" / "schema"
+SCHEMA_FILE = "squashed_schema.sql"
+TEMPLATE_FILE = "template.sqlite"
+MANIFEST_FILE = "template_manifest.json"
+
+SUPERSEDED_TABLES = {
+    '0025_create_vocabulary_master.sql': ('vocabulary_master',),
+}
+
+# 0023 のレイアウトで書かれた NGSL データ (0024) は、別 DB で再生してから取り込む
+NGSL_LEXICON_MIGRATIONS = ('0023_create_eiken_vocabulary_lexicon.sql', '0024_populate_eiken_vocabulary_lexicon.sql')
+NGSL_SOURCE = "NGSL v1.2"
+NGSL_LEXICON_SELECT = """
+SELECT
+  lemma,
+  COALESCE(pos, 'other'),
+  cefr_level,
+  MIN(MAX(zipf_score, 1.0), 7.0),
+  CASE eiken_grade
+    WHEN '5' THEN 5 WHEN '4' THEN 4 WHEN '3' THEN 3 WHEN 'pre-2' THEN 21
+    WHEN '2' THEN 2 WHEN 'pre-1' THEN 11 WHEN '1' THEN 1
+    ELSE NULL
+  END,
+  frequency_rank
+FROM eiken_vocabulary_lexicon
+ORDER BY frequency_rank
+"""
+
+_OBJECT_ORDER = ('table', 'index', 'trigger', 'view')
+
+
+def migrations_fingerprint(paths: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode('utf-8'))
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def merge_ngsl_lexicon(conn: sqlite3.Connection, migrations_dir: Path = MIGRATIONS_DIR) -> List[dict]:
+    """
+    Merge the 0024 NGSL rows into the word_lemma/pos lexicon.
+
+    Lemmas already present (from CEFR-J) gain the NGSL source and any missing
+    zipf/frequency data; new lemmas are inserted with their own POS or
+    'other'. 0024 itself violates the 0023 zipf CHECK (e.g. 'the' = 7.91),
+    so it is replayed with CHECK constraints off and zipf is clamped to the
+    lexicon's 1.0-7.0 range. Returns the scratch replay warnings.
+    """
+    scratch = sqlite3.connect(":memory:")
+    scratch.execute("PRAGMA ignore_check_constraints = ON")
+    try:
+        warnings = replay_migrations(scratch, [migrations_dir / name for name in NGSL_LEXICON_MIGRATIONS])
+        rows = scratch.execute(NGSL_LEXICON_SELECT).fetchall()
+    finally:
+        scratch.close()
+
+    conn.executemany(
+        """
+        UPDATE eiken_vocabulary_lexicon SET
+          zipf_score = COALESCE(zipf_score, ?),
+          frequency_rank = COALESCE(frequency_rank, ?),
+          sources = CASE WHEN EXISTS (SELECT 1 FROM json_each(sources) WHERE value = ?)
+                         THEN sources ELSE json_insert(sources, '$[#]', ?) END
+        WHERE word_lemma = ?
+        """,
+        [(zipf, rank, NGSL_SOURCE, NGSL_SOURCE, lemma) for lemma, _, _, zipf, _, rank in rows],
+    )
+    conn.executemany(
+        """
+        INSERT INTO eiken_vocabulary_lexicon
+          (word_lemma, pos, cefr_level, zipf_score, grade_level, sources, confidence, frequency_rank)
+        SELECT ?, ?, ?, ?, ?, json_array(?), 1.0, ?
+        WHERE NOT EXISTS (SELECT 1 FROM eiken_vocabulary_lexicon WHERE word_lemma = ?)
+        """,
+        [(lemma, pos, cefr, zipf, grade, NGSL_SOURCE, rank, lemma) for lemma, pos, cefr, zipf, grade, rank in rows],
+    )
+    return [{**w, 'file': f"{w['file']} (scratch)"} for w in warnings]
+
+
+def squashed_schema(conn: sqlite3.Connection) -> str:
+    """Every schema object as one script: tables, then indexes, triggers and views."""
+    objects = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    ).fetchall()
+    lines = [
+        "-- Squashed schema generated by scripts/build_schema_template.py",
+        "-- Equivalent to replaying migrations/[0-9]*.sql; do not edit by hand",
+        "",
+    ]
+    for object_type in _OBJECT_ORDER:
+        for kind, name, sql in objects:
+            if kind == object_type:
+                lines.append(f"{sql};")
+                lines.append("")
+    return "\n".join(lines)
+
+
+def table_row_counts(conn: sqlite3.Connection) -> dict:
+    tables = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    return {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] for name in tables}
+
+
+def build_template(output_dir: Path = OUTPUT_DIR, migrations: Optional[List[Path]] = None) -> dict:
+    """Replay, merge reference data, write the squashed schema, template DB and manifest."""
+    migrations = migration_files() if migrations is None else migrations
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+    warnings = replay_migrations(conn, migrations, SUPERSEDED_TABLES)
+    warnings += merge_ngsl_lexicon(conn)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    template = output_dir / TEMPLATE_FILE
+    template.unlink(missing_ok=True)
+    conn.execute("VACUUM INTO ?", (str(template),))
+
+    with open(output_dir / SCHEMA_FILE, 'w', encoding='utf-8') as f:
+        f.write(squashed_schema(conn))
+
+    manifest = {
+        'fingerprint': migrations_fingerprint(migrations),
+        'migrations': [p.name for p in migrations],
+        'superseded_tables': SUPERSEDED_TABLES,
+        'row_counts': table_row_counts(conn),
+        'replay_warnings': warnings,
+    }
+    conn.close()
+    with open(output_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def is_template_current(output_dir: Path = OUTPUT_DIR) -> bool:
+    """True when the template was built from the migrations currently on disk."""
+    try:
+        with open(output_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return False
+    return (output_dir / TEMPLATE_FILE).exists() and manifest['fingerprint'] == migrations_fingerprint(migration_files())
+
+
+def create_database(target: Path, template: Path = OUTPUT_DIR / TEMPLATE_FILE) -> Path:
+    """Fresh database file at target, copied from the template."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(template, target)
+    return target
+
+
+def open_template(template: Path = OUTPUT_DIR / TEMPLATE_FILE) -> sqlite3.Connection:
+    """Writable in-memory copy of the template (for tests; the file is left untouched)."""
+    source = sqlite3.connect(f"file:{template}?mode=ro", uri=True)
+    conn = sqlite3.connect(":memory:")
+    try:
+        source.backup(conn)
+    finally:
+        source.close()
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Build the squashed schema and template database"))
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--check', action='store_true', help="only check whether the template is up to date")
+    args = parser.parse_args()
+
+    if args.check:
+        current = is_template_current(args.output_dir)
+        print("✓ Template is up to date" if current else "❌ Template is missing or older than migrations/")
+        return 0 if current else 1
+
+    print("=" * 70)
+    print("Squashed Schema & Template Database")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_schema_template", args.profile, args.report_dir) as run:
+        with run.stage("build_template") as stage:
+            manifest = build_template(args.output_dir)
+            stage.rows = sum(manifest['row_counts'].values())
+
+    counts = manifest['row_counts']
+    print(f"🗄️  {len(manifest['migrations'])} migrations → {len(counts)} tables, {sum(counts.values()):,} rows")
+    for table in ('eiken_vocabulary_lexicon', 'vocabulary_master', 'eiken_topic_areas', 'grammar_terms'):
+        if table in counts:
+            print(f"   {table}: {counts[table]:,}")
+    print(f"⚠️  {len(manifest['replay_warnings'])} statement(s) skipped as schema drift (see manifest)")
+
+    template = args.output_dir / TEMPLATE_FILE
+    print(f"\n💾 Template: {template} ({template.stat().st_size / 1024 / 1024:.1f} MB)")
+    print(f"💾 Schema:   {args.output_dir / SCHEMA_FILE}")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
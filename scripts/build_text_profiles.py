@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Batch CVLA text profiler for the question corpus and past-paper text.
+
+Computes the same three metrics as src/eiken/services/text-profiler.ts
+(AvrDiff, BperA, ARI → CVLA3 regression → CEFR-J level) for every passage
+and question_text_en in eiken_questions.json and every extracted past paper.
+The corpus is tokenized once, joined to the lexicon as integer lemma ids and
+all metrics are computed with NumPy over the whole batch. Profiles are
+attached to a copy of the corpus and emitted as eiken_text_profiles UPSERTs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import re
+import statistics
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+from batch_payloads import BatchPayloadWriter
+from eiken_corpus import (
+    BASE_DIR,
+    QUESTIONS_FILE,
+    grade_sort_key,
+    iter_question_ids,
+    load_past_paper_texts,
+    load_questions,
+    tokenize,
+)
+from eiken_lexicon import LEXICON_CSV, Lexicon, load_lexicon
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+if TYPE_CHECKING:
+    import numpy as np
+
+QUESTION_FIELDS = ('passage', 'question_text_en')
+PROFILE_COLUMNS = ('source_type', 'source_id', 'field', 'grade', 'question_type', 'topic',
+                   'word_count', 'unique_lemmas', 'known_lemmas',
+                   'avr_diff', 'b_per_a', 'ari', 'numeric_score', 'cefrj_level', 'is_valid')
+UPSERT_BATCH_SIZE = 100
+
+# Table 2 (Uchida & Negishi, 2018): 下限値と CEFR-J レベル
+CEFRJ_LEVELS = ['preA1', 'A1.1', 'A1.2', 'A1.3', 'A2.1', 'A2.2',
+                'B1.1', 'B1.2', 'B2.1', 'B2.2', 'C1', 'C2']
+CEFRJ_THRESHOLDS = (0.5, 0.84, 1.17, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5.5)
+
+# 目標級 → CEFR-J レベル（text-profiler.ts の targetCEFRJ）
+TARGET_CEFRJ = {'5': 'A1.3', '4': 'A2.1', '3': 'A2.2', 'pre2': 'B1.1',
+                '2': 'B1.2', 'pre1': 'B2.1', '1': 'C1'}
+MAX_LEVELS_ABOVE_TARGET = 3
+
+_SENTENCE_SPLIT_RE = re.compile(r"[.!?]+")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]+")
+
+
+def collect_documents(questions_data: List[dict], past_papers: List[dict]) -> List[dict]:
+    """
+    One document per non-empty passage / question_text_en and per past paper.
+    Past-paper text is reduced to its ASCII part so Japanese instructions do
+    not inflate the ARI character count.
+    """
+    documents = []
+    for source_id, grade, q in iter_question_ids(questions_data):
+        for field in QUESTION_FIELDS:
+            text = (q.get(field) or '').strip()
+            if not text:
+                continue
+            documents.append({
+                'source_type': 'question',
+                'source_id': source_id,
+                'field': field,
+                'grade': grade,
+                'question_type': q.get('question_type'),
+                'topic': q.get('topic'),
+                'text': text,
+            })
+
+    for paper in past_papers:
+        documents.append({
+            'source_type': 'past_paper',
+            'source_id': paper['paper_id'],
+            'field': 'text',
+            'grade': paper['grade'],
+            'question_type': None,
+            'topic': None,
+            'text': _NON_ASCII_RE.sub(' ', paper['text']),
+        })
+    return documents
+
+
+def text_counts(texts: List[str]) -> np.ndarray:
+    """(characters, words, sentences) per text, counted the way calculateARI does."""
+    import numpy as np
+
+    counts = np.zeros((len(texts), 3), dtype=np.float64)
+    for i, text in enumerate(texts):
+        counts[i, 0] = len(text) - sum(1 for ch in text if ch.isspace())
+        counts[i, 1] = len(text.split())
+        counts[i, 2] = sum(1 for s in _SENTENCE_SPLIT_RE.split(text) if s.strip())
+    return counts
+
+
+def profile_texts(texts: List[str], lexicon: Lexicon, target_grades: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Profile a batch of texts.
+
+    Returns:
+        dict of arrays (one entry per text): word_count, unique_lemmas,
+        known_lemmas, avr_diff, b_per_a, ari, numeric_score, level_index,
+        is_valid
+    """
+    import numpy as np
+
+    n_docs = len(texts)
+    oov: Dict[str, int] = {}
+    encoded = [lexicon.encode(tokenize(text), oov) for text in texts]
+    lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=n_docs)
+    lemma_ids = np.concatenate(encoded) if n_docs else np.zeros(0, dtype=np.int32)
+    doc_index = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+
+    # 文書ごとのユニーク lemma（runtime と同じく重複語は1回だけ数える）
+    n_ids = len(lexicon) + len(oov)
+    unique_keys = np.unique(doc_index * n_ids + lemma_ids)
+    unique_doc = unique_keys // n_ids
+    unique_id = unique_keys % n_ids
+
+    known = unique_id < len(lexicon)
+    known_doc = unique_doc[known]
+    known_level = lexicon.levels[unique_id[known]].astype(np.float64)
+
+    unique_lemmas = np.bincount(unique_doc, minlength=n_docs)
+    known_lemmas = np.bincount(known_doc, minlength=n_docs)
+    level_sum = np.bincount(known_doc, weights=known_level, minlength=n_docs)
+    b_count = np.bincount(known_doc[known_level >= 3], minlength=n_docs)
+    a_count = np.bincount(known_doc[known_level <= 2], minlength=n_docs)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avr_diff = np.where(known_lemmas > 0, level_sum / known_lemmas, 1.0)
+        b_per_a = np.where(a_count > 0, b_count / a_count, 0.0)
+
+        counts = text_counts(texts)
+        chars, words, sentences = counts[:, 0], counts[:, 1], counts[:, 2]
+        ari = 4.71 * (chars / words) + 0.5 * (words / sentences) - 21.43
+        ari = np.where((words > 0) & (sentences > 0), np.maximum(ari, 0.0), 0.0)
+
+    # CVLA3 の回帰式 → 3指標の平均
+    avr_diff_cefr = np.minimum(avr_diff * 6.417 - 7.184, 7)
+    b_per_a_cefr = np.minimum(b_per_a * 13.146 + 0.428, 7)
+    ari_cefr = np.minimum(ari * 0.607 - 1.632, 7)
+    numeric_score = (avr_diff_cefr + b_per_a_cefr + ari_cefr) / 3
+    level_index = np.searchsorted(CEFRJ_THRESHOLDS, numeric_score, side='right')
+
+    # 語彙が1つもないテキストは runtime と同じく A1.1 / 0.5 扱い
+    empty = unique_lemmas == 0
+    avr_diff[empty] = 0.0
+    b_per_a[empty] = 0.0
+    ari[empty] = 0.0
+    numeric_score[empty] = 0.5
+    level_index[empty] = CEFRJ_LEVELS.index('A1.1')
+
+    target_index = np.array([CEFRJ_LEVELS.index(TARGET_CEFRJ.get(g, 'A2.2')) for g in target_grades],
+                            dtype=np.int64)
+    is_valid = empty | (level_index - target_index <= MAX_LEVELS_ABOVE_TARGET)
+
+    return {
+        'word_count': words.astype(np.int64),
+        'unique_lemmas': unique_lemmas,
+        'known_lemmas': known_lemmas,
+        'avr_diff': avr_diff,
+        'b_per_a': b_per_a,
+        'ari': ari,
+        'numeric_score': numeric_score,
+        'level_index': level_index,
+        'is_valid': is_valid,
+    }
+
+
+def build_profiles(documents: List[dict], lexicon: Lexicon) -> List[dict]:
+    """Profile every document and return one profile dict per document."""
+    metrics = profile_texts([d['text'] for d in documents], lexicon, [d['grade'] for d in documents])
+
+    profiles = []
+    for i, doc in enumerate(documents):
+        profiles.append({
+            **{k: v for k, v in doc.items() if k != 'text'},
+            'word_count': int(metrics['word_count'][i]),
+            'unique_lemmas': int(metrics['unique_lemmas'][i]),
+            'known_lemmas': int(metrics['known_lemmas'][i]),
+            'avr_diff': round(float(metrics['avr_diff'][i]), 4),
+            'b_per_a': round(float(metrics['b_per_a'][i]), 4),
+            'ari': round(float(metrics['ari'][i]), 4),
+            'numeric_score': round(float(metrics['numeric_score'][i]), 4),
+            'cefrj_level': CEFRJ_LEVELS[metrics['level_index'][i]],
+            'is_valid': bool(metrics['is_valid'][i]),
+        })
+    return profiles
+
+
+def attach_profiles(questions_data: List[dict], profiles: List[dict]) -> List[dict]:
+    """Copy of the corpus with a text_profile {field: profile} on each question."""
+    by_source = {}
+    for p in profiles:
+        if p['source_type'] == 'question':
+            by_source.setdefault(p['source_id'], {})[p['field']] = {
+                k: p[k] for k in ('word_count', 'unique_lemmas', 'known_lemmas', 'avr_diff',
+                                  'b_per_a', 'ari', 'numeric_score', 'cefrj_level', 'is_valid')
+            }
+
+    annotated = copy.deepcopy(questions_data)
+    for source_id, _, q in iter_question_ids(annotated):
+        if source_id in by_source:
+            q['text_profile'] = by_source[source_id]
+    return annotated
+
+
+def _sql_text(value) -> str:
+    if value is None:
+        return "NULL"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def generate_upsert_sql(profiles: List[dict], batch_size: int = UPSERT_BATCH_SIZE) -> str:
+    """Generate batched INSERT ... ON CONFLICT(source_id, field) DO UPDATE statements."""
+    lines = [
+        "-- CVLA text profiles built by scripts/build_text_profiles.py",
+        f"-- Total rows: {len(profiles)} "
+        f"({sum(p['source_type'] == 'question' for p in profiles)} question fields, "
+        f"{sum(p['source_type'] == 'past_paper' for p in profiles)} past papers)",
+        "",
+    ]
+
+    for i in range(0, len(profiles), batch_size):
+        batch = profiles[i:i + batch_size]
+        lines.append(f"-- Batch {i // batch_size + 1}: rows {i + 1} to {i + len(batch)}")
+        lines.append("INSERT INTO eiken_text_profiles")
+        lines.append("  (source_type, source_id, field, grade, question_type, topic,")
+        lines.append("   word_count, unique_lemmas, known_lemmas,")
+        lines.append("   avr_diff, b_per_a, ari, numeric_score, cefrj_level, is_valid)")
+        lines.append("VALUES")
+        lines.append(",\n".join(
+            f"  ({_sql_text(p['source_type'])}, {_sql_text(p['source_id'])}, {_sql_text(p['field'])}, "
+            f"{_sql_text(p['grade'])}, {_sql_text(p['question_type'])}, {_sql_text(p['topic'])},\n"
+            f"   {p['word_count']}, {p['unique_lemmas']}, {p['known_lemmas']},\n"
+            f"   {p['avr_diff']}, {p['b_per_a']}, {p['ari']}, {p['numeric_score']}, "
+            f"{_sql_text(p['cefrj_level'])}, {int(p['is_valid'])})"
+            for p in batch
+        ))
+        lines.append("ON CONFLICT(source_id, field) DO UPDATE SET")
+        for column in ('grade', 'question_type', 'topic', 'word_count', 'unique_lemmas', 'known_lemmas',
+                       'avr_diff', 'b_per_a', 'ari', 'numeric_score', 'cefrj_level', 'is_valid'):
+            lines.append(f"  {column} = excluded.{column},")
+        lines.append("  updated_at = CURRENT_TIMESTAMP;")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def write_upsert_payload(profiles: List[dict], path: Path):
+    """The same upserts as a JSON batch payload (batch_payloads.py)."""
+    with BatchPayloadWriter(path, source="scripts/build_text_profiles.py") as payload:
+        payload.insert("eiken_text_profiles", PROFILE_COLUMNS,
+                       ([p[column] for column in PROFILE_COLUMNS] for p in profiles),
+                       conflict=('source_id', 'field'), extra_set=("updated_at = CURRENT_TIMESTAMP",))
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Batch CVLA text profiler"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--lexicon', type=Path, default=LEXICON_CSV)
+    parser.add_argument('--output-dir', type=Path, default=BASE_DIR / "data" / "phase2a_prep")
+    parser.add_argument('--no-past-papers', action='store_true',
+                        help="skip past-paper text (no pdfplumber needed)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Batch CVLA Text Profiler")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_text_profiles", args.profile, args.report_dir) as run:
+        print(f"Loading lexicon from: {args.lexicon}")
+        with run.stage("load_lexicon") as stage:
+            lexicon = load_lexicon(args.lexicon)
+            stage.rows = len(lexicon)
+        print(f"  → {len(lexicon):,} lemmas")
+
+        with run.stage("load_corpus") as stage:
+            questions_data = load_questions(args.questions)
+            past_papers = [] if args.no_past_papers else load_past_paper_texts()
+            documents = collect_documents(questions_data, past_papers)
+            stage.rows = len(documents)
+        print(f"  → {len(documents)} texts ({len(past_papers)} past papers)")
+
+        with run.stage("profile_texts", rows=len(documents)):
+            profiles = build_profiles(documents, lexicon)
+
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        output_json = args.output_dir / "text_profiles.json"
+        output_corpus = args.output_dir / "eiken_questions_profiled.json"
+        output_sql = args.output_dir / "text_profiles.sql"
+        output_payload = args.output_dir / "text_profiles.ndjson"
+
+        print(f"\nSaving JSON to: {output_json}")
+        with open(output_json, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, ensure_ascii=False, indent=2)
+
+        print(f"Saving annotated corpus to: {output_corpus}")
+        with open(output_corpus, 'w', encoding='utf-8') as f:
+            json.dump(attach_profiles(questions_data, profiles), f, ensure_ascii=False, indent=2)
+
+        print(f"Generating SQL to: {output_sql}")
+        with run.stage("generate_upsert_sql", rows=len(profiles)):
+            with open(output_sql, 'w', encoding='utf-8') as f:
+                f.write(generate_upsert_sql(profiles))
+
+        print(f"Writing batch payload to: {output_payload}")
+        with run.stage("write_upsert_payload", rows=len(profiles)):
+            write_upsert_payload(profiles, output_payload)
+
+    print("\n" + "=" * 70)
+    print("✓ Text profiles generated successfully!")
+    print("=" * 70)
+    print("\nMean numeric score by grade (question fields / past papers):")
+    for grade in sorted({p['grade'] for p in profiles}, key=grade_sort_key):
+        line = f"  - Grade {grade:<5}"
+        for source_type in ('question', 'past_paper'):
+            scores = [p['numeric_score'] for p in profiles
+                      if p['grade'] == grade and p['source_type'] == source_type]
+            line += f"  {statistics.mean(scores):5.2f} (n={len(scores):3d})" if scores else "      -        "
+        invalid = sum(1 for p in profiles if p['grade'] == grade and not p['is_valid'])
+        print(line + (f"  ⚠️ {invalid} above target" if invalid else ""))
+    print()
+
+
+if __name__ == "__main__":
+    main()
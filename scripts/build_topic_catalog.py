@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Build the eiken_topic_areas catalog from data instead of hand-written topics.
+
+Topic candidates, sub_topics and official_frequency are derived from the
+parsed question corpus (topic / question_type fields) and the extracted
+past-paper text. Any grade below MIN_TOPICS_PER_GRADE is filled with the
+best-matching topics of neighbouring grades, and the result is emitted as
+batched UPSERTs into eiken_topic_areas.
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import statistics
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from eiken_corpus import (
+    BASE_DIR,
+    GRADE_ORDER,
+    content_words,
+    grade_sort_key,
+    iter_questions,
+    load_past_paper_texts,
+    load_questions,
+    question_text,
+    topic_code_for,
+)
+from eiken_lexicon import Lexicon, load_lexicon
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+MIN_TOPICS_PER_GRADE = 10
+MAX_SUB_TOPICS = 6
+UPSERT_BATCH_SIZE = 50
+
+CATALOG_MIGRATION = BASE_DIR / "migrations" / "0010_create_topic_system.sql"
+
+# Defaults used when a grade has no existing catalog rows to learn from
+DEFAULT_ABSTRACTNESS = {'5': 1, '4': 2, '3': 2, 'pre2': 3, '2': 5, 'pre1': 6, '1': 7}
+DEFAULT_CONTEXT = {'5': 'daily', '4': 'daily', '3': 'daily', 'pre2': 'general',
+                   '2': 'social', 'pre1': 'policy', '1': 'policy'}
+
+# question_type → argument axes the format naturally exercises
+QUESTION_TYPE_AXES = {
+    'grammar_fill': 'description',
+    'conversation': 'experiences',
+    'reading_aloud': 'description',
+    'picture_description': 'description',
+    'q_and_a': 'reasons',
+    'email_reply': 'preferences',
+    'short_opinion': 'pros_cons',
+    'long_reading': 'causes_effects',
+    'essay': 'pros_cons',
+    'opinion_speech': 'opinion',
+    'summary': 'causes_effects',
+    'writing_summary': 'causes_effects',
+    'opinion_essay': 'opinion',
+    'writing_essay': 'solutions',
+}
+
+# Labels of corpus topic codes that the seed catalog (0010) does not define.
+# Every generated topic_code needs a Japanese label: build_catalog refuses
+# rows it cannot label rather than writing English into topic_label_ja.
+TOPIC_LABELS = {
+    'future': ('将来・夢', 'Future and Dreams'),
+    'science': ('科学', 'Science'),
+    'climate_change': ('気候変動', 'Climate Change'),
+    'ai_science': ('AI・科学', 'AI and Science'),
+    'global_health': ('国際保健', 'Global Health'),
+    'politics': ('政治', 'Politics'),
+}
+
+TOPIC_COLUMNS = [
+    'grade', 'topic_code', 'topic_label_ja', 'topic_label_en', 'abstractness_level',
+    'context_type', 'scenario_description', 'sub_topics', 'argument_axes',
+    'weight', 'official_frequency', 'is_active',
+]
+
+
+def load_existing_catalog(migration_path: Path = CATALOG_MIGRATION) -> List[dict]:
+    """Replay the topic-system migration in memory and read its seed topics."""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.executescript(migration_path.read_text(encoding='utf-8'))
+        rows = conn.execute("SELECT * FROM eiken_topic_areas ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+    catalog = []
+    for row in rows:
+        topic = dict(row)
+        topic['sub_topics'] = json.loads(topic['sub_topics'] or '[]')
+        topic['argument_axes'] = json.loads(topic['argument_axes'] or '[]')
+        catalog.append(topic)
+    return catalog
+
+
+def build_corpus_profiles(questions_data: List[dict]) -> Dict[tuple, dict]:
+    """Aggregate question counts, formats and vocabulary per (grade, topic_code)."""
+    profiles = {}
+
+    for grade, q in iter_questions(questions_data):
+        label = q.get('topic', '')
+        if not label:
+            continue
+        key = (grade, topic_code_for(label))
+        profile = profiles.setdefault(key, {
+            'grade': grade,
+            'topic_code': key[1],
+            'label': label,
+            'count': 0,
+            'question_types': Counter(),
+            'words': Counter(),
+        })
+        profile['count'] += 1
+        profile['question_types'][q.get('question_type', 'unknown')] += 1
+        profile['words'].update(content_words(question_text(q)))
+
+    return profiles
+
+
+def derive_sub_topics(profile: dict, document_frequency: Counter, n_profiles: int, lexicon: Lexicon,
+                      existing: Optional[List[str]] = None) -> List[str]:
+    """
+    Existing sub_topics first, then the words most distinctive of the topic
+    (TF-IDF). Candidates are lemmatized and must be CEFR-J headwords, so
+    character names ('tom') and other corpus noise never become sub_topics.
+    """
+    label_words = {lexicon.lemmatize(w) for w in content_words(profile['label'])}
+    scored = sorted(
+        profile['words'].items(),
+        key=lambda item: (-item[1] * math.log(n_profiles / document_frequency[item[0]]), item[0]),
+    )
+    sub_topics = list(existing or [])
+    for word, _ in scored:
+        if len(sub_topics) >= MAX_SUB_TOPICS:
+            break
+        lemma = lexicon.lemmatize(word)
+        if "'" in lemma or lemma not in lexicon.ids:
+            continue
+        if lemma not in label_words and lemma not in sub_topics:
+            sub_topics.append(lemma)
+    return sub_topics[:MAX_SUB_TOPICS]
+
+
+def derive_argument_axes(question_types: Counter) -> List[str]:
+    """Map the formats a topic appears in onto argument axes."""
+    axes = []
+    for q_type, _ in question_types.most_common():
+        axis = QUESTION_TYPE_AXES.get(q_type)
+        if axis and axis not in axes:
+            axes.append(axis)
+    return axes or ['description']
+
+
+def frequency_from_ratio(ratio: float) -> float:
+    """Clamp a relative frequency into the 0.5-2.0 range the table expects."""
+    return round(min(2.0, max(0.5, ratio)), 1)
+
+
+def topic_keywords(topic: dict) -> set:
+    """Words that signal a topic in free text (code, label and sub_topics)."""
+    text = " ".join([topic['topic_code'].replace('_', ' '), topic['topic_label_en']] +
+                    [s.replace('_', ' ') for s in topic['sub_topics']])
+    return set(content_words(text))
+
+
+def grade_defaults(catalog_by_grade: Dict[str, List[dict]], grade: str) -> tuple:
+    """Median abstractness and most common context_type of a grade's catalog."""
+    rows = catalog_by_grade.get(grade, [])
+    if not rows:
+        return DEFAULT_ABSTRACTNESS.get(grade, 3), DEFAULT_CONTEXT.get(grade, 'general')
+    abstractness = int(statistics.median(r['abstractness_level'] for r in rows))
+    context = Counter(r['context_type'] for r in rows).most_common(1)[0][0]
+    return abstractness, context
+
+
+def build_catalog(questions_data: List[dict],
+                  existing_catalog: List[dict],
+                  past_papers: Optional[List[dict]] = None,
+                  min_topics: int = MIN_TOPICS_PER_GRADE,
+                  lexicon: Optional[Lexicon] = None) -> List[dict]:
+    """
+    Derive topic rows from the corpus and fill grades below min_topics.
+    sub_topics candidates are checked against lexicon (default: the CEFR-J list).
+
+    Returns:
+        eiken_topic_areas rows (sub_topics / argument_axes as lists) with a
+        'source' key: 'corpus' for attested topics, 'fill' for gap fillers.
+    """
+    catalog_by_grade = defaultdict(list)
+    catalog_by_key = {}
+    for topic in existing_catalog:
+        catalog_by_grade[topic['grade']].append(topic)
+        catalog_by_key[(topic['grade'], topic['topic_code'])] = topic
+
+    lexicon = lexicon or load_lexicon()
+    labels = dict(TOPIC_LABELS)
+    labels.update({t['topic_code']: (t['topic_label_ja'], t['topic_label_en']) for t in existing_catalog})
+    contexts = {t['topic_code']: t['context_type'] for t in existing_catalog}
+
+    # 1. Corpus-attested topics
+    profiles = build_corpus_profiles(questions_data)
+    unlabeled = sorted((f"{grade}:{code} ({profile['label']!r})" for (grade, code), profile in profiles.items()
+                        if code not in labels), key=lambda key: grade_sort_key(key.split(':')[0]))
+    if unlabeled:
+        raise ValueError("No topic_label_ja for corpus topic(s) " + ", ".join(unlabeled)
+                         + "; add them to TOPIC_LABELS")
+    counts_by_grade = defaultdict(list)
+    document_frequency = Counter()
+    for (grade, _), profile in profiles.items():
+        counts_by_grade[grade].append(profile['count'])
+        document_frequency.update(profile['words'].keys())
+
+    rows = []
+    for (grade, code), profile in profiles.items():
+        existing = catalog_by_key.get((grade, code))
+        mean_count = sum(counts_by_grade[grade]) / len(counts_by_grade[grade])
+        abstractness, context = grade_defaults(catalog_by_grade, grade)
+        formats = ", ".join(sorted(profile['question_types']))
+        label_ja, label_en = labels[code]
+
+        row = {col: existing[col] for col in TOPIC_COLUMNS} if existing else {
+            'grade': grade,
+            'topic_code': code,
+            'topic_label_ja': label_ja,
+            'topic_label_en': label_en,
+            'abstractness_level': abstractness,
+            'context_type': contexts.get(code, context),
+            'scenario_description': f"{label_en} topics as tested in real exam questions ({formats})",
+            'argument_axes': derive_argument_axes(profile['question_types']),
+            'weight': 1.0,
+            'is_active': 1,
+        }
+        row['sub_topics'] = derive_sub_topics(profile, document_frequency, len(profiles), lexicon,
+                                             existing['sub_topics'] if existing else None)
+        row['official_frequency'] = frequency_from_ratio(profile['count'] / mean_count)
+        row['source'] = 'corpus'
+        row['reasoning'] = f"Derived from {profile['count']} exam question(s) in grade {grade}"
+        rows.append(row)
+
+    # 2. Fill grades below the threshold
+    known = defaultdict(dict)
+    for topic in existing_catalog + rows:
+        known[topic['grade']][topic['topic_code']] = topic
+
+    paper_words = defaultdict(Counter)
+    for paper in past_papers or []:
+        paper_words[paper['grade']].update(content_words(paper['text']))
+
+    for grade in sorted(set(GRADE_ORDER) | set(known), key=grade_sort_key):
+        missing = min_topics - len(known[grade])
+        if missing <= 0:
+            continue
+
+        words = paper_words.get(grade, Counter())
+        total_words = sum(words.values()) or 1
+        candidates = {}
+        for other_grade, topics in known.items():
+            if other_grade == grade:
+                continue
+            distance = abs(grade_sort_key(other_grade) - grade_sort_key(grade))
+            for code, topic in topics.items():
+                if code in known[grade]:
+                    continue
+                hits = sum(words[w] for w in topic_keywords(topic))
+                score = (1 + 1000 * hits / total_words) / distance
+                if code not in candidates or score > candidates[code][0]:
+                    candidates[code] = (score, hits, topic, other_grade)
+
+        ranked = sorted(candidates.values(), key=lambda c: (-c[0], c[2]['topic_code']))[:missing]
+        if not ranked:
+            continue
+        best_score = ranked[0][0]
+        abstractness, context = grade_defaults(catalog_by_grade, grade)
+
+        for score, hits, topic, other_grade in ranked:
+            # 話題そのものの内容だけを引き継ぎ、級に依存する列はこの級の値にする
+            code = topic['topic_code']
+            row = {col: topic[col] for col in TOPIC_COLUMNS}
+            row.update({
+                'grade': grade,
+                'topic_label_ja': labels[code][0],
+                'abstractness_level': abstractness,
+                'context_type': contexts.get(code, context),
+                'weight': 1.0,
+                'official_frequency': frequency_from_ratio(0.8 + 0.4 * score / best_score),
+                'is_active': 1,
+                'source': 'fill',
+                'reasoning': (f"Filled from grade {other_grade}; "
+                              f"{hits} keyword hit(s) in grade {grade} past papers"),
+            })
+            rows.append(row)
+            known[grade][code] = row
+
+    rows.sort(key=lambda r: (grade_sort_key(r['grade']), r['source'], r['topic_code']))
+    return rows
+
+
+def _sql_text(value) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def generate_upsert_sql(rows: List[dict], batch_size: int = UPSERT_BATCH_SIZE) -> str:
+    """Generate batched INSERT ... ON CONFLICT(grade, topic_code) DO UPDATE statements."""
+    lines = [
+        "-- Topic catalog built from eiken_questions.json and past-paper text",
+        f"-- Total rows: {len(rows)} "
+        f"({sum(r['source'] == 'corpus' for r in rows)} corpus, {sum(r['source'] == 'fill' for r in rows)} fill)",
+        "",
+    ]
+
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        lines.append(f"-- Batch {i // batch_size + 1}: rows {i + 1} to {i + len(batch)}")
+        lines.append("INSERT INTO eiken_topic_areas")
+        lines.append("  (grade, topic_code, topic_label_ja, topic_label_en, abstractness_level,")
+        lines.append("   context_type, scenario_description, sub_topics, argument_axes,")
+        lines.append("   weight, official_frequency, is_active)")
+        lines.append("VALUES")
+
+        values = []
+        for t in batch:
+            values.append(
+                f"  ({_sql_text(t['grade'])}, {_sql_text(t['topic_code'])}, "
+                f"{_sql_text(t['topic_label_ja'])}, {_sql_text(t['topic_label_en'])},\n"
+                f"   {t['abstractness_level']}, {_sql_text(t['context_type'])}, "
+                f"{_sql_text(t['scenario_description'] or '')},\n"
+                f"   {_sql_text(json.dumps(t['sub_topics']))}, {_sql_text(json.dumps(t['argument_axes']))},\n"
+                f"   {t['weight']}, {t['official_frequency']}, {t['is_active']})"
+            )
+        lines.append(",\n".join(values))
+        lines.append("ON CONFLICT(grade, topic_code) DO UPDATE SET")
+        lines.append("  sub_topics = excluded.sub_topics,")
+        lines.append("  official_frequency = excluded.official_frequency,")
+        lines.append("  updated_at = CURRENT_TIMESTAMP;")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Build eiken_topic_areas from the question corpus"))
+    parser.add_argument('--questions', type=Path, default=BASE_DIR / "data" / "eiken_questions.json")
+    parser.add_argument('--output-dir', type=Path, default=BASE_DIR / "data" / "phase2a_prep")
+    parser.add_argument('--min-topics', type=int, default=MIN_TOPICS_PER_GRADE)
+    parser.add_argument('--no-past-papers', action='store_true',
+                        help="skip past-paper text (no pdfplumber needed)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Topic Catalog Builder")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("build_topic_catalog", args.profile, args.report_dir) as run:
+        print(f"Loading questions from: {args.questions}")
+        with run.stage("load_questions"):
+            questions_data = load_questions(args.questions)
+
+        print(f"Loading existing catalog from: {CATALOG_MIGRATION.name}")
+        with run.stage("load_existing_catalog") as stage:
+            existing_catalog = load_existing_catalog()
+            stage.rows = len(existing_catalog)
+        print(f"  → {len(existing_catalog)} topics")
+
+        past_papers = []
+        if not args.no_past_papers:
+            print("Loading past-paper text...")
+            with run.stage("load_past_paper_texts") as stage:
+                past_papers = load_past_paper_texts()
+                stage.rows = len(past_papers)
+            print(f"  → {len(past_papers)} papers")
+
+        with run.stage("build_catalog") as stage:
+            rows = build_catalog(questions_data, existing_catalog, past_papers, args.min_topics)
+            stage.rows = len(rows)
+
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        output_json = args.output_dir / "topic_catalog.json"
+        output_sql = args.output_dir / "topic_catalog.sql"
+
+        print(f"\nSaving JSON to: {output_json}")
+        with open(output_json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+        print(f"Generating SQL to: {output_sql}")
+        with run.stage("generate_upsert_sql", rows=len(rows)):
+            with open(output_sql, 'w', encoding='utf-8') as f:
+                f.write(generate_upsert_sql(rows))
+
+    print("\n" + "=" * 70)
+    print("✓ Topic catalog generated successfully!")
+    print("=" * 70)
+    print("\nSummary:")
+    for grade in GRADE_ORDER:
+        codes = {t['topic_code'] for t in existing_catalog + rows if t['grade'] == grade}
+        filled = [r['topic_code'] for r in rows if r['grade'] == grade and r['source'] == 'fill']
+        print(f"  - Grade {grade}: {len(codes)} topics"
+              + (f" (filled: {', '.join(filled)})" if filled else ""))
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Hot-vocabulary warmup bundle for the Worker's vocabulary cache.
+
+src/eiken/lib/vocabulary-cache.ts keeps an in-isolate memoryCache (at most
+MAX_CACHE_SIZE words) in front of KV (vocab:<word>, 24h TTL) in front of
+D1, and every isolate starts empty: the first validations after a deploy
+or an eviction all fall through to eiken_vocabulary_lexicon. This job
+predicts which words those validations will look up and prebuilds them.
+
+A validation looks up the unique words of one text (extractWords, minus
+the ignore list), so words are ranked by the share of requests that
+contain them:
+
+    score(w) = (1 - λ) · Σ weight(q)·[w ∈ q] / Σ weight(q)    generated questions
+             +      λ · windows containing w / windows         past papers
+
+where weight(q) = 1 + uses of the question's topic in
+eiken_topic_usage_history (--usage-db, a SQLite copy of the D1 database),
+and the past-paper text of each grade is cut into windows as long as the
+grade's median question. Ties go to the higher Zipf score
+(corpus_frequencies.py). The validators do not know the Eiken grade, so
+lookupWordsWithCache only ever reads the pooled 'all' bundle: the top
+MAX_CACHE_SIZE words over every grade become one bundle of the rows
+lookupWordWithCache would return from eiken_vocabulary_lexicon (--lexicon-db,
+a D1 export or the schema template; lowest CEFR level per word_lemma, null
+for words the lexicon does not have, which the memory cache stores as
+negative hits).
+
+    data/vocab_warmup/kv_bulk.json    wrangler kv bulk put payload: vocab:<word>
+                                      entries and the vocab_warmup:v1:all bundle
+                                      (warmMemoryCache reads it in one get)
+    data/vocab_warmup/seed.json       the same bundle for the Worker build
+                                      (seedMemoryCache)
+    data/vocab_warmup/summary.json    ranking sources and expected hit rates
+
+The expected hit rate is measured on held-out questions (every
+HOLDOUT_EVERY-th by a stable hash of the question id) with a ranking built
+without them: the share of their word lookups the bundle answers, overall
+and per grade.
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import statistics
+import sys
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from build_schema_template import OUTPUT_DIR as SCHEMA_DIR
+from build_schema_template import TEMPLATE_FILE
+from corpus_frequencies import FREQUENCIES_CSV, load_frequencies, lookup_frequency
+from eiken_corpus import (BASE_DIR, QUESTIONS_FILE, grade_sort_key, iter_question_ids, load_past_paper_texts,
+                          load_questions, question_text, topic_code_for)
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+LEXICON_DB = SCHEMA_DIR / TEMPLATE_FILE
+OUTPUT_DIR = BASE_DIR / "data" / "vocab_warmup"
+
+# vocabulary-cache.ts の定数と揃える
+CACHE_PREFIX = "vocab:"
+DEFAULT_TTL = 86400
+MAX_CACHE_SIZE = 1000
+BUNDLE_VERSION = 1
+BUNDLE_PREFIX = f"vocab_warmup:v{BUNDLE_VERSION}:"
+ALL_GRADES = "all"
+
+# vocabulary-validator-cached.ts の DEFAULT_CONFIG.ignore_words
+IGNORE_WORDS = frozenset({'i'})
+# 過去問ウィンドウの重み λ
+PAPER_WEIGHT = 0.3
+HOLDOUT_EVERY = 5
+
+# lookupWordWithCache の levelOrder（未知のレベルは 999）
+LEVEL_ORDER = {'A1': 1, 'A2': 2, 'B1': 3, 'B2': 4, 'C1': 5, 'C2': 6}
+
+# extractWords() と同じ単語境界（JS の \b は ASCII のみ）
+_WORD_RE = re.compile(r"\b[a-zA-Z]+(?:'[a-zA-Z]+)?\b", re.ASCII)
+
+Request = Tuple[str, float, Set[str]]  # (question id, weight, words looked up)
+
+
+def request_words(text: str) -> Set[str]:
+    """The lowercase words one validateVocabularyWithCache call looks up."""
+    return {m.group(0).lower() for m in _WORD_RE.finditer(text)} - IGNORE_WORDS
+
+
+def load_topic_usage(db_path: Path) -> Counter:
+    """(grade, topic_code) → rows in eiken_topic_usage_history."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT grade, topic_code, COUNT(*) FROM eiken_topic_usage_history GROUP BY grade, topic_code"
+        ).fetchall()
+    finally:
+        conn.close()
+    return Counter({(grade, topic): n for grade, topic, n in rows})
+
+
+def question_requests(grade_sections: List[dict], usage: Counter) -> Dict[str, List[Request]]:
+    """Per grade, one weighted request per generated question."""
+    requests: Dict[str, List[Request]] = defaultdict(list)
+    for source_id, grade, q in iter_question_ids(grade_sections):
+        words = request_words(question_text(q))
+        if words:
+            topic = topic_code_for(q.get('topic') or '')
+            requests[grade].append((source_id, 1.0 + usage.get((grade, topic), 0), words))
+    return requests
+
+
+def paper_windows(papers: List[dict], window_sizes: Dict[str, int]) -> Dict[str, List[Set[str]]]:
+    """Per grade, the past-paper text cut into question-sized token windows."""
+    windows: Dict[str, List[Set[str]]] = defaultdict(list)
+    for paper in papers:
+        size = window_sizes.get(paper['grade'])
+        if not size:
+            continue
+        tokens = [m.group(0).lower() for m in _WORD_RE.finditer(paper['text'])]
+        for start in range(0, len(tokens), size):
+            words = set(tokens[start:start + size]) - IGNORE_WORDS
+            if words:
+                windows[paper['grade']].append(words)
+    return windows
+
+
+def rank_words(requests: List[Request], windows: List[Set[str]], paper_weight: float,
+               frequencies: Optional[Dict[str, Tuple[float, int]]]) -> List[Tuple[str, float]]:
+    """(word, score) by expected share of requests containing the word, best first."""
+    scores: Dict[str, float] = defaultdict(float)
+    total_weight = sum(weight for _, weight, _ in requests)
+    question_share = (1 - paper_weight) if windows else 1.0
+    if total_weight:
+        for _, weight, words in requests:
+            for word in words:
+                scores[word] += question_share * weight / total_weight
+    if windows and requests:
+        for words in windows:
+            for word in words:
+                scores[word] += paper_weight / len(windows)
+
+    def zipf(word: str) -> float:
+        return lookup_frequency(frequencies, word)[0] or 0.0
+
+    return sorted(scores.items(), key=lambda item: (-item[1], -zipf(item[0]), item[0]))
+
+
+def hit_rate(hot: Set[str], requests: List[Request]) -> float:
+    """Weighted share of the requests' word lookups answered from hot."""
+    looked_up = sum(weight * len(words) for _, weight, words in requests)
+    answered = sum(weight * len(words & hot) for _, weight, words in requests)
+    return answered / looked_up if looked_up else 0.0
+
+
+def is_holdout(source_id: str) -> bool:
+    return zlib.crc32(source_id.encode()) % HOLDOUT_EVERY == 0
+
+
+def lexicon_entries(db_path: Path) -> Dict[str, dict]:
+    """
+    word_lemma → the eiken_vocabulary_lexicon row lookupWordWithCache returns.
+
+    Its query (WHERE word_lemma = ?) walks the (word_lemma, pos) primary key,
+    so the rows of a word come back in pos order, and the stable sort on
+    levelOrder keeps the first row with the lowest CEFR level.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("SELECT * FROM eiken_vocabulary_lexicon ORDER BY word_lemma, pos").fetchall()
+    finally:
+        conn.close()
+
+    entries: Dict[str, dict] = {}
+    for row in rows:
+        current = entries.get(row['word_lemma'])
+        if current is None or LEVEL_ORDER.get(row['cefr_level'], 999) < LEVEL_ORDER.get(current['cefr_level'], 999):
+            entries[row['word_lemma']] = dict(row)
+    return entries
+
+
+def build_bundles(rankings: Dict[str, List[Tuple[str, float]]], entries: Dict[str, dict],
+                  size: int) -> Dict[str, dict]:
+    """grade → {version, grade, entries: {word: entry or null}} of the top size words."""
+    return {
+        grade: {
+            'version': BUNDLE_VERSION,
+            'grade': grade,
+            'entries': {word: entries.get(word) for word, _ in ranking[:size]},
+        }
+        for grade, ranking in rankings.items()
+    }
+
+
+def generate_kv_bulk(bundles: Dict[str, dict]) -> List[dict]:
+    """wrangler kv bulk put entries: the per-word cache keys plus one key per bundle."""
+    words: Dict[str, dict] = {}
+    for bundle in bundles.values():
+        for word, entry in bundle['entries'].items():
+            # KV の null は getCachedWord で未キャッシュ扱いになるため、語彙外の単語はバンドルのみ
+            if entry is not None:
+                words.setdefault(word, entry)
+    kv = [{'key': f"{CACHE_PREFIX}{word}", 'value': json.dumps(entry, ensure_ascii=False),
+           'expiration_ttl': DEFAULT_TTL}
+          for word, entry in sorted(words.items())]
+    kv += [{'key': f"{BUNDLE_PREFIX}{grade}", 'value': json.dumps(bundle, ensure_ascii=False)}
+           for grade, bundle in bundles.items()]
+    return kv
+
+
+def generate_seed(bundles: Dict[str, dict]) -> dict:
+    """The bundles with each entry stored once: {version, grades: {grade: [words]}, entries}."""
+    entries = {}
+    for bundle in bundles.values():
+        entries.update(bundle['entries'])
+    return {
+        'version': BUNDLE_VERSION,
+        'max_cache_size': MAX_CACHE_SIZE,
+        'grades': {grade: list(bundle['entries']) for grade, bundle in bundles.items()},
+        'entries': dict(sorted(entries.items())),
+    }
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Build the hot-vocabulary KV warmup bundle"))
+    parser.add_argument('--questions', type=Path, default=QUESTIONS_FILE)
+    parser.add_argument('--lexicon-db', type=Path, default=LEXICON_DB, metavar='DB',
+                        help="SQLite database with eiken_vocabulary_lexicon (a D1 export or the schema template)")
+    parser.add_argument('--frequencies', type=Path, default=FREQUENCIES_CSV)
+    parser.add_argument('--usage-db', type=Path, metavar='DB',
+                        help="SQLite copy of the D1 database with eiken_topic_usage_history")
+    parser.add_argument('--paper-weight', type=float, default=PAPER_WEIGHT)
+    parser.add_argument('--size', type=int, default=MAX_CACHE_SIZE, help="words per bundle")
+    parser.add_argument('--no-past-papers', action='store_true', help="rank on the generated questions only")
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Vocabulary Cache Warmup Bundle")
+    print("=" * 70)
+    print()
+
+    if not args.lexicon_db.exists():
+        print(f"❌ {args.lexicon_db} not found; run scripts/build_schema_template.py or pass a D1 export")
+        return 1
+
+    with PipelineRun("build_vocab_warmup", args.profile, args.report_dir) as run:
+        with run.stage("load_requests") as stage:
+            usage = load_topic_usage(args.usage_db) if args.usage_db else Counter()
+            requests = question_requests(load_questions(args.questions), usage)
+            stage.rows = sum(len(r) for r in requests.values())
+
+        with run.stage("load_past_papers") as stage:
+            window_sizes = {grade: int(statistics.median(len(words) for _, _, words in reqs))
+                            for grade, reqs in requests.items()}
+            papers = [] if args.no_past_papers else load_past_paper_texts()
+            windows = paper_windows(papers, window_sizes)
+            stage.rows = sum(len(w) for w in windows.values())
+
+        frequencies = load_frequencies(args.frequencies)
+        if frequencies is None:
+            print(f"⚠️  {args.frequencies} not found; ties are broken alphabetically")
+
+        grades = sorted(requests, key=grade_sort_key)
+        pooled_requests = [r for grade in grades for r in requests[grade]]
+        pooled_windows = [w for grade in grades for w in windows.get(grade, [])]
+
+        with run.stage("rank_words") as stage:
+            pooled = rank_words(pooled_requests, pooled_windows, args.paper_weight, frequencies)
+            stage.rows = len(pooled)
+
+        # 実行時は級が分からず 'all' バンドルだけが読まれるので、各級もそのバンドルで評価する
+        with run.stage("evaluate", rows=len(pooled_requests)):
+            pooled_train = rank_words([r for r in pooled_requests if not is_holdout(r[0])], pooled_windows,
+                                      args.paper_weight, frequencies)
+            hot_train = {w for w, _ in pooled_train[:args.size]}
+            hot = {w for w, _ in pooled[:args.size]}
+            evaluation = {}
+            for grade in grades + [ALL_GRADES]:
+                reqs = pooled_requests if grade == ALL_GRADES else requests[grade]
+                held_out = [r for r in reqs if is_holdout(r[0])]
+                evaluation[grade] = {
+                    'requests': len(reqs),
+                    'held_out': len(held_out),
+                    'distinct_words': len(set().union(*(words for _, _, words in reqs))),
+                    'expected_hit_rate': round(hit_rate(hot_train, held_out), 4),
+                    'in_sample_hit_rate': round(hit_rate(hot, reqs), 4),
+                }
+
+        with run.stage("write_bundles") as stage:
+            entries = lexicon_entries(args.lexicon_db)
+            bundles = build_bundles({ALL_GRADES: pooled}, entries, args.size)
+            kv_entries = generate_kv_bulk(bundles)
+            seed = generate_seed(bundles)
+            args.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(args.output_dir / "kv_bulk.json", 'w', encoding='utf-8') as f:
+                json.dump(kv_entries, f, ensure_ascii=False)
+            with open(args.output_dir / "seed.json", 'w', encoding='utf-8') as f:
+                json.dump(seed, f, ensure_ascii=False, separators=(',', ':'))
+            stage.rows = len(kv_entries)
+
+    summary = {
+        'bundle_size': args.size,
+        'paper_weight': 0.0 if args.no_past_papers else args.paper_weight,
+        'usage_rows': sum(usage.values()),
+        'past_paper_windows': {grade: len(windows.get(grade, [])) for grade in grades},
+        'window_sizes': window_sizes,
+        'kv_entries': len(kv_entries),
+        'seed_entries': len(seed['entries']),
+        'bundle_words': len(bundles[ALL_GRADES]['entries']),
+        'in_lexicon': sum(1 for e in bundles[ALL_GRADES]['entries'].values() if e is not None),
+        'top_words': [w for w, _ in pooled[:20]],
+        'grades': evaluation,
+    }
+    with open(args.output_dir / "summary.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"📊 {len(pooled_requests)} generated questions, {sum(len(w) for w in windows.values()):,} past-paper "
+          f"windows, {sum(usage.values()):,} usage rows")
+    print()
+    print(f"📦 Bundle: {summary['bundle_words']:,} words, {summary['in_lexicon']:,} in the lexicon")
+    print()
+    print(f"   {'grade':<6} {'words':>6} {'expected hit':>13} {'in-sample':>10}")
+    for grade in grades + [ALL_GRADES]:
+        info = summary['grades'][grade]
+        print(f"   {grade:<6} {info['distinct_words']:>6,} {info['expected_hit_rate']:>12.1%} "
+              f"{info['in_sample_hit_rate']:>10.1%}")
+    print()
+    print(f"💾 KV payload: {args.output_dir / 'kv_bulk.json'} ({len(kv_entries):,} keys)")
+    print(f"💾 Seed file: {args.output_dir / 'seed.json'} ({len(seed['entries']):,} entries)")
+    print(f"🚀 KV: npx wrangler kv bulk put --binding=KV {args.output_dir / 'kv_bulk.json'}")
+
+    # seedMemoryCache は MAX_CACHE_SIZE を超えた分を捨てる
+    if args.size > MAX_CACHE_SIZE:
+        print(f"⚠️  --size {args.size} exceeds MAX_CACHE_SIZE {MAX_CACHE_SIZE}; "
+              f"the Worker keeps only the first {MAX_CACHE_SIZE} words")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Retention compaction for the topic selector's hot tables.
+
+eiken_topic_usage_history gets a row per generated question and
+eiken_topic_blacklist keeps every row after it expires; neither is ever
+cleaned up, so the selector's per-student LRU and blacklist queries run
+against tables that grow with every student. This tool walks both tables
+along their cleanup indexes (idx_usage_cleanup, idx_blacklist_cleanup,
+migrations/0010_create_topic_system.sql) in keyset-paginated batches,
+(used_at, id) > last row of the previous page, one transaction per batch:
+
+  - usage rows older than --retention-days (whole UTC days) are rolled into
+    eiken_topic_usage_daily, one row per (student, grade, topic, question
+    type, day), and deleted. The newest LRU_KEEP rows of every
+    (student, grade, question_type) are kept whatever their age, since the
+    LRU filter reads the last LRU_WINDOW_SIZES rows of that group.
+  - topics that have usage but no eiken_topic_statistics row (usage
+    recorded by the question generator, which does not touch the
+    statistics) get one with the rolled-up count; existing statistics rows
+    only have last_selected_at moved forward, as selection_count is already
+    incremented on every selection.
+  - blacklist rows that expired more than --blacklist-grace-days ago are
+    deleted. The grace period keeps failure_count around for addToBlacklist,
+    which lengthens the TTL of topics that keep failing.
+
+    python scripts/compact_topic_history.py --sqlite .wrangler/state/v3/d1/.../db.sqlite
+    python scripts/compact_topic_history.py --wrangler --remote --batch-size 200
+    python scripts/compact_topic_history.py --sqlite /tmp/eiken.sqlite --dry-run
+"""
+
+import argparse
+import json
+import subprocess
+import sqlite3
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from apply_sql_batches import D1_DATABASE, SQLITE_BUSY_TIMEOUT
+from batch_payloads import insert_sql
+from eiken_corpus import BASE_DIR
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+# eiken_topic_usage_history の保持期間（0010 のコメント: retention 90 days）
+USAGE_RETENTION_DAYS = 90
+# LRU_WINDOW_SIZES（src/eiken/types/index.ts）の最大値
+LRU_KEEP = 5
+# BLACKLIST_TTL_MAP の最長 TTL
+BLACKLIST_GRACE_DAYS = 14
+DEFAULT_BATCH_SIZE = 500
+
+DAILY_COLUMNS = ('student_id', 'grade', 'topic_code', 'question_type', 'usage_date',
+                 'use_count', 'first_used_at', 'last_used_at')
+DAILY_KEY = DAILY_COLUMNS[:5]
+DAILY_UPSERT = insert_sql(
+    "eiken_topic_usage_daily", DAILY_COLUMNS, conflict=DAILY_KEY, update=(),
+    extra_set=("use_count = use_count + excluded.use_count",
+               "first_used_at = MIN(first_used_at, excluded.first_used_at)",
+               "last_used_at = MAX(last_used_at, excluded.last_used_at)",
+               "compacted_at = CURRENT_TIMESTAMP"))
+STATISTICS_BACKFILL = insert_sql(
+    "eiken_topic_statistics", ('grade', 'topic_code', 'question_type', 'selection_count', 'last_selected_at'),
+    conflict=('grade', 'topic_code', 'question_type'), update=(),
+    extra_set=("last_selected_at = MAX(COALESCE(last_selected_at, ''), excluded.last_selected_at)",))
+
+# newer: 同じ (student, grade, question_type) でより新しい行の数（LRU_KEEP で打ち切り）
+USAGE_PAGE = """
+SELECT h.id, h.student_id, h.grade, h.topic_code, h.question_type, h.used_at,
+       (SELECT COUNT(*) FROM (
+            SELECT 1 FROM eiken_topic_usage_history AS n
+            WHERE n.student_id = h.student_id AND n.grade = h.grade AND n.question_type = h.question_type
+              AND (n.used_at, n.id) > (h.used_at, h.id)
+            LIMIT ?)) AS newer
+FROM eiken_topic_usage_history AS h INDEXED BY idx_usage_cleanup
+WHERE h.used_at < ? AND (h.used_at, h.id) > (?, ?)
+ORDER BY h.used_at, h.id
+LIMIT ?
+"""
+BLACKLIST_PAGE = """
+SELECT id, expires_at FROM eiken_topic_blacklist INDEXED BY idx_blacklist_cleanup
+WHERE expires_at < ? AND (expires_at, id) > (?, ?)
+ORDER BY expires_at, id
+LIMIT ?
+"""
+
+
+class CompactionError(Exception):
+    pass
+
+
+class SQLiteTarget:
+    """Local SQLite database (a copy of D1, or wrangler's local state file)."""
+
+    def __init__(self, path: Path):
+        if not path.exists():
+            raise CompactionError(f"{path} not found")
+        self.conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+        self.label = f"sqlite-{path.stem}"
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        try:
+            return self.conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise CompactionError(str(e))
+
+    def transaction(self, statements: List[Tuple[str, List[Sequence]]]):
+        """Run (sql, parameter rows) pairs atomically."""
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for sql, rows in statements:
+                self.conn.executemany(sql, rows)
+            self.conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise CompactionError(str(e))
+
+    def close(self):
+        self.conn.close()
+
+
+def _sql_literal(value) -> str:
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _render(sql: str, params: Sequence) -> str:
+    """Inline the ? parameters (wrangler --command has no bindings)."""
+    parts = sql.split('?')
+    if len(parts) != len(params) + 1:
+        raise CompactionError(f"{len(params)} values for {len(parts) - 1} parameters")
+    return parts[0] + "".join(_sql_literal(v) + part for v, part in zip(params, parts[1:]))
+
+
+class WranglerTarget:
+    """
+    D1 through `npx wrangler d1 execute`: reads go through --command --json,
+    and each write batch is written to a temporary SQL file and run with
+    --file (one D1 batch), since a batch inlined into the argument list
+    can exceed the OS limit on argument size.
+    """
+
+    def __init__(self, database: str = D1_DATABASE, remote: bool = False, timeout: float = 300.0):
+        self.database = database
+        self.remote = remote
+        self.timeout = timeout
+        self.label = f"d1-{database}-{'remote' if remote else 'local'}"
+
+    def _run(self, *arguments: str) -> str:
+        command = ["npx", "wrangler", "d1", "execute", self.database,
+                   "--remote" if self.remote else "--local", "--yes", *arguments]
+        try:
+            result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise CompactionError(f"wrangler timed out after {self.timeout:.0f}s")
+        except FileNotFoundError:
+            raise CompactionError("npx not found (install Node.js / wrangler)")
+        except OSError as e:
+            raise CompactionError(f"wrangler could not be started: {e}")
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).strip()
+            raise CompactionError(output.splitlines()[-1] if output else f"wrangler exited with {result.returncode}")
+        return result.stdout
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        results = json.loads(self._run("--json", "--command", _render(sql, params)))
+        return [tuple(row.values()) for row in results[0].get('results', [])]
+
+    def transaction(self, statements: List[Tuple[str, List[Sequence]]]):
+        script = ";\n".join(_render(sql, row) for sql, rows in statements for row in rows) + ";\n"
+        fd, path = tempfile.mkstemp(suffix='.sql', prefix='compact_topics_')
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                f.write(script)
+            self._run(f"--file={path}")
+        except OSError as e:
+            raise CompactionError(f"could not write the batch file: {e}")
+        finally:
+            Path(path).unlink(missing_ok=True)
+
+    def close(self):
+        pass
+
+
+def _in_list(sql: str, ids: List[int]) -> Tuple[str, List[Sequence]]:
+    return sql.format(placeholders=", ".join('?' * len(ids))), [ids]
+
+
+def rollup_rows(rows: List[tuple]) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Usage rows (id, student, grade, topic, type, used_at) → daily upsert
+    rows and statistics backfill rows.
+    """
+    daily: Dict[tuple, list] = {}
+    topics: Dict[tuple, list] = {}
+    for _, student_id, grade, topic_code, question_type, used_at in rows:
+        key = (student_id, grade, topic_code, question_type, used_at[:10])
+        bucket = daily.setdefault(key, [0, used_at, used_at])
+        bucket[0] += 1
+        bucket[1] = min(bucket[1], used_at)
+        bucket[2] = max(bucket[2], used_at)
+        topic = topics.setdefault((grade, topic_code, question_type), [0, used_at])
+        topic[0] += 1
+        topic[1] = max(topic[1], used_at)
+    return ([key + tuple(bucket) for key, bucket in daily.items()],
+            [key + tuple(topic) for key, topic in topics.items()])
+
+
+def compact_usage(target, cutoff: str, keep: int = LRU_KEEP, batch_size: int = DEFAULT_BATCH_SIZE,
+                  max_batches: Optional[int] = None) -> dict:
+    """
+    Roll usage rows with used_at < cutoff into eiken_topic_usage_daily and
+    delete them, batch by batch.
+
+    Returns:
+        {'batches', 'scanned', 'rolled_up', 'kept_for_lru', 'daily_rows'}
+    """
+    counts = defaultdict(int)
+    cursor = ('', 0)
+    while max_batches is None or counts['batches'] < max_batches:
+        page = target.query(USAGE_PAGE, (keep, cutoff, *cursor, batch_size))
+        if not page:
+            break
+        cursor = (page[-1][5], page[-1][0])
+        expired = [row[:6] for row in page if row[6] >= keep]
+        counts['batches'] += 1
+        counts['scanned'] += len(page)
+        counts['kept_for_lru'] += len(page) - len(expired)
+        if not expired:
+            continue
+        daily, topics = rollup_rows(expired)
+        target.transaction([
+            (DAILY_UPSERT, daily),
+            (STATISTICS_BACKFILL, topics),
+            _in_list("DELETE FROM eiken_topic_usage_history WHERE id IN ({placeholders})",
+                     [row[0] for row in expired]),
+        ])
+        counts['rolled_up'] += len(expired)
+        counts['daily_rows'] += len(daily)
+    return dict(counts)
+
+
+def purge_blacklist(target, cutoff: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                    max_batches: Optional[int] = None) -> dict:
+    """Delete blacklist rows with expires_at < cutoff, batch by batch."""
+    counts = defaultdict(int)
+    cursor = ('', 0)
+    while max_batches is None or counts['batches'] < max_batches:
+        page = target.query(BLACKLIST_PAGE, (cutoff, *cursor, batch_size))
+        if not page:
+            break
+        cursor = (page[-1][1], page[-1][0])
+        target.transaction([_in_list("DELETE FROM eiken_topic_blacklist WHERE id IN ({placeholders})",
+                                     [row[0] for row in page])])
+        counts['batches'] += 1
+        counts['deleted'] += len(page)
+    return dict(counts)
+
+
+def table_counts(target, usage_cutoff: str, blacklist_cutoff: str) -> dict:
+    (row,) = target.query(
+        "SELECT (SELECT COUNT(*) FROM eiken_topic_usage_history),"
+        " (SELECT COUNT(*) FROM eiken_topic_usage_history WHERE used_at < ?),"
+        " (SELECT COUNT(*) FROM eiken_topic_blacklist),"
+        " (SELECT COUNT(*) FROM eiken_topic_blacklist WHERE expires_at < ?),"
+        " (SELECT COALESCE(SUM(use_count), 0) FROM eiken_topic_usage_daily)",
+        (usage_cutoff, blacklist_cutoff))
+    return dict(zip(('usage', 'usage_expired', 'blacklist', 'blacklist_expired', 'daily_uses'), row))
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Roll up and purge topic usage history and blacklist"))
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument('--sqlite', type=Path, metavar='DB', help="compact a local SQLite database")
+    target_group.add_argument('--wrangler', action='store_true', help="compact D1 with wrangler d1 execute")
+    parser.add_argument('--database', default=D1_DATABASE, help="D1 database name (--wrangler)")
+    parser.add_argument('--remote', action='store_true', help="wrangler --remote instead of --local")
+    parser.add_argument('--retention-days', type=int, default=USAGE_RETENTION_DAYS)
+    parser.add_argument('--keep', type=int, default=LRU_KEEP, help="newest rows kept per student/grade/type")
+    parser.add_argument('--blacklist-grace-days', type=int, default=BLACKLIST_GRACE_DAYS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--max-batches', type=int, help="stop each table after N batches (rerun to continue)")
+    parser.add_argument('--as-of', type=date.fromisoformat, help="reference date (default: today, UTC)")
+    parser.add_argument('--dry-run', action='store_true', help="only count what would be compacted")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    if args.as_of:
+        now = datetime.combine(args.as_of, datetime.min.time(), tzinfo=timezone.utc)
+    usage_cutoff = (now.date() - timedelta(days=args.retention_days)).isoformat()
+    blacklist_cutoff = (now - timedelta(days=args.blacklist_grace_days)).strftime('%Y-%m-%dT%H:%M:%S')
+
+    print("=" * 70)
+    print("Topic History Compaction")
+    print("=" * 70)
+    print()
+
+    try:
+        target = SQLiteTarget(args.sqlite) if args.sqlite else WranglerTarget(args.database, args.remote)
+        print(f"🎯 Target: {target.label}")
+        print(f"   usage before {usage_cutoff} (keeping the newest {args.keep} per student/grade/type), "
+              f"blacklist expired before {blacklist_cutoff}")
+        before = table_counts(target, usage_cutoff, blacklist_cutoff)
+        print(f"📊 usage history {before['usage']:,} rows ({before['usage_expired']:,} past retention), "
+              f"blacklist {before['blacklist']:,} rows ({before['blacklist_expired']:,} past grace)")
+        if args.dry_run:
+            target.close()
+            return 0
+
+        with PipelineRun("compact_topic_history", args.profile, args.report_dir) as run:
+            with run.stage("compact_usage") as stage:
+                usage = compact_usage(target, usage_cutoff, args.keep, args.batch_size, args.max_batches)
+                stage.rows = usage.get('scanned', 0)
+            with run.stage("purge_blacklist") as stage:
+                blacklist = purge_blacklist(target, blacklist_cutoff, args.batch_size, args.max_batches)
+                stage.rows = blacklist.get('deleted', 0)
+
+        after = table_counts(target, usage_cutoff, blacklist_cutoff)
+        target.close()
+    except CompactionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print()
+    print(f"✅ usage: {usage.get('rolled_up', 0):,} rows rolled into {usage.get('daily_rows', 0):,} daily rows "
+          f"({usage.get('kept_for_lru', 0):,} kept for LRU) in {usage.get('batches', 0)} batch(es)")
+    print(f"✅ blacklist: {blacklist.get('deleted', 0):,} expired rows deleted in {blacklist.get('batches', 0)} batch(es)")
+    print(f"📊 usage history {before['usage']:,} → {after['usage']:,}, blacklist {before['blacklist']:,} → "
+          f"{after['blacklist']:,}")
+
+    # ロールアップした使用回数と削除した行数を照合
+    rolled = after['daily_uses'] - before['daily_uses']
+    deleted = usage.get('rolled_up', 0)
+    if rolled != deleted:
+        print(f"❌ Daily rollups gained {rolled:,} uses but {deleted:,} usage rows were deleted")
+        return 1
+    print("✓ Daily rollup use counts match the deleted usage rows")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,14 @@ CEFR-J Wordlist Ver1.6 Excel to CSV Converter
 A1-B2レベルの語彙をCSV形式に変換
 """
 
-import openpyxl
-import csv
+import argparse
 import json
 import sys
 from pathlib import Path
 
+from lexicon_records import LexiconTable, expand_variants, normalize_pos, normalize_word
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
 def convert_excel_to_csv(excel_path: str, output_csv: str):
     """
     CEFR-J WordlistのExcelファイルをCSVに変換
@@ -18,6 +20,8 @@ def convert_excel_to_csv(excel_path: str, output_csv: str):
         excel_path: 入力Excelファイルパス
         output_csv: 出力CSVファイルパス
     """
+    import openpyxl
+
     print(f"📂 Loading Excel file: {excel_path}")
     wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
     
@@ -26,7 +30,7 @@ def convert_excel_to_csv(excel_path: str, output_csv: str):
     
     # A1-B2の各レベルシートを処理
     levels = ['A1', 'A2', 'B1', 'B2']
-    all_words = []
+    all_words = LexiconTable()
     
     for level in levels:
         # _sep版（分割版）を優先的に使用
@@ -54,36 +58,29 @@ def convert_excel_to_csv(excel_path: str, output_csv: str):
             if not row[0]:  # 最初の列が空ならスキップ
                 continue
             
-            # 単語データを抽出
-            word_data = {
-                'word': str(row[0]).strip() if row[0] else '',
-                'cefr_level': level,
-                'pos': str(row[1]).strip() if len(row) > 1 and row[1] else 'unknown',
-            }
+            # 単語データを抽出（大文字小文字はそのまま: A.M., April など）
+            word = normalize_word(row[0], lower=False)
             
             # 空の単語はスキップ
-            if not word_data['word'] or word_data['word'] == 'None':
+            if not word:
                 continue
             
-            all_words.append(word_data)
+            # _sep シートは分割済み。分割前のシートでは 'a.m./A.M./am/AM' を表記ごとに展開
+            pos = normalize_pos(row[1] if len(row) > 1 else None, lower=False)
+            for variant in expand_variants(word):
+                all_words.add(variant, pos=pos, cefr_level=level)
             row_count += 1
         
         print(f"   ✅ Processed {row_count} words from {level}")
     
     # CSVに書き込み
     print(f"\n💾 Writing to CSV: {output_csv}")
-    with open(output_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=['word', 'pos', 'cefr_level'])
-        writer.writeheader()
-        writer.writerows(all_words)
+    all_words.write_csv(output_csv, ['word', 'pos', 'cefr_level'])
     
     print(f"✅ Successfully wrote {len(all_words)} words to CSV")
     
     # 統計情報を表示
-    level_counts = {}
-    for word in all_words:
-        level = word['cefr_level']
-        level_counts[level] = level_counts.get(level, 0) + 1
+    level_counts = all_words.level_counts()
     
     print("\n📊 Statistics by CEFR Level:")
     for level in ['A1', 'A2', 'B1', 'B2']:
@@ -93,6 +90,9 @@ def convert_excel_to_csv(excel_path: str, output_csv: str):
     return len(all_words)
 
 def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="CEFR-J Wordlist Excel to CSV Converter"))
+    args = parser.parse_args()
+
     # パス設定
     base_dir = Path(__file__).parent.parent
     excel_path = base_dir / "data" / "vocabulary" / "cefrj_wordlist_v16.xlsx"
@@ -103,7 +103,10 @@ def main():
         sys.exit(1)
     
     try:
-        total_words = convert_excel_to_csv(str(excel_path), str(output_csv))
+        with PipelineRun("convert-cefrj-wordlist", args.profile, args.report_dir) as run:
+            with run.stage("convert_excel_to_csv") as stage:
+                total_words = convert_excel_to_csv(str(excel_path), str(output_csv))
+                stage.rows = total_words
         print(f"\n🎉 Conversion completed successfully!")
         print(f"📁 Output file: {output_csv}")
         print(f"📊 Total words: {total_words:,}")
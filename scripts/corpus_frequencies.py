@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Per-lemma corpus frequencies and Zipf scores for the lexicon build.
+
+Counts every lemma in the extracted past-paper text with a multiprocess
+map-reduce: the documents are split into size-balanced shards, each worker
+tokenizes and lemmatizes its shard (eiken_lexicon.Lexicon.lemmatize) into
+its own Counter, and the shards are summed at the end.
+
+The counts are combined with the NGSL SFI values of ngsl-full-raw.csv
+(Standard Frequency Index over a 273M-word reference corpus) into one
+Zipf score per lemma:
+
+    Zipf = log10(occurrences per billion words)
+         = SFI / 10 - 1                                   NGSL lemmas
+         = a + b * log10((count + 1) / (N + V) * 1e9)     corpus-only lemmas
+
+where the corpus-only estimate (Laplace-smoothed, van Heuven et al. 2014)
+is calibrated with a least-squares line fitted on the lemmas both sources
+share, so a word seen once in the small past-paper corpus is not ranked
+like a common word. Scores are clipped to the 1.0-7.0 range the
+eiken_vocabulary_lexicon CHECK allows; frequency_rank orders lemmas by
+Zipf (1 = most frequent).
+
+    data/lexicon_frequencies/lemma_frequencies.csv
+    data/lexicon_frequencies/summary.json
+
+import-cefrj-to-db.py and import_cefrj_wordlist.py read the CSV through
+load_frequencies() for zipf_score / frequency_rank.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from eiken_corpus import BASE_DIR, load_past_paper_texts, tokenize
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+NGSL_SFI_CSV = BASE_DIR / "data" / "vocabulary-sources" / "ngsl-full-raw.csv"
+OUTPUT_DIR = BASE_DIR / "data" / "lexicon_frequencies"
+FREQUENCIES_CSV = OUTPUT_DIR / "lemma_frequencies.csv"
+SUMMARY_FILE = OUTPUT_DIR / "summary.json"
+
+CSV_FIELDS = ('lemma', 'corpus_count', 'per_million', 'ngsl_sfi', 'zipf_score', 'zipf_source', 'frequency_rank')
+
+# eiken_vocabulary_lexicon の CHECK (zipf_score >= 1.0 AND zipf_score <= 7.0)
+ZIPF_MIN = 1.0
+ZIPF_MAX = 7.0
+
+_worker_lexicon = None
+
+
+def _init_worker():
+    from eiken_lexicon import load_lexicon
+
+    global _worker_lexicon
+    _worker_lexicon = load_lexicon()
+
+
+def count_shard(texts: List[str]) -> Counter:
+    """Map step: lemma counts of one shard of documents."""
+    lemmatize = _worker_lexicon.lemmatize
+    counts = Counter()
+    for text in texts:
+        counts.update(lemmatize(token) for token in tokenize(text))
+    return counts
+
+
+def make_shards(texts: List[str], n_shards: int) -> List[List[str]]:
+    """Size-balanced shards (largest document first into the lightest shard)."""
+    shards: List[List[str]] = [[] for _ in range(max(1, min(n_shards, len(texts))))]
+    sizes = [0] * len(shards)
+    for text in sorted(texts, key=len, reverse=True):
+        lightest = sizes.index(min(sizes))
+        shards[lightest].append(text)
+        sizes[lightest] += len(text)
+    return shards
+
+
+def count_lemmas(texts: List[str], jobs: int) -> Tuple[Counter, int]:
+    """
+    Map-reduce lemma counts over texts.
+
+    Returns:
+        (merged Counter, number of shards)
+    """
+    shards = make_shards(texts, jobs)
+    if jobs <= 1:
+        _init_worker()
+        partials = [count_shard(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            partials = list(pool.map(count_shard, shards))
+
+    # reduce: シャードごとの Counter を合算
+    total = Counter()
+    for partial in partials:
+        total.update(partial)
+    return total, len(shards)
+
+
+def load_ngsl_sfi(path: Path = NGSL_SFI_CSV) -> Dict[str, float]:
+    """Lemma → SFI (highest value when a lemma is listed twice)."""
+    sfi = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            lemma = (row.get('Lemma') or '').strip().lower()
+            try:
+                value = float(row.get('SFI') or '')
+            except ValueError:
+                continue
+            if lemma and value > sfi.get(lemma, -math.inf):
+                sfi[lemma] = value
+    return sfi
+
+
+def sfi_to_zipf(sfi: float) -> float:
+    """SFI = 10·(log10(per million) + 4), Zipf = log10(per million) + 3."""
+    return sfi / 10 - 1
+
+
+def corpus_zipf(counts: Counter) -> Dict[str, float]:
+    """Laplace-smoothed Zipf of every counted lemma."""
+    tokens = sum(counts.values())
+    denominator = (tokens + len(counts)) / 1e9
+    return {lemma: math.log10((n + 1) / denominator) for lemma, n in counts.items()}
+
+
+def fit_calibration(raw: Dict[str, float], reference: Dict[str, float]) -> Tuple[float, float]:
+    """Least-squares (intercept, slope) mapping corpus Zipf onto NGSL Zipf over shared lemmas."""
+    import numpy as np
+
+    shared = [lemma for lemma in raw if lemma in reference]
+    if len(shared) < 2:
+        return 0.0, 1.0
+    x = np.array([raw[lemma] for lemma in shared])
+    y = np.array([reference[lemma] for lemma in shared])
+    slope, intercept = np.polyfit(x, y, 1)
+    return float(intercept), float(slope)
+
+
+def build_frequencies(counts: Counter, sfi: Dict[str, float]) -> Tuple[List[dict], dict]:
+    """
+    One row per lemma with corpus counts and/or an NGSL SFI, ranked by Zipf.
+
+    Returns:
+        (rows in frequency_rank order, calibration info)
+    """
+    tokens = sum(counts.values())
+    raw = corpus_zipf(counts)
+    reference = {lemma: sfi_to_zipf(value) for lemma, value in sfi.items()}
+    intercept, slope = fit_calibration(raw, reference)
+
+    rows = []
+    for lemma in set(counts) | set(sfi):
+        if lemma in reference:
+            zipf, source = reference[lemma], 'ngsl'
+        else:
+            zipf, source = intercept + slope * raw[lemma], 'corpus'
+        rows.append({
+            'lemma': lemma,
+            'corpus_count': counts.get(lemma, 0),
+            'per_million': round(counts.get(lemma, 0) / tokens * 1e6, 2) if tokens else 0.0,
+            'ngsl_sfi': sfi.get(lemma),
+            'zipf_score': round(min(ZIPF_MAX, max(ZIPF_MIN, zipf)), 2),
+            'zipf_source': source,
+        })
+
+    rows.sort(key=lambda r: (-r['zipf_score'], -r['corpus_count'], r['lemma']))
+    for rank, row in enumerate(rows, 1):
+        row['frequency_rank'] = rank
+
+    shared = sum(1 for lemma in counts if lemma in reference)
+    return rows, {'intercept': round(intercept, 4), 'slope': round(slope, 4), 'shared_lemmas': shared}
+
+
+def write_frequencies(rows: List[dict], path: Path = FREQUENCIES_CSV):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, 'ngsl_sfi': '' if row['ngsl_sfi'] is None else row['ngsl_sfi']})
+
+
+def load_frequencies(path: Path = FREQUENCIES_CSV) -> Optional[Dict[str, Tuple[float, int]]]:
+    """lemma → (zipf_score, frequency_rank); None when the table has not been built."""
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return {row['lemma']: (float(row['zipf_score']), int(row['frequency_rank']))
+                for row in csv.DictReader(f)}
+
+
+def lookup_frequency(frequencies: Optional[Dict[str, Tuple[float, int]]], word: str
+                     ) -> Tuple[Optional[float], Optional[int]]:
+    """(zipf_score, frequency_rank) of a headword, (None, None) when unknown."""
+    if not frequencies:
+        return None, None
+    return frequencies.get(word.strip().lower(), (None, None))
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Map-reduce lemma frequencies and Zipf scores"))
+    parser.add_argument('--ngsl', type=Path, default=NGSL_SFI_CSV)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--verify', action='store_true',
+                        help="also count the corpus in a single process and compare with the merged shards")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Corpus Lemma Frequencies")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("corpus_frequencies", args.profile, args.report_dir) as run:
+        with run.stage("load_past_papers") as stage:
+            papers = load_past_paper_texts()
+            texts = [paper['text'] for paper in papers]
+            stage.rows = len(texts)
+
+        with run.stage("count_lemmas", rows=len(texts)):
+            counts, n_shards = count_lemmas(texts, args.jobs)
+
+        with run.stage("load_ngsl_sfi") as stage:
+            sfi = load_ngsl_sfi(args.ngsl)
+            stage.rows = len(sfi)
+
+        with run.stage("build_frequencies") as stage:
+            rows, calibration = build_frequencies(counts, sfi)
+            stage.rows = len(rows)
+
+        with run.stage("write_frequencies", rows=len(rows)):
+            write_frequencies(rows, args.output_dir / FREQUENCIES_CSV.name)
+
+    tokens = sum(counts.values())
+
+    summary = {
+        'documents': len(texts),
+        'shards': n_shards,
+        'corpus_tokens': tokens,
+        'corpus_lemmas': len(counts),
+        'ngsl_lemmas': len(sfi),
+        'lemmas': len(rows),
+        'zipf_sources': dict(Counter(r['zipf_source'] for r in rows)),
+        'calibration': calibration,
+        'top_corpus_lemmas': counts.most_common(20),
+    }
+    with open(args.output_dir / SUMMARY_FILE.name, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"💾 Frequencies written to: {args.output_dir / FREQUENCIES_CSV.name}")
+    print(f"   {len(texts)} documents in {n_shards} shard(s), {tokens:,} tokens, {len(counts):,} corpus lemmas")
+    print(f"   {len(rows):,} lemmas ranked ({summary['zipf_sources'].get('ngsl', 0):,} NGSL SFI, "
+          f"{summary['zipf_sources'].get('corpus', 0):,} corpus only)")
+    print(f"   corpus → NGSL Zipf calibration: {calibration['intercept']:+.3f} + "
+          f"{calibration['slope']:.3f}·x over {calibration['shared_lemmas']:,} shared lemmas")
+    if args.verify:
+        # map-reduce の結果を単一プロセスの集計と照合
+        _init_worker()
+        if count_shard(texts) != counts:
+            print("❌ Merged shard counts differ from a single-process count")
+            return 1
+        print("✓ Merged shard counts match a single-process count")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Vectorized port of src/eiken/services/difficulty-calculator.ts.
+
+calculate_difficulty_components() scores a whole batch of vocabulary rows
+with NumPy using the same five components (CEFR weight, Zipf penalty,
+NGSL/NAWL weight, Japanese learnability, length bonus), the same rounding
+(Math.round = round half up) and the same annotation threshold as
+calculateDifficultyScore, so scores can be precomputed at build time.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# difficulty-calculator.ts CEFR_J_COEFFICIENTS
+CEFR_J_COEFFICIENTS = {'A1': 0, 'A2': 1, 'B1': 3, 'B2': 6, 'C1': 8, 'C2': 10}
+
+ANNOTATION_THRESHOLD = 60
+MISSING_ZIPF_PENALTY = 15
+LONG_WORD_LENGTH = 10
+LONG_WORD_BONUS = 5
+
+# difficulty-calculator.ts EXAMPLE_CALCULATIONS
+EXAMPLE_CALCULATIONS = {
+    'the': {'word': 'the', 'cefr_level': 'A1', 'cefr_numeric': 1, 'zipf_score': 7.9,
+            'source_ngsl': True, 'source_nawl': False, 'expected_score': 6},
+    'essential': {'word': 'essential', 'cefr_level': 'B1', 'cefr_numeric': 3, 'zipf_score': 4.8,
+                  'source_ngsl': False, 'source_nawl': True, 'expected_score': 32},
+    'accompany': {'word': 'accompany', 'cefr_level': 'B2', 'cefr_numeric': 4, 'zipf_score': 3.2,
+                  'source_ngsl': False, 'source_nawl': False, 'expected_score': 60},
+    'comprehend': {'word': 'comprehend', 'cefr_level': 'C1', 'cefr_numeric': 5, 'zipf_score': 2.8,
+                   'source_ngsl': False, 'source_nawl': False, 'expected_score': 75},
+}
+EXAMPLE_TOLERANCE = 2
+
+COMPONENT_COLUMNS = ('cefr_weight', 'zipf_penalty', 'ngsl_weight', 'japanese_learnability',
+                     'length_bonus', 'final_score', 'should_annotate')
+
+
+def js_round(values: np.ndarray, digits: int = 0) -> np.ndarray:
+    """Math.round semantics (half rounds towards +∞), not NumPy's half-to-even."""
+    import numpy as np
+
+    scale = 10.0 ** digits
+    return np.floor(values * scale + 0.5) / scale
+
+
+def calculate_difficulty_components(words: List[dict]) -> Dict[str, np.ndarray]:
+    """
+    Score a batch of VocabularyWord-shaped dicts (word, cefr_level,
+    cefr_numeric, zipf_score, source_ngsl, source_nawl).
+
+    Returns:
+        dict of arrays keyed by COMPONENT_COLUMNS, one entry per word
+    """
+    import numpy as np
+
+    n = len(words)
+    cefr_numeric = np.fromiter((w.get('cefr_numeric') or 0 for w in words), dtype=np.float64, count=n)
+    zipf = np.fromiter((float('nan') if w.get('zipf_score') is None else w['zipf_score'] for w in words),
+                       dtype=np.float64, count=n)
+    ngsl = np.fromiter((bool(w.get('source_ngsl')) for w in words), dtype=bool, count=n)
+    nawl = np.fromiter((bool(w.get('source_nawl')) for w in words), dtype=bool, count=n)
+    learnability = np.fromiter((CEFR_J_COEFFICIENTS.get(w.get('cefr_level'), 0) for w in words),
+                               dtype=np.float64, count=n)
+    word_length = np.fromiter((len(w.get('word') or '') for w in words), dtype=np.int64, count=n)
+
+    cefr_weight = cefr_numeric / 6 * 35
+    zipf_penalty = np.where(np.isnan(zipf), MISSING_ZIPF_PENALTY,
+                            np.maximum(0.0, (5.0 - np.nan_to_num(zipf)) * 2.0) / 10 * 30)
+    ngsl_weight = np.where(ngsl, 0.0, np.where(nawl, 2.0, 4.0)) / 4 * 20
+    length_bonus = np.where(word_length >= LONG_WORD_LENGTH, LONG_WORD_BONUS, 0)
+
+    total = cefr_weight + zipf_penalty + ngsl_weight + learnability + length_bonus
+    final_score = np.clip(js_round(total), 0, 100).astype(np.int64)
+
+    return {
+        'cefr_weight': js_round(cefr_weight, 1),
+        'zipf_penalty': js_round(zipf_penalty, 1),
+        'ngsl_weight': js_round(ngsl_weight, 1),
+        'japanese_learnability': learnability,
+        'length_bonus': length_bonus,
+        'final_score': final_score,
+        'should_annotate': final_score >= ANNOTATION_THRESHOLD,
+    }
+
+
+def _component_dict(components: Dict[str, np.ndarray], i: int) -> dict:
+    return {
+        'cefr_weight': float(components['cefr_weight'][i]),
+        'zipf_penalty': float(components['zipf_penalty'][i]),
+        'ngsl_weight': float(components['ngsl_weight'][i]),
+        'japanese_learnability': float(components['japanese_learnability'][i]),
+        'length_bonus': int(components['length_bonus'][i]),
+        'final_score': int(components['final_score'][i]),
+        'should_annotate': bool(components['should_annotate'][i]),
+    }
+
+
+def calculate_difficulty_score(word: dict) -> dict:
+    """Single-word calculateDifficultyScore (a batch of one)."""
+    return _component_dict(calculate_difficulty_components([word]), 0)
+
+
+def calculate_batch_difficulty_scores(words: Iterable[dict]) -> Dict[str, dict]:
+    """calculateBatchDifficultyScores: keyed 'word:pos' (or 'word' without pos); later rows win."""
+    words = list(words)
+    components = calculate_difficulty_components(words)
+    return {
+        (f"{w['word']}:{w['pos']}" if w.get('pos') else w['word']): _component_dict(components, i)
+        for i, w in enumerate(words)
+    }
+
+
+def verify_calculations(examples: Optional[Dict[str, dict]] = None, verbose: bool = True) -> bool:
+    """verifyCalculations(): every example within ±EXAMPLE_TOLERANCE of its expected score."""
+    examples = examples or EXAMPLE_CALCULATIONS
+    scores = calculate_difficulty_components(list(examples.values()))['final_score']
+
+    all_passed = True
+    for (word, example), score in zip(examples.items(), scores):
+        if abs(int(score) - example['expected_score']) > EXAMPLE_TOLERANCE:
+            print(f"❌ {word}: Expected {example['expected_score']}, got {score}")
+            all_passed = False
+        elif verbose:
+            print(f"✅ {word}: Score {score} (expected {example['expected_score']})")
+    return all_passed
@@ -4,13 +4,74 @@ Complete NGSL Data Downloader
 Downloads full NGSL 2,801 word list from EAP Foundation
 """
 
-import requests
-from bs4 import BeautifulSoup
-import csv
+import argparse
+import math
 import re
 
+from lexicon_records import LexiconTable
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+def parse_ngsl_rows(rows):
+    """
+    NGSL table rows (the cell texts of each <tr>) → (LexiconTable, SFI as
+    written on the page, one per table row).
+    """
+    words_data = LexiconTable()
+    sfi_text = []
+    
+    for cols in rows:
+        if len(cols) >= 4:
+            try:
+                rank = cols[0]
+                headword = cols[1].lower()
+                related_forms = cols[2]
+                sfi = cols[3]  # Standardized Frequency Index
+                
+                # Extract numeric rank
+                rank_num = int(re.sub(r'[^\d]', '', rank)) if rank else 0
+                
+                # Assign CEFR level based on rank
+                if rank_num <= 600:
+                    cefr = 'A1'
+                elif rank_num <= 1300:
+                    cefr = 'A2'
+                elif rank_num <= 2100:
+                    cefr = 'B1'
+                elif rank_num <= 2600:
+                    cefr = 'B2'
+                else:
+                    cefr = 'C1'
+                
+                # Calculate frequency from SFI (approximate)
+                # SFI is log-based, so convert back to frequency
+                try:
+                    sfi_float = float(sfi)
+                    frequency = int(10 ** (sfi_float / 10))
+                except:
+                    sfi_float = math.nan
+                    frequency = 0
+                
+                words_data.add(
+                    headword,
+                    rank=rank_num,
+                    frequency=frequency,
+                    cefr_level=cefr,
+                    related_forms=related_forms,
+                    sfi=sfi_float,
+                )
+                # CSV には float ではなくページ上の表記のまま書く（'50' → '50.0' にしない）
+                sfi_text.append(sfi)
+                
+            except Exception as e:
+                print(f"⚠️ Error parsing row: {e}")
+                continue
+    
+    return words_data, sfi_text
+
 def download_ngsl_complete():
     """Download complete NGSL from EAP Foundation"""
+    import requests
+    from bs4 import BeautifulSoup
     
     url = "https://eapfoundation.com/vocab/general/ngsl/"
     print(f"📥 Downloading NGSL from {url}...")
@@ -25,69 +86,27 @@ def download_ngsl_complete():
         table = soup.find('table')
         if not table:
             print("❌ Table not found on page")
-            return None
+            return None, None
         
-        words_data = []
         rows = table.find_all('tr')[1:]  # Skip header row
         
         print(f"📊 Found {len(rows)} rows in table...")
         
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) >= 4:
-                try:
-                    rank = cols[0].get_text(strip=True)
-                    headword = cols[1].get_text(strip=True).lower()
-                    related_forms = cols[2].get_text(strip=True)
-                    sfi = cols[3].get_text(strip=True)  # Standardized Frequency Index
-                    
-                    # Extract numeric rank
-                    rank_num = int(re.sub(r'[^\d]', '', rank)) if rank else 0
-                    
-                    # Assign CEFR level based on rank
-                    if rank_num <= 600:
-                        cefr = 'A1'
-                    elif rank_num <= 1300:
-                        cefr = 'A2'
-                    elif rank_num <= 2100:
-                        cefr = 'B1'
-                    elif rank_num <= 2600:
-                        cefr = 'B2'
-                    else:
-                        cefr = 'C1'
-                    
-                    # Calculate frequency from SFI (approximate)
-                    # SFI is log-based, so convert back to frequency
-                    try:
-                        sfi_float = float(sfi)
-                        frequency = int(10 ** (sfi_float / 10))
-                    except:
-                        frequency = 0
-                    
-                    words_data.append({
-                        'word': headword,
-                        'rank': rank_num,
-                        'frequency': frequency,
-                        'cefr_level': cefr,
-                        'related_forms': related_forms,
-                        'sfi': sfi
-                    })
-                    
-                except Exception as e:
-                    print(f"⚠️ Error parsing row: {e}")
-                    continue
+        words_data, sfi_text = parse_ngsl_rows(
+            [col.get_text(strip=True) for col in row.find_all('td')] for row in rows
+        )
         
         print(f"✅ Successfully extracted {len(words_data)} words")
-        return words_data
+        return words_data, sfi_text
         
     except requests.RequestException as e:
         print(f"❌ Network error: {e}")
-        return None
+        return None, None
     except Exception as e:
         print(f"❌ Error: {e}")
-        return None
+        return None, None
 
-def save_to_csv(words_data, filename):
+def save_to_csv(words_data, sfi_text, filename):
     """Save words to CSV file"""
     
     if not words_data:
@@ -95,20 +114,13 @@ def save_to_csv(words_data, filename):
         return False
     
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = ['word', 'rank', 'frequency', 'cefr_level', 'related_forms', 'sfi']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            writer.writerows(words_data)
+        words_data.write_csv(filename, ['word', 'rank', 'frequency', 'cefr_level', 'related_forms', 'sfi'],
+                             text={'sfi': sfi_text})
         
         print(f"💾 Saved {len(words_data)} words to {filename}")
         
         # Print statistics
-        cefr_counts = {}
-        for word in words_data:
-            level = word['cefr_level']
-            cefr_counts[level] = cefr_counts.get(level, 0) + 1
+        cefr_counts = words_data.level_counts()
         
         print("\n📊 CEFR Distribution:")
         for level in sorted(cefr_counts.keys()):
@@ -121,17 +133,26 @@ def save_to_csv(words_data, filename):
         return False
 
 def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Complete NGSL Data Downloader"))
+    args = parser.parse_args()
+
     print("🚀 NGSL Complete Data Downloader")
     print("=" * 50)
     
-    # Download NGSL
-    words_data = download_ngsl_complete()
+    with PipelineRun("download-ngsl-complete", args.profile, args.report_dir) as run:
+        # Download NGSL
+        with run.stage("download_ngsl_complete") as stage:
+            words_data, sfi_text = download_ngsl_complete()
+            stage.rows = len(words_data or [])
+        
+        success = False
+        if words_data:
+            # Save to CSV
+            output_file = "data/vocabulary-sources/ngsl-complete.csv"
+            with run.stage("save_to_csv", rows=len(words_data)):
+                success = save_to_csv(words_data, sfi_text, output_file)
     
     if words_data:
-        # Save to CSV
-        output_file = "data/vocabulary-sources/ngsl-complete.csv"
-        success = save_to_csv(words_data, output_file)
-        
         if success:
             print("\n✨ Download complete!")
             print(f"\n📁 Output file: {output_file}")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Eiken question corpus and past-paper text.
+Loads data/eiken_questions.json, discovers eiken_past_papers/ PDFs and
+caches their extracted text so the data scripts read the same corpus.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+QUESTIONS_FILE = BASE_DIR / "data" / "eiken_questions.json"
+PAST_PAPERS_DIR = BASE_DIR / "eiken_past_papers"
+PAST_PAPER_TEXT_DIR = BASE_DIR / "data" / "past_paper_text"
+
+GRADE_ORDER = ["5", "4", "3", "pre2", "2", "pre1", "1"]
+
+# 過去問フォルダ名 → grade コード
+GRADE_DIR_NAMES = {
+    "5級": "5",
+    "4級": "4",
+    "3級": "3",
+    "準2級": "pre2",
+    "2級": "2",
+    "準1級": "pre1",
+    "1級": "1",
+}
+
+# ファイル名の種別部分 → kind
+PAST_PAPER_KINDS = {
+    "リスニング原稿": "listening_script",
+    "二次試験サンプル問題": "secondary_sample",
+    "問題冊子": "question_booklet",
+}
+
+STOP_WORDS = frozenset("""
+a about after again all also am an and any are as at be because been before
+being but by can could did do does doing don't every for from get had has have
+having he her here hers him his how i i'm if important in into is it it's its
+just let's like many may me more most much my no not now of on one only or other
+our out over people please really say she should so some such take than that
+the their them then there these they think this those through to too two up us
+very want was we were what what's when where which while who why will with
+would writer yes you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:['’][a-z]+)?")
+_SESSION_RE = re.compile(r"(\d{4})年度第(\d+)回")
+
+
+def grade_sort_key(grade: str) -> int:
+    """GRADE_ORDER に従ったソートキー（未知のグレードは末尾）"""
+    return GRADE_ORDER.index(grade) if grade in GRADE_ORDER else len(GRADE_ORDER)
+
+
+def topic_code_for(topic: str) -> str:
+    """Topic label → eiken_topic_areas topic_code ('AI / science' → 'ai_science')."""
+    return re.sub(r'[^a-z0-9]+', '_', topic.lower()).strip('_')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase English word tokens; Japanese text and digits are dropped."""
+    return [t.replace('’', "'") for t in _TOKEN_RE.findall(text.lower())]
+
+
+def content_words(text: str, min_length: int = 3) -> List[str]:
+    """Tokens with stop words and very short words removed."""
+    return [t for t in tokenize(text) if len(t) >= min_length and t not in STOP_WORDS]
+
+
+def load_questions(file_path: Path = QUESTIONS_FILE) -> List[dict]:
+    """Load parsed grade sections from eiken_questions.json."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_questions(grade_sections: List[dict]) -> Iterator[Tuple[str, dict]]:
+    """Yield (grade, question) for every question in the corpus."""
+    for grade_data in grade_sections:
+        grade = grade_data.get('grade', 'unknown')
+        for q in grade_data.get('questions', []):
+            yield grade, q
+
+
+def iter_question_ids(grade_sections: List[dict]) -> Iterator[Tuple[str, str, dict]]:
+    """
+    Yield (source_id, grade, question) for every question; source_id is
+    "question/<grade>/<section>/<question_number>" and stable across rebuilds.
+    """
+    for section_index, grade_data in enumerate(grade_sections):
+        grade = grade_data.get('grade', 'unknown')
+        section = grade_data.get('section') or str(section_index)
+        for q in grade_data.get('questions', []):
+            yield f"question/{grade}/{section}/{q.get('question_number')}", grade, q
+
+
+def question_text(q: dict) -> str:
+    """English text of a question (passage, stem and sample answer)."""
+    parts = [q.get('passage') or '', q.get('question_text_en') or '', q.get('sample_answer') or '']
+    return "\n".join(p for p in parts if p)
+
+
+def find_past_papers(root: Path = PAST_PAPERS_DIR) -> List[Dict]:
+    """
+    eiken_past_papers/ 以下の PDF を列挙する
+
+    Returns:
+        paper_id, grade, session, kind, path を持つ dict のリスト。
+        同じ grade / ファイル名のコピーは1つにまとめる。
+    """
+    papers = {}
+    for pdf in sorted(root.rglob("*.pdf")):
+        grade = GRADE_DIR_NAMES.get(pdf.parent.name)
+        if grade is None:
+            continue
+
+        session_label, _, kind_label = pdf.stem.partition("_")
+        if not kind_label:
+            session_label, kind_label = "", pdf.stem
+
+        match = _SESSION_RE.search(session_label)
+        session = f"{match.group(1)}-{match.group(2)}" if match else ""
+        kind = PAST_PAPER_KINDS.get(kind_label, "other")
+
+        key = (grade, pdf.name)
+        if key in papers:
+            continue
+
+        papers[key] = {
+            'paper_id': "_".join(p for p in (grade, session, kind) if p),
+            'grade': grade,
+            'session': session,
+            'kind': kind,
+            'path': pdf,
+        }
+
+    return sorted(papers.values(), key=lambda p: (grade_sort_key(p['grade']), p['session'], p['kind']))
+
+
+def extract_pdf_text(pdf_path: Path) -> str:
+    """Extract the text of every page (pdfplumber is only needed here)."""
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+
+def load_past_paper_texts(papers: Optional[List[Dict]] = None,
+                          text_dir: Path = PAST_PAPER_TEXT_DIR) -> List[Dict]:
+    """
+    過去問のテキストを読み込む（抽出済みの .txt キャッシュがあれば再利用）
+
+    Returns:
+        find_past_papers() の dict に 'text' を追加したリスト
+    """
+    if papers is None:
+        papers = find_past_papers()
+
+    text_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+
+    for paper in papers:
+        cache_file = text_dir / f"{paper['paper_id']}.txt"
+        if cache_file.exists() and cache_file.stat().st_mtime >= paper['path'].stat().st_mtime:
+            text = cache_file.read_text(encoding='utf-8')
+        else:
+            text = extract_pdf_text(paper['path'])
+            cache_file.write_text(text, encoding='utf-8')
+
+        results.append({**paper, 'text': text})
+
+    return results
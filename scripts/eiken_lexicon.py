@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Integer-coded view of the CEFR-J lexicon for the offline analysis scripts.
+
+Loads data/vocabulary/cefrj_wordlist_parsed.csv (the same rows that
+import-cefrj-to-db.py turns into eiken_vocabulary_lexicon INSERTs), assigns
+every lemma a dense integer id and keeps the CEFR level as a NumPy array
+indexed by that id, so token streams can be joined to the lexicon with a
+single array lookup instead of one dict/DB lookup per word.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+BASE_DIR = Path(__file__).parent.parent
+LEXICON_CSV = BASE_DIR / "data" / "vocabulary" / "cefrj_wordlist_parsed.csv"
+IRREGULAR_FILES = {
+    'irregular_verbs': BASE_DIR / "data" / "irregular-verbs.json",
+    'irregular_nouns': BASE_DIR / "data" / "irregular-nouns.json",
+    'irregular_adjectives': BASE_DIR / "data" / "irregular-adjectives.json",
+}
+
+# text-profiler.ts cefrToNumeric と同じ対応（未収録語は 0）
+CEFR_NUMERIC = {'A1': 1, 'A2': 2, 'B1': 3, 'B2': 4, 'C1': 5, 'C2': 6}
+
+UNKNOWN_ID = -1
+
+_LEMMA_RE = re.compile(r"^[a-z]+$")
+_DOUBLED_RE = re.compile(r"([b-df-hj-np-tv-z])\1$")
+
+# (suffix, replacement) の候補を上から順に試す
+_SUFFIX_RULES = [
+    ('ies', 'y'), ('ied', 'y'), ('ier', 'y'), ('iest', 'y'),
+    ('es', ''), ('s', ''),
+    ('ed', ''), ('ed', 'e'),
+    ('ing', ''), ('ing', 'e'),
+    ('er', ''), ('er', 'e'), ('est', ''), ('est', 'e'),
+    ('ly', ''),
+]
+
+
+class Lexicon:
+    """
+    Dense-id lexicon.
+
+    Attributes:
+        lemmas: lemma string per id
+        ids: lemma → id
+        levels: int8 array of CEFR_NUMERIC per id (lowest level when a lemma
+                is listed under several parts of speech)
+        pos: parts of speech per id
+    """
+
+    def __init__(self, rows: Iterable[dict], irregular_forms: Optional[Dict[str, str]] = None):
+        self.ids: Dict[str, int] = {}
+        self.lemmas: List[str] = []
+        self.pos: List[List[str]] = []
+        levels: List[int] = []
+
+        for row in rows:
+            lemma = row['word'].strip().lower()
+            level = CEFR_NUMERIC.get(row['cefr_level'].strip(), 0)
+            if not lemma or not level:
+                continue
+            lemma_id = self.ids.get(lemma)
+            if lemma_id is None:
+                lemma_id = self.ids[lemma] = len(self.lemmas)
+                self.lemmas.append(lemma)
+                self.pos.append([])
+                levels.append(level)
+            else:
+                levels[lemma_id] = min(levels[lemma_id], level)
+            if row.get('pos') and row['pos'] not in self.pos[lemma_id]:
+                self.pos[lemma_id].append(row['pos'])
+
+        import numpy as np
+
+        self.levels = np.asarray(levels, dtype=np.int8)
+        self.irregular_forms = {form: base for form, base in (irregular_forms or {}).items()
+                                if base in self.ids}
+        self._lemma_cache: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.lemmas)
+
+    def lemmatize(self, token: str) -> str:
+        """
+        Map an inflected token to a lexicon lemma (irregular forms first, then
+        suffix rules); tokens with no lexicon match are returned unchanged.
+        """
+        cached = self._lemma_cache.get(token)
+        if cached is not None:
+            return cached
+
+        lemma = token
+        if token not in self.ids:
+            if token in self.irregular_forms:
+                lemma = self.irregular_forms[token]
+            else:
+                for suffix, replacement in _SUFFIX_RULES:
+                    if not token.endswith(suffix) or len(token) - len(suffix) < 2:
+                        continue
+                    stem = token[:-len(suffix)]
+                    candidates = [stem + replacement]
+                    if not replacement and _DOUBLED_RE.search(stem):
+                        candidates.append(stem[:-1])  # stopped → stop
+                    match = next((c for c in candidates if c in self.ids), None)
+                    if match:
+                        lemma = match
+                        break
+
+        self._lemma_cache[token] = lemma
+        return lemma
+
+    def encode(self, tokens: Iterable[str], oov: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """
+        Lemmatize tokens and return their lemma ids as an int32 array. Like
+        text-profiler.ts, only purely alphabetic lemmas are kept.
+
+        Words outside the lexicon get UNKNOWN_ID, or - when an oov dict is
+        passed - their own id from len(self) upwards, recorded in oov so the
+        caller can still count distinct unknown words.
+        """
+        import numpy as np
+
+        ids = []
+        for token in tokens:
+            lemma = self.lemmatize(token)
+            if not _LEMMA_RE.match(lemma):
+                continue
+            lemma_id = self.ids.get(lemma)
+            if lemma_id is None:
+                lemma_id = UNKNOWN_ID if oov is None else oov.setdefault(lemma, len(self) + len(oov))
+            ids.append(lemma_id)
+        return np.asarray(ids, dtype=np.int32)
+
+
+def load_irregular_forms(files: Dict[str, Path] = IRREGULAR_FILES) -> Dict[str, str]:
+    """Inflected form → base form from data/irregular-*.json."""
+    forms = {}
+    for key, path in files.items():
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for entry in json.load(f).get(key, []):
+                for form in entry.get('forms', []):
+                    forms.setdefault(form.lower(), entry['base'].lower())
+    return forms
+
+
+def load_lexicon(csv_path: Path = LEXICON_CSV) -> Lexicon:
+    """Load the parsed CEFR-J word list as a Lexicon."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        return Lexicon(csv.DictReader(f), load_irregular_forms())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the Python data tools.
+
+    python scripts/eiken_tools.py <command> [command options]
+    python scripts/eiken_tools.py suitability --profile cprofile
+    python scripts/eiken_tools.py startup-report
+
+Only the module of the chosen command is imported, and heavy dependencies
+(pandas, openpyxl, pdfplumber, requests, bs4, numpy, scipy) are imported
+inside the functions that use them, so --help and no-op runs start in
+milliseconds.
+"""
+
+import argparse
+import importlib.util
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+BASE_DIR = SCRIPTS_DIR.parent
+
+# command → (script path, description)
+COMMANDS = {
+    'import-cefrj': (BASE_DIR / "import_cefrj_wordlist.py",
+                     "CEFR-J xlsx → vocabulary_master INSERTs (pandas)"),
+    'convert-cefrj': (SCRIPTS_DIR / "convert-cefrj-wordlist.py",
+                      "CEFR-J xlsx → cefrj_wordlist_parsed.csv (openpyxl)"),
+    'cefrj-sql': (SCRIPTS_DIR / "import-cefrj-to-db.py",
+                  "cefrj_wordlist_parsed.csv → eiken_vocabulary_lexicon INSERTs"),
+    'parse-questions': (SCRIPTS_DIR / "parse_eiken_questions.py",
+                        "uploaded question data → data/eiken_questions.json"),
+    'analyze-pdf': (BASE_DIR / "analyze_eiken_pdf.py",
+                    "analyze an Eiken booklet PDF; --store: past-paper analysis store (pdfplumber)"),
+    'suitability': (SCRIPTS_DIR / "generate_suitability_scores.py",
+                    "topic × question_type suitability scores"),
+    'mock-data': (SCRIPTS_DIR / "generate_mock_data.py",
+                  "Phase 2A mock usage / blacklist / statistics data"),
+    'topic-catalog': (SCRIPTS_DIR / "build_topic_catalog.py",
+                      "eiken_topic_areas catalog from the question corpus"),
+    'emergency-topics': (SCRIPTS_DIR / "generate_emergency_topics.py",
+                         "fill grades below the minimum topic count"),
+    'text-profiles': (SCRIPTS_DIR / "build_text_profiles.py",
+                      "batch CVLA profiles (AvrDiff, BperA, ARI) of the corpus"),
+    'minhash-index': (SCRIPTS_DIR / "build_minhash_index.py",
+                      "MinHash/LSH copyright index and near-duplicate report"),
+    'difficulty-scores': (SCRIPTS_DIR / "score_vocabulary_master.py",
+                          "precompute vocabulary_master difficulty / should_annotate"),
+    'few-shot-index': (SCRIPTS_DIR / "build_few_shot_index.py",
+                       "top-k similar real examples per (grade, type, topic)"),
+    'embedding-index': (SCRIPTS_DIR / "build_embedding_index.py",
+                        "local topic/passage embeddings and top-k queries"),
+    'validate-sql': (SCRIPTS_DIR / "validate_generated_sql.py",
+                     "dry-run generated SQL against the migrated schema"),
+    'facet-index': (SCRIPTS_DIR / "build_facet_index.py",
+                    "bitmap facet index + facet=value queries over the corpus"),
+    'schema-template': (SCRIPTS_DIR / "build_schema_template.py",
+                        "squashed schema + prebuilt SQLite template database"),
+    'fetch-sources': (SCRIPTS_DIR / "fetch_vocabulary_sources.py",
+                      "fetch all vocabulary sources concurrently (stand-in server for offline runs)"),
+    'flashcard-sim': (SCRIPTS_DIR / "simulate_flashcard_reviews.py",
+                      "vectorized SM-2 review simulation, due-queue projection, --db history"),
+    'corpus-frequencies': (SCRIPTS_DIR / "corpus_frequencies.py",
+                           "map-reduce lemma frequencies + Zipf scores (past papers, NGSL SFI)"),
+    'load-payload': (SCRIPTS_DIR / "batch_payloads.py",
+                     "load JSON batch payloads (.ndjson) into SQLite with executemany"),
+    'apply-sql': (SCRIPTS_DIR / "apply_sql_batches.py",
+                  "apply split SQL chunks concurrently with retries and a resume journal"),
+    'coverage-matrix': (SCRIPTS_DIR / "build_coverage_matrix.py",
+                        "sparse passage × lemma matrix, per-grade word-list coverage + OOV words (scipy)"),
+    'compact-topics': (SCRIPTS_DIR / "compact_topic_history.py",
+                       "roll old topic usage into daily aggregates and purge expired blacklist rows"),
+    'vocab-warmup': (SCRIPTS_DIR / "build_vocab_warmup.py",
+                     "hot-vocabulary warmup bundle for the vocabulary cache (KV + seed file)"),
+    'mwe-automaton': (SCRIPTS_DIR / "build_mwe_automaton.py",
+                      "Aho–Corasick automaton of multiword lexicon entries (array-backed JSON artifact)"),
+    'download-ngsl': (SCRIPTS_DIR / "download-ngsl-complete.py",
+                      "download the NGSL word list (requests, bs4)"),
+    'build': (SCRIPTS_DIR / "build_pipeline.py",
+              "incremental build of the whole data pipeline"),
+    'benchmark': (SCRIPTS_DIR / "benchmark_pipeline.py",
+                  "benchmark suite with regression baselines"),
+}
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def load_command_module(command: str):
+    """Import a command's script by path (several have hyphenated names)."""
+    path, _ = COMMANDS[command]
+    for directory in (str(SCRIPTS_DIR), str(path.parent)):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+
+    module_name = path.stem.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_command(command: str, argv: list) -> int:
+    """Run a command's main() with the remaining arguments as its argv."""
+    sys.argv = [f"{Path(sys.argv[0]).name} {command}"] + argv
+    module = load_command_module(command)
+    result = module.main()
+    return result if isinstance(result, int) else 0
+
+
+def measure_startup(commands: list, top: int = 10) -> list:
+    """
+    Run `<command> --help` under `python -X importtime` for each command.
+
+    Returns:
+        dict per command with total import time (ms) and the heaviest
+        top-level imports.
+    """
+    results = []
+    for command in commands:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", __file__, command, "--help"],
+            capture_output=True, text=True, cwd=BASE_DIR,
+        )
+        top_level = []
+        for line in completed.stderr.splitlines():
+            match = _IMPORTTIME_RE.match(line)
+            # Top-level imports have exactly one space of indentation
+            if match and len(match.group(3)) == 1:
+                top_level.append((match.group(4), int(match.group(2))))
+
+        top_level.sort(key=lambda item: -item[1])
+        results.append({
+            'command': command,
+            'returncode': completed.returncode,
+            'import_ms': round(sum(us for _, us in top_level) / 1000, 1),
+            'heaviest': [(name, round(us / 1000, 1)) for name, us in top_level[:top]],
+        })
+    return results
+
+
+def startup_report(argv: list) -> int:
+    parser = argparse.ArgumentParser(prog="eiken_tools.py startup-report",
+                                     description="Measure CLI startup with -X importtime")
+    parser.add_argument('commands', nargs='*', default=list(COMMANDS))
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("CLI startup (python -X importtime ... <command> --help)")
+    print("=" * 70)
+    for result in measure_startup(args.commands, args.top):
+        status = "" if result['returncode'] == 0 else f"  (exit {result['returncode']})"
+        print(f"\n{result['command']:<18} {result['import_ms']:8.1f} ms{status}")
+        for name, ms in result['heaviest']:
+            print(f"   {name:<40} {ms:8.1f} ms")
+    return 0
+
+
+def main():
+    lines = [f"  {name:<18} {desc}" for name, (_, desc) in COMMANDS.items()]
+    lines.append(f"  {'startup-report':<18} measure each command's import time with -X importtime")
+    parser = argparse.ArgumentParser(
+        description="Eiken data tools",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(lines),
+    )
+    parser.add_argument('command', choices=list(COMMANDS) + ['startup-report'], metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="options passed to the command")
+    args = parser.parse_args()
+
+    if args.command == 'startup-report':
+        return startup_report(args.args)
+    return run_command(args.command, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Concurrent fetcher for the vocabulary sources in data/vocabulary-sources.
+
+Reads data/vocabulary-sources/sources.json and downloads every source at
+once with asyncio over a small keep-alive connection pool (one pool per
+host, HTTP/1.1, standard library only). Each source has its own timeout,
+failed requests (connection errors, 429, 5xx) are retried with
+exponential backoff, and pinned sha256 checksums are verified before a
+file is atomically replaced, so a refresh takes as long as the slowest
+source rather than the sum of all of them.
+
+--serve-fixtures starts a local stand-in HTTP server over the committed
+copies and fetches from it, which exercises the whole path offline
+(--fail-first / --latency inject failures and slow responses):
+
+    python scripts/fetch_vocabulary_sources.py
+    python scripts/fetch_vocabulary_sources.py --serve-fixtures --fail-first 1 --output-dir /tmp/sources
+    python scripts/fetch_vocabulary_sources.py --update-checksums
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import ssl
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from eiken_corpus import BASE_DIR
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+SOURCES_DIR = BASE_DIR / "data" / "vocabulary-sources"
+MANIFEST_FILE = SOURCES_DIR / "sources.json"
+
+DEFAULT_TIMEOUT = 30.0
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+MAX_CONNECTIONS_PER_HOST = 4
+MAX_REDIRECTS = 5
+USER_AGENT = "KOBEYA-StudyPartner-vocabulary-fetcher/1.0"
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections, at most max_per_host open per host.
+
+    Only what the fetcher needs: GET, Content-Length / chunked / read-to-EOF
+    bodies, and redirects.
+    """
+
+    def __init__(self, max_per_host: int = MAX_CONNECTIONS_PER_HOST):
+        self.max_per_host = max_per_host
+        self._idle: Dict[Tuple[str, str, int], List[tuple]] = {}
+        self._limits: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+        self.opened = 0
+        self.reused = 0
+
+    async def _connect(self, key: Tuple[str, str, int]):
+        idle = self._idle.setdefault(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.reused += 1
+                return reader, writer
+        scheme, host, port = key
+        context = ssl.create_default_context() if scheme == 'https' else None
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=context)
+
+    async def get(self, url: str) -> Response:
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._get_once(url)
+            location = response.headers.get('location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return response
+        raise FetchError(f"too many redirects ({MAX_REDIRECTS})", retryable=False)
+
+    async def _get_once(self, url: str) -> Response:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise FetchError(f"unsupported URL scheme: {url}", retryable=False)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+
+        semaphore = self._limits.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        async with semaphore:
+            reader, writer = await self._connect(key)
+            try:
+                writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n"
+                              f"Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n").encode('latin-1'))
+                await writer.drain()
+                response, reusable = await _read_response(reader)
+            except BaseException:
+                writer.close()
+                raise
+            if reusable:
+                self._idle[key].append((reader, writer))
+            else:
+                writer.close()
+            return response
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[Response, bool]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise FetchError("connection closed before response")
+    try:
+        version, status = status_line.decode('latin-1').split()[:2]
+        status = int(status)
+    except ValueError:
+        raise FetchError(f"malformed status line: {status_line[:80]!r}")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    keep_alive = version == "HTTP/1.1" and headers.get('connection', '').lower() != 'close'
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        body = b"".join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return Response(status, headers, body), keep_alive
+
+
+def load_manifest(path: Path = MANIFEST_FILE) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def source_url(source: dict, base_url: Optional[str]) -> Optional[str]:
+    """A mirror (base_url + file) wins over the origin URL."""
+    if base_url:
+        return f"{base_url.rstrip('/')}/{source['file']}"
+    return source.get('url')
+
+
+async def fetch_source(pool: ConnectionPool, source: dict, url: str, output_dir: Path,
+                       retries: int = MAX_RETRIES, verify: bool = True) -> dict:
+    """Download one source with timeout, retries and checksum check; write it atomically."""
+    result = {'name': source['name'], 'file': source['file'], 'url': url, 'attempts': 0}
+    timeout = source.get('timeout', DEFAULT_TIMEOUT)
+    start = time.perf_counter()
+
+    for attempt in range(retries + 1):
+        result['attempts'] = attempt + 1
+        try:
+            response = await asyncio.wait_for(pool.get(url), timeout)
+            if response.status in RETRY_STATUSES:
+                raise FetchError(f"HTTP {response.status}")
+            if response.status != 200:
+                raise FetchError(f"HTTP {response.status}", retryable=False)
+
+            digest = hashlib.sha256(response.body).hexdigest()
+            if verify and source.get('sha256') and digest != source['sha256']:
+                raise FetchError(f"sha256 mismatch: expected {source['sha256'][:12]}…, got {digest[:12]}…",
+                                 retryable=False)
+
+            target = output_dir / source['file']
+            partial = target.with_name(target.name + ".part")
+            partial.write_bytes(response.body)
+            partial.replace(target)
+            result.update(status='ok', bytes=len(response.body), sha256=digest)
+            break
+        except (FetchError, asyncio.TimeoutError, OSError, asyncio.IncompleteReadError) as e:
+            message = f"timeout after {timeout}s" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+            result.update(status='failed', error=message)
+            if isinstance(e, FetchError) and not e.retryable or attempt == retries:
+                break
+            await asyncio.sleep(BACKOFF_SECONDS * 2 ** attempt)
+
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+async def fetch_all(sources: List[dict], output_dir: Path, base_url: Optional[str] = None,
+                    max_per_host: int = MAX_CONNECTIONS_PER_HOST, retries: int = MAX_RETRIES,
+                    verify: bool = True) -> Tuple[List[dict], dict]:
+    """
+    Fetch every source concurrently; sources without a URL are reported as skipped.
+
+    Returns:
+        (one result per source, connection pool stats)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pool = ConnectionPool(max_per_host)
+    try:
+        tasks, results = [], []
+        for source in sources:
+            url = source_url(source, base_url)
+            if url is None:
+                results.append({'name': source['name'], 'file': source['file'], 'status': 'skipped',
+                                'error': "no origin URL recorded (use --base-url or --serve-fixtures)"})
+            else:
+                tasks.append(fetch_source(pool, source, url, output_dir, retries, verify))
+        results += await asyncio.gather(*tasks)
+    finally:
+        await pool.close()
+    return sorted(results, key=lambda r: r['name']), {'opened': pool.opened, 'reused': pool.reused}
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fail_first = 0
+    latency = 0.0
+    _failures: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            failures = self._failures.get(self.path, 0)
+            self._failures[self.path] = failures + 1
+        if failures < self.fail_first:
+            body = b"temporarily unavailable"
+            self.send_response(503)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # タイムアウトしたクライアントが先に切断するのは想定内
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+@contextmanager
+def serve_fixtures(directory: Path = SOURCES_DIR, fail_first: int = 0, latency: float = 0.0):
+    """
+    Local stand-in for the source hosts: serves directory over HTTP/1.1 on
+    an ephemeral port, failing the first fail_first requests per path with
+    503 and delaying every response by latency seconds. Yields the base URL.
+    """
+    handler = type("FixtureHandler", (_FixtureHandler,),
+                   {'fail_first': fail_first, 'latency': latency, '_failures': {}})
+
+    def factory(*args, **kwargs):
+        return handler(*args, directory=str(directory), **kwargs)
+
+    server = _FixtureServer(("127.0.0.1", 0), factory)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def update_checksums(manifest: dict, results: List[dict], path: Path = MANIFEST_FILE):
+    """Pin the sha256 of every successfully fetched source in the manifest."""
+    fetched = {r['name']: r['sha256'] for r in results if r['status'] == 'ok'}
+    for source in manifest['sources']:
+        if source['name'] in fetched:
+            source['sha256'] = fetched[source['name']]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Fetch all vocabulary sources concurrently"))
+    parser.add_argument('--manifest', type=Path, default=MANIFEST_FILE)
+    parser.add_argument('--output-dir', type=Path, default=SOURCES_DIR)
+    parser.add_argument('--only', action='append', metavar='NAME', help="fetch only these sources")
+    parser.add_argument('--base-url', help="fetch every source from this mirror (base-url/<file>)")
+    parser.add_argument('--serve-fixtures', nargs='?', type=Path, const=SOURCES_DIR, metavar='DIR',
+                        help="start a local stand-in server over DIR (default: the committed copies)")
+    parser.add_argument('--fail-first', type=int, default=0, help="stand-in: fail the first N requests per file")
+    parser.add_argument('--latency', type=float, default=0.0, help="stand-in: seconds of delay per response")
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES)
+    parser.add_argument('--max-connections', type=int, default=MAX_CONNECTIONS_PER_HOST, help="per host")
+    parser.add_argument('--update-checksums', action='store_true', help="pin the fetched sha256s instead of verifying")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    sources = [s for s in manifest['sources'] if not args.only or s['name'] in args.only]
+
+    print("=" * 70)
+    print("Vocabulary Source Fetcher")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("fetch_vocabulary_sources", args.profile, args.report_dir) as run:
+        with run.stage("fetch_sources") as stage:
+            if args.serve_fixtures:
+                sources = [s for s in sources if (args.serve_fixtures / s['file']).exists()]
+                with serve_fixtures(args.serve_fixtures, args.fail_first, args.latency) as base_url:
+                    print(f"🧪 Stand-in server: {base_url} → {args.serve_fixtures}")
+                    results, pool = asyncio.run(fetch_all(sources, args.output_dir, base_url, args.max_connections,
+                                                    args.retries, not args.update_checksums))
+            else:
+                results, pool = asyncio.run(fetch_all(sources, args.output_dir, args.base_url, args.max_connections,
+                                                args.retries, not args.update_checksums))
+            stage.rows = sum(r['status'] == 'ok' for r in results)
+
+    if args.update_checksums:
+        update_checksums(manifest, results, args.manifest)
+        print(f"📌 Checksums pinned in {args.manifest}")
+
+    for r in results:
+        if r['status'] == 'ok':
+            print(f"✅ {r['name']:<22} {r['bytes'] / 1024:8.1f} KB  {r['seconds']:.2f}s  "
+                  f"({r['attempts']} attempt{'s' if r['attempts'] > 1 else ''})")
+        elif r['status'] == 'skipped':
+            print(f"⏭️  {r['name']:<22} {r['error']}")
+        else:
+            print(f"❌ {r['name']:<22} {r['error']} ({r['attempts']} attempts)")
+
+    fetched = [r for r in results if 'seconds' in r]
+    if fetched:
+        print(f"\n⏱️  wall {stage.wall_seconds:.2f}s vs slowest {max(r['seconds'] for r in fetched):.2f}s "
+              f"/ sum {sum(r['seconds'] for r in fetched):.2f}s; "
+              f"{pool['opened']} connection(s) opened, {pool['reused']} reused")
+    print(f"💾 Output: {args.output_dir}")
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
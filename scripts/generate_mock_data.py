@@ -4,12 +4,18 @@ Generate comprehensive mock data for Phase 2A testing.
 Creates realistic student usage history, blacklist entries, and statistics.
 """
 
+import argparse
 import json
 import random
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict
 
+from build_facet_index import INDEX_FILE, OUTPUT_DIR as FACET_INDEX_DIR, FacetIndex
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+BASE_DIR = Path(__file__).parent.parent
+
 # Configuration
 NUM_STUDENTS = 20
 HISTORY_PER_STUDENT = 20  # Total: 400 records
@@ -24,11 +30,9 @@ QUESTION_TYPES = [
     'opinion_essay', 'writing_essay'
 ]
 
-def load_topics() -> List[str]:
-    """Load unique topic codes from suitability scores."""
-    with open('/home/user/webapp/data/phase2a_prep/suitability_scores.json', 'r') as f:
-        scores = json.load(f)
-    return list(set(s['topic_code'] for s in scores))
+def load_topics(index_path: Path = FACET_INDEX_DIR / INDEX_FILE) -> List[str]:
+    """Load unique topic codes from the facet index (its topic facet values)."""
+    return FacetIndex.load(index_path).values('topic')
 
 def generate_student_ids() -> List[str]:
     """Generate realistic student IDs."""
@@ -236,52 +240,67 @@ def generate_sql(usage: List[Dict], blacklist: List[Dict], stats: List[Dict]) ->
     return "\n".join(lines)
 
 def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Mock Data Generator for Phase 2A"))
+    args = parser.parse_args()
+
     print("=" * 70)
     print("Mock Data Generator for Phase 2A")
     print("=" * 70)
     print()
     
-    # Load topics
-    print("Loading topics from suitability scores...")
-    topics = load_topics()
-    print(f"Found {len(topics)} unique topics")
-    
-    # Generate student IDs
-    print(f"\nGenerating {NUM_STUDENTS} student IDs...")
-    student_ids = generate_student_ids()
-    
-    # Generate usage history
-    print(f"Generating usage history ({HISTORY_PER_STUDENT} per student)...")
-    usage_history = generate_usage_history(student_ids, topics)
-    print(f"  → {len(usage_history)} records")
-    
-    # Generate blacklist
-    print(f"\nGenerating blacklist entries...")
-    blacklist = generate_blacklist(student_ids, topics)
-    print(f"  → {len(blacklist)} records")
-    
-    # Generate statistics
-    print(f"\nGenerating topic statistics...")
-    statistics = generate_statistics(topics)
-    print(f"  → {len(statistics)} records")
-    
-    # Save JSON
-    output_json = "/home/user/webapp/data/phase2a_prep/mock_data.json"
-    print(f"\nSaving JSON to: {output_json}")
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump({
-            'students': student_ids,
-            'usage_history': usage_history,
-            'blacklist': blacklist,
-            'statistics': statistics
-        }, f, ensure_ascii=False, indent=2)
-    
-    # Generate SQL
-    output_sql = "/home/user/webapp/data/phase2a_prep/mock_data.sql"
-    print(f"Generating SQL to: {output_sql}")
-    sql_content = generate_sql(usage_history, blacklist, statistics)
-    with open(output_sql, 'w', encoding='utf-8') as f:
-        f.write(sql_content)
+    with PipelineRun("generate_mock_data", args.profile, args.report_dir) as run:
+        # Load topics
+        print("Loading topics from facet index...")
+        with run.stage("load_topics"):
+            topics = load_topics()
+        print(f"Found {len(topics)} unique topics")
+        
+        # Generate student IDs
+        print(f"\nGenerating {NUM_STUDENTS} student IDs...")
+        student_ids = generate_student_ids()
+        
+        # Generate usage history
+        print(f"Generating usage history ({HISTORY_PER_STUDENT} per student)...")
+        with run.stage("generate_usage_history") as stage:
+            usage_history = generate_usage_history(student_ids, topics)
+            stage.rows = len(usage_history)
+        print(f"  → {len(usage_history)} records")
+        
+        # Generate blacklist
+        print(f"\nGenerating blacklist entries...")
+        with run.stage("generate_blacklist") as stage:
+            blacklist = generate_blacklist(student_ids, topics)
+            stage.rows = len(blacklist)
+        print(f"  → {len(blacklist)} records")
+        
+        # Generate statistics
+        print(f"\nGenerating topic statistics...")
+        with run.stage("generate_statistics") as stage:
+            statistics = generate_statistics(topics)
+            stage.rows = len(statistics)
+        print(f"  → {len(statistics)} records")
+        
+        total_rows = len(usage_history) + len(blacklist) + len(statistics)
+        
+        # Save JSON
+        output_json = BASE_DIR / "data" / "phase2a_prep" / "mock_data.json"
+        print(f"\nSaving JSON to: {output_json}")
+        with run.stage("write_json", rows=total_rows):
+            with open(output_json, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'students': student_ids,
+                    'usage_history': usage_history,
+                    'blacklist': blacklist,
+                    'statistics': statistics
+                }, f, ensure_ascii=False, indent=2)
+        
+        # Generate SQL
+        output_sql = BASE_DIR / "data" / "phase2a_prep" / "mock_data.sql"
+        print(f"Generating SQL to: {output_sql}")
+        with run.stage("generate_sql", rows=total_rows):
+            sql_content = generate_sql(usage_history, blacklist, statistics)
+            with open(output_sql, 'w', encoding='utf-8') as f:
+                f.write(sql_content)
     
     print("\n" + "=" * 70)
     print("✓ Mock data generated successfully!")
@@ -2,19 +2,24 @@
 """
 Generate initial format suitability scores from parsed 236 questions.
 Calculates success rates and performance metrics for each topic-format combination.
+
+Counts come from the bitmap facet index (build_facet_index.py), one
+question_type drill-down per (grade, topic), instead of a corpus scan.
 """
 
+import argparse
 import json
+import sys
 from pathlib import Path
 from collections import defaultdict
 from typing import Dict, List, Tuple
 
-def load_questions(file_path: str) -> List[dict]:
-    """Load parsed question data."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+from build_facet_index import INDEX_FILE, OUTPUT_DIR as FACET_INDEX_DIR, FacetIndex
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+BASE_DIR = Path(__file__).parent.parent
 
-def calculate_suitability_scores(questions_data: List[dict]) -> List[dict]:
+def calculate_suitability_scores(index: FacetIndex) -> List[dict]:
     """
     Calculate format suitability scores from actual question data.
     
@@ -22,52 +27,18 @@ def calculate_suitability_scores(questions_data: List[dict]) -> List[dict]:
     - Present in data with multiple examples: 0.9-1.3 (based on frequency)
     - Present in data with few examples: 0.8-1.0
     - Not present in data: 1.0 (neutral default)
+
+    topic_code is the eiken_topic_areas code (topic_code_for), the same key
+    the facet index uses.
     """
     
-    # Collect statistics
-    stats = defaultdict(lambda: {'count': 0, 'grades': set(), 'topics': set()})
-    
-    for grade_data in questions_data:
-        grade = grade_data['grade']
-        questions = grade_data.get('questions', [])
-        
-        for q in questions:
-            topic = q.get('topic', 'unknown')
-            q_type = q.get('question_type', 'unknown')
-            
-            key = (topic, grade, q_type)
-            stats[key]['count'] += 1
-            stats[key]['grades'].add(grade)
-            stats[key]['topics'].add(topic)
-    
     # Generate suitability scores
     suitability_records = []
     
-    for (topic, grade, q_type), data in stats.items():
-        count = data['count']
-        
-        # Calculate suitability score based on frequency
-        if count >= 5:
-            suitability_score = 1.3  # High confidence, frequently tested
-        elif count >= 3:
-            suitability_score = 1.2  # Good confidence
-        elif count >= 2:
-            suitability_score = 1.0  # Neutral, sufficient data
-        else:
-            suitability_score = 0.9  # Single occurrence, lower confidence
-        
-        # Reasoning
-        reasoning = f"Based on {count} actual exam question(s) in grade {grade}"
-        
-        suitability_records.append({
-            'topic_code': topic.replace(' ', '_').lower(),
-            'topic_label': topic,
-            'grade': grade,
-            'question_type': q_type,
-            'suitability_score': round(suitability_score, 2),
-            'sample_count': count,
-            'reasoning': reasoning
-        })
+    for grade in index.values('grade'):
+        for topic in index.values('topic'):
+            for q_type, count in index.facet_counts('question_type', grade=grade, topic=topic).items():
+                suitability_records.append(suitability_record(index, grade, topic, q_type, count))
     
     # Sort by grade, then topic, then question type
     grade_order = {'5': 0, '4': 1, '3': 2, 'pre2': 3, '2': 4, 'pre1': 5, '1': 6}
@@ -79,6 +50,31 @@ def calculate_suitability_scores(questions_data: List[dict]) -> List[dict]:
     
     return suitability_records
 
+def suitability_record(index: FacetIndex, grade: str, topic: str, q_type: str, count: int) -> dict:
+    """One eiken_topic_question_type_suitability row for count questions."""
+    # Calculate suitability score based on frequency
+    if count >= 5:
+        suitability_score = 1.3  # High confidence, frequently tested
+    elif count >= 3:
+        suitability_score = 1.2  # Good confidence
+    elif count >= 2:
+        suitability_score = 1.0  # Neutral, sufficient data
+    else:
+        suitability_score = 0.9  # Single occurrence, lower confidence
+    
+    # Reasoning
+    reasoning = f"Based on {count} actual exam question(s) in grade {grade}"
+    
+    return {
+        'topic_code': topic,
+        'topic_label': index.topic_label(topic),
+        'grade': grade,
+        'question_type': q_type,
+        'suitability_score': round(suitability_score, 2),
+        'sample_count': count,
+        'reasoning': reasoning
+    }
+
 def generate_sql_insert(records: List[dict]) -> str:
     """Generate SQL INSERT statements for suitability scores."""
     
@@ -166,42 +162,58 @@ def generate_summary_report(records: List[dict]) -> str:
     return "\n".join(lines)
 
 def main():
-    input_file = "/home/user/webapp/data/eiken_questions.json"
-    output_sql = "/home/user/webapp/data/phase2a_prep/suitability_scores.sql"
-    output_json = "/home/user/webapp/data/phase2a_prep/suitability_scores.json"
-    output_report = "/home/user/webapp/data/phase2a_prep/suitability_report.txt"
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Format Suitability Score Generator"))
+    parser.add_argument('--facet-index', type=Path, default=FACET_INDEX_DIR / INDEX_FILE,
+                        help="bitmap facet index written by build_facet_index.py")
+    args = parser.parse_args()
+
+    output_sql = BASE_DIR / "data" / "phase2a_prep" / "suitability_scores.sql"
+    output_json = BASE_DIR / "data" / "phase2a_prep" / "suitability_scores.json"
+    output_report = BASE_DIR / "data" / "phase2a_prep" / "suitability_report.txt"
     
     print("=" * 70)
     print("Format Suitability Score Generator")
     print("=" * 70)
     print()
     
-    # Load data
-    print(f"Loading questions from: {input_file}")
-    questions_data = load_questions(input_file)
-    print(f"Loaded {len(questions_data)} grade sections")
-    
-    # Calculate scores
-    print("\nCalculating suitability scores...")
-    suitability_records = calculate_suitability_scores(questions_data)
-    print(f"Generated {len(suitability_records)} suitability scores")
-    
-    # Save JSON
-    print(f"\nSaving JSON to: {output_json}")
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(suitability_records, f, ensure_ascii=False, indent=2)
-    
-    # Generate SQL
-    print(f"Generating SQL to: {output_sql}")
-    sql_content = generate_sql_insert(suitability_records)
-    with open(output_sql, 'w', encoding='utf-8') as f:
-        f.write(sql_content)
-    
-    # Generate report
-    print(f"Generating report to: {output_report}")
-    report = generate_summary_report(suitability_records)
-    with open(output_report, 'w', encoding='utf-8') as f:
-        f.write(report)
+    if not args.facet_index.exists():
+        print(f"❌ Facet index not found: {args.facet_index} (run scripts/build_facet_index.py)")
+        return 1
+    
+    with PipelineRun("generate_suitability_scores", args.profile, args.report_dir) as run:
+        # Load data
+        print(f"Loading facet index from: {args.facet_index}")
+        with run.stage("load_facet_index") as stage:
+            index = FacetIndex.load(args.facet_index)
+            stage.rows = len(index.source_ids)
+        print(f"Loaded {len(index.source_ids)} questions")
+        
+        # Calculate scores
+        print("\nCalculating suitability scores...")
+        with run.stage("calculate_suitability_scores") as stage:
+            suitability_records = calculate_suitability_scores(index)
+            stage.rows = len(suitability_records)
+        print(f"Generated {len(suitability_records)} suitability scores")
+        
+        # Save JSON
+        print(f"\nSaving JSON to: {output_json}")
+        with run.stage("write_json", rows=len(suitability_records)):
+            with open(output_json, 'w', encoding='utf-8') as f:
+                json.dump(suitability_records, f, ensure_ascii=False, indent=2)
+        
+        # Generate SQL
+        print(f"Generating SQL to: {output_sql}")
+        with run.stage("generate_sql_insert", rows=len(suitability_records)):
+            sql_content = generate_sql_insert(suitability_records)
+            with open(output_sql, 'w', encoding='utf-8') as f:
+                f.write(sql_content)
+        
+        # Generate report
+        print(f"Generating report to: {output_report}")
+        with run.stage("generate_summary_report"):
+            report = generate_summary_report(suitability_records)
+            with open(output_report, 'w', encoding='utf-8') as f:
+                f.write(report)
     
     print("\n" + "=" * 70)
     print("✓ All files generated successfully!")
@@ -214,6 +226,7 @@ def main():
     print(f"  - Unique formats: {len(set(r['question_type'] for r in suitability_records))}")
     print(f"  - Average score: {sum(r['suitability_score'] for r in suitability_records) / len(suitability_records):.2f}")
     print()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
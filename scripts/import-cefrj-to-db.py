@@ -4,12 +4,23 @@ CEFR-J Wordlist CSV to SQL Converter
 CSVデータをeiken_vocabulary_lexiconテーブル用のSQL INSERT文に変換
 """
 
-import csv
+import argparse
 import json
 import sys
 from pathlib import Path
 
-def generate_sql_inserts(csv_path: str, output_sql: str, batch_size: int = 500):
+from batch_payloads import BatchPayloadWriter
+from corpus_frequencies import FREQUENCIES_CSV, load_frequencies, lookup_frequency
+from lexicon_records import dedupe, read_csv, write_conflict_report
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+LEXICON_COLUMNS = ('word_lemma', 'pos', 'cefr_level', 'zipf_score', 'frequency_rank', 'sources', 'confidence')
+
+def _sql_number(value) -> str:
+    return 'NULL' if value is None else str(value)
+
+def generate_sql_inserts(csv_path: str, output_sql: str, batch_size: int = 500, frequencies_path: Path = FREQUENCIES_CSV,
+                         conflict_report: Path = None, output_payload: Path = None):
     """
     CSVからSQL INSERT文を生成
     
@@ -17,15 +28,33 @@ def generate_sql_inserts(csv_path: str, output_sql: str, batch_size: int = 500):
         csv_path: 入力CSVファイルパス
         output_sql: 出力SQLファイルパス
         batch_size: 1つのINSERT文に含める行数
+        frequencies_path: corpus_frequencies.py の出力（zipf_score / frequency_rank）
+        conflict_report: (word_lemma, pos) 重複の解消結果を書き出す JSON
+        output_payload: 同じ内容の JSON バッチペイロード（batch_payloads.py）
     """
     print(f"📂 Loading CSV: {csv_path}")
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        words = list(reader)
+    words = read_csv(csv_path, source="CEFR-J")
     
     print(f"📊 Loaded {len(words)} words from CSV")
     
+    # 主キー (word_lemma, pos) の重複は D1 ではなくここで解消する
+    loaded = len(words)
+    words, conflicts = dedupe(words)
+    level_conflicts = sum(1 for c in conflicts if c['kind'] == 'level')
+    print(f"🔀 Deduplicated {loaded} → {len(words)} rows "
+          f"({level_conflicts} level conflicts, {len(conflicts) - level_conflicts} duplicates)")
+    if conflict_report:
+        write_conflict_report(conflicts, conflict_report, loaded, len(words))
+        print(f"📋 Conflict report: {conflict_report}")
+    
+    frequencies = load_frequencies(frequencies_path)
+    if frequencies is None:
+        print(f"⚠️  {frequencies_path} not found; zipf_score / frequency_rank will be NULL")
+        print("   Run corpus_frequencies.py first")
+    with_frequency = 0
+    payload_rows = []
+    
     # SQLファイルを開く
     with open(output_sql, 'w', encoding='utf-8') as f:
         # ヘッダーコメント
@@ -41,28 +70,31 @@ def generate_sql_inserts(csv_path: str, output_sql: str, batch_size: int = 500):
         
         # バッチごとにINSERT文を生成
         for i in range(0, len(words), batch_size):
-            batch = words[i:i + batch_size]
+            batch = list(words.rows(i, i + batch_size))
             batch_num = (i // batch_size) + 1
             total_batches = (len(words) + batch_size - 1) // batch_size
             
             f.write(f"-- Batch {batch_num}/{total_batches} ({len(batch)} words)\n")
             f.write("INSERT INTO eiken_vocabulary_lexicon\n")
-            f.write("  (word_lemma, pos, cefr_level, sources, confidence)\n")
+            f.write("  (word_lemma, pos, cefr_level, zipf_score, frequency_rank, sources, confidence)\n")
             f.write("VALUES\n")
             
             for j, word in enumerate(batch):
-                word_lemma = word['word'].replace("'", "''")  # SQLエスケープ
-                pos = word['pos'].replace("'", "''")
-                cefr_level = word['cefr_level']
+                word_lemma = word.word.replace("'", "''")  # SQLエスケープ
+                pos = word.pos.replace("'", "''")
+                cefr_level = word.cefr_level
+                zipf_score, frequency_rank = lookup_frequency(frequencies, word.word)
+                with_frequency += zipf_score is not None
                 
-                # JSON配列としてソースを記録
-                sources_json = json.dumps(["CEFR-J"])
+                # JSON配列としてソースを記録（重複行の出典の和集合）
+                sources_json = json.dumps(list(word.sources)).replace("'", "''")
                 
                 # 信頼度: CEFR-Jの公式リストなので1.0
                 confidence = 1.0
                 
                 # VALUES行を生成
-                values = f"  ('{word_lemma}', '{pos}', '{cefr_level}', '{sources_json}', {confidence})"
+                values = (f"  ('{word_lemma}', '{pos}', '{cefr_level}', {_sql_number(zipf_score)}, "
+                          f"{_sql_number(frequency_rank)}, '{sources_json}', {confidence})")
                 
                 if j < len(batch) - 1:
                     values += ","
@@ -70,22 +102,26 @@ def generate_sql_inserts(csv_path: str, output_sql: str, batch_size: int = 500):
                     values += ";"
                 
                 f.write(values + "\n")
+                payload_rows.append((word.word, word.pos, cefr_level, zipf_score, frequency_rank,
+                                     json.dumps(list(word.sources)), confidence))
             
             f.write("\n")
             
             print(f"✅ Generated batch {batch_num}/{total_batches}")
     
     print(f"\n💾 SQL file created: {output_sql}")
+    
+    if output_payload:
+        with BatchPayloadWriter(output_payload, source="scripts/import-cefrj-to-db.py") as payload:
+            payload.execute("DELETE FROM eiken_vocabulary_lexicon")
+            payload.insert("eiken_vocabulary_lexicon", LEXICON_COLUMNS, payload_rows)
+        print(f"💾 Batch payload created: {output_payload}")
     print(f"📊 Total INSERT statements: {(len(words) + batch_size - 1) // batch_size}")
+    print(f"📊 Words with a corpus/NGSL frequency: {with_frequency:,} / {len(words):,}")
     
     # 統計情報を生成
-    level_counts = {}
-    pos_counts = {}
-    for word in words:
-        level = word['cefr_level']
-        pos = word['pos']
-        level_counts[level] = level_counts.get(level, 0) + 1
-        pos_counts[pos] = pos_counts.get(pos, 0) + 1
+    level_counts = words.level_counts()
+    pos_counts = words.pos_counts()
     
     print("\n📊 Statistics by CEFR Level:")
     for level in ['A1', 'A2', 'B1', 'B2']:
@@ -93,14 +129,19 @@ def generate_sql_inserts(csv_path: str, output_sql: str, batch_size: int = 500):
         print(f"   {level}: {count:,} words")
     
     print("\n📊 Statistics by POS:")
-    for pos, count in sorted(pos_counts.items(), key=lambda x: -x[1])[:10]:
+    for pos, count in list(pos_counts.items())[:10]:
         print(f"   {pos}: {count:,} words")
 
 def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="CEFR-J Wordlist CSV to SQL Converter"))
+    args = parser.parse_args()
+
     # パス設定
     base_dir = Path(__file__).parent.parent
     csv_path = base_dir / "data" / "vocabulary" / "cefrj_wordlist_parsed.csv"
     output_sql = base_dir / "migrations" / "0019_import_cefrj_wordlist.sql"
+    conflict_report = base_dir / "data" / "vocabulary" / "cefrj_wordlist_conflicts.json"
+    output_payload = base_dir / "data" / "vocabulary" / "cefrj_wordlist_lexicon.ndjson"
     
     if not csv_path.exists():
         print(f"❌ Error: CSV file not found: {csv_path}")
@@ -108,7 +149,10 @@ def main():
         sys.exit(1)
     
     try:
-        generate_sql_inserts(str(csv_path), str(output_sql), batch_size=500)
+        with PipelineRun("import-cefrj-to-db", args.profile, args.report_dir) as run:
+            with run.stage("generate_sql_inserts"):
+                generate_sql_inserts(str(csv_path), str(output_sql), batch_size=500,
+                                     conflict_report=conflict_report, output_payload=output_payload)
         print(f"\n🎉 SQL generation completed successfully!")
         print(f"📁 Output file: {output_sql}")
         print(f"\n🚀 Next step: Run the migration")
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Compact lexicon record model shared by the vocabulary import scripts.
+
+A LexiconTable keeps vocabulary entries as columns instead of one dict per
+word: words and related forms are interned strings in lists, CEFR level,
+part of speech and Eiken grade are small integer codes in array('B'/'H')
+columns, and rank / frequency / SFI are packed numeric arrays. Code tables
+(Categories) are module-level, so codes mean the same thing in every
+table and tables from different sources can be merged by copying columns.
+
+    table = LexiconTable()
+    table.add('apple', pos='noun', cefr_level='A1')
+    for entry in table:            # LexiconEntry views
+        entry.word, entry.pos, entry.cefr_level, entry.cefr_score
+
+CSV in and out goes through read_csv / LexiconTable.write_csv with the
+column names the existing files use ('word', 'pos', 'cefr_level', ...).
+
+dedupe() collapses repeated (word, pos) rows, or repeated words for tables
+keyed on the word alone, before anything is written to the database: the
+lowest CEFR level wins, sources are unioned, and every collision is
+returned as a conflict record for the build report.
+"""
+
+import csv
+import json
+import math
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CEFR_LEVELS = ('A1', 'A2', 'B1', 'B2', 'C1', 'C2')
+
+MISSING = 0
+
+
+def is_missing(value) -> bool:
+    """None / NaN（Excel の空セル）を判定（pandas を読み込まずに済むように）"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def normalize_word(value, lower: bool = True) -> str:
+    """Stripped (and by default lowercased) headword; '' for empty cells."""
+    if is_missing(value):
+        return ''
+    word = str(value).strip()
+    if word == 'None':
+        return ''
+    return word.lower() if lower else word
+
+
+def expand_variants(word: str) -> List[str]:
+    """
+    Spelling variants of a slash-separated headword, in source order:
+    'a.m./A.M./am/AM' → ['a.m.', 'A.M.', 'am', 'AM'] (duplicates dropped,
+    so the lowercased 'a.m./a.m./am/am' gives ['a.m.', 'am']).
+    """
+    variants: List[str] = []
+    for variant in word.split('/'):
+        variant = variant.strip()
+        if variant and variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+def normalize_pos(value, lower: bool = True) -> str:
+    """Part of speech as written in the source; 'unknown' for empty cells."""
+    if is_missing(value) or not str(value).strip():
+        return 'unknown'
+    pos = str(value).strip()
+    return pos.lower() if lower else pos
+
+
+def normalize_cefr_level(level_str) -> Optional[str]:
+    """CEFR レベル文字列を正規化（Pre-A1 → A1, A1.1 → A1, 範囲外は None）"""
+    if not level_str or is_missing(level_str):
+        return None
+
+    level_str = str(level_str).strip().upper()
+
+    # Pre-A1, A1.1 などを A1 に正規化
+    if level_str.startswith('PRE-'):
+        return 'A1'
+    if '.' in level_str:
+        return level_str.split('.')[0]
+
+    return level_str if level_str in CEFR_LEVELS else None
+
+
+class Categories:
+    """Interned string ↔ small int code table; code 0 means missing."""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[Optional[str]] = [None]
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: Optional[str]) -> int:
+        if not value:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values) - 1
+
+
+# A1=1 … C2=6（text-profiler.ts cefrToNumeric と同じ順序なので code がそのまま数値スコア）
+LEVELS = Categories(CEFR_LEVELS)
+POS = Categories()
+GRADES = Categories()
+# 出典は code ごとに 1 ビット（sources 列はビット集合なので和集合は OR）
+SOURCES = Categories()
+
+
+def source_bits(names: Iterable[str]) -> int:
+    bits = 0
+    for name in names:
+        if name:
+            bits |= 1 << (SOURCES.code(name) - 1)
+    return bits
+
+
+def source_names(bits: int) -> Tuple[str, ...]:
+    return tuple(SOURCES.values[code] for code in range(1, len(SOURCES.values)) if bits >> (code - 1) & 1)
+
+
+class LexiconEntry:
+    """One row of a LexiconTable, decoded."""
+
+    __slots__ = ('word', 'pos', 'cefr_level', 'eiken_grade', 'rank', 'frequency', 'sfi', 'related_forms',
+                 'sources')
+
+    def __init__(self, word: str, pos: Optional[str] = None, cefr_level: Optional[str] = None,
+                 eiken_grade: Optional[str] = None, rank: int = 0, frequency: int = 0,
+                 sfi: float = math.nan, related_forms: str = '', sources: Tuple[str, ...] = ()):
+        self.word = word
+        self.pos = pos
+        self.cefr_level = cefr_level
+        self.eiken_grade = eiken_grade
+        self.rank = rank
+        self.frequency = frequency
+        self.sfi = sfi
+        self.related_forms = related_forms
+        self.sources = sources
+
+    @property
+    def cefr_score(self) -> int:
+        """A1=1 … C2=6, 0 when the level is unknown."""
+        return LEVELS.codes.get(self.cefr_level, MISSING)
+
+    def __repr__(self) -> str:
+        return f"LexiconEntry({self.word!r}, pos={self.pos!r}, cefr_level={self.cefr_level!r})"
+
+
+class LexiconTable:
+    """
+    Struct-of-arrays vocabulary list.
+
+    Columns (row i of each belongs to the same entry):
+        words           interned headwords
+        pos, level, grade   POS / LEVELS / GRADES codes (0 = missing)
+        rank, frequency     int arrays (0 = missing)
+        sfi                 float array (NaN = missing)
+        related_forms       interned strings ('' = none)
+        sources             SOURCES bit sets (0 = none)
+    """
+
+    FIELDS = LexiconEntry.__slots__
+
+    def __init__(self):
+        self.words: List[str] = []
+        self.pos = array('H')
+        self.level = array('B')
+        self.grade = array('B')
+        self.rank = array('l')
+        self.frequency = array('q')
+        self.sfi = array('d')
+        self.related_forms: List[str] = []
+        self.sources = array('L')
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def add(self, word: str, pos: Optional[str] = None, cefr_level: Optional[str] = None,
+            eiken_grade: Optional[str] = None, rank: int = 0, frequency: int = 0,
+            sfi: float = math.nan, related_forms: str = '', sources: Iterable[str] = ()) -> int:
+        """Append an entry (already normalized) and return its row index."""
+        self.words.append(sys.intern(word))
+        self.pos.append(POS.code(pos))
+        self.level.append(LEVELS.code(cefr_level))
+        self.grade.append(GRADES.code(eiken_grade))
+        self.rank.append(rank)
+        self.frequency.append(frequency)
+        self.sfi.append(sfi)
+        self.related_forms.append(sys.intern(related_forms))
+        self.sources.append(source_bits(sources))
+        return len(self.words) - 1
+
+    def extend(self, other: "LexiconTable"):
+        """Append every row of other (codes are shared, so columns copy as-is)."""
+        self.words.extend(other.words)
+        self.pos.extend(other.pos)
+        self.level.extend(other.level)
+        self.grade.extend(other.grade)
+        self.rank.extend(other.rank)
+        self.frequency.extend(other.frequency)
+        self.sfi.extend(other.sfi)
+        self.related_forms.extend(other.related_forms)
+        self.sources.extend(other.sources)
+
+    def __getitem__(self, i: int) -> LexiconEntry:
+        return LexiconEntry(self.words[i], POS.values[self.pos[i]], LEVELS.values[self.level[i]],
+                            GRADES.values[self.grade[i]], self.rank[i], self.frequency[i], self.sfi[i],
+                            self.related_forms[i], source_names(self.sources[i]))
+
+    def __iter__(self) -> Iterator[LexiconEntry]:
+        return self.rows()
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[LexiconEntry]:
+        """Entries start..stop-1 (one batch of a batched writer)."""
+        window = slice(start, stop)
+        pos, levels, grades = POS.values, LEVELS.values, GRADES.values
+        names: Dict[int, Tuple[str, ...]] = {}
+        for word, p, level, grade, rank, frequency, sfi, forms, bits in zip(
+                self.words[window], self.pos[window], self.level[window], self.grade[window],
+                self.rank[window], self.frequency[window], self.sfi[window], self.related_forms[window],
+                self.sources[window]):
+            sources = names.get(bits)
+            if sources is None:
+                sources = names[bits] = source_names(bits)
+            yield LexiconEntry(word, pos[p], levels[level], grades[grade], rank, frequency, sfi, forms, sources)
+
+    def level_counts(self) -> Dict[str, int]:
+        return {LEVELS.values[code]: n for code, n in sorted(Counter(self.level).items()) if code}
+
+    def pos_counts(self) -> Dict[str, int]:
+        counts = Counter(self.pos)
+        return {POS.values[code]: n for code, n in counts.most_common() if code}
+
+    def write_csv(self, path: Path, fields: Sequence[str], text: Optional[Dict[str, Sequence[str]]] = None):
+        """
+        CSV with the given LexiconEntry fields as columns (missing values are
+        empty). text maps a field to one string per row written instead of
+        the decoded value, for columns that must keep their source spelling
+        (an SFI of '50' rather than the float 50.0).
+        """
+        text = text or {}
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            for i, entry in enumerate(self):
+                writer.writerow([text[field][i] if field in text else _csv_value(getattr(entry, field))
+                                 for field in fields])
+
+
+def _csv_value(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, tuple):
+        return ';'.join(value)
+    return str(value)
+
+
+def dedupe(table: LexiconTable, by_pos: bool = True) -> Tuple[LexiconTable, List[dict]]:
+    """
+    Collapse rows with the same (word, pos) through a hash index.
+
+    With by_pos=False the key is the word alone, for tables with a UNIQUE
+    word column (vocabulary_master).
+
+    Merge rules, applied in input order:
+        cefr_level      lowest level wins (a missing level loses to any level);
+                        eiken_grade (and pos, when not part of the key)
+                        follow the winning row
+        sources         union
+        rank            lowest non-zero rank; frequency / sfi the highest value
+        related_forms   first non-empty value
+
+    Returns:
+        (table of unique rows in first-seen order, one conflict dict per
+        repeated key: word, pos, rows, levels, kept_level, sources, kind
+        'level' when the rows disagree on the level, else 'duplicate';
+        with by_pos=False also merged_pos, every pos of the rows)
+    """
+    unique = LexiconTable()
+    index: Dict[object, int] = {}
+    seen_levels: Dict[int, List[int]] = {}
+    seen_pos: Dict[int, List[int]] = {}
+
+    for i, word in enumerate(table.words):
+        key = (word, table.pos[i]) if by_pos else word
+        j = index.get(key)
+        if j is None:
+            index[key] = len(unique.words)
+            unique.words.append(word)
+            unique.pos.append(table.pos[i])
+            unique.level.append(table.level[i])
+            unique.grade.append(table.grade[i])
+            unique.rank.append(table.rank[i])
+            unique.frequency.append(table.frequency[i])
+            unique.sfi.append(table.sfi[i])
+            unique.related_forms.append(table.related_forms[i])
+            unique.sources.append(table.sources[i])
+            continue
+
+        seen_levels.setdefault(j, [unique.level[j]]).append(table.level[i])
+        if not by_pos:
+            pos = seen_pos.setdefault(j, [unique.pos[j]])
+            if table.pos[i] not in pos:
+                pos.append(table.pos[i])
+        level = table.level[i]
+        if level and (not unique.level[j] or level < unique.level[j]):
+            unique.level[j] = level
+            unique.grade[j] = table.grade[i]
+            if not by_pos:
+                unique.pos[j] = table.pos[i]
+        unique.sources[j] |= table.sources[i]
+        if table.rank[i] and (not unique.rank[j] or table.rank[i] < unique.rank[j]):
+            unique.rank[j] = table.rank[i]
+        unique.frequency[j] = max(unique.frequency[j], table.frequency[i])
+        if not math.isnan(table.sfi[i]) and not unique.sfi[j] >= table.sfi[i]:
+            unique.sfi[j] = table.sfi[i]
+        if not unique.related_forms[j]:
+            unique.related_forms[j] = table.related_forms[i]
+
+    conflicts = []
+    for j, levels in seen_levels.items():
+        distinct = sorted({code for code in levels if code})
+        conflict = {
+            'word': unique.words[j],
+            'pos': POS.values[unique.pos[j]],
+            'rows': len(levels),
+            'levels': [LEVELS.values[code] for code in distinct],
+            'kept_level': LEVELS.values[unique.level[j]],
+            'sources': list(source_names(unique.sources[j])),
+            'kind': 'level' if len(distinct) > 1 else 'duplicate',
+        }
+        if not by_pos:
+            conflict['merged_pos'] = [POS.values[code] for code in seen_pos[j]]
+        conflicts.append(conflict)
+    return unique, conflicts
+
+
+def write_conflict_report(conflicts: List[dict], path: Path, input_rows: int, unique_rows: int):
+    """JSON report of the dedupe() collisions (level disagreements first)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        'input_rows': input_rows,
+        'unique_rows': unique_rows,
+        'dropped_rows': input_rows - unique_rows,
+        'level_conflicts': sum(1 for c in conflicts if c['kind'] == 'level'),
+        'duplicates': sum(1 for c in conflicts if c['kind'] == 'duplicate'),
+        'conflicts': sorted(conflicts, key=lambda c: (c['kind'] != 'level', c['word'], c['pos'] or '')),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def read_csv(path: Path, lower: bool = False, source: Optional[str] = None) -> LexiconTable:
+    """
+    Load a vocabulary CSV (cefrj_wordlist_parsed.csv, ngsl-complete.csv, ...)
+    into a LexiconTable. Columns named like LexiconEntry fields are read;
+    'part_of_speech' is accepted for 'pos'. Words keep their case unless
+    lower is set; source, when given, is recorded on every row.
+    """
+    sources = (source,) if source else ()
+    table = LexiconTable()
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            word = normalize_word(row.get('word'), lower)
+            if not word:
+                continue
+            table.add(
+                word,
+                pos=row.get('pos') or row.get('part_of_speech') or None,
+                cefr_level=normalize_cefr_level(row.get('cefr_level')),
+                eiken_grade=row.get('eiken_grade') or None,
+                rank=_int(row.get('rank') or row.get('frequency_rank')),
+                frequency=_int(row.get('frequency')),
+                sfi=_float(row.get('sfi')),
+                related_forms=row.get('related_forms') or '',
+                sources=sources,
+            )
+    return table
+
+
+def _int(value: Optional[str]) -> int:
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def _float(value: Optional[str]) -> float:
+    try:
+        return float(value) if value else math.nan
+    except ValueError:
+        return math.nan
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Deterministic local text embeddings (no network, no model download).
+
+Texts are turned into hashed word 1-2 gram and character 3-gram counts,
+weighted with sublinear TF-IDF and reduced with a seeded randomized SVD.
+Rows are L2-normalized float32, so cosine similarity is a dot product and
+a batch of queries is ranked with one matrix product (top_k).
+
+The fitted model is small (idf + components over the hashed columns that
+occur in the fitting corpus) and can be saved to / loaded from .npz.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+N_FEATURES = 1 << 20
+DEFAULT_COMPONENTS = 128
+SVD_OVERSAMPLES = 10
+SVD_POWER_ITERATIONS = 4
+SEED = 20240601
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def hashed_features(text: str, n_features: int = N_FEATURES) -> List[int]:
+    """Feature ids of word unigrams, word bigrams and in-word character trigrams."""
+    words = _WORD_RE.findall(text.lower().replace('’', "'"))
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    mask = n_features - 1
+    return [zlib.crc32(g.encode('utf-8')) & mask for g in grams]
+
+
+def count_matrix(texts: Iterable[str], n_features: int = N_FEATURES) -> sparse.csr_matrix:
+    """Sparse documents × n_features term-count matrix."""
+    import numpy as np
+    from scipy import sparse
+
+    indptr, indices = [0], []
+    for text in texts:
+        indices.extend(hashed_features(text, n_features))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    matrix = sparse.csr_matrix((data, np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+                               shape=(len(indptr) - 1, n_features))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def randomized_svd(matrix: sparse.csr_matrix, n_components: int,
+                   seed: int = SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Halko et al. randomized SVD with a fixed seed. Returns (singular values,
+    components) with each component's largest-magnitude entry made positive
+    so repeated builds give identical vectors.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n_random = min(n_components + SVD_OVERSAMPLES, min(matrix.shape))
+    q = matrix @ rng.standard_normal((matrix.shape[1], n_random))
+    for _ in range(SVD_POWER_ITERATIONS):
+        q, _ = np.linalg.qr(q)
+        q, _ = np.linalg.qr(matrix.T @ q)
+        q = matrix @ q
+    q, _ = np.linalg.qr(q)
+
+    b = np.asarray((matrix.T @ q).T)
+    _, s, vt = np.linalg.svd(b, full_matrices=False)
+    vt = vt[:n_components]
+    signs = np.sign(vt[np.arange(len(vt)), np.abs(vt).argmax(axis=1)])
+    signs[signs == 0] = 1
+    return s[:n_components], vt * signs[:, None]
+
+
+class LocalEmbedder:
+    """Hashed n-gram TF-IDF + truncated SVD; fit once, then embed any text."""
+
+    def __init__(self, n_components: int = DEFAULT_COMPONENTS, n_features: int = N_FEATURES):
+        self.n_components = n_components
+        self.n_features = n_features
+        self.columns: Optional[np.ndarray] = None      # hashed feature ids seen while fitting
+        self.idf: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None   # n_components × len(columns)
+
+    @property
+    def dimension(self) -> int:
+        return 0 if self.components is None else self.components.shape[0]
+
+    def _tfidf(self, texts: Iterable[str]) -> sparse.csr_matrix:
+        import numpy as np
+        from scipy import sparse
+
+        counts = count_matrix(texts, self.n_features).tocoo()
+        position = np.searchsorted(self.columns, counts.col)
+        position = np.minimum(position, len(self.columns) - 1)
+        known = self.columns[position] == counts.col
+        tf = 1.0 + np.log(counts.data[known])
+        matrix = sparse.csr_matrix((tf * self.idf[position[known]], (counts.row[known], position[known])),
+                                   shape=(counts.shape[0], len(self.columns)), dtype=np.float64)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms) @ matrix
+
+    def fit(self, texts: List[str]) -> "LocalEmbedder":
+        import numpy as np
+
+        counts = count_matrix(texts, self.n_features).tocsc()
+        document_frequency = np.diff(counts.indptr)
+        self.columns = np.flatnonzero(document_frequency).astype(np.int64)
+        self.idf = np.log((1 + len(texts)) / (1 + document_frequency[self.columns])) + 1.0
+
+        tfidf = self._tfidf(texts)
+        n_components = min(self.n_components, min(tfidf.shape) - 1) if min(tfidf.shape) > 1 else 1
+        _, self.components = randomized_svd(tfidf, n_components)
+        return self
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text."""
+        import numpy as np
+
+        if self.components is None:
+            raise ValueError("LocalEmbedder.embed() called before fit() or load()")
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return normalize_rows(np.asarray(self._tfidf(texts) @ self.components.T))
+
+    def save(self, path: Path):
+        import numpy as np
+
+        np.savez_compressed(path, columns=self.columns, idf=self.idf,
+                            components=self.components.astype(np.float32),
+                            n_features=self.n_features)
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalEmbedder":
+        import numpy as np
+
+        data = np.load(path)
+        embedder = cls(n_components=data['components'].shape[0], n_features=int(data['n_features']))
+        embedder.columns = data['columns']
+        embedder.idf = data['idf']
+        embedder.components = data['components'].astype(np.float64)
+        return embedder
+
+
+def top_k(queries: np.ndarray, matrix: np.ndarray, k: int,
+          exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batch cosine top-k over normalized rows.
+
+    Args:
+        queries: q × d normalized query vectors
+        matrix: n × d normalized candidate vectors
+        exclude: optional q × n boolean mask of candidates to skip
+
+    Returns:
+        (indices, scores), both q × k and sorted by descending score;
+        slots without a candidate have index -1.
+    """
+    import numpy as np
+
+    scores = queries @ matrix.T
+    if exclude is not None:
+        scores = np.where(exclude, -np.inf, scores)
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    indices = np.take_along_axis(part, order, axis=1)
+    best = np.take_along_axis(part_scores, order, axis=1)
+    indices = np.where(np.isfinite(best), indices, -1)
+    return indices, best.astype(np.float32)
@@ -5,11 +5,14 @@ The file contains multiple JSON objects, but they span multiple lines.
 Each grade starts with { "grade": and we need to find the complete object.
 """
 
+import argparse
 import json
 import re
 import unicodedata
 from pathlib import Path
 
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
 def clean_unicode(text: str) -> str:
     """Remove problematic Unicode characters that break JSON parsing."""
     cleaned = []
@@ -122,28 +125,38 @@ def extract_grade_sections(file_path: str) -> list[dict]:
     return grade_objects
 
 def main():
-    input_file = "/home/user/uploaded_files/eikendate.txt"
-    output_file = "/home/user/webapp/data/eiken_questions.json"
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Eiken Question Data Parser"))
+    parser.add_argument('--input', default="/home/user/uploaded_files/eikendate.txt",
+                        help="uploaded question data file")
+    parser.add_argument('--output', default=str(Path(__file__).parent.parent / "data" / "eiken_questions.json"))
+    args = parser.parse_args()
+
+    input_file = args.input
+    output_file = args.output
     
     print("=" * 70)
     print("Eiken Question Data Parser")
     print("=" * 70)
     print()
     
-    # Extract all grade sections
-    grade_objects = extract_grade_sections(input_file)
-    
-    # Sort by grade for consistency
-    grade_order = ["5", "4", "3", "pre2", "2", "pre1", "1"]
-    grade_objects.sort(key=lambda x: grade_order.index(x.get("grade", "999")) if x.get("grade") in grade_order else 999)
-    
-    # Create output directory if needed
-    output_path = Path(output_file)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Save as proper JSON array
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(grade_objects, f, ensure_ascii=False, indent=2)
+    with PipelineRun("parse_eiken_questions", args.profile, args.report_dir) as run:
+        # Extract all grade sections
+        with run.stage("extract_grade_sections") as stage:
+            grade_objects = extract_grade_sections(input_file)
+            stage.rows = sum(len(g.get("questions", [])) for g in grade_objects)
+        
+        # Sort by grade for consistency
+        grade_order = ["5", "4", "3", "pre2", "2", "pre1", "1"]
+        grade_objects.sort(key=lambda x: grade_order.index(x.get("grade", "999")) if x.get("grade") in grade_order else 999)
+        
+        # Create output directory if needed
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Save as proper JSON array
+        with run.stage("write_json"):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(grade_objects, f, ensure_ascii=False, indent=2)
     
     print("\n" + "=" * 70)
     print("Summary Statistics")
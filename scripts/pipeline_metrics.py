@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Stage timing, throughput and memory instrumentation for the data scripts.
+
+Each script wraps its work in a PipelineRun and its steps in run.stage();
+on exit a JSON run report (stage wall/CPU time, rows/sec, peak RSS) is
+written to data/run_reports/ and a one-line summary is appended to
+run_history.jsonl so regressions can be tracked across rebuilds.
+Passing --profile cprofile|pyinstrument additionally captures a profile.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+REPORT_DIR = BASE_DIR / "data" / "run_reports"
+HISTORY_FILE_NAME = "run_history.jsonl"
+PROFILE_TOP_FUNCTIONS = 25
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+def add_profile_arguments(parser):
+    """Add the shared --profile / --report-dir options to an argparse parser."""
+    parser.add_argument('--profile', choices=PROFILERS, default=None,
+                        help="capture a cProfile or pyinstrument profile of the run")
+    parser.add_argument('--report-dir', type=Path, default=REPORT_DIR,
+                        help="where JSON run reports are written")
+    return parser
+
+
+class Stage:
+    """One timed step of a run; set .rows to get a rows/sec figure."""
+
+    def __init__(self, name: str, rows: Optional[int] = None):
+        self.name = name
+        self.rows = rows
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = None
+
+    def to_dict(self) -> dict:
+        result = {
+            'name': self.name,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_mb': self.peak_rss_mb,
+        }
+        if self.rows is not None:
+            result['rows'] = self.rows
+            result['rows_per_sec'] = round(self.rows / self.wall_seconds, 1) if self.wall_seconds > 0 else None
+        return result
+
+
+class PipelineRun:
+    """
+    Context manager recording a whole script run.
+
+    Usage:
+        with PipelineRun('parse_eiken_questions', profile=args.profile) as run:
+            with run.stage('extract') as stage:
+                objects = extract_grade_sections(path)
+                stage.rows = len(objects)
+    """
+
+    def __init__(self, name: str, profile: Optional[str] = None,
+                 report_dir: Path = REPORT_DIR, quiet: bool = False):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profile} (expected one of {PROFILERS})")
+        self.name = name
+        self.profile = profile
+        self.report_dir = Path(report_dir)
+        self.quiet = quiet
+        self.stages: List[Stage] = []
+        self.extra = {}
+        self.run_id = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.report_path = None
+        self._profiler = None
+        self._started_at = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        stage = Stage(name, rows)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_seconds = time.perf_counter() - wall_start
+            stage.cpu_seconds = time.process_time() - cpu_start
+            stage.peak_rss_mb = peak_rss_mb()
+            self.stages.append(stage)
+
+    def __enter__(self):
+        self._started_at = datetime.now().isoformat()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._start_profiler()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_seconds = time.perf_counter() - self._wall_start
+        cpu_seconds = time.process_time() - self._cpu_start
+        profile_info = self._stop_profiler()
+
+        report = {
+            'run_id': self.run_id,
+            'script': self.name,
+            'argv': sys.argv[1:],
+            'started_at': self._started_at,
+            'status': 'error' if exc_type else 'ok',
+            'error': f"{exc_type.__name__}: {exc}" if exc_type else None,
+            'wall_seconds': round(wall_seconds, 4),
+            'cpu_seconds': round(cpu_seconds, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stages': [s.to_dict() for s in self.stages],
+            'profile': profile_info,
+            **self.extra,
+        }
+        self._write_report(report)
+
+        if not self.quiet:
+            self._print_summary(report)
+        return False
+
+    def _start_profiler(self):
+        if self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'pyinstrument':
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+
+    def _stop_profiler(self) -> Optional[dict]:
+        if self._profiler is None:
+            return None
+
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.profile == 'cprofile':
+            import pstats
+            self._profiler.disable()
+            output = self.report_dir / f"{self.run_id}.prof"
+            self._profiler.dump_stats(str(output))
+
+            stats = pstats.Stats(self._profiler).sort_stats('cumulative')
+            top = []
+            for func in stats.fcn_list[:PROFILE_TOP_FUNCTIONS]:
+                _, ncalls, tottime, cumtime, _ = stats.stats[func]
+                filename, line, func_name = func
+                top.append({
+                    'function': f"{os.path.basename(filename)}:{line}({func_name})",
+                    'calls': ncalls,
+                    'tottime': round(tottime, 4),
+                    'cumtime': round(cumtime, 4),
+                })
+            return {'profiler': 'cprofile', 'output': str(output), 'top_cumulative': top}
+
+        self._profiler.stop()
+        output = self.report_dir / f"{self.run_id}.html"
+        output.write_text(self._profiler.output_html(), encoding='utf-8')
+        return {'profiler': 'pyinstrument', 'output': str(output)}
+
+    def _write_report(self, report: dict):
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        self.report_path = self.report_dir / f"{self.run_id}.json"
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+        summary = {
+            'run_id': report['run_id'],
+            'script': report['script'],
+            'started_at': report['started_at'],
+            'status': report['status'],
+            'wall_seconds': report['wall_seconds'],
+            'peak_rss_mb': report['peak_rss_mb'],
+            'stages': {s['name']: s['wall_seconds'] for s in report['stages']},
+        }
+        with open(self.report_dir / HISTORY_FILE_NAME, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+    def _print_summary(self, report: dict):
+        print(f"\n⏱️  {self.name}: {report['wall_seconds']:.2f}s total, "
+              f"peak RSS {report['peak_rss_mb']} MB")
+        for s in report['stages']:
+            share = s['wall_seconds'] / report['wall_seconds'] * 100 if report['wall_seconds'] else 0
+            rate = f", {s['rows_per_sec']:,.0f} rows/s" if s.get('rows_per_sec') else ""
+            print(f"   {s['name']:<24} {s['wall_seconds']:8.3f}s ({share:4.1f}%){rate}")
+        if report['profile']:
+            print(f"   profile: {report['profile']['output']}")
+        print(f"   report: {self.report_path}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Replay migrations/ into SQLite, statement by statement.
+
+The migration history has drifted from what D1 actually ran (tables
+created twice with different columns, ALTERs against tables that were
+never created, see MIGRATION_ERROR_RESOLUTION.md), so a plain
+executescript() stops at the first broken file. replay_migrations()
+instead executes one statement at a time and records every failure as a
+warning with its file and line, leaving the schema as complete as the
+history allows.
+
+The result can be serialized once (schema_bytes) and cloned cheaply into
+fresh in-memory connections (clone_database), e.g. one per worker.
+"""
+
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eiken_corpus import BASE_DIR
+
+MIGRATIONS_DIR = BASE_DIR / "migrations"
+# 番号付きのマイグレーションのみ (fix_*.sql などの手動パッチは除く)
+MIGRATION_GLOB = "[0-9]*.sql"
+
+_LEADING_COMMENTS_RE = re.compile(r"\A(?:\s+|--[^\n]*(?:\n|\Z)|/\*.*?\*/)*", re.DOTALL)
+_TRANSACTION_RE = re.compile(r"\A(?:BEGIN(?:\s+(?:DEFERRED|IMMEDIATE|EXCLUSIVE))?(?:\s+TRANSACTION)?|"
+                             r"COMMIT(?:\s+TRANSACTION)?|END(?:\s+TRANSACTION)?|"
+                             r"ROLLBACK(?:\s+TRANSACTION)?)\s*;?\Z", re.IGNORECASE)
+
+
+def migration_files(migrations_dir: Path = MIGRATIONS_DIR, exclude: Iterable[str] = ()) -> List[Path]:
+    """Numbered migrations in the order wrangler applies them (file name order)."""
+    excluded = set(exclude)
+    return [p for p in sorted(migrations_dir.glob(MIGRATION_GLOB)) if p.name not in excluded]
+
+
+def split_statements(sql: str) -> List[Tuple[int, str]]:
+    """
+    Split a SQL script into (line, statement) pairs.
+
+    Statement boundaries come from sqlite3.complete_statement, so semicolons
+    inside strings and trigger bodies are handled; line is the 1-based line
+    of the statement's first token (leading comments are skipped). A final
+    statement without its semicolon is returned as well.
+    """
+    statements = []
+    line = 1
+    buffer = ""
+    for piece in re.split(r"(?<=;)", sql):
+        buffer += piece
+        if not sqlite3.complete_statement(buffer):
+            continue
+        lead = _LEADING_COMMENTS_RE.match(buffer).end()
+        body = buffer[lead:].strip()
+        if body and body != ";":
+            statements.append((line + buffer.count("\n", 0, lead), body))
+        line += buffer.count("\n")
+        buffer = ""
+
+    lead = _LEADING_COMMENTS_RE.match(buffer).end()
+    if buffer[lead:].strip():
+        statements.append((line + buffer.count("\n", 0, lead), buffer[lead:].strip()))
+    return statements
+
+
+def is_transaction_control(statement: str) -> bool:
+    """BEGIN / COMMIT / END / ROLLBACK outside a trigger body."""
+    return bool(_TRANSACTION_RE.match(statement))
+
+
+def replay_migrations(conn: sqlite3.Connection, paths: Iterable[Path],
+                      superseded: Optional[Dict[str, Iterable[str]]] = None) -> List[dict]:
+    """
+    Execute every statement of every migration in autocommit mode.
+
+    Args:
+        superseded: migration file name → tables to drop before replaying it,
+            for a CREATE TABLE IF NOT EXISTS that must replace an earlier,
+            incompatible definition of the same table
+
+    Returns:
+        one warning dict (file, line, error) per statement that failed
+    """
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    superseded = superseded or {}
+    warnings = []
+    try:
+        for path in paths:
+            for table in superseded.get(path.name, ()):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for line, statement in split_statements(path.read_text(encoding='utf-8')):
+                if is_transaction_control(statement):
+                    continue
+                try:
+                    conn.execute(statement)
+                except sqlite3.Error as e:
+                    warnings.append({'file': path.name, 'line': line, 'error': str(e)})
+    finally:
+        conn.isolation_level = isolation_level
+    return warnings
+
+
+def build_schema_database(paths: Optional[List[Path]] = None, foreign_keys: bool = True,
+                          superseded: Optional[Dict[str, Iterable[str]]] = None
+                          ) -> Tuple[sqlite3.Connection, List[dict]]:
+    """In-memory database with the migrations replayed, plus the replay warnings."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+    warnings = replay_migrations(conn, migration_files() if paths is None else paths, superseded)
+    return conn, warnings
+
+
+def schema_bytes(conn: sqlite3.Connection) -> bytes:
+    return conn.serialize()
+
+
+def clone_database(data: bytes, foreign_keys: bool = True) -> sqlite3.Connection:
+    """Fresh, writable in-memory connection holding a copy of a serialized database."""
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.deserialize(data)
+    conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+    return conn
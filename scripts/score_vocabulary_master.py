@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Precompute final_difficulty_score / should_annotate for vocabulary_master.
+
+Loads every vocabulary_master row (by replaying migrations 0025 + 0026 in an
+in-memory SQLite database, or from an existing SQLite file with --db),
+scores them in one vectorized batch with difficulty_scoring, checks parity
+against EXAMPLE_CALCULATIONS and against the scores already stored by
+populate-vocabulary-master.ts, and writes batched UPDATE statements.
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from difficulty_scoring import calculate_difficulty_components, verify_calculations
+from eiken_corpus import BASE_DIR
+from pipeline_metrics import PipelineRun, add_profile_arguments
+
+MIGRATIONS_DIR = BASE_DIR / "migrations"
+VOCABULARY_MIGRATIONS = [
+    MIGRATIONS_DIR / "0025_create_vocabulary_master.sql",
+    MIGRATIONS_DIR / "0026_populate_vocabulary_master.sql",
+]
+OUTPUT_SQL = BASE_DIR / "data" / "vocabulary" / "vocabulary_master_difficulty.sql"
+UPDATE_BATCH_SIZE = 500
+
+ROW_COLUMNS = ('word', 'pos', 'cefr_level', 'cefr_numeric', 'zipf_score', 'source_ngsl',
+               'source_nawl', 'final_difficulty_score', 'should_annotate')
+
+
+def load_vocabulary_master(db_path: Optional[Path] = None) -> List[dict]:
+    """vocabulary_master rows from a SQLite file, or from the migrations replayed in memory."""
+    if db_path is not None:
+        conn = sqlite3.connect(db_path)
+    else:
+        conn = sqlite3.connect(":memory:")
+        for migration in VOCABULARY_MIGRATIONS:
+            conn.executescript(migration.read_text(encoding='utf-8'))
+
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(f"SELECT {', '.join(ROW_COLUMNS)} FROM vocabulary_master ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def parity_report(rows: List[dict], components: dict) -> List[dict]:
+    """Rows whose stored score/annotation differs from the recomputed one."""
+    import numpy as np
+
+    stored = np.array([-1 if r['final_difficulty_score'] is None else r['final_difficulty_score'] for r in rows])
+    stored_annotate = np.array([bool(r['should_annotate']) for r in rows])
+    differs = (stored != components['final_score']) | (stored_annotate != components['should_annotate'])
+    return [
+        {'word': rows[i]['word'], 'pos': rows[i]['pos'],
+         'stored': rows[i]['final_difficulty_score'], 'computed': int(components['final_score'][i])}
+        for i in np.flatnonzero(differs)
+    ]
+
+
+def _sql_text(value) -> str:
+    if value is None:
+        return "NULL"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def generate_update_sql(rows: List[dict], components: dict, batch_size: int = UPDATE_BATCH_SIZE) -> str:
+    """Batched UPDATE ... FROM (VALUES ...) keyed on (word, pos)."""
+    lines = [
+        "-- vocabulary_master difficulty scores precomputed by scripts/score_vocabulary_master.py",
+        f"-- Rows: {len(rows)}, should_annotate: {int(components['should_annotate'].sum())}",
+        "",
+    ]
+    for i in range(0, len(rows), batch_size):
+        values = []
+        for j in range(i, min(i + batch_size, len(rows))):
+            values.append(
+                f"    ({_sql_text(rows[j]['word'])}, {_sql_text(rows[j]['pos'])}, "
+                f"{components['cefr_weight'][j]:.1f}, {components['zipf_penalty'][j]:.1f}, "
+                f"{components['ngsl_weight'][j]:.1f}, {components['japanese_learnability'][j]:g}, "
+                f"{components['length_bonus'][j]}, {components['final_score'][j]}, "
+                f"{int(components['should_annotate'][j])})"
+            )
+        lines.append(f"-- Batch {i // batch_size + 1}: rows {i + 1} to {i + len(values)}")
+        lines.append("UPDATE vocabulary_master SET")
+        lines.append("  cefr_weight = v.column3, zipf_penalty = v.column4, ngsl_weight = v.column5,")
+        lines.append("  japanese_learnability_weight = v.column6, length_bonus = v.column7,")
+        lines.append("  final_difficulty_score = v.column8, should_annotate = v.column9,")
+        lines.append("  updated_at = CURRENT_TIMESTAMP")
+        lines.append("FROM (VALUES")
+        lines.append(",\n".join(values))
+        lines.append(") AS v")
+        lines.append("WHERE vocabulary_master.word = v.column1 AND vocabulary_master.pos IS v.column2;")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Precompute vocabulary_master difficulty scores"))
+    parser.add_argument('--db', type=Path, default=None,
+                        help="read vocabulary_master from this SQLite file instead of the migrations")
+    parser.add_argument('--output', type=Path, default=OUTPUT_SQL)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Vocabulary Difficulty Scoring")
+    print("=" * 70)
+    print()
+
+    print("Checking EXAMPLE_CALCULATIONS parity:")
+    if not verify_calculations():
+        print("❌ Example parity failed; not writing scores")
+        return 1
+
+    with PipelineRun("score_vocabulary_master", args.profile, args.report_dir) as run:
+        with run.stage("load_vocabulary_master") as stage:
+            rows = load_vocabulary_master(args.db)
+            stage.rows = len(rows)
+        print(f"\nLoaded {len(rows):,} vocabulary_master rows")
+
+        with run.stage("calculate_difficulty_components", rows=len(rows)):
+            components = calculate_difficulty_components(rows)
+
+        mismatches = parity_report(rows, components)
+
+        with run.stage("generate_update_sql", rows=len(rows)):
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(generate_update_sql(rows, components))
+
+    print(f"\n💾 SQL file created: {args.output}")
+    print(f"📊 should_annotate: {int(components['should_annotate'].sum()):,} of {len(rows):,} words")
+    for low in range(0, 100, 20):
+        count = int(((components['final_score'] >= low) & (components['final_score'] < low + 20)).sum())
+        print(f"   {low:3d}-{low + 19:3d}: {count:,}")
+
+    # zipf_score is stored with 2 decimals, so ±1 at a rounding boundary is expected
+    off_by_one = [m for m in mismatches if m['stored'] is not None and abs(m['stored'] - m['computed']) == 1]
+    larger = [m for m in mismatches if m not in off_by_one]
+    print(f"\n📊 Parity with stored scores: {len(rows) - len(mismatches):,} exact, "
+          f"{len(off_by_one)} ±1 (stored zipf precision), {len(larger)} larger")
+    for m in larger[:10]:
+        print(f"   ⚠️  {m['word']} ({m['pos']}): stored {m['stored']} → computed {m['computed']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
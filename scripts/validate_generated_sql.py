@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Pre-flight validation of generated SQL before `wrangler d1 execute`.
+
+Replays migrations/ into an in-memory SQLite database once, serializes it,
+and hands a clone to every worker process. Each generated file is then
+dry-run statement by statement inside a transaction that is always rolled
+back, so files are validated independently against the same schema.
+Failures (missing tables/columns, NOT NULL / UNIQUE / CHECK / FOREIGN KEY
+violations, explicit BEGIN/COMMIT that D1 rejects) are reported as
+file:line.
+
+The replay drops the same superseded tables as the schema template
+(build_schema_template.SUPERSEDED_TABLES), so files are checked against
+the table definitions the app queries. Migrations that fail to replay are
+schema drift, not errors in the generated files; they are listed as
+warnings.
+
+    python scripts/validate_generated_sql.py
+    python scripts/validate_generated_sql.py data/vocab_final_batches/*.sql -j 4
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from build_schema_template import SUPERSEDED_TABLES
+from eiken_corpus import BASE_DIR
+from pipeline_metrics import PipelineRun, add_profile_arguments
+from schema_replay import (
+    build_schema_database,
+    clone_database,
+    is_transaction_control,
+    migration_files,
+    schema_bytes,
+    split_statements,
+)
+
+# 生成された SQL (リポジトリルートからの相対パス、glob 可)
+GENERATED_SQL = [
+    'migrations/0019_import_cefrj_wordlist.sql',
+    'migrations/vocabulary-batches/*.sql',
+    'data/vocab_final_batches/*.sql',
+    'data/vocab_small_batches/*.sql',
+    'data/vocab_dashboard_batches/*.sql',
+    'data/vocabulary_batches/*.sql',
+    'data/vocabulary/*.sql',
+    'data/vocab_test_batch.sql',
+    'data/phase2a_prep/*.sql',
+    'data/copyright_index/*.sql',
+    'data/embeddings/*.sql',
+    'data/pdf_analysis/*.sql',
+]
+REPORT_FILE = BASE_DIR / "data" / "run_reports" / "sql_validation.json"
+MAX_ERRORS_PER_FILE = 20
+
+_worker_conn: Optional[sqlite3.Connection] = None
+
+
+def discover_files(patterns: List[str]) -> List[Path]:
+    files = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_absolute() or path.exists():
+            files.append(path)
+        else:
+            files.extend(sorted(BASE_DIR.glob(pattern)))
+    return list(dict.fromkeys(p.resolve() for p in files if p.is_file()))
+
+
+def _display_path(path: Path) -> str:
+    try:
+        return str(path.relative_to(BASE_DIR.resolve()))
+    except ValueError:
+        return str(path)
+
+
+def validate_sql(conn: sqlite3.Connection, sql: str, max_errors: int = MAX_ERRORS_PER_FILE) -> dict:
+    """
+    Dry-run one script on conn inside a rolled-back transaction.
+
+    Returns:
+        dict with statement count, error count and the first max_errors
+        errors as {'line', 'error', 'statement'}
+    """
+    errors = []
+    n_errors = 0
+    statements = split_statements(sql)
+
+    def record(line, message, statement=""):
+        nonlocal n_errors
+        n_errors += 1
+        if len(errors) < max_errors:
+            errors.append({'line': line, 'error': message, 'statement': statement[:120]})
+
+    conn.execute("BEGIN")
+    try:
+        for line, statement in statements:
+            if is_transaction_control(statement):
+                record(line, "explicit transaction statement (D1 rejects BEGIN/COMMIT in execute)", statement)
+                continue
+            try:
+                conn.execute(statement)
+            except sqlite3.Error as e:
+                record(line, str(e), statement)
+
+        # 遅延 FK 制約は COMMIT 時にしか失敗しないため、ここでまとめて確認する
+        for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check").fetchall():
+            record(None, f"FOREIGN KEY violation: {table} rowid {rowid} → {parent}")
+    finally:
+        conn.execute("ROLLBACK")
+
+    return {'statements': len(statements), 'error_count': n_errors, 'errors': errors}
+
+
+def _init_worker(data: bytes):
+    global _worker_conn
+    _worker_conn = clone_database(data)
+
+
+def _validate_file(path: Path) -> dict:
+    start = time.perf_counter()
+    result = validate_sql(_worker_conn, path.read_text(encoding='utf-8'))
+    result['file'] = _display_path(path)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def validate_files(files: List[Path], data: bytes, jobs: int) -> List[dict]:
+    """Validate files in parallel, each worker holding its own clone of the schema."""
+    if jobs <= 1:
+        _init_worker(data)
+        return [_validate_file(path) for path in files]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(data,)) as pool:
+        return list(pool.map(_validate_file, files, chunksize=max(1, len(files) // (jobs * 4))))
+
+
+def main():
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Dry-run generated SQL against the migrated schema"))
+    parser.add_argument('files', nargs='*', help="SQL files or globs (default: every generated batch file)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--exclude-migration', action='append', default=[], metavar='NAME',
+                        help="leave a migration out of the schema replay")
+    parser.add_argument('--report', type=Path, default=REPORT_FILE)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Generated SQL Pre-flight Validation")
+    print("=" * 70)
+    print()
+
+    with PipelineRun("validate_generated_sql", args.profile, args.report_dir) as run:
+        files = discover_files(args.files or GENERATED_SQL)
+        # 検証対象そのものはスキーマに含めない (二重適用を避ける)
+        targets = {p.name for p in files if p.parent == (BASE_DIR / "migrations").resolve()}
+
+        with run.stage("build_schema") as stage:
+            migrations = migration_files(exclude=targets | set(args.exclude_migration))
+            conn, warnings = build_schema_database(migrations, superseded=SUPERSEDED_TABLES)
+            data = schema_bytes(conn)
+            conn.close()
+            stage.rows = len(migrations)
+        print(f"🗄️  Schema: {len(migrations)} migrations replayed ({len(data) / 1024:.0f} KB), "
+              f"{len(warnings)} statement(s) skipped as schema drift")
+
+        with run.stage("validate_files") as stage:
+            results = validate_files(files, data, min(args.jobs, max(1, len(files))))
+            stage.rows = sum(r['statements'] for r in results)
+
+    failed = [r for r in results if r['error_count']]
+    for r in failed:
+        print(f"\n❌ {r['file']}: {r['error_count']} error(s) in {r['statements']} statement(s)")
+        for e in r['errors']:
+            location = f"{r['file']}:{e['line']}" if e['line'] else r['file']
+            print(f"   {location}: {e['error']}")
+        if r['error_count'] > len(r['errors']):
+            print(f"   ... {r['error_count'] - len(r['errors'])} more")
+
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump({'schema_warnings': warnings, 'files': results}, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 {len(files) - len(failed)} of {len(files)} file(s) passed, "
+          f"{sum(r['statements'] for r in results):,} statements checked")
+    print(f"💾 Report written to: {args.report}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
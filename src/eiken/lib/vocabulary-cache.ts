@@ -13,6 +13,7 @@ import type { VocabularyEntry, VocabularyCache } from '../types/vocabulary';
 const CACHE_PREFIX = 'vocab:';
 const DEFAULT_TTL = 86400; // 24時間（秒）
 const MAX_CACHE_SIZE = 1000; // メモリキャッシュの最大サイズ
+const WARMUP_PREFIX = 'vocab_warmup:v1:'; // scripts/build_vocab_warmup.py のバンドル
 
 // ====================
 // インメモリキャッシュ（Workers実行中のみ有効）
@@ -20,6 +21,19 @@ const MAX_CACHE_SIZE = 1000; // メモリキャッシュの最大サイズ
 
 const memoryCache = new Map<string, VocabularyCache>();
 
+// このアイソレートで読み込み済みのウォームアップバンドル
+const warmedBundles = new Set<string>();
+
+/**
+ * ウォームアップバンドル（scripts/build_vocab_warmup.py が生成）
+ * entries の null は語彙に存在しない単語
+ */
+export interface VocabularyWarmupBundle {
+  version: number;
+  grade: string;
+  entries: Record<string, VocabularyEntry | null>;
+}
+
 /**
  * メモリキャッシュをクリーンアップ
  */
@@ -44,6 +58,58 @@ function cleanupMemoryCache(): void {
   }
 }
 
+// ====================
+// ウォームアップ
+// ====================
+
+/**
+ * メモリキャッシュに事前構築済みのエントリを投入
+ * 既存のエントリは上書きせず、MAX_CACHE_SIZE を超える分は捨てる
+ */
+export function seedMemoryCache(
+  entries: Record<string, VocabularyEntry | null>,
+  ttl: number = DEFAULT_TTL
+): number {
+  const timestamp = Date.now() / 1000;
+  let seeded = 0;
+  
+  for (const [word, entry] of Object.entries(entries)) {
+    if (memoryCache.size >= MAX_CACHE_SIZE) {
+      break;
+    }
+    if (memoryCache.has(word)) {
+      continue;
+    }
+    memoryCache.set(word, { word, entry, timestamp, ttl });
+    seeded++;
+  }
+  
+  return seeded;
+}
+
+/**
+ * KVのウォームアップバンドルを1回の読み込みでメモリキャッシュに展開
+ * アイソレートごとに1回だけ実行（grade 省略時は全級共通の 'all'）
+ */
+export async function warmMemoryCache(
+  kv: KVNamespace | undefined,
+  grade: string = 'all'
+): Promise<number> {
+  if (!kv || warmedBundles.has(grade)) {
+    return 0;
+  }
+  // 並行リクエストが同じバンドルを重複して読まないよう先に記録
+  warmedBundles.add(grade);
+  
+  try {
+    const bundle = await kv.get<VocabularyWarmupBundle>(`${WARMUP_PREFIX}${grade}`, 'json');
+    return bundle ? seedMemoryCache(bundle.entries) : 0;
+  } catch (error) {
+    console.warn('[VocabularyCache] Warmup bundle could not be loaded:', error);
+    return 0;
+  }
+}
+
 // ====================
 // KVキャッシュ関数
 // ====================
@@ -293,6 +359,9 @@ export async function lookupWordsWithCache(
   const normalized = words.map(w => w.toLowerCase());
   const unique = Array.from(new Set(normalized));
   
+  // 0. 初回のみウォームアップバンドル（級を問わない 'all'）を読み込む
+  await warmMemoryCache(kv);
+  
   // 1. キャッシュから取得
   const cached = await getCachedWords(unique, kv);
   
@@ -0,0 +1,145 @@
+/**
+ * 英検対策システム - JSON バッチペイロードローダーのテスト
+ */
+
+import { describe, it, expect } from 'vitest';
+import { BATCH_PAYLOAD_FORMAT, parseBatchPayload, loadBatchPayload } from '../batch-payload';
+
+const header = {
+  format: BATCH_PAYLOAD_FORMAT,
+  source: 'test',
+  statements: [
+    { sql: 'DELETE FROM words', params: 0 },
+    { sql: 'INSERT INTO words (word, level, score) VALUES (?, ?, ?)', params: 3 }
+  ]
+};
+
+function payload(...lines: object[]): string {
+  return [header, ...lines].map(line => JSON.stringify(line)).join('\n') + '\n';
+}
+
+interface FakeStatement {
+  sql: string;
+  values: unknown[] | null;
+  bind(...values: unknown[]): FakeStatement;
+}
+
+/** prepare / bind / batch の呼び出しを記録する D1 の代役 */
+function fakeDatabase() {
+  const prepared: string[] = [];
+  const batches: { sql: string; values: unknown[] | null }[][] = [];
+
+  const db = {
+    prepare(sql: string): FakeStatement {
+      prepared.push(sql);
+      const statement: FakeStatement = {
+        sql,
+        values: null,
+        bind(...values: unknown[]) {
+          return { ...statement, values };
+        }
+      };
+      return statement;
+    },
+    async batch(statements: FakeStatement[]) {
+      batches.push(statements.map(({ sql, values }) => ({ sql, values })));
+      return [];
+    }
+  };
+
+  return { db: db as unknown as D1Database, prepared, batches };
+}
+
+describe('Batch Payload', () => {
+  describe('parseBatchPayload', () => {
+    it('should parse the header and batch lines', () => {
+      const { header: parsed, lines } = parseBatchPayload(
+        payload({ s: 0, rows: [[]] }, { s: 1, rows: [['apple', 'A1', 12], ['march', 'A1', null]] })
+      );
+
+      expect(parsed.source).toBe('test');
+      expect(parsed.statements).toHaveLength(2);
+      expect(lines).toHaveLength(2);
+      expect(lines[1].rows[1]).toEqual(['march', 'A1', null]);
+    });
+
+    it('should ignore blank lines', () => {
+      const text = payload({ s: 1, rows: [['apple', 'A1', 12]] }).replace('\n', '\n\n  \n');
+      expect(parseBatchPayload(text).lines).toHaveLength(1);
+    });
+
+    it('should reject an empty payload', () => {
+      expect(() => parseBatchPayload('\n\n')).toThrow('Empty batch payload');
+    });
+
+    it('should reject an unknown format', () => {
+      const text = JSON.stringify({ ...header, format: 'kobeya-batch/0' });
+      expect(() => parseBatchPayload(text)).toThrow('Unsupported batch payload format: kobeya-batch/0');
+    });
+
+    it('should reject an unknown statement index', () => {
+      expect(() => parseBatchPayload(payload({ s: 2, rows: [[]] }))).toThrow('Unknown statement index 2');
+    });
+
+    it('should reject rows with the wrong number of values', () => {
+      expect(() => parseBatchPayload(payload({ s: 1, rows: [['apple', 'A1', 12], ['march', 'A1']] })))
+        .toThrow('Statement 1 expects 3 values, got 2');
+      expect(() => parseBatchPayload(payload({ s: 0, rows: [['x']] })))
+        .toThrow('Statement 0 expects 0 values, got 1');
+    });
+
+    it('should reject malformed JSON lines', () => {
+      expect(() => parseBatchPayload(payload() + '{"s": 1, "rows": [')).toThrow();
+    });
+  });
+
+  describe('loadBatchPayload', () => {
+    it('should prepare each statement once and bind every row', async () => {
+      const { db, prepared, batches } = fakeDatabase();
+      const result = await loadBatchPayload(db, payload(
+        { s: 1, rows: [['apple', 'A1', 12], ['banana', 'A2', 20]] },
+        { s: 1, rows: [['cherry', 'B1', 31]] }
+      ));
+
+      expect(prepared).toEqual(header.statements.map(statement => statement.sql));
+      expect(batches).toHaveLength(2);
+      expect(batches[0].map(statement => statement.values)).toEqual([['apple', 'A1', 12], ['banana', 'A2', 20]]);
+      expect(batches[1][0].values).toHaveLength(3);
+      expect(result).toEqual({ statements: 2, batches: 2, rows: 3 });
+    });
+
+    it('should send a DELETE in the same batch as the first insert line', async () => {
+      const { db, batches } = fakeDatabase();
+      const result = await loadBatchPayload(db, payload(
+        { s: 0, rows: [[]] },
+        { s: 1, rows: [['apple', 'A1', 12]] },
+        { s: 1, rows: [['banana', 'A2', 20]] }
+      ));
+
+      expect(batches).toHaveLength(2);
+      expect(batches[0]).toEqual([
+        { sql: 'DELETE FROM words', values: null },
+        { sql: header.statements[1].sql, values: ['apple', 'A1', 12] }
+      ]);
+      expect(batches[1]).toEqual([{ sql: header.statements[1].sql, values: ['banana', 'A2', 20] }]);
+      expect(result).toEqual({ statements: 2, batches: 2, rows: 3 });
+    });
+
+    it('should still send a trailing DELETE', async () => {
+      const { db, batches } = fakeDatabase();
+      const result = await loadBatchPayload(db, payload({ s: 1, rows: [['apple', 'A1', 12]] }, { s: 0, rows: [[]] }));
+
+      expect(batches).toHaveLength(2);
+      expect(batches[1]).toEqual([{ sql: 'DELETE FROM words', values: null }]);
+      expect(result.batches).toBe(2);
+    });
+
+    it('should not touch the database when validation fails', async () => {
+      const { db, prepared, batches } = fakeDatabase();
+      await expect(loadBatchPayload(db, payload({ s: 1, rows: [['apple']] }))).rejects.toThrow('expects 3 values');
+
+      expect(prepared).toHaveLength(0);
+      expect(batches).toHaveLength(0);
+    });
+  });
+});
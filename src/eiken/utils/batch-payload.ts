@@ -0,0 +1,89 @@
+/**
+ * 英検対策システム - JSON バッチペイロードのローダー
+ *
+ * scripts/batch_payloads.py が書き出す NDJSON（1 行目にステートメント定義、
+ * 以降 1 行 = パラメータタプルのバッチ）を D1 の prepared statement + batch() で流し込む。
+ * D1 の batch() 1 回がトランザクション 1 つなので、ペイロード全体は原子的ではない。
+ * SQL テキストのパースとエスケープ処理が不要になる。
+ */
+
+export const BATCH_PAYLOAD_FORMAT = 'kobeya-batch/1';
+
+export type BatchValue = string | number | null;
+
+export interface BatchPayloadHeader {
+  format: string;
+  source: string;
+  statements: { sql: string; params: number }[];
+}
+
+export interface BatchPayloadLine {
+  s: number;
+  rows: BatchValue[][];
+}
+
+export interface BatchPayloadResult {
+  statements: number;
+  batches: number;
+  rows: number;
+}
+
+/**
+ * NDJSON ペイロードを解析（ヘッダーとバッチ行）
+ */
+export function parseBatchPayload(text: string): { header: BatchPayloadHeader; lines: BatchPayloadLine[] } {
+  const [first, ...rest] = text.split('\n').filter(line => line.trim().length > 0);
+  if (!first) {
+    throw new Error('Empty batch payload');
+  }
+
+  const header = JSON.parse(first) as BatchPayloadHeader;
+  if (header.format !== BATCH_PAYLOAD_FORMAT) {
+    throw new Error(`Unsupported batch payload format: ${header.format}`);
+  }
+
+  const lines = rest.map(line => JSON.parse(line) as BatchPayloadLine);
+  for (const line of lines) {
+    const statement = header.statements[line.s];
+    if (!statement) {
+      throw new Error(`Unknown statement index ${line.s}`);
+    }
+    for (const row of line.rows) {
+      if (row.length !== statement.params) {
+        throw new Error(`Statement ${line.s} expects ${statement.params} values, got ${row.length}`);
+      }
+    }
+  }
+
+  return { header, lines };
+}
+
+/**
+ * ペイロードを D1 に投入する
+ * パラメータ付きの 1 行が 1 回の batch() 呼び出し（行内は原子的）。
+ * パラメータなしの行（DELETE など）は次の行と同じ batch() で送るので、
+ * 削除と最初の INSERT は一緒にコミットされる。ステートメントは 1 回だけ prepare する。
+ */
+export async function loadBatchPayload(db: D1Database, text: string): Promise<BatchPayloadResult> {
+  const { header, lines } = parseBatchPayload(text);
+  const prepared = header.statements.map(statement => db.prepare(statement.sql));
+  const result: BatchPayloadResult = { statements: prepared.length, batches: 0, rows: 0 };
+
+  let pending: D1PreparedStatement[] = [];
+  for (const line of lines) {
+    const statement = prepared[line.s];
+    pending.push(...line.rows.map(row => (row.length > 0 ? statement.bind(...row) : statement)));
+    result.rows += line.rows.length;
+    if (header.statements[line.s].params > 0) {
+      await db.batch(pending);
+      result.batches++;
+      pending = [];
+    }
+  }
+  if (pending.length > 0) {
+    await db.batch(pending);
+    result.batches++;
+  }
+
+  return result;
+}
@@ -0,0 +1,9 @@
+"""Make the data scripts importable the way they import each other (flat, from scripts/)."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for directory in (ROOT / "scripts", ROOT):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
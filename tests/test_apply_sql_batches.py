@@ -0,0 +1,186 @@
+"""
+apply_sql_batches: manifest barriers, and run_chunks against a local SQLite
+target with injected failures, --limit and journal resume.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from apply_sql_batches import (
+    FlakyTarget,
+    Journal,
+    SQLiteTarget,
+    build_manifest,
+    run_chunks,
+    waves,
+)
+
+SCHEMA = "CREATE TABLE words (id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE, level TEXT);\n"
+
+
+def write_chunks(directory, chunks):
+    paths = []
+    for name, sql in chunks:
+        path = directory / f"{name}.sql"
+        path.write_text(sql, encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def insert_chunk(start, count, level='A1'):
+    values = ", ".join(f"('w{i:03d}', '{level}')" for i in range(start, start + count))
+    return f"-- words {start}..{start + count - 1}\nBEGIN TRANSACTION;\nINSERT INTO words (word, level) VALUES {values};\nCOMMIT;\n"
+
+
+@pytest.fixture
+def chunk_dir(tmp_path):
+    directory = tmp_path / "chunks"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def manifest(chunk_dir):
+    paths = write_chunks(chunk_dir, [('part_00', SCHEMA)] +
+                         [(f"part_{i:02d}", insert_chunk(i * 10, 10)) for i in range(1, 6)])
+    return build_manifest(paths)
+
+
+def word_count(db):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def statuses(results):
+    return {r['chunk']: r['status'] for r in results}
+
+
+@pytest.mark.parametrize('sql, barrier', [
+    (SCHEMA, True),
+    ("INSERT INTO words (word) VALUES ('a');", False),
+    ("INSERT OR IGNORE INTO words (word) VALUES ('a');", False),
+    ("INSERT INTO words (word) VALUES ('a') ON CONFLICT(word) DO NOTHING;", False),
+    ("INSERT OR REPLACE INTO words (word) VALUES ('a');", True),
+    ("REPLACE INTO words (word) VALUES ('a');", True),
+    ("INSERT INTO words (word, level) VALUES ('a', 'B1') ON CONFLICT(word) DO UPDATE SET level = excluded.level;", True),
+    ("UPDATE words SET level = 'A2';", True),
+    ("DELETE FROM words;", True),
+])
+def test_barrier_classification(chunk_dir, sql, barrier):
+    manifest = build_manifest(write_chunks(chunk_dir, [('chunk', sql)]))
+    assert manifest['chunks'][0]['barrier'] is barrier
+
+
+def test_manifest_orders_inserts_between_barriers(chunk_dir):
+    paths = write_chunks(chunk_dir, [
+        ('a', SCHEMA),
+        ('b', insert_chunk(0, 2)),
+        ('c', insert_chunk(2, 2)),
+        ('d', "INSERT OR REPLACE INTO words (word, level) VALUES ('w000', 'B2');"),
+        ('e', insert_chunk(4, 2)),
+    ])
+    manifest = build_manifest(paths)
+    after = {c['id']: c['after'] for c in manifest['chunks']}
+
+    assert after == {'a': [], 'b': ['a'], 'c': ['a'], 'd': ['a', 'b', 'c'], 'e': ['d']}
+    assert waves(manifest) == [['a'], ['b', 'c'], ['d'], ['e']]
+    assert [c['statements'] for c in manifest['chunks']] == [1, 1, 1, 1, 1]
+
+
+def test_applies_every_chunk(manifest, tmp_path):
+    db = tmp_path / "words.sqlite"
+    journal = Journal(tmp_path / "journal.jsonl")
+    results = run_chunks(manifest, SQLiteTarget(db), journal, jobs=4, backoff=0)
+
+    assert [r['chunk'] for r in results] == [c['id'] for c in manifest['chunks']]
+    assert set(statuses(results).values()) == {'applied'}
+    assert word_count(db) == 50
+    assert journal.applied() == {c['id']: c['sha256'] for c in manifest['chunks']}
+
+
+def test_retries_injected_failures(manifest, tmp_path):
+    db = tmp_path / "words.sqlite"
+    target = FlakyTarget(SQLiteTarget(db), fail_first=2)
+    results = run_chunks(manifest, target, Journal(tmp_path / "journal.jsonl"), jobs=3, retries=2, backoff=0)
+
+    assert set(statuses(results).values()) == {'applied'}
+    assert all(r['attempts'] == 3 for r in results)
+    assert word_count(db) == 50
+
+
+def test_exhausted_retries_stop_scheduling(manifest, tmp_path):
+    db = tmp_path / "words.sqlite"
+    target = FlakyTarget(SQLiteTarget(db), fail_first=3)
+    results = run_chunks(manifest, target, Journal(tmp_path / "journal.jsonl"), jobs=2, retries=1, backoff=0)
+
+    # スキーマのチャンクが失敗すると、後続のチャンクは一つも始まらない
+    assert results[0]['status'] == 'failed'
+    assert results[0]['attempts'] == 2
+    assert results[0]['error'] == "injected failure: 503 service unavailable"
+    assert set(statuses(results[1:]).values()) == {'pending'}
+
+
+def test_permanent_error_is_not_retried_and_rolls_back(chunk_dir, tmp_path):
+    paths = write_chunks(chunk_dir, [
+        ('part_00', SCHEMA),
+        ('part_01', insert_chunk(0, 3) + "INSERT INTO missing_table VALUES (1);\n"),
+    ])
+    db = tmp_path / "words.sqlite"
+    results = run_chunks(build_manifest(paths), SQLiteTarget(db), Journal(tmp_path / "journal.jsonl"), backoff=0)
+
+    assert statuses(results) == {'part_00': 'applied', 'part_01': 'failed'}
+    assert results[1]['attempts'] == 1
+    assert "no such table: missing_table" in results[1]['error']
+    assert word_count(db) == 0
+
+
+def test_limit_then_resume_from_journal(manifest, tmp_path):
+    db = tmp_path / "words.sqlite"
+    journal_path = tmp_path / "journal.jsonl"
+
+    first = run_chunks(manifest, SQLiteTarget(db), Journal(journal_path), jobs=1, limit=3, backoff=0)
+    assert [r['status'] for r in first] == ['applied'] * 3 + ['pending'] * 3
+    assert word_count(db) == 20
+
+    second = run_chunks(manifest, SQLiteTarget(db), Journal(journal_path), jobs=2, backoff=0)
+    assert [r['status'] for r in second] == ['skipped'] * 3 + ['applied'] * 3
+    assert word_count(db) == 50
+
+
+def test_changed_chunk_is_reapplied(chunk_dir, tmp_path):
+    paths = write_chunks(chunk_dir, [('part_00', SCHEMA), ('part_01', insert_chunk(0, 5)),
+                                     ('part_02', insert_chunk(5, 5))])
+    db = tmp_path / "words.sqlite"
+    journal_path = tmp_path / "journal.jsonl"
+    run_chunks(build_manifest(paths), SQLiteTarget(db), Journal(journal_path), backoff=0)
+
+    paths[2].write_text(insert_chunk(10, 5), encoding='utf-8')
+    results = run_chunks(build_manifest(paths), SQLiteTarget(db), Journal(journal_path), backoff=0)
+
+    assert statuses(results) == {'part_00': 'skipped', 'part_01': 'skipped', 'part_02': 'applied'}
+    assert word_count(db) == 15
+
+
+def test_reset_ignores_the_journal(manifest, tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    run_chunks(manifest, SQLiteTarget(tmp_path / "first.sqlite"), Journal(journal_path), backoff=0)
+
+    db = tmp_path / "second.sqlite"
+    results = run_chunks(manifest, SQLiteTarget(db), Journal(journal_path, reset=True), backoff=0)
+
+    assert set(statuses(results).values()) == {'applied'}
+    assert word_count(db) == 50
+
+
+def test_journal_ignores_truncated_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text(json.dumps({'chunk': 'a', 'sha256': 'x', 'status': 'applied'}) + "\n"
+                    + json.dumps({'chunk': 'b', 'sha256': 'y', 'status': 'failed'}) + "\n"
+                    + '{"chunk": "c", "sha2', encoding='utf-8')
+
+    assert Journal(path).applied() == {'a': 'x'}
@@ -0,0 +1,149 @@
+"""
+build_mwe_automaton: compile_automaton + MultiwordMatcher against the
+brute-force n-gram lookup, and the kobeya-aho/1 artifact round-trip.
+"""
+
+import json
+import random
+
+import pytest
+
+from build_mwe_automaton import (
+    FORMAT,
+    NO_STATE,
+    MultiwordMatcher,
+    compile_automaton,
+    lemmatize_phrase,
+    multiword_patterns,
+    naive_matches,
+    write_automaton,
+)
+from eiken_lexicon import load_lexicon
+
+LEXICON_CSV = """word,pos,cefr_level
+take,verb,A1
+care,noun,A2
+of,preposition,A1
+take care of,phrase,A2
+care of,preposition,B1
+look,verb,A1
+after,preposition,A1
+look after,verb,A2
+a.m./A.M./am,adverb,A1
+"""
+
+
+def entries(patterns):
+    return {lemmas: [{'word': " ".join(lemmas), 'pos': None, 'cefr_level': 'A1'}] for lemmas in patterns}
+
+
+def matcher_for(patterns, tmp_path):
+    """Compile, write and reload, as main() does."""
+    path = tmp_path / "mwe_automaton.json"
+    write_automaton(path, compile_automaton(list(patterns)), entries(patterns))
+    return MultiwordMatcher.load(path)
+
+
+def test_overlapping_patterns(tmp_path):
+    patterns = [('take', 'care'), ('take', 'care', 'of'), ('care', 'of')]
+    matcher = matcher_for(patterns, tmp_path)
+
+    # 終了位置順、同じ終了位置では長いものが先
+    assert matcher.scan(['we', 'take', 'care', 'of', 'it']) == [(1, 3, 0), (1, 4, 1), (2, 4, 2)]
+
+
+def test_dict_link_chain_reports_every_suffix(tmp_path):
+    patterns = [('w', 'x', 'y', 'z'), ('x', 'y', 'z'), ('y', 'z'), ('x', 'y')]
+    automaton = compile_automaton(patterns)
+    matcher = matcher_for(patterns, tmp_path)
+
+    # 'w x y z' の終端から dict_link で 'x y z' → 'y z' と辿る
+    chain, state = [], matcher._step(0, matcher.symbol_ids['w'])
+    for lemma in 'xyz':
+        state = matcher._step(state, matcher.symbol_ids[lemma])
+    while state != NO_STATE:
+        chain.append(int(automaton['output'][state]))
+        state = int(automaton['dict_link'][state])
+    assert chain == [0, 1, 2]
+
+    assert matcher.scan(list('wxyz')) == [(1, 3, 3), (0, 4, 0), (1, 4, 1), (2, 4, 2)]
+
+
+def test_dict_link_skips_states_without_output(tmp_path):
+    # 'a b c d' の fail は出力の無い 'b c d'、dict_link はその先の 'c d'
+    patterns = [('a', 'b', 'c', 'd'), ('b', 'c', 'd', 'e'), ('c', 'd')]
+    matcher = matcher_for(patterns, tmp_path)
+
+    assert matcher.scan(list('abcde')) == [(0, 4, 0), (2, 4, 2), (1, 5, 1)]
+
+
+def test_restarts_on_unknown_lemma(tmp_path):
+    matcher = matcher_for([('look', 'after')], tmp_path)
+
+    assert matcher.scan(['look', 'really', 'after']) == []
+    assert matcher.scan(['look', 'look', 'after']) == [(1, 3, 0)]
+
+
+def test_matches_brute_force_on_random_text(tmp_path):
+    rng = random.Random(7)
+    alphabet = list('abcd')
+    patterns = sorted({tuple(rng.choice(alphabet) for _ in range(rng.randint(2, 5))) for _ in range(40)})
+    matcher = matcher_for(patterns, tmp_path)
+    pattern_ids = {lemmas: i for i, lemmas in enumerate(patterns)}
+
+    for _ in range(50):
+        lemmas = [rng.choice(alphabet + ['z']) for _ in range(rng.randint(0, 60))]
+        assert sorted(matcher.scan(lemmas)) == sorted(naive_matches(lemmas, pattern_ids))
+
+
+@pytest.fixture
+def lexicon_csv(tmp_path):
+    path = tmp_path / "lexicon.csv"
+    path.write_text(LEXICON_CSV, encoding='utf-8')
+    return path
+
+
+def test_inflected_phrase_matches_headword(lexicon_csv, tmp_path):
+    lexicon = load_lexicon(lexicon_csv)
+    patterns = multiword_patterns(lexicon_csv, lexicon)
+
+    assert list(patterns) == [('a', 'm'), ('care', 'of'), ('look', 'after'), ('take', 'care', 'of')]
+    matcher = matcher_for(patterns, tmp_path)
+
+    lemmas = lemmatize_phrase("She took care of the dog and looked after it.", lexicon)
+    found = {(start, end): matcher.patterns[pattern_id]['lemmas'] for start, end, pattern_id in matcher.scan(lemmas)}
+    assert found == {(1, 4): ['take', 'care', 'of'], (2, 4): ['care', 'of'], (7, 9): ['look', 'after']}
+
+
+def test_variants_of_one_headword(lexicon_csv):
+    lexicon = load_lexicon(lexicon_csv)
+    patterns = multiword_patterns(lexicon_csv, lexicon)
+
+    # 'a.m.' と 'A.M.' は同じ ('a', 'm') に、1 トークンの 'am' はパターンにならない
+    assert [entry['word'] for entry in patterns[('a', 'm')]] == ['a.m.', 'A.M.']
+    assert ('am',) not in patterns
+    assert patterns[('take', 'care', 'of')] == [{'word': 'take care of', 'pos': 'phrase', 'cefr_level': 'A2'}]
+
+
+def test_artifact_round_trip(lexicon_csv, tmp_path):
+    lexicon = load_lexicon(lexicon_csv)
+    patterns = multiword_patterns(lexicon_csv, lexicon)
+    automaton = compile_automaton(list(patterns))
+    path = tmp_path / "out" / "mwe_automaton.json"
+    write_automaton(path, automaton, patterns)
+
+    artifact = json.loads(path.read_text(encoding='utf-8'))
+    assert artifact['format'] == FORMAT
+    assert artifact['states'] == len(automaton['fail'])
+    assert [tuple(p['lemmas']) for p in artifact['patterns']] == list(patterns)
+
+    matcher = MultiwordMatcher.load(path)
+    assert matcher.symbol_ids == {lemma: i for i, lemma in enumerate(automaton['symbols'])}
+    for name in ('edge_start', 'edge_symbol', 'edge_target', 'fail', 'output', 'dict_link'):
+        assert getattr(matcher, name) == automaton[name].tolist()
+    assert matcher.patterns[3]['entries'] == patterns[('take', 'care', 'of')]
+
+
+def test_rejects_other_formats():
+    with pytest.raises(ValueError, match=FORMAT):
+        MultiwordMatcher({'format': 'kobeya-aho/0'})
@@ -0,0 +1,52 @@
+"""
+build_topic_catalog.build_catalog: topic_label_ja for corpus and fill rows.
+"""
+
+import pytest
+
+from build_topic_catalog import TOPIC_LABELS, build_catalog
+
+
+def topic(grade, code, label_ja, label_en, context='daily', abstractness=1):
+    return {'grade': grade, 'topic_code': code, 'topic_label_ja': label_ja, 'topic_label_en': label_en,
+            'abstractness_level': abstractness, 'context_type': context,
+            'scenario_description': f"{label_en} scenarios", 'sub_topics': [], 'argument_axes': ['opinion'],
+            'weight': 1.0, 'official_frequency': 1.0, 'is_active': 1}
+
+
+CATALOG = [
+    topic('5', 'school', '学校', 'School'),
+    topic('2', 'society', '社会', 'Society', context='social', abstractness=5),
+]
+
+
+def corpus(*questions):
+    return [{'grade': grade, 'questions': [{'topic': label, 'question_type': 'essay',
+                                            'question_text_en': "People worry that machines will replace jobs."}]}
+            for grade, label in questions]
+
+
+def test_corpus_topic_uses_label_table():
+    rows = build_catalog(corpus(('2', 'AI / science')), CATALOG, min_topics=0)
+
+    row = next(r for r in rows if r['topic_code'] == 'ai_science')
+    assert (row['topic_label_ja'], row['topic_label_en']) == TOPIC_LABELS['ai_science']
+    assert row['scenario_description'].startswith("AI and Science topics")
+
+
+def test_unlabeled_corpus_topic_is_refused():
+    with pytest.raises(ValueError, match=r"2:space_travel \('space travel'\)"):
+        build_catalog(corpus(('2', 'space travel')), CATALOG, min_topics=0)
+
+
+def test_fill_row_keeps_topic_content_and_takes_grade_columns():
+    rows = build_catalog(corpus(('pre1', 'AI / science')), CATALOG, min_topics=3)
+
+    fill = next(r for r in rows if r['grade'] == '5' and r['topic_code'] == 'ai_science')
+    assert fill['source'] == 'fill'
+    assert fill['topic_label_ja'] == 'AI・科学'
+    # 内容は元の級の行から、抽象度と context_type は埋める級のもの
+    assert fill['argument_axes'] == ['pros_cons']
+    assert fill['abstractness_level'] == 1
+    assert fill['context_type'] == 'daily'
+    assert fill['reasoning'].startswith("Filled from grade pre1")
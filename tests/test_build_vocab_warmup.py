@@ -0,0 +1,37 @@
+"""
+build_vocab_warmup.lexicon_entries picks the row lookupWordWithCache returns.
+"""
+
+import sqlite3
+
+from build_vocab_warmup import lexicon_entries
+
+LEXICON_SQL = """
+CREATE TABLE eiken_vocabulary_lexicon (
+  word_lemma TEXT NOT NULL, pos TEXT NOT NULL, cefr_level TEXT NOT NULL, zipf_score REAL,
+  sources TEXT NOT NULL, PRIMARY KEY (word_lemma, pos)
+);
+INSERT INTO eiken_vocabulary_lexicon VALUES
+  ('run', 'verb', 'A1', 5.95, '["CEFR-J"]'),
+  ('run', 'noun', 'A2', 5.95, '["CEFR-J"]'),
+  ('march', 'verb', 'B1', NULL, '["CEFR-J"]'),
+  ('march', 'noun', 'B1', NULL, '["CEFR-J"]'),
+  ('access', 'verb', 'B2', 4.1, '["CEFR-J"]'),
+  ('access', 'noun', 'B1', 4.1, '["NGSL v1.2"]');
+"""
+
+
+def test_lowest_level_row_per_word(tmp_path):
+    db = tmp_path / "lexicon.sqlite"
+    conn = sqlite3.connect(db)
+    conn.executescript(LEXICON_SQL)
+    conn.close()
+
+    entries = lexicon_entries(db)
+
+    assert set(entries) == {'run', 'march', 'access'}
+    assert entries['run'] == {'word_lemma': 'run', 'pos': 'verb', 'cefr_level': 'A1', 'zipf_score': 5.95,
+                              'sources': '["CEFR-J"]'}
+    assert entries['access']['pos'] == 'noun'
+    # 同じレベルなら D1 が返す順（主キーの pos 順）で先の行
+    assert entries['march']['pos'] == 'noun'
@@ -0,0 +1,98 @@
+"""
+Parity of difficulty_scoring with src/eiken/services/difficulty-calculator.ts.
+
+The expected components were produced by calculateDifficultyScore /
+calculateBatchDifficultyScores themselves for the inputs below; a change
+on either side has to update this table.
+"""
+
+import pytest
+
+from difficulty_scoring import (
+    EXAMPLE_CALCULATIONS,
+    calculate_batch_difficulty_scores,
+    calculate_difficulty_components,
+    calculate_difficulty_score,
+    js_round,
+    verify_calculations,
+)
+
+
+def word(name, cefr_level, cefr_numeric, zipf_score, ngsl=False, nawl=False, **extra):
+    return {'word': name, 'cefr_level': cefr_level, 'cefr_numeric': cefr_numeric,
+            'zipf_score': zipf_score, 'source_ngsl': ngsl, 'source_nawl': nawl, **extra}
+
+
+# (input, cefr_weight, zipf_penalty, ngsl_weight, japanese_learnability, length_bonus, final_score, should_annotate)
+TS_OUTPUTS = [
+    (word('the', 'A1', 1, 7.9, ngsl=True), 5.8, 0, 0, 0, 0, 6, False),
+    (word('essential', 'B1', 3, 4.8, nawl=True), 17.5, 1.2, 10, 3, 0, 32, False),
+    (word('accompany', 'B2', 4, 3.2), 23.3, 10.8, 20, 6, 0, 60, True),
+    (word('comprehend', 'C1', 5, 2.8), 29.2, 13.2, 20, 8, 5, 75, True),
+    # zipf_score が無い語は 15 点
+    (word('photosynthesis', 'C2', 6, None), 35, 15, 20, 10, 5, 85, True),
+    (word('moreover', 'B1', 3, 5, ngsl=True), 17.5, 0, 0, 3, 0, 21, False),
+    # 18.5 → 19（Math.round は 0.5 を切り上げ、偶数丸めではない）
+    (word('rewind', 'A2', 3, 6.1, ngsl=True), 17.5, 0, 0, 1, 0, 19, False),
+    (word('kimono', '', 0, 4.75, nawl=True), 0, 1.5, 10, 0, 0, 12, False),
+    (word('threshold', 'B2', 4, 3.95, nawl=True), 23.3, 6.3, 10, 6, 0, 46, False),
+    # 102.8 → 100 に丸め込み
+    (word('xylophonist', 'C2', 7, 0.5), 40.8, 27, 20, 10, 5, 100, True),
+]
+
+
+@pytest.mark.parametrize('vocab, cefr_weight, zipf_penalty, ngsl_weight, learnability, length_bonus, '
+                         'final_score, should_annotate', TS_OUTPUTS, ids=[case[0]['word'] for case in TS_OUTPUTS])
+def test_single_word_matches_typescript(vocab, cefr_weight, zipf_penalty, ngsl_weight, learnability,
+                                        length_bonus, final_score, should_annotate):
+    assert calculate_difficulty_score(vocab) == {
+        'cefr_weight': cefr_weight,
+        'zipf_penalty': zipf_penalty,
+        'ngsl_weight': ngsl_weight,
+        'japanese_learnability': learnability,
+        'length_bonus': length_bonus,
+        'final_score': final_score,
+        'should_annotate': should_annotate,
+    }
+
+
+def test_batch_matches_single_word_scores():
+    components = calculate_difficulty_components([case[0] for case in TS_OUTPUTS])
+    assert components['final_score'].tolist() == [case[6] for case in TS_OUTPUTS]
+    assert components['should_annotate'].tolist() == [case[7] for case in TS_OUTPUTS]
+
+
+def test_missing_zipf_key_is_treated_like_null():
+    vocab = word('apple', 'A1', 1, None, ngsl=True)
+    del vocab['zipf_score']
+    assert calculate_difficulty_score(vocab)['zipf_penalty'] == 15
+    assert calculate_difficulty_score(vocab)['final_score'] == 21
+
+
+def test_batch_keys_follow_typescript_map():
+    rows = [
+        word('run', 'A1', 1, 6, ngsl=True, pos='verb'),
+        word('run', 'B1', 3, 6, ngsl=True, pos='noun'),
+        word('run', 'A2', 2, 6, ngsl=True),
+        word('run', 'B2', 4, 6, ngsl=True, pos='verb'),
+    ]
+    scores = calculate_batch_difficulty_scores(rows)
+    # Map.set と同じく同じキーは後勝ち、挿入順は最初の出現位置
+    assert list(scores) == ['run:verb', 'run:noun', 'run']
+    assert scores['run:verb']['final_score'] == 29
+    assert scores['run:verb']['cefr_weight'] == 23.3
+    assert scores['run:noun']['final_score'] == 21
+    assert scores['run']['final_score'] == 13
+    assert scores['run']['cefr_weight'] == 11.7
+
+
+def test_js_round_rounds_half_up():
+    import numpy as np
+
+    assert js_round(np.array([0.5, 1.5, 2.5, -0.5, -1.5])).tolist() == [1.0, 2.0, 3.0, -0.0, -1.0]
+    assert js_round(np.array([5.8333333, 1.25]), 1).tolist() == [5.8, 1.3]
+
+
+def test_example_calculations_verify():
+    assert verify_calculations(verbose=False)
+    assert set(EXAMPLE_CALCULATIONS) == {'the', 'essential', 'accompany', 'comprehend'}
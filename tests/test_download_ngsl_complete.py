@@ -0,0 +1,70 @@
+"""
+download-ngsl-complete.py writes the same CSV as the dict / csv.DictWriter
+version it replaced.
+"""
+
+import csv
+import importlib.util
+import re
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "download-ngsl-complete.py"
+spec = importlib.util.spec_from_file_location('download_ngsl_complete', SCRIPT)
+download_ngsl_complete = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(download_ngsl_complete)
+
+FIELDS = ['word', 'rank', 'frequency', 'cefr_level', 'related_forms', 'sfi']
+
+# ページの各 <tr> のセル（get_text(strip=True) 済み）
+ROWS = [
+    ['1', 'The', 'the', '87.85'],
+    ['2', 'be', 'am, are, been, being, is, was, were', '86.86'],
+    ['640', 'Limit', 'limited, limiting, limits', '50'],
+    ['1301', 'quote', '"quoted", quotes', '50.10'],
+    ['2200', 'alien', '', ''],
+    ['2700', 'Blah', 'blahs', 'n/a'],
+    ['2801', 'zinc'],                       # セル不足: 読み飛ばす
+    ['#x', 'bad', '', '10.0'],              # 順位が数字を含まない: エラーで読み飛ばす
+    ['', 'unranked', '', '12.3'],
+]
+
+
+def legacy_csv(rows, path):
+    """The writer before LexiconTable: one dict per row, SFI kept as scraped."""
+    words_data = []
+    for cols in rows:
+        if len(cols) >= 4:
+            try:
+                rank, headword, related_forms, sfi = cols[0], cols[1].lower(), cols[2], cols[3]
+                rank_num = int(re.sub(r'[^\d]', '', rank)) if rank else 0
+                cefr = ('A1' if rank_num <= 600 else 'A2' if rank_num <= 1300 else 'B1' if rank_num <= 2100
+                        else 'B2' if rank_num <= 2600 else 'C1')
+                try:
+                    frequency = int(10 ** (float(sfi) / 10))
+                except ValueError:
+                    frequency = 0
+                words_data.append({'word': headword, 'rank': rank_num, 'frequency': frequency,
+                                   'cefr_level': cefr, 'related_forms': related_forms, 'sfi': sfi})
+            except Exception:
+                continue
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(words_data)
+
+
+def test_csv_matches_legacy_writer(tmp_path):
+    words_data, sfi_text = download_ngsl_complete.parse_ngsl_rows(ROWS)
+    assert download_ngsl_complete.save_to_csv(words_data, sfi_text, tmp_path / "new.csv")
+    legacy_csv(ROWS, tmp_path / "old.csv")
+
+    assert (tmp_path / "new.csv").read_bytes() == (tmp_path / "old.csv").read_bytes()
+
+
+def test_sfi_keeps_source_spelling_and_parsed_value(tmp_path):
+    words_data, sfi_text = download_ngsl_complete.parse_ngsl_rows(ROWS)
+
+    assert len(words_data) == len(sfi_text) == 7
+    assert sfi_text[2:6] == ['50', '50.10', '', 'n/a']
+    limit = words_data[2]
+    assert (limit.word, limit.sfi, limit.frequency, limit.cefr_level) == ('limit', 50.0, 100000, 'A2')
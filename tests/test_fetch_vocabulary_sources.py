@@ -0,0 +1,141 @@
+"""
+fetch_vocabulary_sources against the local stand-in server (serve_fixtures).
+"""
+
+import asyncio
+import hashlib
+import time
+
+import pytest
+
+import fetch_vocabulary_sources as fetcher
+from fetch_vocabulary_sources import fetch_all, serve_fixtures
+
+FILES = {
+    'alpha.csv': b"word,level\napple,A1\n",
+    'beta.csv': b"word,level\nbanana,A2\n",
+    'gamma.csv': b"word,level\ncherry,B1\n",
+    'delta.csv': b"word,level\ndate,B2\n",
+}
+
+
+@pytest.fixture
+def fixtures_dir(tmp_path):
+    directory = tmp_path / "served"
+    directory.mkdir()
+    for name, body in FILES.items():
+        (directory / name).write_bytes(body)
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(fetcher, 'BACKOFF_SECONDS', 0.01)
+
+
+def source(file, sha256=None, timeout=5):
+    return {'name': file.split('.')[0], 'file': file, 'url': None,
+            'sha256': sha256 if sha256 is not None else hashlib.sha256(FILES[file]).hexdigest(),
+            'timeout': timeout}
+
+
+def fetch(sources, output_dir, base_url, **kwargs):
+    return asyncio.run(fetch_all(sources, output_dir, base_url, **kwargs))
+
+
+def test_fetches_every_source_and_reuses_connections(fixtures_dir, tmp_path):
+    output = tmp_path / "out"
+    with serve_fixtures(fixtures_dir) as base_url:
+        results, pool = fetch([source(f) for f in FILES], output, base_url, max_per_host=2)
+
+    assert [r['status'] for r in results] == ['ok'] * len(FILES)
+    assert all(r['attempts'] == 1 for r in results)
+    for name, body in FILES.items():
+        assert (output / name).read_bytes() == body
+    assert pool['opened'] <= 2
+    assert pool['opened'] + pool['reused'] == len(FILES)
+
+
+def test_retries_transient_failures(fixtures_dir, tmp_path):
+    with serve_fixtures(fixtures_dir, fail_first=2) as base_url:
+        results, _ = fetch([source('alpha.csv')], tmp_path / "out", base_url, retries=3)
+
+    assert results[0]['status'] == 'ok'
+    assert results[0]['attempts'] == 3
+
+
+def test_gives_up_after_retries(fixtures_dir, tmp_path):
+    output = tmp_path / "out"
+    with serve_fixtures(fixtures_dir, fail_first=5) as base_url:
+        results, _ = fetch([source('alpha.csv')], output, base_url, retries=2)
+
+    assert results[0]['status'] == 'failed'
+    assert results[0]['attempts'] == 3
+    assert results[0]['error'] == "HTTP 503"
+    assert not (output / 'alpha.csv').exists()
+
+
+def test_checksum_mismatch_is_rejected_without_retry(fixtures_dir, tmp_path):
+    output = tmp_path / "out"
+    output.mkdir()
+    (output / 'alpha.csv').write_bytes(b"previous copy\n")
+
+    with serve_fixtures(fixtures_dir) as base_url:
+        results, _ = fetch([source('alpha.csv', sha256="0" * 64)], output, base_url)
+
+    assert results[0]['status'] == 'failed'
+    assert results[0]['attempts'] == 1
+    assert results[0]['error'].startswith("sha256 mismatch")
+    # 検証に失敗した内容では既存のファイルを置き換えない
+    assert (output / 'alpha.csv').read_bytes() == b"previous copy\n"
+    assert list(output.iterdir()) == [output / 'alpha.csv']
+
+
+def test_checksum_is_not_checked_when_verify_is_off(fixtures_dir, tmp_path):
+    with serve_fixtures(fixtures_dir) as base_url:
+        results, _ = fetch([source('alpha.csv', sha256="0" * 64)], tmp_path / "out", base_url, verify=False)
+
+    assert results[0]['status'] == 'ok'
+    assert results[0]['sha256'] == hashlib.sha256(FILES['alpha.csv']).hexdigest()
+
+
+def test_replaces_existing_file_atomically(fixtures_dir, tmp_path):
+    output = tmp_path / "out"
+    output.mkdir()
+    (output / 'beta.csv').write_bytes(b"stale\n")
+
+    with serve_fixtures(fixtures_dir) as base_url:
+        results, _ = fetch([source('beta.csv')], output, base_url)
+
+    assert results[0]['status'] == 'ok'
+    assert (output / 'beta.csv').read_bytes() == FILES['beta.csv']
+    assert not (output / 'beta.csv.part').exists()
+
+
+def test_timeout_is_per_source(fixtures_dir, tmp_path):
+    with serve_fixtures(fixtures_dir, latency=0.5) as base_url:
+        results, _ = fetch([source('alpha.csv', timeout=0.1)], tmp_path / "out", base_url, retries=0)
+
+    assert results[0]['status'] == 'failed'
+    assert results[0]['error'] == "timeout after 0.1s"
+
+
+def test_source_without_url_is_skipped(tmp_path):
+    results, pool = fetch([source('alpha.csv')], tmp_path / "out", None)
+
+    assert results[0]['status'] == 'skipped'
+    assert pool == {'opened': 0, 'reused': 0}
+
+
+def test_wall_time_is_close_to_slowest_source(fixtures_dir, tmp_path):
+    latency = 0.3
+    with serve_fixtures(fixtures_dir, latency=latency) as base_url:
+        start = time.perf_counter()
+        results, _ = fetch([source(f) for f in FILES], tmp_path / "out", base_url, max_per_host=len(FILES))
+        wall = time.perf_counter() - start
+
+    assert [r['status'] for r in results] == ['ok'] * len(FILES)
+    slowest = max(r['seconds'] for r in results)
+    assert slowest >= latency
+    # 直列なら latency * 4 = 1.2 秒かかる
+    assert wall < slowest + latency
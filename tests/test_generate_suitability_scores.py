@@ -0,0 +1,58 @@
+"""
+generate_suitability_scores and generate_mock_data.load_topics over the
+bitmap facet index instead of a corpus scan.
+"""
+
+import pytest
+
+from build_facet_index import FacetIndex
+from generate_mock_data import load_topics
+from generate_suitability_scores import calculate_suitability_scores
+
+
+def questions(grade, *items):
+    return {'grade': grade, 'questions': [{'question_number': i, 'topic': topic, 'question_type': q_type}
+                                          for i, (topic, q_type) in enumerate(items, start=1)]}
+
+
+CORPUS = [
+    questions('5', ('school', 'grammar_fill'), ('school', 'grammar_fill'), ('self-introduction', 'conversation')),
+    questions('pre1', *[('AI / science', 'opinion_essay')] * 5, ('AI / science', 'summary'),
+              ('climate change', 'summary'), ('Climate Change', 'summary'), ('climate change', 'summary')),
+]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / "facet_index.json"
+    FacetIndex.build(CORPUS).save(path)
+    return path
+
+
+def test_scores_per_grade_topic_and_type(index_path):
+    records = calculate_suitability_scores(FacetIndex.load(index_path))
+
+    assert [(r['grade'], r['topic_code'], r['question_type'], r['sample_count'], r['suitability_score'])
+            for r in records] == [
+        ('5', 'school', 'grammar_fill', 2, 1.0),
+        ('5', 'self_introduction', 'conversation', 1, 0.9),
+        ('pre1', 'ai_science', 'opinion_essay', 5, 1.3),
+        ('pre1', 'ai_science', 'summary', 1, 0.9),
+        # 表記揺れは同じ topic_code にまとまる
+        ('pre1', 'climate_change', 'summary', 3, 1.2),
+    ]
+    assert records[2]['topic_label'] == 'AI / science'
+    assert records[4]['topic_label'] == 'climate change'
+    assert records[0]['reasoning'] == "Based on 2 actual exam question(s) in grade 5"
+
+
+def test_topic_labels_survive_save_and_load(index_path):
+    index = FacetIndex.load(index_path)
+
+    assert index.topic_labels == {'school': 'school', 'self_introduction': 'self-introduction',
+                                  'ai_science': 'AI / science', 'climate_change': 'climate change'}
+    assert index.topic_label('unknown_code') == 'unknown_code'
+
+
+def test_mock_data_topics_come_from_the_index(index_path):
+    assert load_topics(index_path) == ['ai_science', 'climate_change', 'school', 'self_introduction']
@@ -0,0 +1,54 @@
+"""
+lexicon_records.dedupe on the (word, pos) key and on the word alone.
+"""
+
+from lexicon_records import LexiconTable, dedupe
+
+
+def table(*rows):
+    result = LexiconTable()
+    for word, pos, level, sources in rows:
+        result.add(word, pos=pos, cefr_level=level, eiken_grade=f"grade_{level}", sources=sources)
+    return result
+
+
+ROWS = (
+    ('access', 'verb', 'B2', ('CEFR-J',)),
+    ('access', 'noun', 'B1', ('CEFR-J',)),
+    ('march', 'noun', 'B1', ('CEFR-J',)),
+    ('march', 'noun', 'A1', ('NGSL',)),
+    ('apple', 'noun', 'A1', ('CEFR-J',)),
+    ('apple', 'noun', 'A1', ('CEFR-J',)),
+)
+
+
+def test_dedupe_by_word_and_pos():
+    unique, conflicts = dedupe(table(*ROWS))
+
+    assert [(e.word, e.pos, e.cefr_level) for e in unique] == [
+        ('access', 'verb', 'B2'), ('access', 'noun', 'B1'), ('march', 'noun', 'A1'), ('apple', 'noun', 'A1')]
+    assert unique[2].eiken_grade == 'grade_A1'
+    assert unique[2].sources == ('CEFR-J', 'NGSL')
+    assert {c['word']: c['kind'] for c in conflicts} == {'march': 'level', 'apple': 'duplicate'}
+    assert all('merged_pos' not in c for c in conflicts)
+
+
+def test_dedupe_by_word_keeps_lowest_level_row():
+    unique, conflicts = dedupe(table(*ROWS), by_pos=False)
+
+    # vocabulary_master.word は UNIQUE なので 1 語 1 行、pos と級は最も低いレベルの行に従う
+    assert [(e.word, e.pos, e.cefr_level, e.eiken_grade) for e in unique] == [
+        ('access', 'noun', 'B1', 'grade_B1'), ('march', 'noun', 'A1', 'grade_A1'), ('apple', 'noun', 'A1', 'grade_A1')]
+    access = next(c for c in conflicts if c['word'] == 'access')
+    assert access['kind'] == 'level'
+    assert access['levels'] == ['B1', 'B2']
+    assert access['merged_pos'] == ['verb', 'noun']
+
+
+def test_dedupe_by_word_keeps_first_row_on_equal_levels():
+    unique, conflicts = dedupe(table(('about', 'adverb', 'A1', ()), ('about', 'preposition', 'A1', ())),
+                               by_pos=False)
+
+    assert [(e.word, e.pos) for e in unique] == [('about', 'adverb')]
+    assert conflicts[0]['kind'] == 'duplicate'
+    assert conflicts[0]['merged_pos'] == ['adverb', 'preposition']
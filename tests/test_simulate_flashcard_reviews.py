@@ -0,0 +1,31 @@
+"""
+simulate_flashcard_reviews.sm2_update against the scalar SM2Algorithm.updateCard port.
+"""
+
+import pytest
+
+from simulate_flashcard_reviews import INITIAL_INTERVAL, sm2_update, sm2_update_scalar, verify_sm2
+
+
+def test_vectorized_matches_scalar_port():
+    assert verify_sm2(n=5000, seed=3)
+
+
+@pytest.mark.parametrize('quality, response_ms, expected', [
+    # 速い正答は +1、遅い正答は -1 で品質が補正される
+    (4, 250, (2.6, 1, 1)),
+    (4, 3000, (2.36, 1, 1)),
+    (2, None, (2.18, INITIAL_INTERVAL, 0)),
+])
+def test_first_review(quality, response_ms, expected):
+    easiness, interval, repetitions = sm2_update_scalar(2.5, 0, 0, quality, response_ms)
+    assert (round(easiness, 2), interval, repetitions) == expected
+
+
+def test_third_review_uses_easiness_and_multipliers():
+    import numpy as np
+
+    easiness, interval, repetitions = sm2_update(np.array([2.5]), np.array([3.0]), np.array([2]), np.array([5.0]),
+                                                 np.array([800]), np.array([0.8]), np.array([1.0]))
+    # round(3 × 2.6) = 8、年齢補正 0.8 で round(6.4) = 6
+    assert (round(float(easiness[0]), 2), int(interval[0]), int(repetitions[0])) == (2.6, 6, 3)